@@ -0,0 +1,38 @@
+"""Add fingerprint watermark index for incremental arena refresh
+
+Adds:
+- Composite index on molecule_fingerprints (fingerprint_type, updated_at) so
+  the memory-mapped fingerprint arena can fetch rows changed since its
+  watermark without scanning the table
+
+Also merges the upload and ML registry branches into a single head.
+
+Revision ID: d4e5f6g7h8i9
+Revises: c3d4e5f6g7h8, ml_registry_001
+Create Date: 2026-01-24 10:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d4e5f6g7h8i9"
+down_revision: str | Sequence[str] | None = ("c3d4e5f6g7h8", "ml_registry_001")
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    op.create_index(
+        "ix_molecule_fp_type_updated_at",
+        "molecule_fingerprints",
+        ["fingerprint_type", "updated_at"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    op.drop_index("ix_molecule_fp_type_updated_at", table_name="molecule_fingerprints")
@@ -0,0 +1,42 @@
+"""Add upload artifact storage path
+
+Adds:
+- upload_files.artifact_storage_path: location of the columnar side file
+  holding per-row artifacts computed during validation, so insertion can
+  stream them instead of re-parsing and recomputing every molecule
+
+Revision ID: e5f6g7h8i9j0
+Revises: d4e5f6g7h8i9
+Create Date: 2026-01-25 10:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e5f6g7h8i9j0"
+down_revision: str | Sequence[str] | None = "d4e5f6g7h8i9"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    op.add_column(
+        "upload_files",
+        sa.Column(
+            "artifact_storage_path",
+            sa.String(length=500),
+            nullable=True,
+            comment="Computed per-row artifacts from validation, reused by insertion",
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    op.drop_column("upload_files", "artifact_storage_path")
@@ -0,0 +1,107 @@
+"""Pack MACCS and RDKit fingerprints stored as bit strings
+
+Rewrites:
+- molecules.fingerprint_maccs / fingerprint_rdkit rows stored as ASCII
+  "0101..." bit strings (one byte per bit) into the packed format already
+  used by fingerprint_morgan (bit i -> byte i // 8, LSB first)
+
+The backfill is online: rows are found by keyset pagination on the primary
+key and rewritten in small batches, each committed on its own, so no lock is
+held for longer than one batch. Readers accept both formats while it runs
+(packages.chemistry.read_stored_fingerprint). Re-running it is a no-op.
+
+Revision ID: f6g7h8i9j0k1
+Revises: e5f6g7h8i9j0
+Create Date: 2026-01-26 10:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f6g7h8i9j0k1"
+down_revision: str | Sequence[str] | None = "e5f6g7h8i9j0"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Column -> fingerprint length in bits
+FINGERPRINT_COLUMNS = {
+    "fingerprint_maccs": 167,
+    "fingerprint_rdkit": 2048,
+}
+
+BATCH_SIZE = 1000
+
+
+def _pack(bits: bytes) -> bytes:
+    """Pack an ASCII bit string (LSB-first within each byte)."""
+    packed = bytearray((len(bits) + 7) // 8)
+    for i, bit in enumerate(bits):
+        if bit == 0x31:  # "1"
+            packed[i >> 3] |= 1 << (i & 7)
+    return bytes(packed)
+
+
+def _unpack(packed: bytes, num_bits: int) -> bytes:
+    """Inverse of _pack."""
+    return bytes(
+        0x31 if packed[i >> 3] >> (i & 7) & 1 else 0x30
+        for i in range(num_bits)
+    )
+
+
+def _rewrite(column: str, from_length: int, convert) -> None:
+    """Rewrite every row whose column has from_length bytes, batch by batch."""
+    bind = op.get_bind()
+    select_first = sa.text(
+        f"SELECT id, {column} AS fp FROM molecules "
+        f"WHERE length({column}) = :length ORDER BY id LIMIT :limit"
+    )
+    select_next = sa.text(
+        f"SELECT id, {column} AS fp FROM molecules "
+        f"WHERE id > :last_id AND length({column}) = :length ORDER BY id LIMIT :limit"
+    )
+    # The length guard skips rows rewritten concurrently by the application
+    update = sa.text(
+        f"UPDATE molecules SET {column} = :fp "
+        f"WHERE id = :id AND length({column}) = :length"
+    )
+
+    last_id = None
+    while True:
+        params = {"length": from_length, "limit": BATCH_SIZE}
+        if last_id is None:
+            rows = bind.execute(select_first, params).all()
+        else:
+            rows = bind.execute(select_next, {**params, "last_id": last_id}).all()
+        if not rows:
+            return
+        bind.execute(
+            update,
+            [{"id": row.id, "fp": convert(bytes(row.fp)), "length": from_length} for row in rows],
+        )
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    if op.get_context().as_sql:
+        return  # Data backfill needs a live connection
+
+    with op.get_context().autocommit_block():
+        for column, num_bits in FINGERPRINT_COLUMNS.items():
+            _rewrite(column, num_bits, _pack)
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    if op.get_context().as_sql:
+        return
+
+    with op.get_context().autocommit_block():
+        for column, num_bits in FINGERPRINT_COLUMNS.items():
+            _rewrite(column, (num_bits + 7) // 8, lambda fp, n=num_bits: _unpack(fp, n))
@@ -0,0 +1,55 @@
+"""Add generated bit-string fingerprint column for in-database Tanimoto
+
+Adds:
+- molecule_fingerprints.fingerprint_bits: BIT VARYING copy of
+  fingerprint_bytes, generated and stored by PostgreSQL, so similarity can
+  be computed in SQL as bit_count(a & b) (bytea has no bitwise AND)
+- Composite index on (fingerprint_type, num_on_bits) for the popcount
+  window that prunes candidates before scoring
+
+Adding a stored generated column rewrites molecule_fingerprints; run it in
+a maintenance window on large tables.
+
+Revision ID: g7h8i9j0k1l2
+Revises: f6g7h8i9j0k1
+Create Date: 2026-01-27 10:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "g7h8i9j0k1l2"
+down_revision: str | Sequence[str] | None = "f6g7h8i9j0k1"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    op.add_column(
+        "molecule_fingerprints",
+        sa.Column(
+            "fingerprint_bits",
+            postgresql.BIT(varying=True),
+            sa.Computed("('x' || encode(fingerprint_bytes, 'hex'))::bit varying", persisted=True),
+            nullable=True,
+            comment="fingerprint_bytes as BIT VARYING for bit_count(a & b) search (generated)",
+        ),
+    )
+    op.create_index(
+        "ix_molecule_fp_type_on_bits",
+        "molecule_fingerprints",
+        ["fingerprint_type", "num_on_bits"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    op.drop_index("ix_molecule_fp_type_on_bits", table_name="molecule_fingerprints")
+    op.drop_column("molecule_fingerprints", "fingerprint_bits")
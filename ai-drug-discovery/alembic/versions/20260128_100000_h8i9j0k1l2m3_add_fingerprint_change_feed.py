@@ -0,0 +1,170 @@
+"""Add trigger-maintained fingerprint change feed
+
+Adds:
+- fingerprint_changes: one row per fingerprint write or delete, with the
+  writing transaction id so readers can page by visibility horizon
+- Row triggers on molecules (fingerprint_morgan, deleted_at, DELETE) and
+  molecule_fingerprints (INSERT, fingerprint changes, DELETE) that append to it
+- A statement trigger on fingerprint_changes that sends
+  NOTIFY fingerprint_changes; PostgreSQL folds identical notifications, so a
+  100k-row upload transaction wakes listeners once, at commit
+
+Existing rows are not back-filled: consumers take a full snapshot first and
+replay the feed from the horizon recorded with it.
+
+Revision ID: h8i9j0k1l2m3
+Revises: g7h8i9j0k1l2
+Create Date: 2026-01-28 10:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "h8i9j0k1l2m3"
+down_revision: str | Sequence[str] | None = "g7h8i9j0k1l2"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+CHANNEL = "fingerprint_changes"
+
+LOG_MOLECULE_CHANGE = """
+CREATE OR REPLACE FUNCTION log_molecule_fingerprint_change() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO fingerprint_changes (source, fingerprint_type, molecule_id, organization_id, deleted)
+        VALUES ('molecules', 'morgan', OLD.id, OLD.organization_id, true);
+        RETURN OLD;
+    END IF;
+    IF TG_OP = 'UPDATE'
+       AND NEW.fingerprint_morgan IS NOT DISTINCT FROM OLD.fingerprint_morgan
+       AND NEW.deleted_at IS NOT DISTINCT FROM OLD.deleted_at THEN
+        RETURN NEW;
+    END IF;
+    INSERT INTO fingerprint_changes (source, fingerprint_type, molecule_id, organization_id, deleted)
+    VALUES (
+        'molecules', 'morgan', NEW.id, NEW.organization_id,
+        NEW.deleted_at IS NOT NULL OR NEW.fingerprint_morgan IS NULL
+    );
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+LOG_FINGERPRINT_CHANGE = """
+CREATE OR REPLACE FUNCTION log_fingerprint_row_change() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO fingerprint_changes (source, fingerprint_type, molecule_id, deleted)
+        VALUES ('molecule_fingerprints', OLD.fingerprint_type, OLD.molecule_id, true);
+        RETURN OLD;
+    END IF;
+    IF TG_OP = 'UPDATE' THEN
+        IF NEW.molecule_id <> OLD.molecule_id OR NEW.fingerprint_type <> OLD.fingerprint_type THEN
+            -- The old (molecule, type) pair no longer exists
+            INSERT INTO fingerprint_changes (source, fingerprint_type, molecule_id, deleted)
+            VALUES ('molecule_fingerprints', OLD.fingerprint_type, OLD.molecule_id, true);
+        ELSIF NEW.fingerprint_bytes = OLD.fingerprint_bytes THEN
+            RETURN NEW;
+        END IF;
+    END IF;
+    INSERT INTO fingerprint_changes (source, fingerprint_type, molecule_id, deleted)
+    VALUES ('molecule_fingerprints', NEW.fingerprint_type, NEW.molecule_id, false);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+NOTIFY_CHANGE = f"""
+CREATE OR REPLACE FUNCTION notify_fingerprint_changes() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('{CHANNEL}', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    op.create_table(
+        "fingerprint_changes",
+        sa.Column("id", sa.BigInteger(), sa.Identity(), primary_key=True),
+        sa.Column(
+            "source",
+            sa.String(32),
+            nullable=False,
+            comment="molecules or molecule_fingerprints",
+        ),
+        sa.Column("fingerprint_type", sa.String(50), nullable=False),
+        sa.Column("molecule_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column(
+            "organization_id",
+            postgresql.UUID(as_uuid=True),
+            nullable=True,
+            comment="Set for the molecules source",
+        ),
+        sa.Column("deleted", sa.Boolean(), nullable=False, server_default="false"),
+        sa.Column(
+            "txid",
+            sa.BigInteger(),
+            nullable=False,
+            server_default=sa.text("(pg_current_xact_id()::text)::bigint"),
+            comment="Writing transaction id",
+        ),
+        sa.Column(
+            "changed_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+        comment="Trigger-maintained fingerprint change feed",
+    )
+    op.create_index(
+        "ix_fingerprint_changes_source_txid",
+        "fingerprint_changes",
+        ["source", "fingerprint_type", "txid"],
+    )
+    op.create_index(
+        "ix_fingerprint_changes_changed_at",
+        "fingerprint_changes",
+        ["changed_at"],
+    )
+
+    op.execute(LOG_MOLECULE_CHANGE)
+    op.execute(LOG_FINGERPRINT_CHANGE)
+    op.execute(NOTIFY_CHANGE)
+    op.execute(
+        "CREATE TRIGGER trg_molecules_fingerprint_change "
+        "AFTER INSERT OR UPDATE OF fingerprint_morgan, deleted_at OR DELETE ON molecules "
+        "FOR EACH ROW EXECUTE FUNCTION log_molecule_fingerprint_change()"
+    )
+    op.execute(
+        "CREATE TRIGGER trg_molecule_fingerprints_change "
+        "AFTER INSERT OR UPDATE OF fingerprint_bytes, fingerprint_type, molecule_id OR DELETE "
+        "ON molecule_fingerprints "
+        "FOR EACH ROW EXECUTE FUNCTION log_fingerprint_row_change()"
+    )
+    op.execute(
+        "CREATE TRIGGER trg_fingerprint_changes_notify "
+        "AFTER INSERT ON fingerprint_changes "
+        "FOR EACH STATEMENT EXECUTE FUNCTION notify_fingerprint_changes()"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    op.execute("DROP TRIGGER IF EXISTS trg_fingerprint_changes_notify ON fingerprint_changes")
+    op.execute("DROP TRIGGER IF EXISTS trg_molecule_fingerprints_change ON molecule_fingerprints")
+    op.execute("DROP TRIGGER IF EXISTS trg_molecules_fingerprint_change ON molecules")
+    op.execute("DROP FUNCTION IF EXISTS notify_fingerprint_changes()")
+    op.execute("DROP FUNCTION IF EXISTS log_fingerprint_row_change()")
+    op.execute("DROP FUNCTION IF EXISTS log_molecule_fingerprint_change()")
+    op.drop_index("ix_fingerprint_changes_changed_at", table_name="fingerprint_changes")
+    op.drop_index("ix_fingerprint_changes_source_txid", table_name="fingerprint_changes")
+    op.drop_table("fingerprint_changes")
@@ -0,0 +1,45 @@
+"""Add per-code row error counts to upload progress
+
+Adds:
+- upload_progress.error_counts: row errors per error code, kept in memory
+  while an upload runs and stored at each phase boundary, so the error
+  summary is not a GROUP BY over upload_row_errors
+
+Existing uploads keep NULL and are summarized from upload_row_errors.
+
+Revision ID: i9j0k1l2m3n4
+Revises: h8i9j0k1l2m3
+Create Date: 2026-01-29 10:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "i9j0k1l2m3n4"
+down_revision: str | Sequence[str] | None = "h8i9j0k1l2m3"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    op.add_column(
+        "upload_progress",
+        sa.Column(
+            "error_counts",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=True,
+            comment="Row errors per error code, as of the last phase boundary",
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    op.drop_column("upload_progress", "error_counts")
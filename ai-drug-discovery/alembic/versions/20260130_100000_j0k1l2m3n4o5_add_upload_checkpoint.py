@@ -0,0 +1,43 @@
+"""Add resumable checkpoint to upload progress
+
+Adds:
+- upload_progress.checkpoint: rows consumed and running totals, committed
+  with each insert batch so a retried insertion job resumes after the last
+  committed batch instead of starting over
+
+Revision ID: j0k1l2m3n4o5
+Revises: i9j0k1l2m3n4
+Create Date: 2026-01-30 10:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "j0k1l2m3n4o5"
+down_revision: str | Sequence[str] | None = "i9j0k1l2m3n4"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    op.add_column(
+        "upload_progress",
+        sa.Column(
+            "checkpoint",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=True,
+            comment="Rows consumed and running totals as of the last committed batch",
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    op.drop_column("upload_progress", "checkpoint")
@@ -0,0 +1,113 @@
+"""Add upload shards for parallel processing of large uploads
+
+Adds:
+- upload_shards: record-aligned byte (text) or worksheet row (Excel)
+  ranges of a large upload, each validated and inserted by its own worker
+  job, with the shard's counters, artifacts and insertion checkpoint
+
+Revision ID: k1l2m3n4o5p6
+Revises: j0k1l2m3n4o5
+Create Date: 2026-01-31 10:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "k1l2m3n4o5p6"
+down_revision: str | Sequence[str] | None = "j0k1l2m3n4o5"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    op.create_table(
+        "upload_shards",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("upload_id", sa.UUID(), nullable=False),
+        sa.Column(
+            "shard_index",
+            sa.Integer(),
+            nullable=False,
+            comment="0-based position of the shard in the file",
+        ),
+        sa.Column(
+            "start_offset",
+            sa.BigInteger(),
+            nullable=False,
+            comment="First byte (text) or worksheet row (Excel) of the shard",
+        ),
+        sa.Column(
+            "end_offset",
+            sa.BigInteger(),
+            nullable=False,
+            comment="Byte or worksheet row after the shard (exclusive)",
+        ),
+        sa.Column(
+            "row_offset",
+            sa.Integer(),
+            nullable=False,
+            comment="Row number of the last row before the shard",
+        ),
+        sa.Column(
+            "status",
+            sa.Enum("pending", "validated", "inserted", name="shardstatus"),
+            nullable=False,
+        ),
+        sa.Column("total_rows", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("valid_rows", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("invalid_rows", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("duplicate_exact", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("duplicate_similar", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "error_counts",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=True,
+            comment="Row errors per error code recorded by the shard's jobs",
+        ),
+        sa.Column(
+            "artifact_storage_path",
+            sa.String(length=500),
+            nullable=True,
+            comment="Computed per-row artifacts of the shard",
+        ),
+        sa.Column(
+            "checkpoint",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=True,
+            comment="Insertion totals as of the last committed batch",
+        ),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["upload_id"],
+            ["uploads.id"],
+            name="fk_upload_shards_upload_id",
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("upload_id", "shard_index", name="uq_upload_shard_index"),
+        comment="Record-aligned shards of large uploads",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    op.drop_table("upload_shards")
+    op.execute("DROP TYPE IF EXISTS shardstatus")
@@ -63,6 +63,18 @@ class Settings(BaseSettings):
     max_upload_size_mb: int = 100
     max_rows_per_upload: int = 100000
     upload_expiry_hours: int = 24  # Auto-cancel unconfirmed uploads
+    upload_compute_workers: int = 0  # RDKit compute processes per worker; 0 = CPU count
+
+    # Upload Job Scheduling
+    upload_fast_lane_max_rows: int = 5000  # Jobs this small go to the fast lane
+    upload_fast_lane_max_bytes: int = 1024 * 1024  # Used when rows are not known yet
+    upload_org_max_jobs: int = 4  # Concurrent jobs per org while other orgs wait
+    upload_org_weights: dict[str, float] = {}  # Org ID -> fair share weight (default 1)
+
+    # Similarity Search
+    fingerprint_arena_path: str | None = None  # mmap arena dir; None = per-session cache
+    fingerprint_arena_refresh_seconds: int = 30
+    fingerprint_index_memory_mb: int = 2048  # Per-process budget for cached org indexes
 
 
 @lru_cache
@@ -7,6 +7,7 @@ Endpoints:
 - GET /uploads/{id}/errors: List validation errors
 - POST /uploads/{id}/confirm: Confirm and process upload
 - DELETE /uploads/{id}: Cancel upload
+- GET /uploads/queue: Job queue depth and wait times
 """
 
 import uuid
@@ -25,14 +26,18 @@ from fastapi import (
     UploadFile as FastAPIUploadFile,
     status,
 )
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from apps.api.config import get_settings
 from apps.api.uploads.error_codes import UploadErrorCode
 from apps.api.uploads.file_detection import detect_file_type
+from apps.api.uploads.progress import get_progress_redis, merge_progress, read_progress
+from apps.api.uploads.scheduling import read_queue_metrics
 from apps.api.uploads.schemas import (
     ColumnMapping,
     ColumnMappingInfo,
+    QueueLaneResponse,
     RowErrorResponse,
     UploadActionsResponse,
     UploadConfirmRequest,
@@ -42,6 +47,7 @@ from apps.api.uploads.schemas import (
     UploadFileResponse,
     UploadLinksResponse,
     UploadProgressResponse,
+    UploadQueueResponse,
     UploadResponse,
     UploadStatusResponse,
     ResultSummaryResponse,
@@ -219,7 +225,9 @@ async def create_upload(
     if settings.environment == "production":
         # Use ARQ job queue
         from apps.api.uploads.worker import enqueue_validation_job
-        await enqueue_validation_job(upload.id, user["organization_id"])
+        await enqueue_validation_job(
+            upload.id, user["organization_id"], file_size_bytes=len(content)
+        )
     else:
         # Use FastAPI BackgroundTasks for development
         background_tasks.add_task(
@@ -264,6 +272,7 @@ async def get_upload_status(
     upload_id: uuid.UUID,
     service: Annotated[UploadService, Depends(get_upload_service)],
     user: Annotated[dict, Depends(get_current_user)],
+    redis_client: Annotated[Redis, Depends(get_progress_redis)],
 ) -> UploadStatusResponse:
     """Get upload status and progress."""
     upload = await service.get_upload_with_relations(
@@ -275,19 +284,13 @@ async def get_upload_status(
             detail="Upload not found",
         )
 
-    # Build progress response
+    # Build progress response; running jobs publish live counters to Redis
     progress = None
     if upload.progress:
-        progress = UploadProgressResponse(
-            phase=upload.progress.phase,
-            total_rows=upload.progress.total_rows,
-            processed_rows=upload.progress.processed_rows,
-            valid_rows=upload.progress.valid_rows,
-            invalid_rows=upload.progress.invalid_rows,
-            duplicate_exact=upload.progress.duplicate_exact,
-            duplicate_similar=upload.progress.duplicate_similar,
-            percent_complete=upload.progress.percent_complete,
-        )
+        live = None
+        if upload.status in (UploadStatus.VALIDATING, UploadStatus.PROCESSING):
+            live = await read_progress(redis_client, upload.id)
+        progress = UploadProgressResponse(**merge_progress(upload.progress, live))
 
     # Build validation summary for awaiting_confirm
     validation_summary = None
@@ -495,7 +498,11 @@ async def update_column_mapping(
     settings = get_settings()
     if settings.environment == "production":
         from apps.api.uploads.worker import enqueue_validation_job
-        await enqueue_validation_job(upload.id, user["organization_id"])
+        await enqueue_validation_job(
+            upload.id,
+            user["organization_id"],
+            file_size_bytes=upload.file.file_size_bytes if upload.file else None,
+        )
     else:
         background_tasks.add_task(
             run_validation_task,
@@ -638,7 +645,11 @@ async def confirm_upload(
         settings = get_settings()
         if settings.environment == "production":
             from apps.api.uploads.worker import enqueue_validation_job
-            await enqueue_validation_job(upload.id, user["organization_id"])
+            await enqueue_validation_job(
+                upload.id,
+                user["organization_id"],
+                file_size_bytes=upload.file.file_size_bytes if upload.file else None,
+            )
         else:
             background_tasks.add_task(
                 run_validation_task,
@@ -682,7 +693,11 @@ async def confirm_upload(
     settings = get_settings()
     if settings.environment == "production":
         from apps.api.uploads.worker import enqueue_processing_job
-        job_id = await enqueue_processing_job(upload.id, user["organization_id"])
+        job_id = await enqueue_processing_job(
+            upload.id,
+            user["organization_id"],
+            total_rows=upload.progress.valid_rows if upload.progress else None,
+        )
         if not job_id:
             # Failed to enqueue - fall back to background task
             background_tasks.add_task(
@@ -787,6 +802,47 @@ async def cancel_upload(
     await service.cancel_upload(upload)
 
 
+# =============================================================================
+# GET /uploads/queue - Queue Metrics
+# =============================================================================
+
+
+@router.get(
+    "/queue",
+    response_model=UploadQueueResponse,
+    summary="Get upload queue metrics",
+    description="Queue depth and recent wait times of the upload job queues.",
+)
+async def get_upload_queue(
+    user: Annotated[dict, Depends(get_current_user)],
+    redis_client: Annotated[Redis, Depends(get_progress_redis)],
+) -> UploadQueueResponse:
+    """Get job queue metrics, with your organization's share."""
+    metrics = await read_queue_metrics(redis_client)
+    if metrics is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Upload queue metrics are unavailable",
+        )
+
+    org = str(user["organization_id"])
+    return UploadQueueResponse(
+        lanes=[
+            QueueLaneResponse(
+                lane=lane.lane,
+                queued_jobs=lane.queued_jobs,
+                org_queued_jobs=lane.queued_by_org.get(org, 0),
+                wait_p50_seconds=lane.wait_p50_seconds,
+                wait_p95_seconds=lane.wait_p95_seconds,
+                wait_max_seconds=lane.wait_max_seconds,
+            )
+            for lane in metrics.lanes
+        ],
+        org_running_jobs=metrics.running_by_org.get(org, 0),
+        org_max_jobs=get_settings().upload_org_max_jobs,
+    )
+
+
 # =============================================================================
 # GET /uploads - List Uploads (Optional)
 # =============================================================================
@@ -0,0 +1,277 @@
+"""
+Per-row computed artifacts shared between upload validation and insertion.
+
+Validation computes canonical SMILES, InChI/InChIKey, descriptors and
+fingerprints for every row. Instead of re-parsing the file and recomputing
+all of it after the user confirms, validation writes the results to a
+compact columnar side file and insertion streams from it.
+
+File layout::
+
+    MAGIC
+    [uint64 length][npz segment]   one segment per parse batch
+    ...
+
+Each segment holds one numpy array per column (no pickled objects):
+
+- Fixed-width columns: row_number, is_valid, verdict, descriptors (float64,
+  NaN when missing)
+- Variable-length columns (strings, packed fingerprint bytes, raw_data JSON)
+  as a flat uint8 buffer plus int64 offsets and a null mask
+
+Segments written before MACCS/RDKit fingerprints were packed stored them as
+packed ASCII bit strings with a ``<name>.bits`` length column; those are
+still decoded, into the packed format.
+"""
+
+import io
+import json
+import struct
+import tempfile
+from collections.abc import Iterator
+from decimal import Decimal
+from typing import BinaryIO
+
+import numpy as np
+
+from apps.api.uploads.compute import MOLECULE_DESCRIPTOR_COLUMNS, ValidationResult
+from apps.api.uploads.error_codes import UploadErrorCode
+
+ARTIFACT_MAGIC = b"UPLOADARTIFACTS1"
+ARTIFACT_CONTENT_TYPE = "application/octet-stream"
+
+# Spool segments in memory up to this size before spilling to disk
+SPOOL_MAX_BYTES = 16 * 1024 * 1024
+
+# Duplicate verdict codes (None = new molecule)
+VERDICT_CODES = {None: 0, "batch": 1, "exact": 2, "similar": 3}
+VERDICTS = {code: verdict for verdict, code in VERDICT_CODES.items()}
+
+# Descriptor columns stored as integers in the Molecule table
+_INT_DESCRIPTORS = frozenset(
+    {"hbd", "hba", "rotatable_bonds", "num_rings", "num_aromatic_rings", "num_heavy_atoms"}
+)
+
+_STRING_COLUMNS = ("canonical_smiles", "inchi", "inchi_key", "smiles_hash", "error_detail")
+_BYTES_COLUMNS = ("fingerprint_morgan", "fingerprint_maccs", "fingerprint_rdkit")
+
+_LENGTH = struct.Struct("<Q")
+
+
+# =============================================================================
+# Column Encoding
+# =============================================================================
+
+
+def _encode_varlen(values: list[bytes | None]) -> dict[str, np.ndarray]:
+    """Encode variable-length byte strings as buffer + offsets + null mask."""
+    null = np.array([v is None for v in values], dtype=bool)
+    chunks = [v or b"" for v in values]
+    offsets = np.zeros(len(chunks) + 1, dtype=np.int64)
+    np.cumsum([len(c) for c in chunks], out=offsets[1:])
+    data = np.frombuffer(b"".join(chunks), dtype=np.uint8)
+    return {"data": data, "offsets": offsets, "null": null}
+
+
+def _decode_varlen(data: np.ndarray, offsets: np.ndarray, null: np.ndarray) -> list[bytes | None]:
+    buffer = data.tobytes()
+    bounds = offsets.tolist()
+    return [
+        None if null[i] else buffer[bounds[i]:bounds[i + 1]]
+        for i in range(len(null))
+    ]
+
+
+def _repack_legacy_bitstring(value: bytes | None, num_bits: int) -> bytes | None:
+    """Convert a legacy segment's big-endian packed bit string to fingerprint bytes."""
+    if value is None:
+        return None
+    bits = np.unpackbits(np.frombuffer(value, dtype=np.uint8), count=num_bits)
+    return np.packbits(bits, bitorder="little").tobytes()
+
+
+def encode_segment(
+    results: list[ValidationResult],
+    verdicts: list[str | None],
+) -> bytes:
+    """
+    Encode one batch of validation results as an npz segment.
+
+    Args:
+        results: Validation results (RDKit Mol objects are not stored)
+        verdicts: Duplicate verdict per result
+
+    Returns:
+        Serialized segment
+    """
+    columns: dict[str, np.ndarray] = {
+        "row_number": np.array([r.row_number for r in results], dtype=np.int64),
+        "is_valid": np.array([r.is_valid for r in results], dtype=bool),
+        "verdict": np.array([VERDICT_CODES[v] for v in verdicts], dtype=np.int8),
+    }
+
+    for name in _STRING_COLUMNS:
+        values = [getattr(r, name) for r in results]
+        encoded = _encode_varlen([None if v is None else v.encode() for v in values])
+        columns.update({f"{name}.{key}": array for key, array in encoded.items()})
+
+    encoded = _encode_varlen([None if r.error_code is None else r.error_code.value.encode() for r in results])
+    columns.update({f"error_code.{key}": array for key, array in encoded.items()})
+
+    encoded = _encode_varlen([json.dumps(r.raw_data, default=str).encode() for r in results])
+    columns.update({f"raw_data.{key}": array for key, array in encoded.items()})
+
+    for name in _BYTES_COLUMNS:
+        encoded = _encode_varlen([getattr(r, name) for r in results])
+        columns.update({f"{name}.{key}": array for key, array in encoded.items()})
+
+    descriptors = np.full((len(results), len(MOLECULE_DESCRIPTOR_COLUMNS)), np.nan)
+    for i, r in enumerate(results):
+        for j, name in enumerate(MOLECULE_DESCRIPTOR_COLUMNS):
+            value = (r.descriptors or {}).get(name)
+            if value is not None:
+                descriptors[i, j] = float(value)
+    columns["descriptors"] = descriptors
+    columns["descriptors.null"] = np.array([r.descriptors is None for r in results], dtype=bool)
+
+    buffer = io.BytesIO()
+    np.savez(buffer, **columns)
+    return buffer.getvalue()
+
+
+def decode_segment(segment: bytes) -> tuple[list[ValidationResult], list[str | None]]:
+    """
+    Decode an npz segment back into validation results and verdicts.
+
+    Args:
+        segment: Serialized segment from encode_segment
+
+    Returns:
+        Tuple of (results, verdicts); results have mol=None
+    """
+    with np.load(io.BytesIO(segment), allow_pickle=False) as npz:
+        columns = {name: npz[name] for name in npz.files}
+
+    def varlen(name: str) -> list[bytes | None]:
+        return _decode_varlen(columns[f"{name}.data"], columns[f"{name}.offsets"], columns[f"{name}.null"])
+
+    strings = {
+        name: [None if v is None else v.decode() for v in varlen(name)]
+        for name in _STRING_COLUMNS
+    }
+    error_codes = [None if v is None else UploadErrorCode(v.decode()) for v in varlen("error_code")]
+    raw_data = [json.loads(v) for v in varlen("raw_data")]
+    fingerprints = {name: varlen(name) for name in _BYTES_COLUMNS}
+    for name in _BYTES_COLUMNS:
+        if f"{name}.bits" in columns:  # Legacy bit-string segment
+            bits = columns[f"{name}.bits"].tolist()
+            fingerprints[name] = [
+                _repack_legacy_bitstring(v, n)
+                for v, n in zip(fingerprints[name], bits, strict=True)
+            ]
+
+    descriptor_rows = columns["descriptors"].tolist()
+    descriptors_null = columns["descriptors.null"]
+
+    results: list[ValidationResult] = []
+    for i, row_number in enumerate(columns["row_number"].tolist()):
+        descriptors = None
+        if not descriptors_null[i]:
+            descriptors = {}
+            for name, value in zip(MOLECULE_DESCRIPTOR_COLUMNS, descriptor_rows[i], strict=True):
+                if value != value:  # NaN
+                    descriptors[name] = None
+                elif name in _INT_DESCRIPTORS:
+                    descriptors[name] = int(value)
+                else:
+                    descriptors[name] = Decimal(repr(value))
+
+        results.append(ValidationResult(
+            row_number=row_number,
+            is_valid=bool(columns["is_valid"][i]),
+            canonical_smiles=strings["canonical_smiles"][i],
+            inchi=strings["inchi"][i],
+            inchi_key=strings["inchi_key"][i],
+            smiles_hash=strings["smiles_hash"][i],
+            mol=None,
+            error_code=error_codes[i],
+            error_detail=strings["error_detail"][i],
+            raw_data=raw_data[i],
+            fingerprint_morgan=fingerprints["fingerprint_morgan"][i],
+            fingerprint_maccs=fingerprints["fingerprint_maccs"][i],
+            fingerprint_rdkit=fingerprints["fingerprint_rdkit"][i],
+            descriptors=descriptors,
+        ))
+
+    verdicts = [VERDICTS[code] for code in columns["verdict"].tolist()]
+    return results, verdicts
+
+
+# =============================================================================
+# File Reading / Writing
+# =============================================================================
+
+
+class ArtifactWriter:
+    """
+    Accumulates validation batches into an artifact file.
+
+    Segments are spooled in memory and spill to a temporary file once the
+    artifact grows past SPOOL_MAX_BYTES.
+    """
+
+    def __init__(self) -> None:
+        self.file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+        self.file.write(ARTIFACT_MAGIC)
+        self.row_count = 0
+
+    def write_batch(self, results: list[ValidationResult], verdicts: list[str | None]) -> None:
+        """
+        Append one batch of results.
+
+        Args:
+            results: Validation results for the batch
+            verdicts: Duplicate verdict per result
+        """
+        if not results:
+            return
+        segment = encode_segment(results, verdicts)
+        self.file.write(_LENGTH.pack(len(segment)))
+        self.file.write(segment)
+        self.row_count += len(results)
+
+    def getfile(self) -> BinaryIO:
+        """Return the artifact file positioned at the start."""
+        self.file.seek(0)
+        return self.file
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def iter_artifact_batches(
+    file: BinaryIO,
+) -> Iterator[tuple[list[ValidationResult], list[str | None]]]:
+    """
+    Stream batches from an artifact file.
+
+    Args:
+        file: Artifact file positioned at the start
+
+    Yields:
+        Tuple of (results, verdicts) per stored batch
+
+    Raises:
+        ValueError: If the file is not an upload artifact or is truncated
+    """
+    if file.read(len(ARTIFACT_MAGIC)) != ARTIFACT_MAGIC:
+        raise ValueError("Not an upload artifact file")
+
+    while header := file.read(_LENGTH.size):
+        if len(header) != _LENGTH.size:
+            raise ValueError("Truncated upload artifact file")
+        (length,) = _LENGTH.unpack(header)
+        segment = file.read(length)
+        if len(segment) != length:
+            raise ValueError("Truncated upload artifact file")
+        yield decode_segment(segment)
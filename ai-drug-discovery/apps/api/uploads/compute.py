@@ -0,0 +1,466 @@
+"""
+CPU-bound compute stage for upload processing.
+
+RDKit parsing, canonicalization, InChI/InChIKey generation, descriptors and
+fingerprints are pure CPU work. Running them on the event loop blocks every
+other coroutine in the worker and uses a single core, so batches of parsed
+rows are shipped to a ProcessPoolExecutor instead.
+
+Parsing runs ahead of computation: about COMPUTE_TASKS_PER_WORKER chunks
+per pool process are kept in flight, so the pool stays busy while the
+caller checks duplicates and inserts the rows already computed.
+
+Worker processes return compact, picklable ValidationResult tuples (no RDKit
+Mol objects): canonical SMILES, InChI, InChIKey, SMILES hash, descriptors
+and fingerprint bytes, with error codes preserved. Results come back in row
+order.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+from collections import deque
+from collections.abc import AsyncIterator
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import NamedTuple
+
+from apps.api.uploads.error_codes import UploadErrorCode
+
+logger = logging.getLogger(__name__)
+
+# Import chemistry utilities
+try:
+    from rdkit import Chem
+    from rdkit.Chem.inchi import MolToInchi, MolToInchiKey
+
+    from packages.chemistry import calculate_descriptors_rdkit
+    from packages.chemistry.features import FingerprintType, calculate_fingerprint_batch
+    from packages.chemistry.smiles import smiles_to_mol
+
+    RDKIT_AVAILABLE = True
+except ImportError:
+    RDKIT_AVAILABLE = False
+
+# Rows sent to a worker process per task
+COMPUTE_CHUNK_SIZE = 50
+
+# Chunks kept in flight per pool process by compute_batches
+COMPUTE_TASKS_PER_WORKER = 2
+
+# Validation limits
+MAX_SMILES_LENGTH = 2000
+MAX_HEAVY_ATOMS = 1000
+
+# Molecule descriptor columns filled from MolecularDescriptors
+MOLECULE_DESCRIPTOR_COLUMNS = (
+    "molecular_weight",
+    "logp",
+    "hbd",
+    "hba",
+    "tpsa",
+    "rotatable_bonds",
+    "num_rings",
+    "num_aromatic_rings",
+    "num_heavy_atoms",
+    "fraction_sp3",
+)
+
+
+class ParsedRow(NamedTuple):
+    """A parsed row from the upload file."""
+
+    row_number: int
+    smiles: str
+    name: str | None
+    external_id: str | None
+    raw_data: dict
+
+
+class ValidationResult(NamedTuple):
+    """Result of validating a single molecule."""
+
+    row_number: int
+    is_valid: bool
+    canonical_smiles: str | None
+    inchi: str | None
+    inchi_key: str | None
+    smiles_hash: str | None
+    mol: object | None  # RDKit Mol (None when computed in a worker process)
+    error_code: UploadErrorCode | None
+    error_detail: str | None
+    raw_data: dict
+    fingerprint_morgan: bytes | None = None  # Computed once, reused for dedup and insert
+    fingerprint_maccs: bytes | None = None  # Packed bits, like Morgan
+    fingerprint_rdkit: bytes | None = None
+    descriptors: dict | None = None  # Molecule column -> value
+
+
+# =============================================================================
+# Per-row Computation (runs in worker processes)
+# =============================================================================
+
+
+def _invalid(
+    row: ParsedRow,
+    error_code: UploadErrorCode,
+    error_detail: str,
+    canonical_smiles: str | None = None,
+    mol: object | None = None,
+) -> ValidationResult:
+    return ValidationResult(
+        row_number=row.row_number,
+        is_valid=False,
+        canonical_smiles=canonical_smiles,
+        inchi=None,
+        inchi_key=None,
+        smiles_hash=None,
+        mol=mol,
+        error_code=error_code,
+        error_detail=error_detail,
+        raw_data=row.raw_data,
+    )
+
+
+def validate_row(row: ParsedRow) -> ValidationResult:
+    """
+    Validate a single molecule and compute its descriptors and fingerprints.
+
+    Args:
+        row: Parsed row
+
+    Returns:
+        ValidationResult (with the RDKit Mol attached)
+    """
+    return validate_rows([row])[0]
+
+
+def validate_rows(rows: list[ParsedRow]) -> list[ValidationResult]:
+    """
+    Validate rows and compute descriptors and fingerprints for the valid ones.
+
+    Fingerprints are computed for all valid rows at once with the batch
+    fingerprint kernel.
+
+    Args:
+        rows: Parsed rows
+
+    Returns:
+        ValidationResult per row, in input order (with RDKit Mols attached)
+    """
+    results = [_validate_structure(row) for row in rows]
+    if RDKIT_AVAILABLE:
+        results = _add_features(results)
+    return results
+
+
+def _validate_structure(row: ParsedRow) -> ValidationResult:
+    """Parse and identify a single molecule, without descriptors or fingerprints."""
+    if not RDKIT_AVAILABLE:
+        # Minimal validation without RDKit
+        return validate_row_minimal(row)
+
+    smiles = row.smiles
+
+    # Check empty
+    if not smiles:
+        return _invalid(row, UploadErrorCode.MISSING_REQUIRED_FIELD, "SMILES is empty")
+
+    # Check length
+    if len(smiles) > MAX_SMILES_LENGTH:
+        return _invalid(
+            row,
+            UploadErrorCode.SMILES_TOO_LONG,
+            f"SMILES length {len(smiles)} exceeds {MAX_SMILES_LENGTH}",
+        )
+
+    # Parse with RDKit
+    try:
+        mol = smiles_to_mol(smiles)
+        if mol is None:
+            return _invalid(
+                row, UploadErrorCode.INVALID_SMILES, f"Cannot parse SMILES: {smiles[:50]}"
+            )
+    except Exception as e:
+        return _invalid(row, UploadErrorCode.INVALID_SMILES, str(e))
+
+    # Check molecule size
+    num_atoms = mol.GetNumHeavyAtoms()
+    if num_atoms > MAX_HEAVY_ATOMS:
+        return _invalid(
+            row,
+            UploadErrorCode.MOLECULE_TOO_LARGE,
+            f"Molecule has {num_atoms} heavy atoms (max {MAX_HEAVY_ATOMS})",
+            mol=mol,
+        )
+
+    if num_atoms == 0:
+        return _invalid(row, UploadErrorCode.NO_ATOMS, "Molecule has no atoms", mol=mol)
+
+    # Generate canonical SMILES
+    try:
+        canonical = Chem.MolToSmiles(mol, canonical=True)
+    except Exception:
+        canonical = smiles
+
+    # Generate InChI and InChIKey
+    try:
+        inchi = MolToInchi(mol)
+        inchi_key = MolToInchiKey(mol)
+    except Exception as e:
+        return _invalid(
+            row,
+            UploadErrorCode.INCHI_GENERATION_FAILED,
+            str(e),
+            canonical_smiles=canonical,
+            mol=mol,
+        )
+
+    # Generate SMILES hash
+    smiles_hash = hashlib.sha256(canonical.encode()).hexdigest()
+
+    return ValidationResult(
+        row_number=row.row_number,
+        is_valid=True,
+        canonical_smiles=canonical,
+        inchi=inchi,
+        inchi_key=inchi_key,
+        smiles_hash=smiles_hash,
+        mol=mol,
+        error_code=None,
+        error_detail=None,
+        raw_data=row.raw_data,
+    )
+
+
+def _compute_descriptors(mol: object, row_number: int) -> dict | None:
+    """Compute Molecule descriptor columns; None if calculation fails."""
+    try:
+        desc = calculate_descriptors_rdkit(mol)
+    except Exception as e:
+        logger.warning(f"Failed to calculate descriptors for row {row_number}: {e}")
+        return None
+
+    return {
+        "molecular_weight": desc.molecular_weight,
+        "logp": desc.logp,
+        "hbd": desc.hbd,
+        "hba": desc.hba,
+        "tpsa": desc.tpsa,
+        "rotatable_bonds": desc.num_rotatable_bonds,
+        "num_rings": desc.num_rings,
+        "num_aromatic_rings": desc.num_aromatic_rings,
+        "num_heavy_atoms": desc.num_heavy_atoms,
+        "fraction_sp3": desc.fraction_sp3,
+    }
+
+
+def _add_features(results: list[ValidationResult]) -> list[ValidationResult]:
+    """Attach descriptors and fingerprints to valid results; failures leave None."""
+    rows = [i for i, result in enumerate(results) if result.is_valid and result.mol is not None]
+    if not rows:
+        return results
+    mols = [results[i].mol for i in rows]
+
+    # Morgan bytes are shared by duplicate detection and insertion
+    morgan = calculate_fingerprint_batch(mols, FingerprintType.MORGAN)
+    for pos, error in morgan.errors.items():
+        logger.warning(
+            f"Failed to calculate Morgan fingerprint for row {results[rows[pos]].row_number}: {error}"
+        )
+    morgan_bytes = morgan.to_bytes()
+    maccs = calculate_fingerprint_batch(mols, FingerprintType.MACCS).to_bytes()
+    rdkit = calculate_fingerprint_batch(mols, FingerprintType.RDKIT).to_bytes()
+
+    results = list(results)
+    for pos, i in enumerate(rows):
+        results[i] = results[i]._replace(
+            descriptors=_compute_descriptors(results[i].mol, results[i].row_number),
+            fingerprint_morgan=morgan_bytes[pos],
+            fingerprint_maccs=maccs[pos],
+            fingerprint_rdkit=rdkit[pos],
+        )
+    return results
+
+
+def validate_row_minimal(row: ParsedRow) -> ValidationResult:
+    """Minimal validation without RDKit."""
+    smiles = row.smiles
+
+    if not smiles:
+        return _invalid(row, UploadErrorCode.MISSING_REQUIRED_FIELD, "SMILES is empty")
+
+    if len(smiles) > MAX_SMILES_LENGTH:
+        return _invalid(
+            row,
+            UploadErrorCode.SMILES_TOO_LONG,
+            f"SMILES length {len(smiles)} exceeds {MAX_SMILES_LENGTH}",
+        )
+
+    # Generate SMILES hash (use original as canonical without RDKit)
+    smiles_hash = hashlib.sha256(smiles.encode()).hexdigest()
+
+    return ValidationResult(
+        row_number=row.row_number,
+        is_valid=True,
+        canonical_smiles=smiles,
+        inchi=None,
+        inchi_key=f"PLACEHOLDER-{smiles_hash[:27]}",  # Fake InChIKey
+        smiles_hash=smiles_hash,
+        mol=None,
+        error_code=None,
+        error_detail=None,
+        raw_data=row.raw_data,
+    )
+
+
+def compute_rows(rows: list[ParsedRow]) -> list[ValidationResult]:
+    """
+    Validate a chunk of rows. Entry point for worker processes.
+
+    RDKit Mol objects are dropped so results pickle compactly.
+
+    Args:
+        rows: Parsed rows
+
+    Returns:
+        ValidationResult per row, in input order
+    """
+    return [result._replace(mol=None) for result in validate_rows(rows)]
+
+
+# =============================================================================
+# Process Pool
+# =============================================================================
+
+_executor: ProcessPoolExecutor | None = None
+
+
+def get_compute_executor(max_workers: int | None = None) -> ProcessPoolExecutor:
+    """
+    Get the process pool shared by upload jobs in this worker.
+
+    Args:
+        max_workers: Number of processes (default: settings, then CPU count)
+
+    Returns:
+        ProcessPoolExecutor
+    """
+    global _executor
+    if _executor is None:
+        if max_workers is None:
+            from apps.api.config import get_settings
+
+            max_workers = get_settings().upload_compute_workers or os.cpu_count() or 1
+        _executor = ProcessPoolExecutor(max_workers=max_workers)
+        logger.info(f"Started upload compute pool with {max_workers} processes")
+    return _executor
+
+
+def shutdown_compute_executor() -> None:
+    """Shut down the shared process pool, if started."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+
+async def compute_batch(
+    rows: list[ParsedRow],
+    executor: Executor | None = None,
+    chunk_size: int = COMPUTE_CHUNK_SIZE,
+) -> list[ValidationResult]:
+    """
+    Validate a batch of rows, fanning chunks out to an executor.
+
+    Args:
+        rows: Parsed rows
+        executor: Executor to run chunks in; None computes inline on the
+            calling thread
+        chunk_size: Rows per executor task
+
+    Returns:
+        ValidationResult per row, in input order
+    """
+    if executor is None:
+        return validate_rows(rows)
+
+    loop = asyncio.get_running_loop()
+    chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+    chunk_results = await asyncio.gather(
+        *(loop.run_in_executor(executor, compute_rows, chunk) for chunk in chunks)
+    )
+    return [result for chunk in chunk_results for result in chunk]
+
+
+def _compute_window(executor: Executor) -> int:
+    """Chunks to keep in flight on an executor."""
+    workers = getattr(executor, "_max_workers", None) or os.cpu_count() or 1
+    return COMPUTE_TASKS_PER_WORKER * workers
+
+
+async def compute_batches(
+    batches: AsyncIterator[list[ParsedRow]],
+    executor: Executor | None = None,
+    chunk_size: int = COMPUTE_CHUNK_SIZE,
+    max_pending: int | None = None,
+) -> AsyncIterator[list[ValidationResult]]:
+    """
+    Validate a stream of row batches, keeping the executor busy.
+
+    Batches are read ahead and split into chunks of ``chunk_size`` rows
+    until ``max_pending`` chunks are in flight. Each batch's results are
+    yielded as soon as its chunks are done, while later chunks keep
+    computing, so the caller's work on a batch overlaps the next ones.
+
+    Args:
+        batches: Parsed row batches
+        executor: Executor to run chunks in; None computes each batch
+            inline on the calling thread
+        chunk_size: Rows per executor task
+        max_pending: Chunks in flight (default: COMPUTE_TASKS_PER_WORKER
+            per executor worker)
+
+    Yields:
+        ValidationResult per row of each batch, in input order
+    """
+    if executor is None:
+        async for batch in batches:
+            yield validate_rows(batch)
+        return
+
+    loop = asyncio.get_running_loop()
+    limit = max_pending or _compute_window(executor)
+    sizes: deque[int] = deque()  # Rows of the batches not yet yielded
+    queued: deque[list[ParsedRow]] = deque()  # Chunks not yet submitted
+    running: deque[asyncio.Future] = deque()  # Submitted chunks, in row order
+    results: list[ValidationResult] = []  # Finished rows not yet yielded
+    exhausted = False
+
+    try:
+        while True:
+            # Fill the window, parsing ahead as needed
+            while len(running) < limit:
+                if queued:
+                    running.append(loop.run_in_executor(executor, compute_rows, queued.popleft()))
+                    continue
+                if exhausted:
+                    break
+                batch = await anext(batches, None)
+                if batch is None:
+                    exhausted = True
+                    continue
+                sizes.append(len(batch))
+                queued.extend(batch[i:i + chunk_size] for i in range(0, len(batch), chunk_size))
+
+            if not sizes:
+                return
+            if len(results) >= sizes[0]:
+                size = sizes.popleft()
+                yield results[:size]
+                results = results[size:]
+                continue
+            results.extend(await running.popleft())
+    finally:
+        for future in running:
+            future.cancel()
@@ -7,8 +7,9 @@ Provides:
 
 For MVP performance:
 - Batch InChIKey lookups
-- Candidate filtering by molecular formula for similarity search
+- Candidate filtering by molecular formula for single-molecule similarity search
 - Configurable sample size for large databases
+- Blocked many-vs-many similarity join for batch similarity search
 """
 
 import logging
@@ -17,13 +18,17 @@ from dataclasses import dataclass
 from decimal import Decimal
 from typing import Sequence
 
-from sqlalchemy import func, select
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from apps.api.uploads.fingerprint_scan import iter_fingerprint_chunks
 from db.models.discovery import Molecule
 
 logger = logging.getLogger(__name__)
 
+# Corpus rows fetched and scored per block in batch similarity search
+SIMILARITY_BLOCK_SIZE = 5000
+
 
 # =============================================================================
 # Data Classes
@@ -180,8 +185,12 @@ async def find_similar_duplicates(
 
     For MVP performance, uses candidate filtering:
     1. If molecular_formula provided, only compare against same formula
-    2. Otherwise, sample up to max_candidates molecules
-    3. Calculate Tanimoto similarity and return matches above threshold
+    2. Only candidates whose popcount can reach the threshold are read
+    3. Otherwise, sample up to max_candidates molecules
+    4. Calculate Tanimoto similarity and return matches above threshold
+
+    Candidates are streamed as (id, InChIKey, name, fingerprint) chunks
+    rather than loaded as Molecule entities.
 
     Args:
         db: Database session
@@ -195,53 +204,30 @@ async def find_similar_duplicates(
     Returns:
         List of SimilarDuplicate results, sorted by similarity descending
     """
-    from packages.chemistry import tanimoto_similarity_bytes
-
-    # Build candidate query
-    base_query = select(Molecule).where(
-        Molecule.organization_id == organization_id,
-        Molecule.fingerprint_morgan.isnot(None),
-        Molecule.deleted_at.is_(None),
-    )
-
-    # Filter by molecular formula if provided (faster candidate set)
-    if molecular_formula:
-        base_query = base_query.where(
-            Molecule.molecular_formula == molecular_formula
-        )
-
-    # Limit candidates for performance
-    base_query = base_query.limit(max_candidates)
+    from packages.chemistry.similarity_engine import popcount_bounds, popcount_bytes
 
-    result = await db.execute(base_query)
-    candidates = result.scalars().all()
+    low, high = popcount_bounds(popcount_bytes(fingerprint_bytes), threshold)
 
-    if not candidates:
-        return []
-
-    # Calculate similarities
     similar: list[SimilarDuplicate] = []
-    for mol in candidates:
-        if not mol.fingerprint_morgan:
-            continue
-
-        try:
-            similarity = tanimoto_similarity_bytes(
-                fingerprint_bytes,
-                mol.fingerprint_morgan,
-            )
-            if similarity >= threshold:
-                similar.append(SimilarDuplicate(
-                    inchi_key="",  # Will be set by caller
-                    similar_molecule_id=mol.id,
-                    similar_molecule_inchi_key=mol.inchi_key,
-                    similar_molecule_name=mol.name,
-                    similarity_score=similarity,
-                    molecular_formula=molecular_formula,
-                ))
-        except Exception as e:
-            logger.warning(f"Failed to calculate similarity for molecule {mol.id}: {e}")
-            continue
+    async for chunk in iter_fingerprint_chunks(
+        db,
+        organization_id,
+        num_bytes=len(fingerprint_bytes),
+        min_popcount=low,
+        max_popcount=high,
+        molecular_formula=molecular_formula,
+        include_names=True,
+        limit=max_candidates,
+    ):
+        for idx, similarity in chunk.matrix.search(fingerprint_bytes, threshold=threshold):
+            similar.append(SimilarDuplicate(
+                inchi_key="",  # Will be set by caller
+                similar_molecule_id=chunk.ids[idx],
+                similar_molecule_inchi_key=chunk.inchi_keys[idx],
+                similar_molecule_name=chunk.names[idx],
+                similarity_score=similarity,
+                molecular_formula=molecular_formula,
+            ))
 
     # Sort by similarity descending and limit
     similar.sort(key=lambda x: x.similarity_score, reverse=True)
@@ -253,83 +239,76 @@ async def find_similar_duplicates_batch(
     organization_id: uuid.UUID,
     molecules: list[tuple[str, bytes, str | None]],  # (inchi_key, fingerprint, formula)
     threshold: float = 0.95,
-    max_candidates_per_formula: int = 500,
+    limit_per_molecule: int = 10,
 ) -> dict[str, list[SimilarDuplicate]]:
     """
     Find similar duplicates for a batch of molecules.
 
-    Optimizes by grouping queries by molecular formula.
+    Runs a blocked many-vs-many similarity join of the whole batch against
+    the organization's corpus: each corpus block is fetched (id, InChIKey,
+    name and fingerprint only) and scored against every query at once.
+    Every molecule in the organization is considered; only rows whose
+    popcount can reach the threshold for some query are fetched.
 
     Args:
         db: Database session
         organization_id: Organization to search within
         molecules: List of (inchi_key, fingerprint_bytes, molecular_formula) tuples
         threshold: Tanimoto similarity threshold
-        max_candidates_per_formula: Max candidates per formula group
+        limit_per_molecule: Maximum matches kept per query molecule
 
     Returns:
         Dict mapping InChIKey -> list of SimilarDuplicate
     """
-    from packages.chemistry import tanimoto_similarity_bytes
+    from packages.chemistry.similarity_engine import (
+        FingerprintMatrix,
+        popcount_bounds,
+        similarity_join,
+    )
 
     results: dict[str, list[SimilarDuplicate]] = {}
 
-    # Group molecules by formula for efficient querying
-    formula_groups: dict[str | None, list[tuple[str, bytes]]] = {}
+    # Fingerprints of different lengths are not comparable; join per length
+    length_groups: dict[int, list[tuple[str, bytes, str | None]]] = {}
     for inchi_key, fp_bytes, formula in molecules:
-        if formula not in formula_groups:
-            formula_groups[formula] = []
-        formula_groups[formula].append((inchi_key, fp_bytes))
-
-    # Process each formula group
-    for formula, group_molecules in formula_groups.items():
-        # Get candidates for this formula
-        base_query = select(Molecule).where(
-            Molecule.organization_id == organization_id,
-            Molecule.fingerprint_morgan.isnot(None),
-            Molecule.deleted_at.is_(None),
-        )
-
-        if formula:
-            base_query = base_query.where(Molecule.molecular_formula == formula)
-
-        base_query = base_query.limit(max_candidates_per_formula)
+        if fp_bytes:
+            length_groups.setdefault(len(fp_bytes), []).append((inchi_key, fp_bytes, formula))
 
-        result = await db.execute(base_query)
-        candidates = result.scalars().all()
+    for num_bytes, group in length_groups.items():
+        queries = FingerprintMatrix.from_bytes([fp for _, fp, _ in group], num_bytes)
+        bounds = [popcount_bounds(int(pc), threshold) for pc in queries.popcounts]
+        low = min(b[0] for b in bounds)
+        high = max(b[1] for b in bounds)
 
-        if not candidates:
-            continue
-
-        # Check each molecule in group against candidates
-        for inchi_key, fp_bytes in group_molecules:
-            similar: list[SimilarDuplicate] = []
-
-            for candidate in candidates:
+        matches: dict[int, list[SimilarDuplicate]] = {}
+        async for chunk in iter_fingerprint_chunks(
+            db,
+            organization_id,
+            num_bytes=num_bytes,
+            min_popcount=low,
+            max_popcount=high,
+            include_names=True,
+            chunk_size=SIMILARITY_BLOCK_SIZE,
+        ):
+            for query_idx, target_idx, similarity in similarity_join(
+                queries, chunk.matrix, threshold
+            ):
+                inchi_key, _, formula = group[query_idx]
                 # Skip self-comparison
-                if candidate.inchi_key == inchi_key:
-                    continue
-
-                if not candidate.fingerprint_morgan:
-                    continue
-
-                try:
-                    similarity = tanimoto_similarity_bytes(fp_bytes, candidate.fingerprint_morgan)
-                    if similarity >= threshold:
-                        similar.append(SimilarDuplicate(
-                            inchi_key=inchi_key,
-                            similar_molecule_id=candidate.id,
-                            similar_molecule_inchi_key=candidate.inchi_key,
-                            similar_molecule_name=candidate.name,
-                            similarity_score=similarity,
-                            molecular_formula=formula,
-                        ))
-                except Exception:
+                if chunk.inchi_keys[target_idx] == inchi_key:
                     continue
+                matches.setdefault(query_idx, []).append(SimilarDuplicate(
+                    inchi_key=inchi_key,
+                    similar_molecule_id=chunk.ids[target_idx],
+                    similar_molecule_inchi_key=chunk.inchi_keys[target_idx],
+                    similar_molecule_name=chunk.names[target_idx],
+                    similarity_score=similarity,
+                    molecular_formula=formula,
+                ))
 
-            if similar:
-                similar.sort(key=lambda x: x.similarity_score, reverse=True)
-                results[inchi_key] = similar[:10]  # Top 10 per molecule
+        for query_idx, similar in matches.items():
+            similar.sort(key=lambda x: x.similarity_score, reverse=True)
+            results[group[query_idx][0]] = similar[:limit_per_molecule]
 
     return results
 
@@ -0,0 +1,191 @@
+"""
+Buffered writer for upload row errors.
+
+A bad vendor file can produce hundreds of thousands of row errors. Adding
+one UploadRowError ORM object per row makes the session track every error
+and flush it through executemany. UploadErrorSink instead keeps each error
+as a plain tuple, truncates ``raw_data`` once when the error is added, and
+writes the buffer with COPY in large chunks: whenever ``chunk_rows`` errors
+are pending, and once more when the phase ends.
+
+Per-code counts are kept in memory for the whole run, so the error summary
+needs no GROUP BY over ``upload_row_errors``. They are stored on
+UploadProgress.error_counts at each phase boundary.
+
+Usage:
+    sink = UploadErrorSink(db, upload.id)
+    await sink.add(row_number, UploadErrorCode.INVALID_SMILES, "Cannot parse SMILES")
+    ...
+    await sink.flush()
+    upload.progress.error_counts = sink.counts
+"""
+
+import json
+import logging
+import uuid
+from collections import Counter
+from collections.abc import Mapping
+from decimal import Decimal
+from typing import Any
+
+from sqlalchemy import insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from apps.api.uploads.error_codes import UploadErrorCode
+from db.models.upload import UploadRowError
+
+logger = logging.getLogger(__name__)
+
+# Longest string value kept per raw_data field
+RAW_VALUE_MAX_LENGTH = 100
+
+# Columns written per error; created_at/updated_at take their server defaults
+COPY_COLUMNS = (
+    "id",
+    "upload_id",
+    "row_number",
+    "error_code",
+    "error_message",
+    "raw_data",
+    "field_name",
+    "duplicate_inchi_key",
+    "duplicate_similarity",
+)
+
+
+def truncate_raw_data(raw_data: Mapping[str, Any] | None) -> dict[str, Any] | None:
+    """
+    Truncate long string values of a row kept for debugging.
+
+    Args:
+        raw_data: Row data as parsed
+
+    Returns:
+        Row data with strings cut to RAW_VALUE_MAX_LENGTH, or None if empty
+    """
+    if not raw_data:
+        return None
+    return {
+        k: (
+            v[:RAW_VALUE_MAX_LENGTH] + "..."
+            if isinstance(v, str) and len(v) > RAW_VALUE_MAX_LENGTH
+            else v
+        )
+        for k, v in raw_data.items()
+    }
+
+
+class UploadErrorSink:
+    """
+    Buffers an upload's row errors and writes them with COPY.
+
+    Not shared between sessions: writes go through the session's connection
+    and are committed with its transaction.
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        upload_id: uuid.UUID,
+        chunk_rows: int = 10_000,
+        counts: Mapping[str, int] | None = None,
+    ):
+        """
+        Initialize an empty sink.
+
+        Args:
+            db: Async database session
+            upload_id: Upload the errors belong to
+            chunk_rows: Pending errors that trigger a write
+            counts: Per-code counts already recorded by an earlier phase
+        """
+        self.db = db
+        self.upload_id = upload_id
+        self.chunk_rows = chunk_rows
+        self.written = 0
+        self._counts: Counter[str] = Counter(counts or {})
+        self._buffer: list[tuple] = []
+
+    def __len__(self) -> int:
+        """Number of errors not yet written."""
+        return len(self._buffer)
+
+    @property
+    def counts(self) -> dict[str, int]:
+        """Errors recorded per error code, written or not."""
+        return dict(self._counts)
+
+    async def add(
+        self,
+        row_number: int,
+        error_code: UploadErrorCode | str,
+        error_message: str,
+        raw_data: Mapping[str, Any] | None = None,
+        field_name: str | None = None,
+        duplicate_inchi_key: str | None = None,
+        duplicate_similarity: Decimal | None = None,
+    ) -> None:
+        """
+        Record a row error, writing the buffer if it is full.
+
+        Args:
+            row_number: 1-based row number
+            error_code: Structured error code
+            error_message: Human-readable message
+            raw_data: Row data for debugging (truncated here)
+            field_name: Field that caused the error
+            duplicate_inchi_key: InChIKey of the duplicate
+            duplicate_similarity: Similarity score
+        """
+        code = error_code.value if isinstance(error_code, UploadErrorCode) else error_code
+        self._buffer.append((
+            row_number,
+            code,
+            error_message,
+            truncate_raw_data(raw_data),
+            field_name,
+            duplicate_inchi_key,
+            duplicate_similarity,
+        ))
+        self._counts[code] += 1
+        if len(self._buffer) >= self.chunk_rows:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write all pending errors in the session's transaction."""
+        if not self._buffer:
+            return
+        pending, self._buffer = self._buffer, []
+
+        connection = await self.db.connection()
+        raw = await connection.get_raw_connection()
+        driver = raw.driver_connection
+        if hasattr(driver, "copy_records_to_table"):
+            if not driver.is_in_transaction():
+                # The adapter sends BEGIN with its first statement; COPY goes
+                # around it and would otherwise commit on its own
+                await connection.execute(select(literal(1)))
+            # asyncpg: the JSONB codec takes serialized text
+            await driver.copy_records_to_table(
+                UploadRowError.__tablename__,
+                records=[
+                    (uuid.uuid4(), self.upload_id, row_number, code, message,
+                     json.dumps(raw_data) if raw_data is not None else None, *rest)
+                    for row_number, code, message, raw_data, *rest in pending
+                ],
+                columns=COPY_COLUMNS,
+            )
+        else:
+            await connection.execute(
+                insert(UploadRowError.__table__),
+                [
+                    dict(zip(COPY_COLUMNS, (uuid.uuid4(), self.upload_id, *error), strict=True))
+                    for error in pending
+                ],
+            )
+        self.written += len(pending)
+        logger.debug(f"Wrote {len(pending)} row errors for upload {self.upload_id}")
+
+    def discard(self) -> None:
+        """Drop pending errors, e.g. after the transaction failed."""
+        self._buffer.clear()
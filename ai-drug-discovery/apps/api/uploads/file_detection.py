@@ -282,12 +282,12 @@ def detect_csv_columns(content: bytes) -> list[str]:
     return []
 
 
-def detect_excel_columns(content: bytes) -> list[str]:
+def detect_excel_columns(content: bytes | BinaryIO) -> list[str]:
     """
     Detect column names from Excel content.
 
     Args:
-        content: Excel file content
+        content: Excel file content, or a seekable file holding it
 
     Returns:
         List of column names from header row
@@ -296,7 +296,8 @@ def detect_excel_columns(content: bytes) -> list[str]:
         import openpyxl
         from io import BytesIO
 
-        wb = openpyxl.load_workbook(BytesIO(content), read_only=True)
+        source = BytesIO(content) if isinstance(content, bytes) else content
+        wb = openpyxl.load_workbook(source, read_only=True)
         ws = wb.active
         if ws:
             # Get first row as headers
@@ -0,0 +1,195 @@
+"""
+Narrow, streamed reads of an organization's Morgan fingerprints.
+
+Similarity scans only need each molecule's id, InChIKey (sometimes its name)
+and Morgan fingerprint. Selecting ``Molecule`` entities for that loads InChI
+text, JSONB metadata, synonym arrays and every fingerprint column, and builds
+an ORM object per row. The helpers here select just the needed columns,
+stream them from a server-side cursor in large chunks and pack each chunk's
+fingerprints straight into a FingerprintMatrix.
+"""
+
+import uuid
+from collections.abc import AsyncIterator, Sequence
+from dataclasses import dataclass
+
+from sqlalchemy import Select, and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.models.discovery import Molecule, MoleculeFingerprint
+from packages.chemistry.similarity_engine import FingerprintMatrix
+
+# Rows fetched per round trip from the server-side cursor
+FINGERPRINT_SCAN_CHUNK_SIZE = 10_000
+
+
+@dataclass(frozen=True, eq=False)
+class FingerprintChunk:
+    """One streamed block of fingerprints and the rows they belong to."""
+
+    ids: list[uuid.UUID]
+    inchi_keys: list[str]
+    names: list[str | None] | None  # None unless names were requested
+    matrix: FingerprintMatrix  # Row i is the fingerprint of ids[i]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def fingerprint_scan_statement(
+    organization_id: uuid.UUID,
+    num_bytes: int | None = None,
+    min_popcount: int = 0,
+    max_popcount: float | None = None,
+    molecular_formula: str | None = None,
+    include_names: bool = False,
+    limit: int | None = None,
+) -> Select:
+    """
+    Build the narrow fingerprint projection for an organization.
+
+    Args:
+        organization_id: Organization to scan
+        num_bytes: Only fingerprints of this length (None = any length)
+        min_popcount: Minimum number of set bits
+        max_popcount: Maximum number of set bits (None or inf = no bound)
+        molecular_formula: Only molecules with this formula
+        include_names: Also select molecule names
+        limit: Maximum rows
+
+    Returns:
+        SELECT of (id, inchi_key, [name,] fingerprint_morgan)
+    """
+    columns = [Molecule.id, Molecule.inchi_key]
+    if include_names:
+        columns.append(Molecule.name)
+    columns.append(Molecule.fingerprint_morgan)
+
+    stmt = select(*columns).where(
+        Molecule.organization_id == organization_id,
+        Molecule.fingerprint_morgan.isnot(None),
+        Molecule.deleted_at.is_(None),
+    )
+    if num_bytes is not None:
+        stmt = stmt.where(func.length(Molecule.fingerprint_morgan) == num_bytes)
+
+    popcount = func.bit_count(Molecule.fingerprint_morgan)
+    if min_popcount > 0:
+        stmt = stmt.where(popcount >= min_popcount)
+    if max_popcount is not None and max_popcount != float("inf"):
+        stmt = stmt.where(popcount <= max_popcount)
+
+    if molecular_formula:
+        stmt = stmt.where(Molecule.molecular_formula == molecular_formula)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def fingerprint_type_scan_statement(
+    organization_id: uuid.UUID,
+    fingerprint_type: str = "morgan",
+) -> Select:
+    """
+    Build the (id, inchi_key, fingerprint) projection for one fingerprint type.
+
+    Morgan fingerprints come from ``molecules.fingerprint_morgan``; other
+    types from ``molecule_fingerprints``.
+
+    Args:
+        organization_id: Organization to scan
+        fingerprint_type: Fingerprint type
+
+    Returns:
+        SELECT of (id, inchi_key, fingerprint) for live molecules
+    """
+    if fingerprint_type == "morgan":
+        return fingerprint_scan_statement(organization_id).with_only_columns(
+            Molecule.id,
+            Molecule.inchi_key,
+            Molecule.fingerprint_morgan.label("fingerprint"),
+        )
+
+    return (
+        select(
+            Molecule.id,
+            Molecule.inchi_key,
+            MoleculeFingerprint.fingerprint_bytes.label("fingerprint"),
+        )
+        .join(
+            MoleculeFingerprint,
+            and_(
+                MoleculeFingerprint.molecule_id == Molecule.id,
+                MoleculeFingerprint.fingerprint_type == fingerprint_type,
+            ),
+        )
+        .where(
+            Molecule.organization_id == organization_id,
+            Molecule.deleted_at.is_(None),
+        )
+    )
+
+
+def pack_chunk(rows: Sequence, num_bytes: int, include_names: bool = False) -> FingerprintChunk:
+    """
+    Pack rows of a fingerprint projection into a FingerprintChunk.
+
+    Args:
+        rows: Rows with id, inchi_key, fingerprint_morgan (and name)
+        num_bytes: Fingerprint length shared by all rows
+        include_names: Rows carry a name column
+
+    Returns:
+        FingerprintChunk over the rows
+    """
+    return FingerprintChunk(
+        ids=[row.id for row in rows],
+        inchi_keys=[row.inchi_key for row in rows],
+        names=[row.name for row in rows] if include_names else None,
+        matrix=FingerprintMatrix.from_bytes(
+            [row.fingerprint_morgan for row in rows], num_bytes
+        ),
+    )
+
+
+async def iter_fingerprint_chunks(
+    db: AsyncSession,
+    organization_id: uuid.UUID,
+    num_bytes: int,
+    min_popcount: int = 0,
+    max_popcount: float | None = None,
+    molecular_formula: str | None = None,
+    include_names: bool = False,
+    limit: int | None = None,
+    chunk_size: int = FINGERPRINT_SCAN_CHUNK_SIZE,
+) -> AsyncIterator[FingerprintChunk]:
+    """
+    Stream an organization's fingerprints of one length in packed chunks.
+
+    Args:
+        db: Database session
+        organization_id: Organization to scan
+        num_bytes: Fingerprint length in bytes
+        min_popcount: Minimum number of set bits
+        max_popcount: Maximum number of set bits (None or inf = no bound)
+        molecular_formula: Only molecules with this formula
+        include_names: Also fetch molecule names
+        limit: Maximum rows in total
+        chunk_size: Rows per chunk
+
+    Yields:
+        Non-empty FingerprintChunk blocks
+    """
+    stmt = fingerprint_scan_statement(
+        organization_id,
+        num_bytes=num_bytes,
+        min_popcount=min_popcount,
+        max_popcount=max_popcount,
+        molecular_formula=molecular_formula,
+        include_names=include_names,
+        limit=limit,
+    )
+    stream = await db.stream(stmt.execution_options(yield_per=chunk_size))
+    async for rows in stream.partitions():
+        if rows:
+            yield pack_chunk(rows, num_bytes, include_names)
@@ -0,0 +1,248 @@
+"""
+Write-behind progress reporting for upload jobs.
+
+Live row counters are published to a Redis hash per upload instead of being
+committed to ``upload_progress`` every few rows. Publishes are coalesced in
+time (at most one per ``min_interval`` seconds), so a fast job costs a
+handful of Redis round trips and no extra transactions. UploadProgress is
+only written at phase boundaries and on completion, by the UploadService
+state transitions that commit anyway.
+
+Shards of one upload run as separate jobs and add their rows to the same
+hash with ``increment`` (HINCRBY) instead of overwriting it.
+
+The status endpoint overlays the Redis hash on the stored row while an
+upload is validating or processing. Progress is advisory: if Redis is
+unreachable, publishing is skipped and readers fall back to the database.
+
+Usage:
+    reporter = ProgressReporter(redis_client, upload.id)
+    await reporter.update(processed_rows=100, phase="validating")
+    ...
+    await reporter.clear()  # once UploadProgress holds the final counters
+"""
+
+import logging
+import time
+import uuid
+from collections.abc import Callable, Mapping
+from typing import Any
+
+from redis.asyncio import Redis, from_url
+from redis.exceptions import RedisError
+
+from apps.api.config import get_settings
+from db.models.upload import UploadProgress
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_KEY_PREFIX = "upload:progress:"
+
+# Live progress outlives any job; stale hashes of crashed jobs expire
+PROGRESS_TTL_SECONDS = 24 * 60 * 60
+
+PROGRESS_COUNTERS = (
+    "total_rows",
+    "processed_rows",
+    "valid_rows",
+    "invalid_rows",
+    "duplicate_exact",
+    "duplicate_similar",
+)
+
+
+def progress_key(upload_id: uuid.UUID) -> str:
+    """Redis key of an upload's live progress hash."""
+    return f"{PROGRESS_KEY_PREFIX}{upload_id}"
+
+
+class ProgressReporter:
+    """
+    Coalescing publisher of one upload's live progress.
+
+    Counters passed to ``update`` are merged into a pending snapshot that is
+    written to Redis when ``min_interval`` seconds have passed since the
+    last write. Counters left pending at the end of a phase are superseded
+    by the database row the phase boundary commits. Deltas passed to
+    ``increment`` are summed the same way and added to the stored values.
+    """
+
+    def __init__(
+        self,
+        redis_client: Redis | None,
+        upload_id: uuid.UUID,
+        min_interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        replace: bool = True,
+    ):
+        """
+        Initialize a reporter.
+
+        Args:
+            redis_client: Async Redis client; None disables publishing
+            upload_id: Upload being reported
+            min_interval: Minimum seconds between Redis writes
+            clock: Monotonic time source
+            replace: Whether the first write replaces the hash left by a
+                previous job; False adds to it (shard jobs)
+        """
+        self.redis = redis_client
+        self.key = progress_key(upload_id)
+        self.min_interval = min_interval
+        self.clock = clock
+        self.publishes = 0
+        self._pending: dict[str, int | str] = {}
+        self._deltas: dict[str, int] = {}
+        self._last_publish: float | None = None
+        self._reset = replace
+
+    async def update(self, phase: str | None = None, **counters: int) -> None:
+        """
+        Record the latest counters, publishing if the interval has elapsed.
+
+        Args:
+            phase: Current phase name
+            **counters: Any of PROGRESS_COUNTERS
+        """
+        _check_counters(counters)
+        self._pending.update(counters)
+        if phase is not None:
+            self._pending["phase"] = phase
+        await self._maybe_publish()
+
+    async def increment(self, **counters: int) -> None:
+        """
+        Add to counters shared with other jobs, publishing when due.
+
+        Args:
+            **counters: Deltas for any of PROGRESS_COUNTERS
+        """
+        _check_counters(counters)
+        for field, delta in counters.items():
+            self._deltas[field] = self._deltas.get(field, 0) + delta
+        await self._maybe_publish()
+
+    async def flush(self) -> None:
+        """Publish pending counters now, e.g. before a job ends."""
+        await self._publish(self.clock())
+
+    async def clear(self) -> None:
+        """Drop the live hash once the database holds the final counters."""
+        self._pending.clear()
+        self._deltas.clear()
+        if self.redis is None:
+            return
+        try:
+            await self.redis.delete(self.key)
+        except RedisError as e:
+            logger.warning(f"Failed to clear live progress {self.key}: {e}")
+
+    async def _maybe_publish(self) -> None:
+        now = self.clock()
+        if self._last_publish is None or now - self._last_publish >= self.min_interval:
+            await self._publish(now)
+
+    async def _publish(self, now: float) -> None:
+        self._last_publish = now
+        if self.redis is None or not (self._pending or self._deltas):
+            return
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                if self._reset:
+                    pipe.delete(self.key)
+                if self._pending:
+                    pipe.hset(self.key, mapping=self._pending)
+                for field, delta in self._deltas.items():
+                    pipe.hincrby(self.key, field, delta)
+                pipe.expire(self.key, PROGRESS_TTL_SECONDS)
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Failed to publish live progress {self.key}: {e}")
+            return
+        self._reset = False
+        self._pending = {}
+        self._deltas = {}
+        self.publishes += 1
+
+
+def _check_counters(counters: Mapping[str, int]) -> None:
+    unknown = set(counters) - set(PROGRESS_COUNTERS)
+    if unknown:
+        raise ValueError(f"Unknown progress counters: {sorted(unknown)}")
+
+
+async def read_progress(
+    redis_client: Redis | None,
+    upload_id: uuid.UUID,
+) -> dict[str, int | str] | None:
+    """
+    Read an upload's live progress.
+
+    Args:
+        redis_client: Async Redis client
+        upload_id: Upload ID
+
+    Returns:
+        Published counters and phase, or None if none are live or Redis is
+        unreachable
+    """
+    if redis_client is None:
+        return None
+    try:
+        raw = await redis_client.hgetall(progress_key(upload_id))
+    except RedisError as e:
+        logger.debug(f"Live progress unavailable for upload {upload_id}: {e}")
+        return None
+    if not raw:
+        return None
+
+    live: dict[str, int | str] = {}
+    for field, value in raw.items():
+        field = field.decode() if isinstance(field, bytes) else field
+        value = value.decode() if isinstance(value, bytes) else value
+        if field in PROGRESS_COUNTERS:
+            live[field] = int(value)
+        elif field == "phase":
+            live[field] = value
+    return live
+
+
+def merge_progress(
+    stored: UploadProgress,
+    live: Mapping[str, int | str] | None,
+) -> dict[str, Any]:
+    """
+    Overlay live counters on the stored progress row.
+
+    Args:
+        stored: Progress row as of the last phase boundary
+        live: Counters from read_progress
+
+    Returns:
+        Fields of UploadProgressResponse
+    """
+    live = live or {}
+    merged: dict[str, Any] = {
+        field: live.get(field, getattr(stored, field)) for field in PROGRESS_COUNTERS
+    }
+    merged["phase"] = live.get("phase", stored.phase)
+    total = merged["total_rows"]
+    merged["percent_complete"] = (
+        round(merged["processed_rows"] / total * 100, 1) if total else 0.0
+    )
+    return merged
+
+
+_progress_redis: Redis | None = None
+
+
+def get_progress_redis() -> Redis:
+    """Get the shared async Redis client for live progress."""
+    global _progress_redis
+    if _progress_redis is None:
+        _progress_redis = from_url(
+            get_settings().redis_url,
+            socket_timeout=1,
+            socket_connect_timeout=1,
+        )
+    return _progress_redis
@@ -0,0 +1,387 @@
+"""
+Fair scheduling of upload jobs across organizations.
+
+Upload jobs go to one of two ARQ queues, each served by its own workers:
+
+- FAST_QUEUE (FastLaneWorkerSettings) for small uploads, so interactive
+  uploads never wait behind bulk loads
+- BULK_QUEUE (WorkerSettings) for everything else, including shard jobs
+
+ARQ starts ready jobs in score order. Instead of the enqueue time, jobs
+are scored with start-time fair queuing: every organization has a virtual
+clock per queue that advances by each job's estimated cost divided by the
+organization's weight, and a job is tagged with ``max(now, clock)``. An
+organization that queued five large libraries has its later jobs tagged
+in the future, so a job enqueued afterwards by another organization sorts
+ahead of them. Scores are shifted back by FAIR_HORIZON, which keeps every
+job ready at once: only the order changes, and idle workers never wait.
+
+Each organization runs at most ``upload_org_max_jobs`` jobs at a time
+while other organizations have jobs queued. A job over the cap is put
+back behind the queued work; with nothing else queued it runs anyway, so
+bulk loads still use spare capacity. The cap is checked without a lock
+and may be exceeded by a job that starts at the same moment.
+
+Queue depth per organization and recent queue wait times are kept in
+Redis next to the queues (see read_queue_metrics). A job's wait is sampled
+at its first dequeue only; the time a requeued job then spends behind its
+own organization's cap is not counted as queue wait.
+
+Usage:
+    scheduler = UploadScheduler(redis)
+    queue = choose_queue(file_size_bytes=size)
+    await scheduler.enqueue("validate_upload_job", upload_id, org_id, queue=queue)
+"""
+
+import logging
+import time
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+
+from arq.connections import ArqRedis
+from arq.constants import default_queue_name
+from arq.jobs import Job
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from apps.api.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+BULK_QUEUE = default_queue_name
+FAST_QUEUE = f"{default_queue_name}:uploads-fast"
+UPLOAD_QUEUES = {"fast": FAST_QUEUE, "bulk": BULK_QUEUE}
+
+# Fair scores are this far in the past; an organization's backlog beyond
+# it is deferred until its tags come within range
+FAIR_HORIZON = timedelta(hours=6)
+
+# Set explicitly: ARQ derives the default from the (shifted) score
+JOB_EXPIRES = timedelta(days=1)
+
+# Rough job cost estimates, in seconds of worker time
+ROWS_PER_COST_SECOND = 1_000
+BYTES_PER_COST_SECOND = 100_000
+MIN_JOB_COST = 1.0
+
+# Queue wait samples kept per queue for metrics
+WAIT_SAMPLES = 1_000
+
+SCHEDULER_KEY_PREFIX = "upload:sched:"
+RUNNING_KEY = f"{SCHEDULER_KEY_PREFIX}running"  # org:job -> lease expiry
+
+
+def _queue_key(queue: str, name: str) -> str:
+    return f"{SCHEDULER_KEY_PREFIX}{queue}:{name}"
+
+
+def choose_queue(file_size_bytes: int | None = None, total_rows: int | None = None) -> str:
+    """
+    Pick the queue for an upload job from its size.
+
+    Args:
+        file_size_bytes: Size of the upload file
+        total_rows: Rows the job processes, when known (preferred)
+
+    Returns:
+        FAST_QUEUE for small uploads, BULK_QUEUE otherwise
+    """
+    settings = get_settings()
+    if total_rows is not None:
+        small = total_rows <= settings.upload_fast_lane_max_rows
+    elif file_size_bytes is not None:
+        small = file_size_bytes <= settings.upload_fast_lane_max_bytes
+    else:
+        small = False
+    return FAST_QUEUE if small else BULK_QUEUE
+
+
+def estimate_cost(file_size_bytes: int | None = None, total_rows: int | None = None) -> float:
+    """
+    Estimate a job's worker time for fair scheduling.
+
+    Args:
+        file_size_bytes: Size of the upload file
+        total_rows: Rows the job processes, when known (preferred)
+
+    Returns:
+        Estimated seconds, at least MIN_JOB_COST
+    """
+    if total_rows is not None:
+        cost = total_rows / ROWS_PER_COST_SECOND
+    elif file_size_bytes is not None:
+        cost = file_size_bytes / BYTES_PER_COST_SECOND
+    else:
+        cost = 0.0
+    return max(cost, MIN_JOB_COST)
+
+
+def _decode(value: bytes | str) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class UploadScheduler:
+    """
+    Enqueues upload jobs in fair order and limits concurrency per organization.
+
+    One instance per API request or job; all state is in Redis.
+    """
+
+    def __init__(
+        self,
+        redis: ArqRedis,
+        org_max_jobs: int | None = None,
+        weights: Mapping[str, float] | None = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initialize a scheduler.
+
+        Args:
+            redis: ARQ Redis pool
+            org_max_jobs: Concurrent jobs per organization while others
+                wait; defaults to the upload_org_max_jobs setting
+            weights: Fair share weight per organization ID (default 1);
+                defaults to the upload_org_weights setting
+            clock: Wall-clock time source (seconds)
+        """
+        settings = get_settings()
+        self.redis = redis
+        self.org_max_jobs = org_max_jobs if org_max_jobs is not None else settings.upload_org_max_jobs
+        self.weights = weights if weights is not None else settings.upload_org_weights
+        self.clock = clock
+
+    async def enqueue(
+        self,
+        function: str,
+        upload_id: str,
+        organization_id: str,
+        *args: object,
+        queue: str = BULK_QUEUE,
+        cost: float = MIN_JOB_COST,
+        job_id: str | None = None,
+    ) -> Job | None:
+        """
+        Enqueue an upload job with its fair-queuing score.
+
+        Args:
+            function: Job function name
+            upload_id: Upload UUID as string (first job argument)
+            organization_id: Organization UUID as string (second job argument)
+            *args: Further job arguments
+            queue: FAST_QUEUE or BULK_QUEUE
+            cost: Estimated worker seconds (see estimate_cost)
+            job_id: ARQ job ID, to keep a job from being enqueued twice
+
+        Returns:
+            The job, or None if a job with ``job_id`` exists
+        """
+        now = self.clock()
+        weight = float(self.weights.get(organization_id, 1.0))
+        clocks = _queue_key(queue, "vclock")
+
+        # Concurrent enqueues may share a tag; the order between them is moot
+        clock = await self.redis.hget(clocks, organization_id)
+        tag = max(now, float(clock)) if clock is not None else now
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(clocks, organization_id, tag + cost / weight)
+            pipe.hincrby(_queue_key(queue, "queued"), organization_id, 1)
+            await pipe.execute()
+
+        job = await self.redis.enqueue_job(
+            function,
+            upload_id,
+            organization_id,
+            *args,
+            _job_id=job_id,
+            _queue_name=queue,
+            _defer_until=datetime.fromtimestamp(tag - FAIR_HORIZON.total_seconds(), UTC),
+            _expires=JOB_EXPIRES,
+        )
+        if job is None:
+            await self.redis.hincrby(_queue_key(queue, "queued"), organization_id, -1)
+        return job
+
+    async def requeue(
+        self,
+        function: str,
+        upload_id: str,
+        organization_id: str,
+        *args: object,
+        queue: str,
+        job_id: str,
+        delay: timedelta,
+    ) -> None:
+        """
+        Put a job that may not start yet behind the queued work.
+
+        Its score is the real time after ``delay``, later than any fair
+        score, so it starts once the queue holds nothing else.
+
+        Args:
+            function: Job function name
+            upload_id: Upload UUID as string
+            organization_id: Organization UUID as string
+            *args: Further job arguments
+            queue: Queue the job came from
+            job_id: ARQ job ID of the new job
+            delay: Minimum wait before the job is ready again
+        """
+        await self.redis.hincrby(_queue_key(queue, "queued"), organization_id, 1)
+        job = await self.redis.enqueue_job(
+            function,
+            upload_id,
+            organization_id,
+            *args,
+            _job_id=job_id,
+            _queue_name=queue,
+            _defer_by=delay,
+            _expires=JOB_EXPIRES,
+        )
+        if job is None:
+            await self.redis.hincrby(_queue_key(queue, "queued"), organization_id, -1)
+
+    async def job_started(
+        self,
+        queue: str,
+        organization_id: str,
+        enqueue_time: datetime,
+        record_wait: bool = True,
+    ) -> None:
+        """
+        Count a job as no longer queued and record how long it waited.
+
+        Args:
+            queue: Queue the job came from
+            organization_id: Organization UUID as string
+            enqueue_time: When the job was enqueued (ARQ ``enqueue_time``)
+            record_wait: Whether to add a wait sample; False for a job
+                requeued by its organization's cap, whose wait was
+                sampled at its first dequeue
+        """
+        wait = max(0.0, self.clock() - enqueue_time.timestamp())
+        waits = _queue_key(queue, "waits")
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hincrby(_queue_key(queue, "queued"), organization_id, -1)
+            if record_wait:
+                pipe.lpush(waits, f"{wait:.3f}")
+                pipe.ltrim(waits, 0, WAIT_SAMPLES - 1)
+            await pipe.execute()
+
+    async def acquire_slot(
+        self,
+        queue: str,
+        organization_id: str,
+        job_id: str,
+        lease: timedelta,
+    ) -> bool:
+        """
+        Take one of an organization's job slots for a starting job.
+
+        Args:
+            queue: Queue the job came from
+            organization_id: Organization UUID as string
+            job_id: ARQ job ID
+            lease: How long the slot is held if release_slot is never
+                called (e.g. the worker died)
+
+        Returns:
+            False if the organization is at its cap and other organizations
+            have jobs queued; the job should then be requeued
+        """
+        now = self.clock()
+        prefix = f"{organization_id}:"
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zremrangebyscore(RUNNING_KEY, "-inf", now)
+            pipe.zrange(RUNNING_KEY, 0, -1)
+            pipe.hgetall(_queue_key(queue, "queued"))
+            _, running, queued = await pipe.execute()
+
+        if sum(1 for member in running if _decode(member).startswith(prefix)) >= self.org_max_jobs:
+            others_waiting = any(
+                _decode(org) != organization_id and int(count) > 0
+                for org, count in queued.items()
+            )
+            if others_waiting:
+                return False
+
+        await self.redis.zadd(RUNNING_KEY, {f"{prefix}{job_id}": now + lease.total_seconds()})
+        return True
+
+    async def release_slot(self, organization_id: str, job_id: str) -> None:
+        """
+        Give back a slot taken by acquire_slot.
+
+        Args:
+            organization_id: Organization UUID as string
+            job_id: ARQ job ID
+        """
+        await self.redis.zrem(RUNNING_KEY, f"{organization_id}:{job_id}")
+
+
+@dataclass
+class LaneMetrics:
+    """Depth and wait times of one upload queue."""
+
+    lane: str
+    queued_jobs: int = 0
+    queued_by_org: dict[str, int] = field(default_factory=dict)
+    wait_p50_seconds: float | None = None
+    wait_p95_seconds: float | None = None
+    wait_max_seconds: float | None = None
+
+
+@dataclass
+class QueueMetrics:
+    """Upload queue metrics across lanes."""
+
+    lanes: list[LaneMetrics]
+    running_by_org: dict[str, int]
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def read_queue_metrics(redis: Redis, now: float | None = None) -> QueueMetrics | None:
+    """
+    Read queue depths, wait times and running jobs per organization.
+
+    Args:
+        redis: Async Redis client
+        now: Current wall-clock time (seconds); defaults to time.time()
+
+    Returns:
+        Metrics, or None if Redis is unreachable
+    """
+    now = time.time() if now is None else now
+    try:
+        async with redis.pipeline(transaction=False) as pipe:
+            for queue in UPLOAD_QUEUES.values():
+                pipe.hgetall(_queue_key(queue, "queued"))
+                pipe.lrange(_queue_key(queue, "waits"), 0, -1)
+            pipe.zrangebyscore(RUNNING_KEY, now, "+inf")
+            *per_queue, running = await pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Upload queue metrics unavailable: {e}")
+        return None
+
+    lanes = []
+    for i, lane in enumerate(UPLOAD_QUEUES):
+        queued, waits = per_queue[2 * i], per_queue[2 * i + 1]
+        # Counters can dip below zero for jobs enqueued before scheduling
+        by_org = {_decode(org): int(count) for org, count in queued.items() if int(count) > 0}
+        metrics = LaneMetrics(lane, sum(by_org.values()), by_org)
+        if waits:
+            ordered = sorted(float(w) for w in waits)
+            metrics.wait_p50_seconds = _percentile(ordered, 0.5)
+            metrics.wait_p95_seconds = _percentile(ordered, 0.95)
+            metrics.wait_max_seconds = ordered[-1]
+        lanes.append(metrics)
+
+    running_by_org: dict[str, int] = {}
+    for member in running:
+        org = _decode(member).split(":", 1)[0]
+        running_by_org[org] = running_by_org.get(org, 0) + 1
+    return QueueMetrics(lanes, running_by_org)
@@ -319,6 +319,31 @@ class UploadConfirmResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class QueueLaneResponse(BaseModel):
+    """Depth and wait times of one upload job queue."""
+
+    lane: str = Field(..., description="fast (small uploads) or bulk")
+    queued_jobs: int = Field(..., description="Jobs waiting to start, all organizations")
+    org_queued_jobs: int = Field(..., description="Jobs of your organization waiting to start")
+    wait_p50_seconds: float | None = Field(
+        default=None,
+        description="Median queue wait of recently started jobs",
+    )
+    wait_p95_seconds: float | None = None
+    wait_max_seconds: float | None = None
+
+
+class UploadQueueResponse(BaseModel):
+    """Upload job queue metrics."""
+
+    lanes: list[QueueLaneResponse]
+    org_running_jobs: int = Field(..., description="Jobs of your organization running now")
+    org_max_jobs: int = Field(
+        ...,
+        description="Jobs your organization may run at once while others wait",
+    )
+
+
 # =============================================================================
 # Response Schemas - Errors
 # =============================================================================
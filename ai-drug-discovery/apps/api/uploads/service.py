@@ -9,25 +9,31 @@ Handles:
 - Progress tracking
 """
 
+import tempfile
 import uuid
 from datetime import UTC, datetime, timedelta
 from decimal import Decimal
-from io import BytesIO
-from typing import BinaryIO
+from typing import AsyncIterator, BinaryIO
 
-from sqlalchemy import func, select
+from sqlalchemy import delete, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer_group
 
 from apps.api.uploads.error_codes import UploadErrorCode, get_error_message
-from db.models.discovery import Molecule
+from apps.api.uploads.error_sink import UploadErrorSink
+from apps.api.uploads.fingerprint_scan import iter_fingerprint_chunks
+from apps.api.uploads.sharding import ShardRange
+from db.models.discovery import FINGERPRINT_GROUP, Molecule
 from db.models.upload import (
     DuplicateAction,
     FileType,
+    ShardStatus,
     Upload,
     UploadFile,
     UploadProgress,
     UploadResultSummary,
     UploadRowError,
+    UploadShard,
     UploadStatus,
 )
 from packages.shared.storage import FileStorageBackend
@@ -53,6 +59,9 @@ class UploadService:
     # Batch size for duplicate checks
     DUPLICATE_CHECK_BATCH_SIZE = 100
 
+    # Files fetched whole are spooled in memory up to this size, then to disk
+    FILE_SPOOL_MAX_BYTES = 16 * 1024 * 1024
+
     def __init__(
         self,
         db: AsyncSession,
@@ -67,6 +76,8 @@ class UploadService:
         """
         self.db = db
         self.storage = storage
+        self._error_sinks: dict[uuid.UUID, UploadErrorSink] = {}
+        self._active_shards: dict[uuid.UUID, UploadShard] = {}
 
     # =========================================================================
     # Upload Creation
@@ -217,16 +228,25 @@ class UploadService:
         """
         Transition upload to VALIDATING state.
 
+        An upload already VALIDATING is a retried job and starts over.
+
         Args:
             upload: Upload to transition
 
         Raises:
             ValueError: If transition not allowed
         """
-        upload.transition_to(UploadStatus.VALIDATING)
+        if upload.status != UploadStatus.VALIDATING:
+            upload.transition_to(UploadStatus.VALIDATING)
         if upload.progress:
             upload.progress.phase = "parsing"
             upload.progress.started_at = datetime.now(UTC)
+            upload.progress.error_counts = {}
+
+        # Errors and shards of an earlier validation run (before a mapping change)
+        self._error_sinks.pop(upload.id, None)
+        await self.db.execute(delete(UploadRowError).where(UploadRowError.upload_id == upload.id))
+        await self.delete_shards(upload)
         await self.db.commit()
 
     async def complete_validation(
@@ -258,6 +278,7 @@ class UploadService:
             upload.progress.duplicate_exact = duplicate_exact
             upload.progress.duplicate_similar = duplicate_similar
             upload.progress.phase = "validation_complete"
+        await self.flush_row_errors(upload)
 
         # Determine next state based on error rate
         error_rate = invalid_rows / total_rows if total_rows > 0 else 0
@@ -323,6 +344,8 @@ class UploadService:
         # Optionally clean up stored file
         if upload.file:
             await self.storage.delete(upload.file.storage_path)
+            await self.delete_upload_artifacts(upload)
+        await self.delete_shard_artifacts(upload)
 
     async def complete_processing(
         self,
@@ -334,6 +357,7 @@ class UploadService:
         exact_duplicates: int,
         similar_duplicates: int,
         duration_seconds: float,
+        processed_rows: int | None = None,
     ) -> None:
         """
         Complete processing and create result summary.
@@ -347,12 +371,17 @@ class UploadService:
             exact_duplicates: Exact duplicates found
             similar_duplicates: Similar duplicates found
             duration_seconds: Processing time
+            processed_rows: Final insertion-phase row count
         """
         upload.transition_to(UploadStatus.COMPLETED)
         upload.completed_at = datetime.now(UTC)
 
         if upload.progress:
             upload.progress.phase = "completed"
+            upload.progress.checkpoint = None
+            if processed_rows is not None:
+                upload.progress.processed_rows = processed_rows
+        await self.flush_row_errors(upload)
 
         # Create summary
         summary = UploadResultSummary(
@@ -379,6 +408,12 @@ class UploadService:
         if upload.can_transition_to(UploadStatus.FAILED):
             upload.status = UploadStatus.FAILED
         upload.error_message = error_message
+        if upload.progress:
+            upload.progress.checkpoint = None
+        # Buffered errors belong to a transaction that may have failed
+        sink = self._error_sinks.pop(upload.id, None)
+        if sink is not None:
+            sink.discard()
         await self.db.commit()
 
     # =========================================================================
@@ -396,7 +431,11 @@ class UploadService:
         phase: str | None = None,
     ) -> None:
         """
-        Update upload progress.
+        Set progress counters on the stored progress row.
+
+        Not committed here: the row is written with the next state
+        transition. Live progress between phase boundaries goes to Redis
+        (see apps.api.uploads.progress).
 
         Args:
             upload: Upload to update
@@ -423,12 +462,72 @@ class UploadService:
         if phase is not None:
             upload.progress.phase = phase
 
-        await self.db.commit()
+    async def save_checkpoint(self, upload: Upload, checkpoint: dict) -> None:
+        """
+        Record a resumable checkpoint for the current phase.
+
+        Buffered row errors are written first. Not committed here: the
+        caller commits the checkpoint with the batch it describes.
+
+        Args:
+            upload: Upload record
+            checkpoint: JSON-serializable phase state
+        """
+        await self.flush_row_errors(upload)
+        shard = self._active_shards.get(upload.id)
+        if shard is not None:
+            shard.checkpoint = checkpoint
+        elif upload.progress:
+            upload.progress.checkpoint = checkpoint
+
+    async def get_inserted_inchi_keys(self, upload: Upload) -> set[str]:
+        """
+        Get InChIKeys of molecules created by an upload.
+
+        Used to resume an interrupted insertion.
+
+        Args:
+            upload: Upload record
+
+        Returns:
+            Set of InChIKeys
+        """
+        stmt = select(Molecule.inchi_key).where(
+            Molecule.organization_id == upload.organization_id,
+            Molecule.metadata_["source_upload_id"].astext == str(upload.id),
+            Molecule.deleted_at.is_(None),
+        )
+        result = await self.db.execute(stmt)
+        return set(result.scalars().all())
 
     # =========================================================================
     # Error Recording
     # =========================================================================
 
+    def error_sink(self, upload: Upload) -> UploadErrorSink:
+        """
+        Get the buffered error sink for an upload's current run.
+
+        Counts continue from those stored by the previous phase, on the
+        shard when processing one (see use_shard).
+
+        Args:
+            upload: Upload record
+
+        Returns:
+            UploadErrorSink writing through this service's session
+        """
+        sink = self._error_sinks.get(upload.id)
+        if sink is None:
+            shard = self._active_shards.get(upload.id)
+            if shard is not None:
+                counts = shard.error_counts
+            else:
+                counts = upload.progress.error_counts if upload.progress else None
+            sink = UploadErrorSink(self.db, upload.id, counts=counts)
+            self._error_sinks[upload.id] = sink
+        return sink
+
     async def add_row_error(
         self,
         upload: Upload,
@@ -439,10 +538,13 @@ class UploadService:
         raw_data: dict | None = None,
         duplicate_inchi_key: str | None = None,
         duplicate_similarity: Decimal | None = None,
-    ) -> UploadRowError:
+    ) -> None:
         """
         Record a row-level error.
 
+        Errors are buffered and written with COPY in large chunks; see
+        flush_row_errors.
+
         Args:
             upload: Upload record
             row_number: 1-based row number
@@ -452,44 +554,36 @@ class UploadService:
             raw_data: Row data for debugging (truncated)
             duplicate_inchi_key: InChIKey of duplicate
             duplicate_similarity: Similarity score
-
-        Returns:
-            Created UploadRowError
-        """
-        # Truncate raw_data to prevent huge storage
-        if raw_data:
-            truncated_data = {
-                k: (v[:100] + "..." if isinstance(v, str) and len(v) > 100 else v)
-                for k, v in raw_data.items()
-            }
-        else:
-            truncated_data = None
-
-        error = UploadRowError(
-            upload_id=upload.id,
-            row_number=row_number,
-            error_code=error_code.value,
-            error_message=get_error_message(error_code, detail),
+        """
+        await self.error_sink(upload).add(
+            row_number,
+            error_code,
+            get_error_message(error_code, detail),
+            raw_data=raw_data,
             field_name=field_name,
-            raw_data=truncated_data,
             duplicate_inchi_key=duplicate_inchi_key,
             duplicate_similarity=duplicate_similarity,
         )
-        self.db.add(error)
-        return error
 
-    async def add_row_errors_batch(
-        self,
-        errors: list[UploadRowError],
-    ) -> None:
+    async def flush_row_errors(self, upload: Upload) -> None:
         """
-        Add multiple row errors in batch.
+        Write buffered row errors and store per-code counts on the progress row.
+
+        Called at phase boundaries, before the transition commits. While a
+        shard is processed, its own counts are stored on the shard instead.
 
         Args:
-            errors: List of error objects to add
+            upload: Upload record
         """
-        self.db.add_all(errors)
-        await self.db.flush()
+        sink = self._error_sinks.pop(upload.id, None)
+        if sink is None:
+            return
+        await sink.flush()
+        shard = self._active_shards.get(upload.id)
+        if shard is not None:
+            shard.error_counts = sink.counts
+        elif upload.progress:
+            upload.progress.error_counts = sink.counts
 
     async def get_errors(
         self,
@@ -530,12 +624,29 @@ class UploadService:
         """
         Get error counts grouped by error code.
 
+        Answered from the counters kept while the upload ran. Phases still
+        running in another process, and uploads processed before counters
+        were stored, are counted in the database.
+
         Args:
             upload: Upload record
 
         Returns:
             Dict of error_code -> count
         """
+        sink = self._error_sinks.get(upload.id)
+        if sink is not None:
+            return sink.counts
+        # Stored counts are final once the phase that wrote them has ended
+        if upload.status not in (UploadStatus.VALIDATING, UploadStatus.PROCESSING):
+            counts = (
+                await self.db.execute(
+                    select(UploadProgress.error_counts).where(UploadProgress.upload_id == upload.id)
+                )
+            ).scalar_one_or_none()
+            if counts is not None:
+                return dict(counts)
+
         stmt = (
             select(
                 UploadRowError.error_code,
@@ -602,6 +713,64 @@ class UploadService:
 
         return {m.inchi_key: m for m in molecules}
 
+    async def resolve_molecule_ids(
+        self,
+        organization_id: uuid.UUID,
+        inchi_keys: list[str],
+    ) -> dict[str, uuid.UUID]:
+        """
+        Resolve InChIKeys to existing molecule IDs in one query.
+
+        Only the key and ID columns are fetched.
+
+        Args:
+            organization_id: Organization ID
+            inchi_keys: List of InChIKeys to resolve
+
+        Returns:
+            Dict of inchi_key -> molecule ID for existing molecules
+        """
+        if not inchi_keys:
+            return {}
+
+        stmt = select(Molecule.inchi_key, Molecule.id).where(
+            Molecule.organization_id == organization_id,
+            Molecule.inchi_key.in_(inchi_keys),
+            Molecule.deleted_at.is_(None),
+        )
+        result = await self.db.execute(stmt)
+        return {row.inchi_key: row.id for row in result}
+
+    async def get_molecules_by_ids(
+        self,
+        organization_id: uuid.UUID,
+        molecule_ids: list[uuid.UUID],
+    ) -> dict[uuid.UUID, Molecule]:
+        """
+        Load molecules by ID in one query, fingerprint columns included.
+
+        Args:
+            organization_id: Organization ID
+            molecule_ids: Molecule IDs to load
+
+        Returns:
+            Dict of molecule ID -> Molecule
+        """
+        if not molecule_ids:
+            return {}
+
+        stmt = (
+            select(Molecule)
+            .options(undefer_group(FINGERPRINT_GROUP))
+            .where(
+                Molecule.organization_id == organization_id,
+                Molecule.id.in_(molecule_ids),
+                Molecule.deleted_at.is_(None),
+            )
+        )
+        result = await self.db.execute(stmt)
+        return {m.id: m for m in result.scalars().all()}
+
     async def find_similar_molecules(
         self,
         organization_id: uuid.UUID,
@@ -612,8 +781,12 @@ class UploadService:
         """
         Find molecules similar to the given fingerprint.
 
-        This is a placeholder implementation using brute-force comparison.
-        For production, use a vector index (pgvector, Pinecone, etc.).
+        Candidates are pruned in SQL by popcount: Tanimoto >= t requires
+        bit_count(candidate) to lie in [t*q, q/t], which at duplicate-check
+        thresholds discards most of the library before any bits are compared.
+        The remaining ids and fingerprints are streamed in packed chunks and
+        scored with the vectorized engine; only the hits are loaded as
+        Molecule entities.
 
         Args:
             organization_id: Organization ID
@@ -624,47 +797,82 @@ class UploadService:
         Returns:
             List of (Molecule, similarity_score) tuples
         """
-        # For MVP, we'll do a simple in-database comparison
-        # In production, this would use a vector index
-        from packages.chemistry import tanimoto_similarity_bytes
-
-        # Get molecules with fingerprints
-        stmt = select(Molecule).where(
-            Molecule.organization_id == organization_id,
-            Molecule.fingerprint_morgan.isnot(None),
-            Molecule.deleted_at.is_(None),
+        from packages.chemistry.similarity_engine import popcount_bounds, popcount_bytes
+
+        low, high = popcount_bounds(popcount_bytes(fingerprint_bytes), float(threshold))
+
+        # Best hits so far; chunks arrive in scan order, so a stable sort keeps
+        # ties ordered as one search over the whole corpus would
+        hits: list[tuple[uuid.UUID, float]] = []
+        async for chunk in iter_fingerprint_chunks(
+            self.db,
+            organization_id,
+            num_bytes=len(fingerprint_bytes),
+            min_popcount=low,
+            max_popcount=high,
+        ):
+            chunk_hits = chunk.matrix.search(
+                fingerprint_bytes, threshold=float(threshold), top_k=limit
+            )
+            hits.extend((chunk.ids[idx], similarity) for idx, similarity in chunk_hits)
+            hits.sort(key=lambda hit: -hit[1])
+            del hits[limit:]
+        if not hits:
+            return []
+
+        result = await self.db.execute(
+            select(Molecule).where(Molecule.id.in_([mol_id for mol_id, _ in hits]))
         )
-        result = await self.db.execute(stmt)
-        molecules = result.scalars().all()
+        molecules = {mol.id: mol for mol in result.scalars().all()}
 
-        # Calculate similarities
-        similar = []
-        for mol in molecules:
-            if mol.fingerprint_morgan:
-                similarity = tanimoto_similarity_bytes(
-                    fingerprint_bytes,
-                    mol.fingerprint_morgan,
-                )
-                if similarity >= float(threshold):
-                    similar.append((mol, similarity))
-
-        # Sort by similarity and limit
-        similar.sort(key=lambda x: x[1], reverse=True)
-        return similar[:limit]
+        return [
+            (molecules[mol_id], similarity)
+            for mol_id, similarity in hits
+            if mol_id in molecules
+        ]
 
     # =========================================================================
     # File Access
     # =========================================================================
 
-    async def get_upload_file_content(self, upload: Upload) -> BytesIO:
+    def iter_upload_file_chunks(
+        self,
+        upload: Upload,
+        start: int = 0,
+        end: int | None = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream the content of an upload's file in chunks.
+
+        Args:
+            upload: Upload record
+            start: Byte offset to start at
+            end: Byte offset to stop at (exclusive); None streams to the end
+
+        Returns:
+            Async iterator of byte chunks
+
+        Raises:
+            ValueError: If upload has no file
+            FileNotFoundError: If file not in storage (raised on iteration)
+        """
+        if not upload.file:
+            raise ValueError("Upload has no associated file")
+
+        return self.storage.iter_chunks(upload.file.storage_path, start=start, end=end)
+
+    async def get_upload_file_content(self, upload: Upload) -> BinaryIO:
         """
-        Get the content of an upload's file.
+        Get the content of an upload's file as a seekable file.
+
+        For formats that need random access (Excel). The file is spooled to
+        a temporary file, so large uploads are not held in memory.
 
         Args:
             upload: Upload record
 
         Returns:
-            BytesIO with file content
+            Temporary file positioned at the start
 
         Raises:
             ValueError: If upload has no file
@@ -673,7 +881,252 @@ class UploadService:
         if not upload.file:
             raise ValueError("Upload has no associated file")
 
-        return await self.storage.get(upload.file.storage_path)
+        return await self._spool_file(upload.file.storage_path)
+
+    async def _spool_file(self, path: str) -> BinaryIO:
+        """Stream a stored file into a spooled temporary file."""
+        file = tempfile.SpooledTemporaryFile(max_size=self.FILE_SPOOL_MAX_BYTES)
+        try:
+            async for chunk in self.storage.iter_chunks(path):
+                file.write(chunk)
+        except BaseException:
+            file.close()
+            raise
+        file.seek(0)
+        return file
+
+    async def save_upload_artifacts(self, upload: Upload, file: BinaryIO) -> None:
+        """
+        Store the per-row artifacts computed during validation.
+
+        Replaces any artifacts from an earlier validation run. The new path
+        is committed together with the upload's validation results.
+
+        Args:
+            upload: Upload record
+            file: Artifact file positioned at the start
+        """
+        if not upload.file:
+            raise ValueError("Upload has no associated file")
+
+        await self.delete_upload_artifacts(upload)
+        stored = await self.storage.save(
+            file,
+            f"{upload.id}.artifacts",
+            "application/octet-stream",
+        )
+        upload.file.artifact_storage_path = stored.storage_path
+
+    async def get_upload_artifacts(
+        self,
+        upload: Upload,
+        shard: UploadShard | None = None,
+    ) -> BinaryIO | None:
+        """
+        Get the per-row artifacts computed during validation.
+
+        Args:
+            upload: Upload record
+            shard: Shard whose artifacts to get instead of the upload's
+
+        Returns:
+            Artifact file, or None if the upload (or shard) has none
+        """
+        if shard is not None:
+            path = shard.artifact_storage_path
+        else:
+            path = upload.file.artifact_storage_path if upload.file else None
+        if not path:
+            return None
+
+        try:
+            return await self._spool_file(path)
+        except FileNotFoundError:
+            return None
+
+    async def delete_upload_artifacts(self, upload: Upload) -> None:
+        """
+        Delete the upload's validation artifacts, if any.
+
+        Args:
+            upload: Upload record
+        """
+        if not upload.file or not upload.file.artifact_storage_path:
+            return
+
+        await self.storage.delete(upload.file.artifact_storage_path)
+        upload.file.artifact_storage_path = None
+
+    # =========================================================================
+    # Shards
+    # =========================================================================
+
+    async def create_shards(self, upload: Upload, ranges: list[ShardRange]) -> list[UploadShard]:
+        """
+        Record the shards a validating upload is split into.
+
+        Args:
+            upload: Upload in VALIDATING state
+            ranges: Planned shard ranges, in file order
+
+        Returns:
+            Created shards
+        """
+        shards = [
+            UploadShard(
+                upload_id=upload.id,
+                shard_index=index,
+                start_offset=shard.start,
+                end_offset=shard.end,
+                row_offset=shard.row_offset,
+                status=ShardStatus.PENDING,
+            )
+            for index, shard in enumerate(ranges)
+        ]
+        self.db.add_all(shards)
+        if upload.progress:
+            upload.progress.total_rows = sum(shard.rows for shard in ranges)
+            upload.progress.phase = "validating"
+        await self.db.commit()
+        return shards
+
+    def use_shard(self, upload: Upload, shard: UploadShard | None) -> None:
+        """
+        Route an upload's row error counts and checkpoints to one of its shards.
+
+        Shard jobs of the same upload run concurrently, so each keeps its
+        counters on its shard; the merge job adds them up.
+
+        Args:
+            upload: Upload record
+            shard: Shard this service's run processes; None for the upload
+        """
+        self._error_sinks.pop(upload.id, None)
+        if shard is None:
+            self._active_shards.pop(upload.id, None)
+        else:
+            self._active_shards[upload.id] = shard
+
+    async def get_shards(self, upload: Upload) -> list[UploadShard]:
+        """
+        Get an upload's shards in file order.
+
+        Args:
+            upload: Upload record
+
+        Returns:
+            Shards; empty if the upload is processed by a single job
+        """
+        stmt = (
+            select(UploadShard)
+            .where(UploadShard.upload_id == upload.id)
+            .order_by(UploadShard.shard_index)
+        )
+        result = await self.db.execute(stmt)
+        return list(result.scalars().all())
+
+    async def get_shard(self, upload: Upload, shard_index: int) -> UploadShard | None:
+        """
+        Get one shard of an upload.
+
+        Args:
+            upload: Upload record
+            shard_index: 0-based shard position
+
+        Returns:
+            Shard if found, None otherwise
+        """
+        stmt = select(UploadShard).where(
+            UploadShard.upload_id == upload.id,
+            UploadShard.shard_index == shard_index,
+        )
+        result = await self.db.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def complete_shard(
+        self,
+        upload: Upload,
+        shard: UploadShard,
+        status: ShardStatus,
+    ) -> bool:
+        """
+        Mark a shard's phase as done and commit.
+
+        Args:
+            upload: Upload record
+            shard: Shard that finished
+            status: VALIDATED or INSERTED
+
+        Returns:
+            True if every shard of the upload has now reached ``status``
+        """
+        await self.flush_row_errors(upload)
+        shard.status = status
+        await self.db.commit()
+        # Counted after our own commit, so the last shard to finish sees it
+        return await self.all_shards_reached(upload, status)
+
+    async def all_shards_reached(self, upload: Upload, status: ShardStatus) -> bool:
+        """
+        Check whether every shard of an upload has the given status.
+
+        Args:
+            upload: Upload record
+            status: Shard status to check for
+
+        Returns:
+            True if no shard has another status
+        """
+        stmt = select(func.count()).where(
+            UploadShard.upload_id == upload.id,
+            UploadShard.status != status,
+        )
+        remaining = (await self.db.execute(stmt)).scalar() or 0
+        return remaining == 0
+
+    async def save_shard_artifacts(self, upload: Upload, shard: UploadShard, file: BinaryIO) -> None:
+        """
+        Store the per-row artifacts computed for a shard.
+
+        Replaces the shard's previous artifacts. The new path is committed
+        with the shard's results.
+
+        Args:
+            upload: Upload record
+            shard: Shard the artifacts belong to
+            file: Artifact file positioned at the start
+        """
+        old_path = shard.artifact_storage_path
+        stored = await self.storage.save(
+            file,
+            f"{upload.id}.{shard.shard_index}.artifacts",
+            "application/octet-stream",
+        )
+        shard.artifact_storage_path = stored.storage_path
+        if old_path:
+            await self.storage.delete(old_path)
+
+    async def delete_shard_artifacts(self, upload: Upload) -> None:
+        """
+        Delete the artifacts of an upload's shards, if any.
+
+        Args:
+            upload: Upload record
+        """
+        for shard in await self.get_shards(upload):
+            if shard.artifact_storage_path:
+                await self.storage.delete(shard.artifact_storage_path)
+                shard.artifact_storage_path = None
+
+    async def delete_shards(self, upload: Upload) -> None:
+        """
+        Delete an upload's shards and their artifacts. Not committed here.
+
+        Args:
+            upload: Upload record
+        """
+        await self.delete_shard_artifacts(upload)
+        await self.db.execute(delete(UploadShard).where(UploadShard.upload_id == upload.id))
 
     # =========================================================================
     # Cleanup
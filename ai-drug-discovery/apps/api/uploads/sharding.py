@@ -0,0 +1,299 @@
+"""
+Record-aligned shard planning for parallel upload processing.
+
+A large upload is split into shards that separate worker jobs validate and
+insert, followed by one merge job per phase (see apps.api.uploads.worker).
+Text files are cut on byte offsets, always just after a record terminator,
+so each shard can be streamed with a ranged read and parsed on its own:
+
+- SMILES lists: after a newline
+- CSV: after a newline that leaves no quoted field open
+- SDF: after a ``$$$$`` line
+
+Excel workbooks need random access and are cut on worksheet rows instead.
+Their row count comes from the active sheet's recorded ``<dimension>``,
+found with ranged reads of the zip directory, the workbook part and the
+first bytes of the sheet, so the workbook is never downloaded to plan it.
+
+Planning is a single pass over the raw bytes with no decoding or parsing,
+so it costs a small fraction of validating the file.
+
+Usage:
+    shards = await plan_text_shards(chunks, FileType.CSV, target_bytes)
+    for shard in shards:
+        chunks = storage.iter_chunks(path, start=shard.start, end=shard.end)
+"""
+
+import re
+import struct
+import zlib
+from bisect import bisect_left
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass
+from typing import NamedTuple
+from xml.etree import ElementTree
+
+from db.models.upload import FileType
+
+# Smaller files are processed by a single job
+SHARD_MIN_BYTES = 8 * 1024 * 1024
+SHARD_MIN_ROWS = 50_000
+
+# Preferred shard sizes; raised for very large files to respect MAX_SHARDS
+SHARD_TARGET_BYTES = 4 * 1024 * 1024
+SHARD_TARGET_ROWS = 25_000
+MAX_SHARDS = 64
+
+# Compressed bytes of a worksheet read to find its <dimension> element
+EXCEL_SHEET_HEAD_BYTES = 16 * 1024
+
+_LINE_END = re.compile(rb"\n")
+_SDF_RECORD_END = re.compile(rb"^\$\$\$\$[ \t\r\f\v]*\n", re.MULTILINE)
+_SHEET_DIMENSION = re.compile(rb'<(?:\w+:)?dimension\s+ref="[^"]*?(\d+)"')
+
+_ZIP_END_RECORD = b"PK\x05\x06"
+_ZIP_END_RECORD_SIZE = 22
+_ZIP_DIRECTORY_ENTRY = b"PK\x01\x02"
+_ZIP_LOCAL_HEADER_SIZE = 30
+_XLSX_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_XLSX_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_XLSX_PACKAGE_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+@dataclass(frozen=True)
+class ShardRange:
+    """A record-aligned range of an upload file."""
+
+    start: int  # First byte, or first worksheet row
+    end: int  # Byte or worksheet row after the range (exclusive)
+    row_offset: int  # Row number of the last row before the range
+    rows: int  # Records in the range, blank and comment lines included
+
+
+def shard_target(size: int, target: int) -> int:
+    """Shard size for a file of ``size`` bytes or rows, capped at MAX_SHARDS."""
+    return max(target, -(-size // MAX_SHARDS))
+
+
+def _record_ends(text: bytes, file_type: FileType, in_quotes: bool) -> tuple[list[int], bool]:
+    """
+    Find the offsets just after each record in text made of complete lines.
+
+    Args:
+        text: Bytes ending with a newline
+        file_type: Upload file type
+        in_quotes: Whether a CSV quoted field is open at the start of text
+
+    Returns:
+        Tuple of (record end offsets, whether a quoted field is open at the end)
+    """
+    if file_type == FileType.SDF:
+        return [m.end() for m in _SDF_RECORD_END.finditer(text)], in_quotes
+    if file_type != FileType.CSV or (not in_quotes and b'"' not in text):
+        return [m.end() for m in _LINE_END.finditer(text)], in_quotes
+
+    # A quoted field may span lines; same rule as iter_csv_blocks
+    ends = []
+    position = 0
+    for line in text.split(b"\n")[:-1]:
+        position += len(line) + 1
+        if line.count(b'"') % 2:
+            in_quotes = not in_quotes
+        if not in_quotes:
+            ends.append(position)
+    return ends, in_quotes
+
+
+async def plan_text_shards(
+    chunks: AsyncIterator[bytes],
+    file_type: FileType,
+    target_bytes: int,
+) -> list[ShardRange]:
+    """
+    Split a streamed text file into shards of about ``target_bytes``.
+
+    Each cut is placed at the first record boundary at or after the target
+    size, so shards can be slightly larger than the target.
+
+    Args:
+        chunks: Byte chunks of the whole file
+        file_type: CSV, SDF or SMILES_LIST
+        target_bytes: Preferred shard size in bytes
+
+    Returns:
+        Shards covering the file in order; one shard if it is small
+    """
+    cuts: list[tuple[int, int]] = [(0, 0)]  # (byte offset, records before)
+    offset = 0  # Bytes of complete lines scanned
+    records = 0
+    in_quotes = False
+    carry = b""
+    next_cut = target_bytes
+
+    async for chunk in chunks:
+        data = carry + chunk
+        end = data.rfind(b"\n") + 1
+        carry = data[end:]
+        if not end:
+            continue
+
+        ends, in_quotes = _record_ends(data[:end], file_type, in_quotes)
+        while ends and offset + ends[-1] >= next_cut:
+            i = bisect_left(ends, next_cut - offset)
+            cut = offset + ends[i]
+            cuts.append((cut, records + i + 1))
+            next_cut = cut + target_bytes
+        records += len(ends)
+        offset += end
+
+    size = offset + len(carry)
+    if carry.strip():
+        records += 1  # Trailing record without a terminator
+    if len(cuts) > 1 and cuts[-1][0] >= size:
+        cuts.pop()
+
+    shards = []
+    bounds = cuts + [(size, records)]
+    for (start, before), (stop, upto) in zip(bounds[:-1], bounds[1:], strict=True):
+        rows = upto - before
+        row_offset = before
+        if file_type == FileType.CSV and start == 0:
+            # The first shard holds the header, which is row 1
+            rows -= 1
+            row_offset = 1
+        shards.append(ShardRange(start, stop, row_offset, rows))
+    return shards
+
+
+def plan_row_shards(first_row: int, end_row: int, target_rows: int) -> list[ShardRange]:
+    """
+    Split worksheet rows ``[first_row, end_row)`` into shards of ``target_rows``.
+
+    Args:
+        first_row: First data row (1-based worksheet row number)
+        end_row: Row after the last data row
+        target_rows: Rows per shard
+
+    Returns:
+        Shards covering the rows in order
+    """
+    return [
+        ShardRange(start, min(start + target_rows, end_row), start - 1, min(target_rows, end_row - start))
+        for start in range(first_row, end_row, target_rows)
+    ]
+
+
+class _ZipMember(NamedTuple):
+    method: int  # 0 = stored, 8 = deflated
+    compressed_size: int
+    header_offset: int
+
+
+async def _read_zip_directory(
+    read: Callable[[int, int], Awaitable[bytes]], size: int
+) -> dict[str, _ZipMember] | None:
+    """Members of a zip file from its central directory (None if not found)."""
+    # The end record is last unless the archive has a comment (up to 64 KiB)
+    tail = await read(max(0, size - 1024), size)
+    position = tail.rfind(_ZIP_END_RECORD)
+    if position < 0 and size > 1024:
+        tail = await read(max(0, size - _ZIP_END_RECORD_SIZE - 0xFFFF), size)
+        position = tail.rfind(_ZIP_END_RECORD)
+    if position < 0 or len(tail) - position < _ZIP_END_RECORD_SIZE:
+        return None
+    directory_size, directory_offset = struct.unpack_from("<II", tail, position + 12)
+    if directory_offset == 0xFFFFFFFF or directory_offset + directory_size > size:
+        return None  # ZIP64 or inconsistent
+
+    directory = await read(directory_offset, directory_offset + directory_size)
+    members = {}
+    offset = 0
+    while directory.startswith(_ZIP_DIRECTORY_ENTRY, offset) and offset + 46 <= len(directory):
+        method = struct.unpack_from("<H", directory, offset + 10)[0]
+        compressed_size = struct.unpack_from("<I", directory, offset + 20)[0]
+        name_length, extra_length, comment_length = struct.unpack_from("<HHH", directory, offset + 28)
+        header_offset = struct.unpack_from("<I", directory, offset + 42)[0]
+        name = directory[offset + 46 : offset + 46 + name_length].decode("utf-8", "replace")
+        members[name] = _ZipMember(method, compressed_size, header_offset)
+        offset += 46 + name_length + extra_length + comment_length
+    return members
+
+
+async def _read_zip_member(
+    read: Callable[[int, int], Awaitable[bytes]],
+    member: _ZipMember,
+    limit: int | None = None,
+) -> bytes | None:
+    """Content of a zip member, or of its first ``limit`` compressed bytes."""
+    start = member.header_offset
+    header = await read(start, start + _ZIP_LOCAL_HEADER_SIZE)
+    if len(header) < _ZIP_LOCAL_HEADER_SIZE:
+        return None
+    name_length, extra_length = struct.unpack_from("<HH", header, 26)
+    data_start = start + _ZIP_LOCAL_HEADER_SIZE + name_length + extra_length
+    length = member.compressed_size if limit is None else min(limit, member.compressed_size)
+    data = await read(data_start, data_start + length)
+
+    if member.method == 0:
+        return data
+    if member.method == 8:
+        try:
+            # A truncated stream decompresses as far as it goes
+            return zlib.decompressobj(-zlib.MAX_WBITS).decompress(data)
+        except zlib.error:
+            return None
+    return None
+
+
+async def read_excel_max_row(
+    read: Callable[[int, int], Awaitable[bytes]],
+    size: int,
+) -> int | None:
+    """
+    Last row of an xlsx workbook's active sheet, from its recorded dimension.
+
+    Only the zip directory, the workbook part and the first
+    ``EXCEL_SHEET_HEAD_BYTES`` of the sheet are read.
+
+    Args:
+        read: Reads bytes ``[start, end)`` of the file
+        size: File size in bytes
+
+    Returns:
+        The dimension's last row (openpyxl's read-only ``max_row``), or None
+        if the workbook records none or is not laid out as expected
+    """
+    members = await _read_zip_directory(read, size)
+    if not members or "xl/workbook.xml" not in members or "xl/_rels/workbook.xml.rels" not in members:
+        return None
+
+    workbook = await _read_zip_member(read, members["xl/workbook.xml"])
+    relationships = await _read_zip_member(read, members["xl/_rels/workbook.xml.rels"])
+    if workbook is None or relationships is None:
+        return None
+    try:
+        workbook_root = ElementTree.fromstring(workbook)
+        relationships_root = ElementTree.fromstring(relationships)
+    except ElementTree.ParseError:
+        return None
+
+    view = workbook_root.find(f"{_XLSX_MAIN_NS}bookViews/{_XLSX_MAIN_NS}workbookView")
+    active = int(view.get("activeTab", 0)) if view is not None else 0
+    sheets = workbook_root.findall(f"{_XLSX_MAIN_NS}sheets/{_XLSX_MAIN_NS}sheet")
+    if not 0 <= active < len(sheets):
+        return None
+    relationship_id = sheets[active].get(f"{_XLSX_REL_NS}id")
+    targets = {
+        rel.get("Id"): rel.get("Target", "")
+        for rel in relationships_root.iter(f"{_XLSX_PACKAGE_REL_NS}Relationship")
+    }
+    target = targets.get(relationship_id)
+    if not target:
+        return None
+    path = target.lstrip("/") if target.startswith("/") else f"xl/{target}"
+    if path not in members:
+        return None
+
+    head = await _read_zip_member(read, members[path], EXCEL_SHEET_HEAD_BYTES)
+    match = _SHEET_DIMENSION.search(head) if head else None
+    return int(match.group(1)) if match else None
@@ -0,0 +1,490 @@
+"""
+Per-organization fingerprint index for upload duplicate detection.
+
+Upload validation and insertion check every parsed batch for molecules
+similar to the organization's existing library. Instead of querying and
+scanning the library once per row, the library's Morgan fingerprints are
+loaded once into a packed, popcount-bucketed matrix and each batch is
+resolved with a single many-vs-many similarity join.
+
+Indexes are cached per (organization, fingerprint type) by a process-wide
+FingerprintIndexManager (packages.chemistry.index_manager) under the
+``fingerprint_index_memory_mb`` budget; the least recently used indexes are
+evicted when it is exceeded. After the initial load they follow the
+fingerprint change feed (packages.chemistry.change_feed): at most every
+``ORG_INDEX_SYNC_INTERVAL`` seconds, and only when a change was notified (or
+the listener is down), the molecules changed since the index epoch are
+applied as upserts and deletes. Writes committed by any worker therefore
+show up within seconds without a reload. A full reload only happens after
+``ORG_INDEX_MAX_AGE`` seconds, to bound drift and compact tombstones.
+Molecules inserted by an upload in this process are also appended directly,
+so later batches see them before commit.
+"""
+
+import logging
+import time
+import uuid
+from datetime import UTC, datetime
+from typing import NamedTuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from apps.api.uploads.fingerprint_scan import fingerprint_type_scan_statement
+from packages.chemistry.change_feed import (
+    SOURCE_FINGERPRINTS,
+    SOURCE_MOLECULES,
+    ChangeSet,
+    current_epoch,
+    fetch_fingerprint_changes,
+    get_change_listener,
+    needs_snapshot,
+)
+from packages.chemistry.index_manager import FingerprintIndexManager
+from packages.chemistry.similarity_engine import FingerprintMatrix, similarity_join
+
+logger = logging.getLogger(__name__)
+
+# Seconds before a cached organization index is rebuilt from a full snapshot
+ORG_INDEX_MAX_AGE = 6 * 3600.0
+
+# Minimum seconds between change feed syncs of a cached index
+ORG_INDEX_SYNC_INTERVAL = 2.0
+
+# Segments are repacked without removed rows once this fraction is dead
+SEGMENT_COMPACT_FRACTION = 0.25
+
+# Rows fetched per round trip while loading an index
+ORG_INDEX_LOAD_BATCH_SIZE = 10_000
+
+# Approximate Python overhead per indexed row: UUID, InChIKey string, bytes
+# object, list slots and position dict entry
+ROW_OVERHEAD_BYTES = 320
+
+
+class IndexMatch(NamedTuple):
+    """Best library match for a query fingerprint."""
+
+    molecule_id: uuid.UUID
+    inchi_key: str
+    similarity: float
+
+
+class _Segment:
+    """Fingerprints of one byte length, with lazily packed matrix."""
+
+    __slots__ = ("molecule_ids", "inchi_keys", "fingerprints", "positions", "dead", "_matrix")
+
+    def __init__(self) -> None:
+        self.molecule_ids: list[uuid.UUID] = []
+        self.inchi_keys: list[str] = []
+        self.fingerprints: list[bytes] = []
+        self.positions: dict[uuid.UUID, int] = {}
+        self.dead: set[int] = set()  # Positions of removed rows
+        self._matrix: FingerprintMatrix | None = None
+
+    def __len__(self) -> int:
+        return len(self.molecule_ids) - len(self.dead)
+
+    def append(self, molecule_id: uuid.UUID, inchi_key: str, fingerprint: bytes) -> None:
+        self.positions[molecule_id] = len(self.molecule_ids)
+        self.molecule_ids.append(molecule_id)
+        self.inchi_keys.append(inchi_key)
+        self.fingerprints.append(fingerprint)
+        self._matrix = None
+
+    def remove(self, molecule_id: uuid.UUID) -> bool:
+        """Tombstone a row; the packed matrix is kept."""
+        position = self.positions.pop(molecule_id, None)
+        if position is None:
+            return False
+        self.dead.add(position)
+        return True
+
+    def compacted(self) -> "_Segment":
+        """Copy without tombstoned rows."""
+        segment = _Segment()
+        for position, molecule_id in enumerate(self.molecule_ids):
+            if position not in self.dead:
+                segment.append(molecule_id, self.inchi_keys[position], self.fingerprints[position])
+        return segment
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate resident size, counting the packed matrix once built."""
+        rows = len(self.molecule_ids)
+        num_bytes = len(self.fingerprints[0]) if self.fingerprints else 0
+        if self._matrix is not None:
+            matrix = self._matrix
+            packed = matrix.words.nbytes + matrix.popcounts.nbytes
+            if matrix.row_ids is not None:
+                packed += matrix.row_ids.nbytes
+        else:
+            # The matrix is packed on first search: words plus popcounts
+            packed = rows * (-(-num_bytes // 8) * 8 + 4)
+        return rows * (num_bytes + ROW_OVERHEAD_BYTES) + packed
+
+    @property
+    def matrix(self) -> FingerprintMatrix:
+        if self._matrix is None:
+            self._matrix = FingerprintMatrix.from_bytes(
+                self.fingerprints,
+                num_bytes=len(self.fingerprints[0]),
+                bucketed=True,
+            )
+        return self._matrix
+
+
+class OrgFingerprintIndex:
+    """
+    In-memory fingerprint index for one organization and fingerprint type.
+
+    Fingerprints loaded from the database form the base segment for each
+    fingerprint length; molecules added afterwards go to a small delta
+    segment so appending does not repack the whole library. Removed or
+    replaced molecules are tombstoned in place.
+
+    ``epoch`` is the change feed position the index reflects.
+    """
+
+    def __init__(self, organization_id: uuid.UUID, fingerprint_type: str = "morgan"):
+        """
+        Initialize an empty index.
+
+        Args:
+            organization_id: Organization the index belongs to
+            fingerprint_type: Fingerprint type ("morgan" reads
+                molecules.fingerprint_morgan, others molecule_fingerprints)
+        """
+        self.organization_id = organization_id
+        self.fingerprint_type = fingerprint_type
+        self.loaded_at = time.monotonic()
+        self.epoch = 0
+        self.synced_at = time.monotonic()
+        self.synced_at_utc: datetime | None = datetime.now(UTC)
+        self.listener_version = 0
+        self._base: dict[int, _Segment] = {}
+        self._delta: dict[int, _Segment] = {}
+
+    def __len__(self) -> int:
+        return sum(
+            len(segment)
+            for segments in (self._base, self._delta)
+            for segment in segments.values()
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate resident size in bytes."""
+        return sum(
+            segment.nbytes
+            for segments in (self._base, self._delta)
+            for segment in segments.values()
+        )
+
+    @property
+    def age(self) -> float:
+        """Seconds since the index was loaded."""
+        return time.monotonic() - self.loaded_at
+
+    @classmethod
+    async def load(
+        cls,
+        db: AsyncSession,
+        organization_id: uuid.UUID,
+        fingerprint_type: str = "morgan",
+    ) -> "OrgFingerprintIndex":
+        """
+        Load all fingerprinted molecules of an organization.
+
+        Only ids, InChIKeys and fingerprints are streamed from the database.
+
+        Args:
+            db: Database session
+            organization_id: Organization to load
+            fingerprint_type: Fingerprint type
+
+        Returns:
+            Populated OrgFingerprintIndex
+        """
+        index = cls(organization_id, fingerprint_type)
+        listener = get_change_listener()
+        if listener is not None:
+            index.listener_version = listener.version
+        # Taken before the scan, so writes racing with it are replayed
+        index.epoch = await current_epoch(db)
+        index.synced_at_utc = datetime.now(UTC)
+        stmt = fingerprint_type_scan_statement(organization_id, fingerprint_type)
+        stream = await db.stream(stmt.execution_options(yield_per=ORG_INDEX_LOAD_BATCH_SIZE))
+        async for block in stream.partitions():
+            for row in block:
+                index._add_to(index._base, row.id, row.inchi_key, row.fingerprint)
+
+        logger.info(
+            f"Loaded {fingerprint_type} fingerprint index for organization {organization_id}: "
+            f"{len(index)} molecules, ~{index.nbytes} bytes"
+        )
+        return index
+
+    def add(self, molecule_id: uuid.UUID, inchi_key: str, fingerprint: bytes | None) -> None:
+        """
+        Add a molecule to the index, replacing any earlier entry for it.
+
+        Args:
+            molecule_id: Molecule ID
+            inchi_key: Molecule InChIKey
+            fingerprint: Fingerprint bytes (ignored if None)
+        """
+        self.remove(molecule_id)
+        self._add_to(self._delta, molecule_id, inchi_key, fingerprint)
+
+    def remove(self, molecule_id: uuid.UUID) -> bool:
+        """
+        Remove a molecule from the index.
+
+        Returns:
+            True if the molecule was indexed
+        """
+        removed = False
+        for segments in (self._base, self._delta):
+            for num_bytes, segment in list(segments.items()):
+                if not segment.remove(molecule_id):
+                    continue
+                removed = True
+                if len(segment) == 0:
+                    del segments[num_bytes]
+                elif len(segment.dead) > SEGMENT_COMPACT_FRACTION * len(segment.molecule_ids):
+                    segments[num_bytes] = segment.compacted()
+        return removed
+
+    def apply_changes(self, changes: ChangeSet) -> None:
+        """
+        Apply change feed deltas and advance the epoch.
+
+        Args:
+            changes: Changes of this organization since ``epoch``
+        """
+        for delta in changes.deltas:
+            if delta.deleted:
+                self.remove(delta.molecule_id)
+            else:
+                self.add(delta.molecule_id, delta.inchi_key or "", delta.fingerprint)
+        self.epoch = changes.epoch
+        self.synced_at = time.monotonic()
+        self.synced_at_utc = datetime.now(UTC)
+
+    async def sync(self, db: AsyncSession) -> int:
+        """
+        Apply molecules changed since the index epoch.
+
+        Args:
+            db: Database session
+
+        Returns:
+            Number of molecules updated or removed
+        """
+        listener = get_change_listener()
+        version = listener.version if listener is not None else 0
+        source = SOURCE_MOLECULES if self.fingerprint_type == "morgan" else SOURCE_FINGERPRINTS
+        changes = await fetch_fingerprint_changes(
+            db, self.epoch, source, self.fingerprint_type, organization_id=self.organization_id
+        )
+        self.apply_changes(changes)
+        self.listener_version = version
+        if changes.deltas:
+            logger.debug(
+                f"Synced fingerprint index for organization {self.organization_id}: "
+                f"{len(changes)} changes, epoch {self.epoch}"
+            )
+        return len(changes)
+
+    def sync_due(self) -> bool:
+        """Whether the change feed should be polled before the next search."""
+        if time.monotonic() - self.synced_at < ORG_INDEX_SYNC_INTERVAL:
+            return False
+        listener = get_change_listener()
+        return listener is None or listener.changed_since(self.listener_version)
+
+    @staticmethod
+    def _add_to(
+        segments: dict[int, _Segment],
+        molecule_id: uuid.UUID,
+        inchi_key: str,
+        fingerprint: bytes | None,
+    ) -> None:
+        if not fingerprint:
+            return
+        segment = segments.get(len(fingerprint))
+        if segment is None:
+            segment = segments[len(fingerprint)] = _Segment()
+        segment.append(molecule_id, inchi_key, fingerprint)
+
+    def search_batch(
+        self,
+        fingerprints: list[bytes | None],
+        threshold: float,
+    ) -> list[IndexMatch | None]:
+        """
+        Find the most similar indexed molecule for each query fingerprint.
+
+        Args:
+            fingerprints: Query fingerprints (None entries are skipped)
+            threshold: Minimum Tanimoto similarity
+
+        Returns:
+            One IndexMatch (or None when nothing reaches the threshold) per query,
+            in query order. Ties are broken by index order.
+        """
+        best: list[IndexMatch | None] = [None] * len(fingerprints)
+
+        # Fingerprints of different lengths are not comparable; join per length
+        length_groups: dict[int, list[int]] = {}
+        for position, fp in enumerate(fingerprints):
+            if fp:
+                length_groups.setdefault(len(fp), []).append(position)
+
+        for num_bytes, positions in length_groups.items():
+            queries = [fingerprints[position] for position in positions]
+            for segments in (self._base, self._delta):
+                segment = segments.get(num_bytes)
+                if segment is None:
+                    continue
+                for query_idx, target_idx, similarity in similarity_join(
+                    queries, segment.matrix, threshold
+                ):
+                    if target_idx in segment.dead:
+                        continue
+                    position = positions[query_idx]
+                    current = best[position]
+                    if current is None or similarity > current.similarity:
+                        best[position] = IndexMatch(
+                            molecule_id=segment.molecule_ids[target_idx],
+                            inchi_key=segment.inchi_keys[target_idx],
+                            similarity=similarity,
+                        )
+
+        return best
+
+
+# =============================================================================
+# Process-wide Cache
+# =============================================================================
+
+_org_index_manager: FingerprintIndexManager[OrgFingerprintIndex] | None = None
+
+
+def get_org_index_manager() -> FingerprintIndexManager[OrgFingerprintIndex]:
+    """Process-wide index manager, sized from settings on first use."""
+    global _org_index_manager
+    if _org_index_manager is None:
+        from apps.api.config import get_settings
+
+        budget = get_settings().fingerprint_index_memory_mb * 1024 * 1024
+        _org_index_manager = FingerprintIndexManager(memory_budget=budget)
+    return _org_index_manager
+
+
+async def get_org_fingerprint_index(
+    db: AsyncSession,
+    organization_id: uuid.UUID,
+    max_age: float = ORG_INDEX_MAX_AGE,
+    fingerprint_type: str = "morgan",
+) -> OrgFingerprintIndex:
+    """
+    Get the cached fingerprint index for an organization.
+
+    The index is shared by all uploads processed in this worker. It is
+    loaded on first use, kept current from the change feed, and rebuilt from
+    a full snapshot once older than ``max_age`` seconds (or when it has not
+    synced within the change log retention window). Cold indexes may be
+    evicted to stay within the memory budget and are reloaded on next use.
+
+    Args:
+        db: Database session used when loading or syncing
+        organization_id: Organization ID
+        max_age: Maximum age in seconds before a full reload
+        fingerprint_type: Fingerprint type
+
+    Returns:
+        OrgFingerprintIndex for the organization
+    """
+    manager = get_org_index_manager()
+    async with manager.lock(organization_id, fingerprint_type):
+        index = manager.get(organization_id, fingerprint_type)
+        if index is None or index.age > max_age or (
+            index.sync_due() and needs_snapshot(index.synced_at_utc)
+        ):
+            index = await OrgFingerprintIndex.load(db, organization_id, fingerprint_type)
+            manager.put(organization_id, fingerprint_type, index)
+        elif index.sync_due():
+            await index.sync(db)
+            manager.resize(organization_id, fingerprint_type)
+        return index
+
+
+def invalidate_org_fingerprint_index(organization_id: uuid.UUID | None = None) -> None:
+    """
+    Drop cached indexes so the next lookup reloads from the database.
+
+    Args:
+        organization_id: Organization to drop, or None to drop all
+    """
+    get_org_index_manager().invalidate(organization_id)
+
+
+def record_inserted_molecule(
+    organization_id: uuid.UUID,
+    molecule_id: uuid.UUID,
+    inchi_key: str,
+    fingerprint: bytes | None,
+    fingerprint_type: str = "morgan",
+) -> None:
+    """
+    Append a newly inserted molecule to the organization's cached index.
+
+    Does nothing if the organization has no cached index; it will pick the
+    molecule up when it is next loaded.
+
+    Args:
+        organization_id: Organization ID
+        molecule_id: Inserted molecule ID
+        inchi_key: Inserted molecule InChIKey
+        fingerprint: Fingerprint bytes
+        fingerprint_type: Fingerprint type
+    """
+    manager = get_org_index_manager()
+    index = manager.peek(organization_id, fingerprint_type)
+    if index is not None:
+        index.add(molecule_id, inchi_key, fingerprint)
+        manager.resize(organization_id, fingerprint_type)
+
+
+def find_similar_within_batch(
+    fingerprints: list[bytes | None],
+    threshold: float,
+) -> list[list[tuple[int, float]]]:
+    """
+    Find, for each fingerprint, the earlier fingerprints it is similar to.
+
+    Args:
+        fingerprints: Batch fingerprints in row order (None entries are skipped)
+        threshold: Minimum Tanimoto similarity
+
+    Returns:
+        For each position, (earlier_position, similarity) pairs ordered by
+        similarity descending
+    """
+    earlier: list[list[tuple[int, float]]] = [[] for _ in fingerprints]
+
+    length_groups: dict[int, list[int]] = {}
+    for position, fp in enumerate(fingerprints):
+        if fp:
+            length_groups.setdefault(len(fp), []).append(position)
+
+    for num_bytes, positions in length_groups.items():
+        fps = [fingerprints[position] for position in positions]
+        matrix = FingerprintMatrix.from_bytes(fps, num_bytes=num_bytes)
+        for query_idx, target_idx, similarity in similarity_join(fps, matrix, threshold):
+            if target_idx < query_idx:
+                earlier[positions[query_idx]].append((positions[target_idx], similarity))
+
+    return earlier
@@ -0,0 +1,130 @@
+"""
+Incremental record splitting for streamed upload files.
+
+Upload files are read from storage as an async stream of byte chunks. The
+helpers here decode the stream incrementally and group it into complete
+records, one block per chunk, so parsers never hold more than a chunk's
+worth of text regardless of file size.
+
+Each helper yields lists (blocks) rather than single lines so the per-line
+work stays synchronous and cheap; only chunk boundaries hit the event loop.
+"""
+
+import codecs
+from collections.abc import AsyncIterator
+
+SDF_RECORD_TERMINATOR = "$$$$"
+
+
+async def iter_line_blocks(
+    chunks: AsyncIterator[bytes],
+    encoding: str = "utf-8",
+) -> AsyncIterator[list[str]]:
+    """
+    Decode a byte stream and yield its complete lines, block by block.
+
+    Lines keep their terminators (``"\\n"``; a preceding ``"\\r"`` is left in
+    place). The final line is yielded without a terminator if the stream
+    does not end with one.
+
+    Args:
+        chunks: Byte chunks of the file
+        encoding: Text encoding (decoding is strict)
+
+    Yields:
+        Non-empty lists of lines
+
+    Raises:
+        UnicodeDecodeError: If the stream is not valid in ``encoding``
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ""
+
+    async for chunk in chunks:
+        text = pending + decoder.decode(chunk)
+        end = text.rfind("\n") + 1
+        pending = text[end:]
+        if end:
+            yield _split_lines(text[:end])
+
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield [pending]
+
+
+def _split_lines(text: str) -> list[str]:
+    """Split text ending in ``"\\n"`` on ``"\\n"`` only, keeping terminators."""
+    lines = text.split("\n")
+    lines.pop()  # Empty remainder after the final terminator
+    return [line + "\n" for line in lines]
+
+
+async def iter_csv_blocks(
+    chunks: AsyncIterator[bytes],
+    encoding: str = "utf-8",
+) -> AsyncIterator[list[str]]:
+    """
+    Yield blocks of CSV lines that start and end on record boundaries.
+
+    A quoted field may span lines, so a block is only cut after a line that
+    leaves an even number of quote characters open. Feeding each block to
+    its own ``csv`` reader gives the same records as reading the whole file.
+
+    Args:
+        chunks: Byte chunks of the file
+        encoding: Text encoding
+
+    Yields:
+        Non-empty lists of lines
+    """
+    carry: list[str] = []
+
+    async for lines in iter_line_blocks(chunks, encoding):
+        lines = carry + lines  # Carried lines start on a record boundary
+        in_quotes = False
+        boundary = 0
+        for i, line in enumerate(lines):
+            if line.count('"') % 2:
+                in_quotes = not in_quotes
+            if not in_quotes:
+                boundary = i + 1
+        carry = lines[boundary:]
+        if boundary:
+            yield lines[:boundary]
+
+    # Unbalanced quotes at EOF; let the csv reader decide
+    if carry:
+        yield carry
+
+
+async def iter_sdf_blocks(
+    chunks: AsyncIterator[bytes],
+    encoding: str = "utf-8",
+) -> AsyncIterator[str]:
+    """
+    Yield blocks of complete SDF records as text.
+
+    Records end with a ``$$$$`` line. A trailing record without one is
+    yielded at the end of the stream.
+
+    Args:
+        chunks: Byte chunks of the file
+        encoding: Text encoding
+
+    Yields:
+        Text holding one or more complete records
+    """
+    carry: list[str] = []
+
+    async for lines in iter_line_blocks(chunks, encoding):
+        lines = carry + lines
+        boundary = 0
+        for i, line in enumerate(lines):
+            if line.rstrip() == SDF_RECORD_TERMINATOR:
+                boundary = i + 1
+        carry = lines[boundary:]
+        if boundary:
+            yield "".join(lines[:boundary])
+
+    if any(line.strip() for line in carry):
+        yield "".join(carry)
@@ -11,68 +11,134 @@ Handles:
 
 import asyncio
 import csv
-import hashlib
 import logging
 import time
 import uuid
+from collections import Counter
+from concurrent.futures import Executor
+from dataclasses import asdict, dataclass, fields
+from datetime import UTC, datetime
 from decimal import Decimal
-from io import BytesIO, StringIO
-from typing import AsyncIterator, NamedTuple
+from typing import AsyncIterator, BinaryIO, NamedTuple
 
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from apps.api.uploads.artifacts import ArtifactWriter, iter_artifact_batches
+from apps.api.uploads.compute import (
+    COMPUTE_CHUNK_SIZE,
+    MOLECULE_DESCRIPTOR_COLUMNS,
+    RDKIT_AVAILABLE,
+    ParsedRow,
+    ValidationResult,
+    compute_batches,
+)
 from apps.api.uploads.error_codes import UploadErrorCode
 from apps.api.uploads.file_detection import (
     detect_csv_columns,
     detect_excel_columns,
     infer_column_mapping,
 )
+from apps.api.uploads.progress import ProgressReporter, get_progress_redis
 from apps.api.uploads.service import UploadService
+from apps.api.uploads.sharding import (
+    SHARD_MIN_BYTES,
+    SHARD_MIN_ROWS,
+    SHARD_TARGET_BYTES,
+    SHARD_TARGET_ROWS,
+    ShardRange,
+    plan_row_shards,
+    plan_text_shards,
+    read_excel_max_row,
+    shard_target,
+)
+from apps.api.uploads.similarity_index import (
+    find_similar_within_batch,
+    get_org_fingerprint_index,
+    invalidate_org_fingerprint_index,
+    record_inserted_molecule,
+)
+from apps.api.uploads.streaming import (
+    iter_csv_blocks,
+    iter_line_blocks,
+    iter_sdf_blocks,
+)
 from db.models.discovery import Molecule
-from db.models.upload import DuplicateAction, FileType, Upload, UploadRowError
+from db.models.upload import DuplicateAction, FileType, ShardStatus, Upload, UploadShard
 
 logger = logging.getLogger(__name__)
 
-# Import chemistry utilities
-try:
-    from packages.chemistry import (
-        calculate_descriptors_rdkit,
-        calculate_morgan_fingerprint,
-        canonicalize_smiles,
-        validate_smiles,
-    )
-    from packages.chemistry.smiles import smiles_to_mol
+if RDKIT_AVAILABLE:
     from rdkit import Chem
-    from rdkit.Chem.inchi import MolToInchi, MolToInchiKey
 
-    RDKIT_AVAILABLE = True
-except ImportError:
-    RDKIT_AVAILABLE = False
 
+class UploadCheckpointed(Exception):
+    """Insertion stopped at a committed checkpoint before its deadline."""
+
+    def __init__(self, upload_id: uuid.UUID, processed_rows: int):
+        super().__init__(f"Upload {upload_id} checkpointed after row {processed_rows}")
+        self.upload_id = upload_id
+        self.processed_rows = processed_rows
+
+
+@dataclass
+class ValidationTotals:
+    """Row counters of a validation run (or of one shard)."""
+
+    total_rows: int = 0
+    valid_rows: int = 0
+    invalid_rows: int = 0
+    duplicate_exact: int = 0
+    duplicate_similar: int = 0
+
+
+@dataclass
+class InsertionTotals:
+    """Running totals of an insertion run, saved with each checkpoint."""
+
+    processed_rows: int = 0
+    molecules_created: int = 0
+    molecules_updated: int = 0
+    molecules_skipped: int = 0
+    errors_count: int = 0
+    exact_duplicates: int = 0
+    similar_duplicates: int = 0
+    verdict_changes: int = 0
+    elapsed_seconds: float = 0.0
+
+    @classmethod
+    def from_checkpoint(cls, checkpoint: dict | None) -> "InsertionTotals":
+        """Totals to resume from; zero without an insertion checkpoint."""
+        if not checkpoint or checkpoint.get("phase") != "inserting":
+            return cls()
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in checkpoint["totals"].items() if k in known})
+
+    def to_checkpoint(self) -> dict:
+        """JSON-serializable checkpoint for UploadProgress.checkpoint."""
+        return {"phase": "inserting", "totals": asdict(self)}
+
+    def add(self, other: "InsertionTotals") -> None:
+        """Add another run's totals, e.g. of a shard."""
+        for field in fields(self):
+            setattr(self, field.name, getattr(self, field.name) + getattr(other, field.name))
 
-class ParsedRow(NamedTuple):
-    """A parsed row from the upload file."""
 
-    row_number: int
-    smiles: str
-    name: str | None
-    external_id: str | None
-    raw_data: dict
+class BulkInsertResult(NamedTuple):
+    """Outcome of inserting a batch of new molecules."""
 
+    inserted: list[tuple[ValidationResult, uuid.UUID]]
+    conflicts: list[ValidationResult]  # InChIKey already existed at insert time
+    failed: list[ValidationResult]  # Row error recorded
 
-class ValidationResult(NamedTuple):
-    """Result of validating a single molecule."""
 
-    row_number: int
-    is_valid: bool
-    canonical_smiles: str | None
-    inchi: str | None
-    inchi_key: str | None
-    smiles_hash: str | None
-    mol: object | None  # RDKit Mol
-    error_code: UploadErrorCode | None
-    error_detail: str | None
-    raw_data: dict
+# Molecule fingerprint columns written on insert; every row carries all of
+# them (and all descriptor columns) so rows can share one multi-row INSERT
+MOLECULE_FINGERPRINT_COLUMNS = (
+    "fingerprint_morgan",
+    "fingerprint_maccs",
+    "fingerprint_rdkit",
+)
 
 
 class UploadProcessor:
@@ -84,14 +150,16 @@ class UploadProcessor:
 
     # Batch sizes
     PARSE_BATCH_SIZE = 100
-    VALIDATE_BATCH_SIZE = 50
+    VALIDATE_BATCH_SIZE = COMPUTE_CHUNK_SIZE  # Rows per compute task
     INSERT_BATCH_SIZE = 100
-    PROGRESS_UPDATE_INTERVAL = 50
+    PROGRESS_UPDATE_INTERVAL = 1.0  # Seconds between live progress publishes
 
     def __init__(
         self,
         db: AsyncSession,
         service: UploadService,
+        executor: Executor | None = None,
+        redis_client: Redis | None = None,
     ):
         """
         Initialize processor.
@@ -99,15 +167,30 @@ class UploadProcessor:
         Args:
             db: Database session
             service: Upload service instance
+            executor: Executor for RDKit computation (e.g. the shared process
+                pool); None computes inline on the event loop
+            redis_client: Async Redis client for live progress; None only
+                records progress at phase boundaries
         """
         self.db = db
         self.service = service
+        self.executor = executor
+        self.redis_client = redis_client
+        # Org-scoped InChIKey -> molecule ID map for the life of the job,
+        # plus keys known not to exist, so each key is queried at most once
+        self._molecule_ids: dict[str, uuid.UUID] = {}
+        self._missing_inchi_keys: set[str] = set()
 
     # =========================================================================
     # Main Processing Entry Points
     # =========================================================================
 
-    async def process_validation(self, upload: Upload) -> None:
+    async def process_validation(
+        self,
+        upload: Upload,
+        final_attempt: bool = True,
+        allow_sharding: bool = False,
+    ) -> list[UploadShard]:
         """
         Run validation on an upload.
 
@@ -119,210 +202,752 @@ class UploadProcessor:
         - Attempts to infer mapping
         - If SMILES column cannot be inferred, moves to AWAITING_CONFIRM with needs_column_mapping=True
 
+        Validation keeps no checkpoint: its artifact file is only stored at
+        the end, so a retried run starts over.
+
+        With ``allow_sharding``, a large file is instead split into shards
+        that are left for process_shard_validation jobs to validate.
+
         Args:
             upload: Upload to validate
+            final_attempt: Whether a failure is final; otherwise the upload
+                stays VALIDATING for a retried job
+            allow_sharding: Whether the caller can run shard jobs
+
+        Returns:
+            Shards still to be validated; empty if validated here
         """
+        progress = self._progress_reporter(upload)
         try:
             # Start validation
             await self.service.start_validation(upload)
-
-            # Get file content
-            file_content = await self.service.get_upload_file_content(upload)
+            await progress.update(phase="parsing")
 
             # For CSV/Excel, check column mapping
             if upload.file_type in (FileType.CSV, FileType.EXCEL):
-                needs_mapping = await self._check_column_mapping(upload, file_content)
+                needs_mapping = await self._check_column_mapping(upload)
                 if needs_mapping:
                     # Move to AWAITING_CONFIRM with needs_mapping flag
                     await self.service.complete_validation_needs_mapping(upload)
-                    return
-                # Reset file position after column check
-                file_content.seek(0)
+                    return []
+
+            if allow_sharding:
+                ranges = await self._plan_shards(upload)
+                if len(ranges) > 1:
+                    shards = await self.service.create_shards(upload, ranges)
+                    await progress.update(
+                        total_rows=upload.progress.total_rows if upload.progress else 0,
+                        phase="validating",
+                    )
+                    await progress.flush()
+                    logger.info(f"Upload {upload.id}: validating {len(shards)} shards")
+                    return shards
 
             # Parse and validate
-            total_rows = 0
-            valid_rows = 0
-            invalid_rows = 0
-            duplicate_exact = 0
-            duplicate_similar = 0
+            totals = ValidationTotals()
             seen_inchi_keys: set[str] = set()  # Track duplicates within batch
+            artifacts = ArtifactWriter()  # Computed rows, reused by insertion
+
+            # Stream and parse file based on type; compute runs ahead
+            batches = self._iter_validated_batches(upload, self._parse_file(upload))
+            async for results in batches:
+                await self._classify_rows(upload, results, seen_inchi_keys, artifacts, totals)
+
+                # Commit on the batch boundary; counters go to Redis
+                await self.db.commit()
+                await progress.update(
+                    processed_rows=totals.total_rows,
+                    valid_rows=totals.valid_rows,
+                    invalid_rows=totals.invalid_rows,
+                    duplicate_exact=totals.duplicate_exact,
+                    duplicate_similar=totals.duplicate_similar,
+                    phase="validating",
+                )
 
-            # Parse file based on type
-            async for batch in self._parse_file(upload, file_content):
-                # Validate batch
-                for result in await self._validate_batch(upload, batch, seen_inchi_keys):
-                    total_rows += 1
-
-                    if result.is_valid:
-                        # Check for duplicates
-                        dup_type = await self._check_duplicates(
-                            upload, result, seen_inchi_keys
-                        )
-                        if dup_type == "exact":
-                            duplicate_exact += 1
-                            if upload.duplicate_action == DuplicateAction.ERROR:
-                                invalid_rows += 1
-                            else:
-                                valid_rows += 1
-                        elif dup_type == "similar":
-                            duplicate_similar += 1
-                            if upload.duplicate_action == DuplicateAction.ERROR:
-                                invalid_rows += 1
-                            else:
-                                valid_rows += 1
-                        elif dup_type == "batch":
-                            # Duplicate within this upload
-                            invalid_rows += 1
-                        else:
-                            valid_rows += 1
-                            if result.inchi_key:
-                                seen_inchi_keys.add(result.inchi_key)
-                    else:
-                        invalid_rows += 1
-
-                    # Update progress periodically
-                    if total_rows % self.PROGRESS_UPDATE_INTERVAL == 0:
-                        await self.service.update_progress(
-                            upload,
-                            processed_rows=total_rows,
-                            valid_rows=valid_rows,
-                            invalid_rows=invalid_rows,
-                            duplicate_exact=duplicate_exact,
-                            duplicate_similar=duplicate_similar,
-                            phase="validating",
-                        )
+            # Persist computed artifacts; insertion recomputes if this fails
+            try:
+                await self.service.save_upload_artifacts(upload, artifacts.getfile())
+            except Exception as e:
+                logger.warning(f"Failed to store artifacts for upload {upload.id}: {e}")
+            finally:
+                artifacts.close()
 
             # Complete validation
-            await self.service.complete_validation(
-                upload,
-                total_rows=total_rows,
-                valid_rows=valid_rows,
-                invalid_rows=invalid_rows,
-                duplicate_exact=duplicate_exact,
-                duplicate_similar=duplicate_similar,
-            )
+            await self.service.complete_validation(upload, **asdict(totals))
+            await progress.clear()
+            return []
 
         except Exception as e:
+            if not final_attempt:
+                await self.db.rollback()
+                raise
             await self.service.fail_upload(upload, str(e))
+            await progress.clear()
             raise
 
-    async def process_insertion(self, upload: Upload) -> None:
+    async def process_shard_validation(
+        self,
+        upload: Upload,
+        shard: UploadShard,
+        final_attempt: bool = True,
+    ) -> bool:
         """
-        Insert validated molecules into the database.
+        Validate one shard of a sharded upload.
 
-        Called after user confirms the upload.
-        Transitions upload from PROCESSING -> COMPLETED/FAILED.
+        The shard's artifacts, counters and row errors are committed in one
+        transaction at the end, so a retried run starts the shard over.
+        Duplicates within the upload are only detected within the shard;
+        merge_shard_validation reconciles them across shards.
 
         Args:
-            upload: Confirmed upload to process
+            upload: Upload in VALIDATING state
+            shard: Shard to validate
+            final_attempt: Whether a failure is final (fails the upload)
+
+        Returns:
+            True if every shard of the upload is now validated
         """
-        start_time = time.time()
+        progress = self._progress_reporter(upload, replace=False)
+        self.service.use_shard(upload, shard)
+        try:
+            totals = ValidationTotals()
+            seen_inchi_keys: set[str] = set()
+            artifacts = ArtifactWriter()
+            try:
+                batches = self._iter_validated_batches(upload, self._parse_file(upload, shard))
+                async for results in batches:
+                    await self._classify_rows(upload, results, seen_inchi_keys, artifacts, totals)
+                    await progress.increment(processed_rows=len(results))
+                await self.service.save_shard_artifacts(upload, shard, artifacts.getfile())
+            finally:
+                artifacts.close()
+
+            for name, value in asdict(totals).items():
+                setattr(shard, name, value)
+            done = await self.service.complete_shard(upload, shard, ShardStatus.VALIDATED)
+            await progress.flush()
+            return done
 
+        except Exception as e:
+            if not final_attempt:
+                await self.db.rollback()
+                raise
+            await self.service.fail_upload(upload, f"Shard {shard.shard_index}: {e}")
+            raise
+
+    async def merge_shard_validation(self, upload: Upload, final_attempt: bool = True) -> None:
+        """
+        Reconcile validated shards and complete the upload's validation.
+
+        Each shard counted its first occurrence of a molecule as new, even if
+        an earlier shard has it too. Shard artifacts are read in file order
+        and such repeats are reclassified as duplicates within the upload,
+        as a single run would have classified them; artifacts with changed
+        verdicts are rewritten for insertion.
+
+        Args:
+            upload: Upload in VALIDATING state whose shards are all validated
+            final_attempt: Whether a failure is final (fails the upload)
+        """
+        progress = self._progress_reporter(upload)
         try:
-            # Get file content
-            file_content = await self.service.get_upload_file_content(upload)
+            shards = await self.service.get_shards(upload)
+            if any(shard.status != ShardStatus.VALIDATED for shard in shards):
+                raise ValueError(f"Upload {upload.id} has shards that are not validated")
+
+            totals = ValidationTotals(**{
+                name: sum(getattr(shard, name) for shard in shards)
+                for name in asdict(ValidationTotals())
+            })
+            # Shard counts move to the upload; insertion counts start afresh
+            error_counts: Counter[str] = Counter()
+            for shard in shards:
+                error_counts.update(shard.error_counts or {})
+                shard.error_counts = None
+            if upload.progress:
+                upload.progress.error_counts = dict(error_counts)
 
-            # Track results
-            molecules_created = 0
-            molecules_updated = 0
-            molecules_skipped = 0
-            errors_count = 0
-            exact_duplicates = 0
-            similar_duplicates = 0
             seen_inchi_keys: set[str] = set()
-            processed_rows = 0
+            for shard in shards:
+                repeats = await self._reconcile_shard(upload, shard, seen_inchi_keys)
+                # Repeats were counted valid by their shard
+                totals.valid_rows -= repeats
+                totals.invalid_rows += repeats
 
-            # Process file
-            async for batch in self._parse_file(upload, file_content):
-                for result in await self._validate_batch(upload, batch, seen_inchi_keys):
-                    processed_rows += 1
+            await self.service.complete_validation(upload, **asdict(totals))
+            await progress.clear()
 
-                    if not result.is_valid:
-                        errors_count += 1
-                        continue
+        except Exception as e:
+            if not final_attempt:
+                await self.db.rollback()
+                raise
+            await self.service.fail_upload(upload, str(e))
+            await progress.clear()
+            raise
 
-                    # Check duplicates
-                    dup_type = await self._check_duplicates(
-                        upload, result, seen_inchi_keys, record_errors=False
-                    )
+    async def _reconcile_shard(
+        self,
+        upload: Upload,
+        shard: UploadShard,
+        seen_inchi_keys: set[str],
+    ) -> int:
+        """
+        Mark rows of a shard that repeat a molecule of an earlier shard.
 
-                    if dup_type == "batch":
-                        # Skip duplicates within batch
-                        molecules_skipped += 1
-                        continue
+        Args:
+            upload: Upload record
+            shard: Validated shard
+            seen_inchi_keys: New molecules of earlier shards; updated with
+                this shard's
 
-                    if dup_type == "exact":
-                        exact_duplicates += 1
-                        if upload.duplicate_action == DuplicateAction.SKIP:
-                            molecules_skipped += 1
-                            continue
-                        elif upload.duplicate_action == DuplicateAction.UPDATE:
-                            await self._update_molecule(upload, result)
-                            molecules_updated += 1
-                            continue
-                        else:  # ERROR - should have been caught in validation
-                            errors_count += 1
-                            continue
+        Returns:
+            Number of rows reclassified as duplicates within the upload
+        """
+        artifacts = await self.service.get_upload_artifacts(upload, shard)
+        if artifacts is None:
+            raise ValueError(f"Artifacts of shard {shard.shard_index} are missing")
 
-                    if dup_type == "similar":
-                        similar_duplicates += 1
-                        if upload.duplicate_action in (DuplicateAction.SKIP, DuplicateAction.UPDATE):
-                            molecules_skipped += 1
-                            continue
-                        else:
-                            errors_count += 1
-                            continue
+        rewritten = ArtifactWriter()
+        repeats = 0
+        try:
+            for results, verdicts in iter_artifact_batches(artifacts):
+                for i, result in enumerate(results):
+                    if verdicts[i] is not None or not result.is_valid or not result.inchi_key:
+                        continue
+                    if result.inchi_key not in seen_inchi_keys:
+                        seen_inchi_keys.add(result.inchi_key)
+                        continue
 
-                    # Insert new molecule
-                    try:
-                        await self._insert_molecule(upload, result)
-                        molecules_created += 1
-                        if result.inchi_key:
-                            seen_inchi_keys.add(result.inchi_key)
-                    except Exception as e:
-                        errors_count += 1
+                    verdicts[i] = "batch"
+                    repeats += 1
+                    if upload.duplicate_action == DuplicateAction.ERROR:
                         await self.service.add_row_error(
                             upload,
                             result.row_number,
-                            UploadErrorCode.DB_INSERT_FAILED,
-                            str(e),
+                            UploadErrorCode.DUPLICATE_IN_BATCH,
+                            "Duplicate of another row in this upload",
                             raw_data=result.raw_data,
+                            duplicate_inchi_key=result.inchi_key,
                         )
+                rewritten.write_batch(results, verdicts)
+                await asyncio.sleep(0)  # Yield control
 
-                    # Update progress
-                    if processed_rows % self.PROGRESS_UPDATE_INTERVAL == 0:
-                        await self.service.update_progress(
-                            upload,
-                            processed_rows=processed_rows,
-                            phase="inserting",
-                        )
+            if repeats:
+                await self.service.save_shard_artifacts(upload, shard, rewritten.getfile())
+        finally:
+            artifacts.close()
+            rewritten.close()
+        return repeats
+
+    async def process_insertion(
+        self,
+        upload: Upload,
+        deadline: float | None = None,
+        final_attempt: bool = True,
+    ) -> None:
+        """
+        Insert validated molecules into the database.
+
+        Called after user confirms the upload.
+        Transitions upload from PROCESSING -> COMPLETED/FAILED.
+
+        Every insert batch is committed together with a checkpoint (rows
+        consumed and running totals), and a run that finds a checkpoint
+        resumes after it. A worker crash or timeout therefore only repeats
+        the batch in flight.
+
+        Args:
+            upload: Confirmed upload to process
+            deadline: time.monotonic() value after which to stop at the next
+                checkpoint by raising UploadCheckpointed; None runs to the end
+            final_attempt: Whether a failure is final; otherwise the upload
+                stays PROCESSING so a retried job resumes from the checkpoint
+
+        Raises:
+            UploadCheckpointed: The deadline passed; work so far is committed
+        """
+        progress = self._progress_reporter(upload)
+        checkpoint = upload.progress.checkpoint if upload.progress else None
+        totals = InsertionTotals.from_checkpoint(checkpoint)
+        start_time = time.time() - totals.elapsed_seconds
+
+        try:
+            if totals.processed_rows:
+                # Molecules this upload inserted before the checkpoint are
+                # repeats for later rows, as if seen in this run
+                seen_inchi_keys = await self.service.get_inserted_inchi_keys(upload)
+                logger.info(
+                    f"Upload {upload.id}: resuming insertion after row {totals.processed_rows}"
+                )
+            else:
+                seen_inchi_keys = set()
+            await progress.update(processed_rows=totals.processed_rows, phase="inserting")
+
+            # Process computed rows (from validation artifacts when available)
+            async for results, verdicts in self._iter_computed_batches(
+                upload, seen_inchi_keys, skip_rows=totals.processed_rows
+            ):
+                await self._insert_batch(upload, results, verdicts, totals, seen_inchi_keys)
+
+                # Commit the batch with its checkpoint, then publish what is now visible
+                totals.elapsed_seconds = time.time() - start_time
+                await self.service.save_checkpoint(upload, totals.to_checkpoint())
+                await self.db.commit()
+                await progress.update(processed_rows=totals.processed_rows, phase="inserting")
+
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise UploadCheckpointed(upload.id, totals.processed_rows)
+
+            if totals.verdict_changes:
+                logger.info(
+                    f"Upload {upload.id}: {totals.verdict_changes} duplicate verdicts changed "
+                    "between validation and insertion"
+                )
+            await self.service.delete_upload_artifacts(upload)
 
             # Complete
             duration = time.time() - start_time
             await self.service.complete_processing(
                 upload,
-                molecules_created=molecules_created,
-                molecules_updated=molecules_updated,
-                molecules_skipped=molecules_skipped,
-                errors_count=errors_count,
-                exact_duplicates=exact_duplicates,
-                similar_duplicates=similar_duplicates,
+                molecules_created=totals.molecules_created,
+                molecules_updated=totals.molecules_updated,
+                molecules_skipped=totals.molecules_skipped,
+                errors_count=totals.errors_count,
+                exact_duplicates=totals.exact_duplicates,
+                similar_duplicates=totals.similar_duplicates,
                 duration_seconds=duration,
+                processed_rows=totals.processed_rows,
             )
+            await progress.clear()
+
+        except UploadCheckpointed:
+            raise
 
         except Exception as e:
+            # Molecules appended to the cached index were rolled back
+            invalidate_org_fingerprint_index(upload.organization_id)
+            if not final_attempt:
+                # Left PROCESSING; the retry resumes from the last checkpoint
+                await self.db.rollback()
+                raise
             await self.service.fail_upload(upload, str(e))
+            await progress.clear()
             raise
 
+    async def process_shard_insertion(
+        self,
+        upload: Upload,
+        shard: UploadShard,
+        deadline: float | None = None,
+        final_attempt: bool = True,
+    ) -> bool:
+        """
+        Insert the validated molecules of one shard.
+
+        Works like process_insertion over the shard's artifacts, with the
+        checkpoint and row error counts kept on the shard. Rows the
+        validation merge marked as repeats of an earlier shard are left to
+        that shard.
+
+        Args:
+            upload: Upload in PROCESSING state
+            shard: Validated shard to insert
+            deadline: time.monotonic() value after which to stop at the next
+                checkpoint by raising UploadCheckpointed; None runs to the end
+            final_attempt: Whether a failure is final (fails the upload)
+
+        Returns:
+            True if every shard of the upload is now inserted
+
+        Raises:
+            UploadCheckpointed: The deadline passed; work so far is committed
+        """
+        progress = self._progress_reporter(upload, replace=False)
+        self.service.use_shard(upload, shard)
+        totals = InsertionTotals.from_checkpoint(shard.checkpoint)
+        start_time = time.time() - totals.elapsed_seconds
+
+        try:
+            if totals.processed_rows:
+                seen_inchi_keys = await self.service.get_inserted_inchi_keys(upload)
+            else:
+                seen_inchi_keys = set()
+
+            async for results, verdicts in self._iter_computed_batches(
+                upload, seen_inchi_keys, skip_rows=totals.processed_rows, shard=shard
+            ):
+                await self._insert_batch(
+                    upload, results, verdicts, totals, seen_inchi_keys, from_shard=True
+                )
+
+                totals.elapsed_seconds = time.time() - start_time
+                await self.service.save_checkpoint(upload, totals.to_checkpoint())
+                await self.db.commit()
+                await progress.increment(processed_rows=len(results))
+
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise UploadCheckpointed(upload.id, totals.processed_rows)
+
+            done = await self.service.complete_shard(upload, shard, ShardStatus.INSERTED)
+            await progress.flush()
+            return done
+
+        except UploadCheckpointed:
+            await progress.flush()
+            raise
+
+        except Exception as e:
+            invalidate_org_fingerprint_index(upload.organization_id)
+            if not final_attempt:
+                await self.db.rollback()
+                raise
+            await self.service.fail_upload(upload, f"Shard {shard.shard_index}: {e}")
+            raise
+
+    async def merge_shard_insertion(self, upload: Upload, final_attempt: bool = True) -> None:
+        """
+        Add up the inserted shards and complete the upload with one summary.
+
+        Args:
+            upload: Upload in PROCESSING state whose shards are all inserted
+            final_attempt: Whether a failure is final (fails the upload)
+        """
+        progress = self._progress_reporter(upload)
+        try:
+            shards = await self.service.get_shards(upload)
+            if any(shard.status != ShardStatus.INSERTED for shard in shards):
+                raise ValueError(f"Upload {upload.id} has shards that are not inserted")
+
+            totals = InsertionTotals()
+            error_counts: Counter[str] = Counter(
+                upload.progress.error_counts if upload.progress else None
+            )
+            for shard in shards:
+                totals.add(InsertionTotals.from_checkpoint(shard.checkpoint))
+                error_counts.update(shard.error_counts or {})
+            if upload.progress:
+                upload.progress.error_counts = dict(error_counts)
+
+            if totals.verdict_changes:
+                logger.info(
+                    f"Upload {upload.id}: {totals.verdict_changes} duplicate verdicts changed "
+                    "between validation and insertion"
+                )
+            await self.service.delete_shard_artifacts(upload)
+
+            # Shards ran in parallel; report the wall-clock time
+            if upload.confirmed_at:
+                duration = (datetime.now(UTC) - upload.confirmed_at).total_seconds()
+            else:
+                duration = totals.elapsed_seconds
+            await self.service.complete_processing(
+                upload,
+                molecules_created=totals.molecules_created,
+                molecules_updated=totals.molecules_updated,
+                molecules_skipped=totals.molecules_skipped,
+                errors_count=totals.errors_count,
+                exact_duplicates=totals.exact_duplicates,
+                similar_duplicates=totals.similar_duplicates,
+                duration_seconds=duration,
+                processed_rows=totals.processed_rows,
+            )
+            await progress.clear()
+
+        except Exception as e:
+            if not final_attempt:
+                await self.db.rollback()
+                raise
+            await self.service.fail_upload(upload, str(e))
+            await progress.clear()
+            raise
+
+    async def _classify_rows(
+        self,
+        upload: Upload,
+        results: list[ValidationResult],
+        seen_inchi_keys: set[str],
+        artifacts: ArtifactWriter,
+        totals: ValidationTotals,
+    ) -> None:
+        """
+        Classify duplicates in a batch of validated rows and count them.
+
+        Args:
+            upload: Upload record
+            results: Validated rows
+            seen_inchi_keys: New molecules of earlier batches; updated with
+                this batch's
+            artifacts: Writer the computed rows and verdicts are added to
+            totals: Counters updated with this batch's rows
+        """
+        # Resolve duplicates for the whole batch
+        dup_types = await self._check_duplicates_batch(upload, results, seen_inchi_keys)
+        artifacts.write_batch(results, dup_types)
+
+        for result, dup_type in zip(results, dup_types, strict=True):
+            totals.total_rows += 1
+
+            if result.is_valid:
+                if dup_type == "exact":
+                    totals.duplicate_exact += 1
+                    if upload.duplicate_action == DuplicateAction.ERROR:
+                        totals.invalid_rows += 1
+                    else:
+                        totals.valid_rows += 1
+                elif dup_type == "similar":
+                    totals.duplicate_similar += 1
+                    if upload.duplicate_action == DuplicateAction.ERROR:
+                        totals.invalid_rows += 1
+                    else:
+                        totals.valid_rows += 1
+                elif dup_type == "batch":
+                    # Duplicate within this upload
+                    totals.invalid_rows += 1
+                else:
+                    totals.valid_rows += 1
+                    if result.inchi_key:
+                        seen_inchi_keys.add(result.inchi_key)
+            else:
+                totals.invalid_rows += 1
+
+    async def _insert_batch(
+        self,
+        upload: Upload,
+        results: list[ValidationResult],
+        verdicts: list[str | None] | None,
+        totals: InsertionTotals,
+        seen_inchi_keys: set[str],
+        from_shard: bool = False,
+    ) -> None:
+        """
+        Insert, update or skip the molecules of a batch of computed rows.
+
+        Not committed here.
+
+        Args:
+            upload: Upload record
+            results: Computed rows, in row order
+            verdicts: Duplicate verdicts from validation, if stored
+            totals: Running totals, updated with this batch's rows
+            seen_inchi_keys: Molecules already inserted by this upload;
+                updated with this batch's
+            from_shard: Rows belong to a shard; keep validation's verdicts
+                for duplicates within the upload, which span shards
+        """
+        if from_shard and verdicts is not None:
+            # Repeats of an earlier shard's rows, inserted by that shard
+            new_keys = {
+                r.inchi_key
+                for r, verdict in zip(results, verdicts, strict=True)
+                if verdict is None
+            }
+            seen_inchi_keys.update(
+                r.inchi_key for r, verdict in zip(results, verdicts, strict=True)
+                if verdict == "batch" and r.inchi_key and r.inchi_key not in new_keys
+            )
+
+        dup_types = await self._check_duplicates_batch(
+            upload,
+            results,
+            seen_inchi_keys,
+            record_errors=False,
+            match_within_batch=True,
+        )
+        if verdicts is not None:
+            totals.verdict_changes += sum(
+                1 for result, old, new in zip(results, verdicts, dup_types, strict=True)
+                if result.is_valid and old != new
+            )
+
+        to_update: dict[uuid.UUID, Molecule] = {}
+        if upload.duplicate_action == DuplicateAction.UPDATE:
+            to_update = await self.service.get_molecules_by_ids(
+                upload.organization_id,
+                [
+                    self._molecule_ids[result.inchi_key]
+                    for result, dup_type in zip(results, dup_types, strict=True)
+                    if dup_type == "exact"
+                ],
+            )
+
+        to_insert: list[ValidationResult] = []
+        for result, dup_type in zip(results, dup_types, strict=True):
+            totals.processed_rows += 1
+
+            if not result.is_valid:
+                totals.errors_count += 1
+                continue
+
+            if dup_type == "batch":
+                # Skip duplicates within batch
+                totals.molecules_skipped += 1
+                continue
+
+            if dup_type == "exact":
+                totals.exact_duplicates += 1
+                if upload.duplicate_action == DuplicateAction.SKIP:
+                    totals.molecules_skipped += 1
+                    continue
+                elif upload.duplicate_action == DuplicateAction.UPDATE:
+                    await self._update_molecule(
+                        upload,
+                        result,
+                        to_update.get(self._molecule_ids[result.inchi_key]),
+                    )
+                    totals.molecules_updated += 1
+                    continue
+                else:  # ERROR - should have been caught in validation
+                    totals.errors_count += 1
+                    continue
+
+            if dup_type == "similar":
+                totals.similar_duplicates += 1
+                if upload.duplicate_action in (DuplicateAction.SKIP, DuplicateAction.UPDATE):
+                    totals.molecules_skipped += 1
+                    continue
+                else:
+                    totals.errors_count += 1
+                    continue
+
+            # Queue new molecule for bulk insertion
+            to_insert.append(result)
+
+        # Insert the batch's new molecules with multi-row INSERTs
+        if to_insert:
+            outcome = await self._insert_molecules(upload, to_insert)
+            totals.molecules_created += len(outcome.inserted)
+            totals.errors_count += len(outcome.failed)
+            # Key appeared since the duplicate check (e.g. concurrent upload)
+            totals.exact_duplicates += len(outcome.conflicts)
+            totals.molecules_skipped += len(outcome.conflicts)
+
+            for result, molecule_id in outcome.inserted:
+                seen_inchi_keys.add(result.inchi_key)
+                self._molecule_ids[result.inchi_key] = molecule_id
+                self._missing_inchi_keys.discard(result.inchi_key)
+                record_inserted_molecule(
+                    upload.organization_id,
+                    molecule_id,
+                    result.inchi_key,
+                    result.fingerprint_morgan,
+                )
+
+    def _progress_reporter(self, upload: Upload, replace: bool = True) -> ProgressReporter:
+        """Live progress reporter for one run over an upload (or one of its shards)."""
+        return ProgressReporter(
+            self.redis_client,
+            upload.id,
+            min_interval=self.PROGRESS_UPDATE_INTERVAL,
+            replace=replace,
+        )
+
+    async def _iter_computed_batches(
+        self,
+        upload: Upload,
+        seen_inchi_keys: set[str],
+        skip_rows: int = 0,
+        shard: UploadShard | None = None,
+    ) -> AsyncIterator[tuple[list[ValidationResult], list[str | None] | None]]:
+        """
+        Yield computed rows for insertion, batch by batch.
+
+        Streams the artifacts stored during validation when available, so no
+        RDKit work is repeated. Otherwise re-parses and re-validates the file.
+
+        Args:
+            upload: Upload record
+            seen_inchi_keys: InChIKeys already seen in this upload
+            skip_rows: Leading rows already processed by an earlier run;
+                when re-parsing they are not re-validated
+            shard: Shard to read instead of the whole upload
+
+        Yields:
+            Tuple of (validation results, validation-time duplicate verdicts
+            or None when recomputed)
+        """
+        artifacts = await self.service.get_upload_artifacts(upload, shard)
+        if artifacts is not None:
+            try:
+                for results, verdicts in iter_artifact_batches(artifacts):
+                    if skip_rows:
+                        skipped = min(skip_rows, len(results))
+                        skip_rows -= skipped
+                        results, verdicts = results[skipped:], verdicts[skipped:]
+                        if not results:
+                            continue
+                    yield results, verdicts
+                    await asyncio.sleep(0)  # Yield control
+            finally:
+                artifacts.close()
+            return
+
+        async def remaining_rows() -> AsyncIterator[list[ParsedRow]]:
+            nonlocal skip_rows
+            async for batch in self._parse_file(upload, shard):
+                if skip_rows:
+                    skipped = min(skip_rows, len(batch))
+                    skip_rows -= skipped
+                    batch = batch[skipped:]
+                    if not batch:
+                        continue
+                yield batch
+
+        async for results in self._iter_validated_batches(upload, remaining_rows()):
+            yield results, None
+
+    # =========================================================================
+    # Shard Planning
+    # =========================================================================
+
+    async def _plan_shards(self, upload: Upload) -> list[ShardRange]:
+        """
+        Plan record-aligned shards for a large upload file.
+
+        Args:
+            upload: Upload record
+
+        Returns:
+            Shard ranges in file order; empty if the file is too small to shard
+        """
+        if upload.file_type == FileType.EXCEL:
+            return await self._plan_excel_shards(upload)
+
+        size = upload.file.file_size_bytes if upload.file else 0
+        if size < SHARD_MIN_BYTES:
+            return []
+        chunks = self.service.iter_upload_file_chunks(upload)
+        try:
+            return await plan_text_shards(
+                chunks, upload.file_type, shard_target(size, SHARD_TARGET_BYTES)
+            )
+        finally:
+            await chunks.aclose()
+
+    async def _plan_excel_shards(self, upload: Upload) -> list[ShardRange]:
+        """Plan shards of worksheet rows from the workbook's recorded dimensions."""
+        size = upload.file.file_size_bytes if upload.file else 0
+        if not size:
+            return []
+
+        async def read_range(start: int, end: int) -> bytes:
+            chunks = self.service.iter_upload_file_chunks(upload, start, end)
+            try:
+                return b"".join([chunk async for chunk in chunks])
+            finally:
+                await chunks.aclose()
+
+        max_row = await read_excel_max_row(read_range, size)
+
+        # Without a recorded dimension the row count is unknown
+        if not max_row or max_row - 1 < SHARD_MIN_ROWS:
+            return []
+        return plan_row_shards(2, max_row + 1, shard_target(max_row - 1, SHARD_TARGET_ROWS))
+
     # =========================================================================
     # Column Mapping Check (CSV/Excel)
     # =========================================================================
 
-    async def _check_column_mapping(
-        self,
-        upload: Upload,
-        file_content: BytesIO,
-    ) -> bool:
+    async def _check_column_mapping(self, upload: Upload) -> bool:
         """
         Check if column mapping is needed for CSV/Excel files.
 
@@ -331,7 +956,6 @@ class UploadProcessor:
 
         Args:
             upload: Upload record
-            file_content: File content
 
         Returns:
             True if user needs to provide mapping, False if we can proceed
@@ -341,13 +965,14 @@ class UploadProcessor:
             return False
 
         # Detect columns from file
-        content = file_content.read()
-        file_content.seek(0)
-
         if upload.file_type == FileType.CSV:
-            columns = detect_csv_columns(content)
+            columns = detect_csv_columns(await self._read_header(upload))
         elif upload.file_type == FileType.EXCEL:
-            columns = detect_excel_columns(content)
+            file_content = await self.service.get_upload_file_content(upload)
+            try:
+                columns = detect_excel_columns(file_content)
+            finally:
+                file_content.close()
         else:
             return False
 
@@ -383,71 +1008,127 @@ class UploadProcessor:
     # File Parsing
     # =========================================================================
 
+    async def _read_header(self, upload: Upload) -> bytes:
+        """Read the file up to the end of its first line."""
+        header = b""
+        chunks = self.service.iter_upload_file_chunks(upload)
+        try:
+            async for chunk in chunks:
+                header += chunk
+                if b"\n" in chunk:
+                    break
+        finally:
+            await chunks.aclose()
+        return header.split(b"\n", 1)[0]
+
     async def _parse_file(
         self,
         upload: Upload,
-        file_content: BytesIO,
+        shard: UploadShard | None = None,
     ) -> AsyncIterator[list[ParsedRow]]:
         """
-        Parse upload file and yield batches of rows.
+        Stream the upload file from storage and yield batches of rows.
+
+        Text formats are parsed incrementally, so memory use does not grow
+        with file size.
 
         Args:
             upload: Upload record
-            file_content: File content
+            shard: Shard to parse instead of the whole file; row numbers
+                are still those of the whole file
 
         Yields:
             Batches of ParsedRow objects
         """
+        if upload.file_type == FileType.EXCEL:
+            # XLSX is a zip archive and needs random access
+            file_content = await self.service.get_upload_file_content(upload)
+            if shard is not None:
+                rows = {"min_row": shard.start_offset, "max_row": shard.end_offset - 1}
+            else:
+                rows = {}
+            try:
+                async for batch in self._parse_excel(upload, file_content, **rows):
+                    yield batch
+            finally:
+                file_content.close()
+            return
+
         if upload.file_type == FileType.CSV:
-            async for batch in self._parse_csv(upload, file_content):
-                yield batch
-        elif upload.file_type == FileType.EXCEL:
-            async for batch in self._parse_excel(upload, file_content):
-                yield batch
+            parser = self._parse_csv
         elif upload.file_type == FileType.SDF:
-            async for batch in self._parse_sdf(upload, file_content):
-                yield batch
+            parser = self._parse_sdf
         elif upload.file_type == FileType.SMILES_LIST:
-            async for batch in self._parse_smiles_list(upload, file_content):
-                yield batch
+            parser = self._parse_smiles_list
         else:
             raise ValueError(f"Unsupported file type: {upload.file_type}")
 
+        if shard is None:
+            chunks = self.service.iter_upload_file_chunks(upload)
+            options = {}
+        else:
+            chunks = self.service.iter_upload_file_chunks(
+                upload, start=shard.start_offset, end=shard.end_offset
+            )
+            options = {"row_number": shard.row_offset}
+            if upload.file_type == FileType.CSV and shard.start_offset > 0:
+                # Only the first shard holds the header
+                header = (await self._read_header(upload)).decode("utf-8", errors="replace")
+                options["fieldnames"] = next(csv.reader([header]), [])
+        try:
+            async for batch in parser(upload, chunks, **options):
+                yield batch
+        finally:
+            await chunks.aclose()
+
     async def _parse_csv(
         self,
         upload: Upload,
-        file_content: BytesIO,
+        chunks: AsyncIterator[bytes],
+        fieldnames: list[str] | None = None,
+        row_number: int = 1,
     ) -> AsyncIterator[list[ParsedRow]]:
-        """Parse CSV file."""
+        """
+        Parse a streamed CSV file.
+
+        Args:
+            upload: Upload record
+            chunks: Byte chunks of the file (or of a shard)
+            fieldnames: Header of a shard without one; None reads the first row
+            row_number: Row number before the first row in ``chunks``
+        """
         mapping = upload.column_mapping or {}
         smiles_col = mapping.get("smiles", "smiles")
         name_col = mapping.get("name")
         external_id_col = mapping.get("external_id")
 
-        # Decode content
-        text_content = file_content.read().decode("utf-8")
-        reader = csv.DictReader(StringIO(text_content))
-
         batch: list[ParsedRow] = []
-        row_number = 1  # 1-based, row 1 is header
+        # Row numbers are 1-based and row 1 is the header; without given
+        # fieldnames they are read from the first block
 
-        for row in reader:
-            row_number += 1
-            smiles = row.get(smiles_col, "").strip()
+        # Blocks end on record boundaries, so each gets its own reader
+        async for lines in iter_csv_blocks(chunks):
+            reader = csv.DictReader(lines, fieldnames=fieldnames)
 
-            parsed = ParsedRow(
-                row_number=row_number,
-                smiles=smiles,
-                name=row.get(name_col, "").strip() if name_col else None,
-                external_id=row.get(external_id_col, "").strip() if external_id_col else None,
-                raw_data=dict(row),
-            )
-            batch.append(parsed)
+            for row in reader:
+                row_number += 1
+                smiles = row.get(smiles_col, "").strip()
 
-            if len(batch) >= self.PARSE_BATCH_SIZE:
-                yield batch
-                batch = []
-                await asyncio.sleep(0)  # Yield control
+                parsed = ParsedRow(
+                    row_number=row_number,
+                    smiles=smiles,
+                    name=row.get(name_col, "").strip() if name_col else None,
+                    external_id=row.get(external_id_col, "").strip() if external_id_col else None,
+                    raw_data=dict(row),
+                )
+                batch.append(parsed)
+
+                if len(batch) >= self.PARSE_BATCH_SIZE:
+                    yield batch
+                    batch = []
+                    await asyncio.sleep(0)  # Yield control
+
+            fieldnames = reader.fieldnames
 
         if batch:
             yield batch
@@ -455,13 +1136,25 @@ class UploadProcessor:
     async def _parse_excel(
         self,
         upload: Upload,
-        file_content: BytesIO,
+        file_content: BinaryIO,
+        min_row: int = 2,
+        max_row: int | None = None,
     ) -> AsyncIterator[list[ParsedRow]]:
-        """Parse Excel file."""
+        """
+        Parse Excel file.
+
+        Args:
+            upload: Upload record
+            file_content: Workbook file
+            min_row: First worksheet row to parse (row 1 is the header)
+            max_row: Last worksheet row to parse; None parses to the end
+        """
         try:
             import openpyxl
-        except ImportError:
-            raise ImportError("openpyxl is required for Excel parsing. Install with: pip install openpyxl")
+        except ImportError as e:
+            raise ImportError(
+                "openpyxl is required for Excel parsing. Install with: pip install openpyxl"
+            ) from e
 
         mapping = upload.column_mapping or {}
         smiles_col = mapping.get("smiles", "smiles")
@@ -469,8 +1162,7 @@ class UploadProcessor:
         external_id_col = mapping.get("external_id")
 
         # Load workbook
-        content = file_content.read()
-        wb = openpyxl.load_workbook(BytesIO(content), read_only=True)
+        wb = openpyxl.load_workbook(file_content, read_only=True)
         ws = wb.active
 
         if not ws:
@@ -485,7 +1177,7 @@ class UploadProcessor:
         # Find column indices
         try:
             smiles_idx = headers.index(smiles_col)
-        except ValueError:
+        except ValueError as e:
             # Try case-insensitive match
             smiles_idx = None
             for i, h in enumerate(headers):
@@ -493,7 +1185,9 @@ class UploadProcessor:
                     smiles_idx = i
                     break
             if smiles_idx is None:
-                raise ValueError(f"SMILES column '{smiles_col}' not found in Excel headers: {headers}")
+                raise ValueError(
+                    f"SMILES column '{smiles_col}' not found in Excel headers: {headers}"
+                ) from e
 
         name_idx = None
         if name_col:
@@ -510,9 +1204,9 @@ class UploadProcessor:
                     break
 
         batch: list[ParsedRow] = []
-        row_number = 1  # 1-based, row 1 is header
+        row_number = min_row - 1  # 1-based, row 1 is header
 
-        for row in ws.iter_rows(min_row=2, values_only=True):
+        for row in ws.iter_rows(min_row=min_row, max_row=max_row, values_only=True):
             row_number += 1
             row_values = list(row)
 
@@ -556,50 +1250,51 @@ class UploadProcessor:
     async def _parse_sdf(
         self,
         upload: Upload,
-        file_content: BytesIO,
+        chunks: AsyncIterator[bytes],
+        row_number: int = 0,
     ) -> AsyncIterator[list[ParsedRow]]:
-        """Parse SDF file."""
+        """Parse a streamed SDF file, numbering records after ``row_number``."""
         if not RDKIT_AVAILABLE:
             raise ImportError("RDKit is required for SDF parsing")
 
-        content = file_content.read()
-        suppl = Chem.SDMolSupplier()
-        suppl.SetData(content.decode("utf-8"))
-
         batch: list[ParsedRow] = []
-        row_number = 0
-
-        for mol in suppl:
-            row_number += 1
-
-            if mol is None:
-                # Invalid molecule in SDF
-                batch.append(ParsedRow(
-                    row_number=row_number,
-                    smiles="",  # Will fail validation
-                    name=None,
-                    external_id=None,
-                    raw_data={"error": "Failed to parse molecule from SDF"},
-                ))
-            else:
-                smiles = Chem.MolToSmiles(mol)
-                name = mol.GetProp("_Name") if mol.HasProp("_Name") else None
 
-                # Get all properties as raw_data
-                raw_data = {prop: mol.GetProp(prop) for prop in mol.GetPropsAsDict()}
-
-                batch.append(ParsedRow(
-                    row_number=row_number,
-                    smiles=smiles,
-                    name=name,
-                    external_id=raw_data.get("CAS", raw_data.get("external_id")),
-                    raw_data=raw_data,
-                ))
-
-            if len(batch) >= self.PARSE_BATCH_SIZE:
-                yield batch
-                batch = []
-                await asyncio.sleep(0)
+        # Each block holds complete records only
+        async for records in iter_sdf_blocks(chunks):
+            suppl = Chem.SDMolSupplier()
+            suppl.SetData(records)
+
+            for mol in suppl:
+                row_number += 1
+
+                if mol is None:
+                    # Invalid molecule in SDF
+                    batch.append(ParsedRow(
+                        row_number=row_number,
+                        smiles="",  # Will fail validation
+                        name=None,
+                        external_id=None,
+                        raw_data={"error": "Failed to parse molecule from SDF"},
+                    ))
+                else:
+                    smiles = Chem.MolToSmiles(mol)
+                    name = mol.GetProp("_Name") if mol.HasProp("_Name") else None
+
+                    # Get all properties as raw_data
+                    raw_data = {prop: mol.GetProp(prop) for prop in mol.GetPropsAsDict()}
+
+                    batch.append(ParsedRow(
+                        row_number=row_number,
+                        smiles=smiles,
+                        name=name,
+                        external_id=raw_data.get("CAS", raw_data.get("external_id")),
+                        raw_data=raw_data,
+                    ))
+
+                if len(batch) >= self.PARSE_BATCH_SIZE:
+                    yield batch
+                    batch = []
+                    await asyncio.sleep(0)
 
         if batch:
             yield batch
@@ -607,36 +1302,40 @@ class UploadProcessor:
     async def _parse_smiles_list(
         self,
         upload: Upload,
-        file_content: BytesIO,
+        chunks: AsyncIterator[bytes],
+        row_number: int = 0,
     ) -> AsyncIterator[list[ParsedRow]]:
-        """Parse SMILES list (one per line, optional tab-separated name)."""
-        text_content = file_content.read().decode("utf-8")
-        lines = text_content.strip().split("\n")
+        """
+        Parse a streamed SMILES list (one per line, optional tab-separated name).
 
+        Rows are numbered by physical line, continuing after ``row_number``.
+        """
         batch: list[ParsedRow] = []
 
-        for row_number, line in enumerate(lines, start=1):
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
+        async for lines in iter_line_blocks(chunks):
+            for line in lines:
+                row_number += 1
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
 
-            # Split by tab or whitespace
-            parts = line.split("\t") if "\t" in line else line.split(None, 1)
-            smiles = parts[0].strip()
-            name = parts[1].strip() if len(parts) > 1 else None
+                # Split by tab or whitespace
+                parts = line.split("\t") if "\t" in line else line.split(None, 1)
+                smiles = parts[0].strip()
+                name = parts[1].strip() if len(parts) > 1 else None
 
-            batch.append(ParsedRow(
-                row_number=row_number,
-                smiles=smiles,
-                name=name,
-                external_id=None,
-                raw_data={"smiles": smiles, "name": name},
-            ))
+                batch.append(ParsedRow(
+                    row_number=row_number,
+                    smiles=smiles,
+                    name=name,
+                    external_id=None,
+                    raw_data={"smiles": smiles, "name": name},
+                ))
 
-            if len(batch) >= self.PARSE_BATCH_SIZE:
-                yield batch
-                batch = []
-                await asyncio.sleep(0)
+                if len(batch) >= self.PARSE_BATCH_SIZE:
+                    yield batch
+                    batch = []
+                    await asyncio.sleep(0)
 
         if batch:
             yield batch
@@ -645,334 +1344,198 @@ class UploadProcessor:
     # Validation
     # =========================================================================
 
-    async def _validate_batch(
+    async def _iter_validated_batches(
         self,
         upload: Upload,
-        batch: list[ParsedRow],
-        seen_inchi_keys: set[str],
-    ) -> list[ValidationResult]:
+        batches: AsyncIterator[list[ParsedRow]],
+    ) -> AsyncIterator[list[ValidationResult]]:
         """
-        Validate a batch of parsed rows.
+        Validate batches of parsed rows and record their row errors.
+
+        RDKit work runs in the executor, VALIDATE_BATCH_SIZE rows per task,
+        with later batches parsed and computed while the caller handles
+        the batch it was given.
 
         Args:
             upload: Upload record
-            batch: Parsed rows to validate
-            seen_inchi_keys: InChIKeys already seen in this upload
+            batches: Parsed row batches
 
-        Returns:
-            List of ValidationResult objects
+        Yields:
+            ValidationResult per row of each batch, in row order
         """
-        results: list[ValidationResult] = []
-        errors_to_add: list[UploadRowError] = []
-
-        for row in batch:
-            result = await self._validate_molecule(row)
-            results.append(result)
-
-            if not result.is_valid and result.error_code:
-                error = UploadRowError(
-                    upload_id=upload.id,
-                    row_number=row.row_number,
-                    error_code=result.error_code.value,
-                    error_message=result.error_detail or "",
-                    raw_data=result.raw_data,
-                )
-                errors_to_add.append(error)
-
-        if errors_to_add:
-            await self.service.add_row_errors_batch(errors_to_add)
+        async for results in compute_batches(batches, self.executor, self.VALIDATE_BATCH_SIZE):
+            errors = [result for result in results if not result.is_valid and result.error_code]
+            if errors:
+                sink = self.service.error_sink(upload)
+                for result in errors:
+                    await sink.add(
+                        result.row_number,
+                        result.error_code,
+                        result.error_detail or "",
+                        raw_data=result.raw_data,
+                    )
+            yield results
 
-        return results
+    # =========================================================================
+    # Duplicate Detection
+    # =========================================================================
 
-    async def _validate_molecule(self, row: ParsedRow) -> ValidationResult:
+    async def _resolve_inchi_keys(
+        self,
+        organization_id: uuid.UUID,
+        inchi_keys: set[str],
+    ) -> dict[str, uuid.UUID]:
         """
-        Validate a single molecule.
+        Resolve InChIKeys to existing molecule IDs.
+
+        Keys already resolved during this job (found or not) are answered
+        from memory; the rest are fetched in a single IN query.
 
         Args:
-            row: Parsed row
+            organization_id: Organization ID
+            inchi_keys: InChIKeys to resolve
 
         Returns:
-            ValidationResult
+            Dict of inchi_key -> molecule ID for keys that exist
         """
-        if not RDKIT_AVAILABLE:
-            # Minimal validation without RDKit
-            return await self._validate_molecule_minimal(row)
-
-        smiles = row.smiles
-
-        # Check empty
-        if not smiles:
-            return ValidationResult(
-                row_number=row.row_number,
-                is_valid=False,
-                canonical_smiles=None,
-                inchi=None,
-                inchi_key=None,
-                smiles_hash=None,
-                mol=None,
-                error_code=UploadErrorCode.MISSING_REQUIRED_FIELD,
-                error_detail="SMILES is empty",
-                raw_data=row.raw_data,
-            )
+        unknown = inchi_keys - self._molecule_ids.keys() - self._missing_inchi_keys
+        if unknown:
+            found = await self.service.resolve_molecule_ids(organization_id, list(unknown))
+            self._molecule_ids.update(found)
+            self._missing_inchi_keys.update(unknown - found.keys())
 
-        # Check length
-        if len(smiles) > 2000:
-            return ValidationResult(
-                row_number=row.row_number,
-                is_valid=False,
-                canonical_smiles=None,
-                inchi=None,
-                inchi_key=None,
-                smiles_hash=None,
-                mol=None,
-                error_code=UploadErrorCode.SMILES_TOO_LONG,
-                error_detail=f"SMILES length {len(smiles)} exceeds 2000",
-                raw_data=row.raw_data,
-            )
-
-        # Parse with RDKit
-        try:
-            mol = smiles_to_mol(smiles)
-            if mol is None:
-                return ValidationResult(
-                    row_number=row.row_number,
-                    is_valid=False,
-                    canonical_smiles=None,
-                    inchi=None,
-                    inchi_key=None,
-                    smiles_hash=None,
-                    mol=None,
-                    error_code=UploadErrorCode.INVALID_SMILES,
-                    error_detail=f"Cannot parse SMILES: {smiles[:50]}",
-                    raw_data=row.raw_data,
-                )
-        except Exception as e:
-            return ValidationResult(
-                row_number=row.row_number,
-                is_valid=False,
-                canonical_smiles=None,
-                inchi=None,
-                inchi_key=None,
-                smiles_hash=None,
-                mol=None,
-                error_code=UploadErrorCode.INVALID_SMILES,
-                error_detail=str(e),
-                raw_data=row.raw_data,
-            )
-
-        # Check molecule size
-        num_atoms = mol.GetNumHeavyAtoms()
-        if num_atoms > 1000:
-            return ValidationResult(
-                row_number=row.row_number,
-                is_valid=False,
-                canonical_smiles=None,
-                inchi=None,
-                inchi_key=None,
-                smiles_hash=None,
-                mol=mol,
-                error_code=UploadErrorCode.MOLECULE_TOO_LARGE,
-                error_detail=f"Molecule has {num_atoms} heavy atoms (max 1000)",
-                raw_data=row.raw_data,
-            )
-
-        if num_atoms == 0:
-            return ValidationResult(
-                row_number=row.row_number,
-                is_valid=False,
-                canonical_smiles=None,
-                inchi=None,
-                inchi_key=None,
-                smiles_hash=None,
-                mol=mol,
-                error_code=UploadErrorCode.NO_ATOMS,
-                error_detail="Molecule has no atoms",
-                raw_data=row.raw_data,
-            )
-
-        # Generate canonical SMILES
-        try:
-            canonical = Chem.MolToSmiles(mol, canonical=True)
-        except Exception:
-            canonical = smiles
-
-        # Generate InChI and InChIKey
-        try:
-            inchi = MolToInchi(mol)
-            inchi_key = MolToInchiKey(mol)
-        except Exception as e:
-            return ValidationResult(
-                row_number=row.row_number,
-                is_valid=False,
-                canonical_smiles=canonical,
-                inchi=None,
-                inchi_key=None,
-                smiles_hash=None,
-                mol=mol,
-                error_code=UploadErrorCode.INCHI_GENERATION_FAILED,
-                error_detail=str(e),
-                raw_data=row.raw_data,
-            )
-
-        # Generate SMILES hash
-        smiles_hash = hashlib.sha256(canonical.encode()).hexdigest()
-
-        return ValidationResult(
-            row_number=row.row_number,
-            is_valid=True,
-            canonical_smiles=canonical,
-            inchi=inchi,
-            inchi_key=inchi_key,
-            smiles_hash=smiles_hash,
-            mol=mol,
-            error_code=None,
-            error_detail=None,
-            raw_data=row.raw_data,
-        )
-
-    async def _validate_molecule_minimal(self, row: ParsedRow) -> ValidationResult:
-        """Minimal validation without RDKit."""
-        smiles = row.smiles
-
-        if not smiles:
-            return ValidationResult(
-                row_number=row.row_number,
-                is_valid=False,
-                canonical_smiles=None,
-                inchi=None,
-                inchi_key=None,
-                smiles_hash=None,
-                mol=None,
-                error_code=UploadErrorCode.MISSING_REQUIRED_FIELD,
-                error_detail="SMILES is empty",
-                raw_data=row.raw_data,
-            )
-
-        if len(smiles) > 2000:
-            return ValidationResult(
-                row_number=row.row_number,
-                is_valid=False,
-                canonical_smiles=None,
-                inchi=None,
-                inchi_key=None,
-                smiles_hash=None,
-                mol=None,
-                error_code=UploadErrorCode.SMILES_TOO_LONG,
-                error_detail=f"SMILES length {len(smiles)} exceeds 2000",
-                raw_data=row.raw_data,
-            )
-
-        # Generate SMILES hash (use original as canonical without RDKit)
-        smiles_hash = hashlib.sha256(smiles.encode()).hexdigest()
-
-        return ValidationResult(
-            row_number=row.row_number,
-            is_valid=True,
-            canonical_smiles=smiles,
-            inchi=None,
-            inchi_key=f"PLACEHOLDER-{smiles_hash[:27]}",  # Fake InChIKey
-            smiles_hash=smiles_hash,
-            mol=None,
-            error_code=None,
-            error_detail=None,
-            raw_data=row.raw_data,
-        )
-
-    # =========================================================================
-    # Duplicate Detection
-    # =========================================================================
+        return {key: self._molecule_ids[key] for key in inchi_keys if key in self._molecule_ids}
 
-    async def _check_duplicates(
+    async def _check_duplicates_batch(
         self,
         upload: Upload,
-        result: ValidationResult,
+        results: list[ValidationResult],
         seen_inchi_keys: set[str],
         record_errors: bool = True,
-    ) -> str | None:
+        match_within_batch: bool = False,
+    ) -> list[str | None]:
         """
-        Check for duplicate molecules.
+        Check a batch of validated molecules for duplicates.
+
+        Exact duplicates are resolved with one InChIKey lookup for the batch,
+        and similar duplicates with one similarity join against the
+        organization's cached fingerprint index, instead of a query per row.
 
         Args:
             upload: Upload record
-            result: Validation result
-            seen_inchi_keys: InChIKeys seen in this upload
+            results: Validation results for the batch, in row order
+            seen_inchi_keys: InChIKeys seen in earlier batches of this upload
             record_errors: Whether to record errors
+            match_within_batch: Also treat rows similar to an earlier new row of
+                this batch as similar duplicates (used during insertion, where
+                earlier rows are inserted before later ones are checked)
 
         Returns:
-            "exact", "similar", "batch" (duplicate in batch), or None
+            "exact", "similar", "batch" (duplicate in batch), or None per result
         """
-        if not result.inchi_key:
-            return None
-
-        # Check for duplicate within batch
-        if result.inchi_key in seen_inchi_keys:
-            if record_errors and upload.duplicate_action == DuplicateAction.ERROR:
-                await self.service.add_row_error(
-                    upload,
-                    result.row_number,
-                    UploadErrorCode.DUPLICATE_IN_BATCH,
-                    f"Duplicate of another row in this upload",
-                    raw_data=result.raw_data,
-                    duplicate_inchi_key=result.inchi_key,
-                )
-            return "batch"
-
-        # Check for exact duplicate in database
-        existing = await self.service.check_exact_duplicate(
+        dup_types: list[str | None] = [None] * len(results)
+        candidates = [
+            i for i, result in enumerate(results)
+            if result.is_valid and result.inchi_key and result.inchi_key not in seen_inchi_keys
+        ]
+
+        # Exact duplicates in database: at most one lookup for the batch
+        existing = await self._resolve_inchi_keys(
             upload.organization_id,
-            result.inchi_key,
+            {results[i].inchi_key for i in candidates},
         )
-        if existing:
-            if record_errors and upload.duplicate_action == DuplicateAction.ERROR:
-                await self.service.add_row_error(
-                    upload,
-                    result.row_number,
-                    UploadErrorCode.EXACT_DUPLICATE,
-                    f"Molecule already exists",
-                    raw_data=result.raw_data,
-                    duplicate_inchi_key=result.inchi_key,
-                )
-            return "exact"
 
-        # Check for similar molecules (if threshold set and fingerprint available)
-        if upload.similarity_threshold and result.mol and RDKIT_AVAILABLE:
+        # Similar molecules (if threshold set): one join against the org index
+        similar_to_library: dict[int, tuple[str, float]] = {}
+        similar_to_earlier: dict[int, list[tuple[int, float]]] = {}
+        to_search = [i for i in candidates if results[i].inchi_key not in existing]
+        if upload.similarity_threshold and RDKIT_AVAILABLE and to_search:
+            threshold = float(upload.similarity_threshold)
+            fps = [results[i].fingerprint_morgan for i in to_search]
             try:
-                fp = calculate_morgan_fingerprint(result.mol)
-                similar = await self.service.find_similar_molecules(
-                    upload.organization_id,
-                    fp.to_bytes(),
-                    upload.similarity_threshold,
-                    limit=1,
-                )
-                if similar:
-                    mol, similarity = similar[0]
-                    if record_errors and upload.duplicate_action == DuplicateAction.ERROR:
-                        await self.service.add_row_error(
-                            upload,
-                            result.row_number,
-                            UploadErrorCode.SIMILAR_DUPLICATE,
-                            f"Similar molecule found (Tanimoto={similarity:.2f})",
-                            raw_data=result.raw_data,
-                            duplicate_inchi_key=mol.inchi_key,
-                            duplicate_similarity=Decimal(str(similarity)),
-                        )
-                    return "similar"
-            except Exception:
-                pass  # Skip similarity check on error
+                index = await get_org_fingerprint_index(self.db, upload.organization_id)
+                for i, match in zip(to_search, index.search_batch(fps, threshold), strict=True):
+                    if match is not None:
+                        similar_to_library[i] = (match.inchi_key, match.similarity)
+                if match_within_batch:
+                    earlier_matches = find_similar_within_batch(fps, threshold)
+                    for i, earlier in zip(to_search, earlier_matches, strict=True):
+                        similar_to_earlier[i] = [(to_search[j], sim) for j, sim in earlier]
+            except Exception as e:
+                logger.warning(f"Similarity check failed for upload {upload.id}: {e}")
+
+        # Classify in row order so repeats within the batch are detected
+        new_rows: set[int] = set()
+        new_keys: set[str] = set()
+        for i, result in enumerate(results):
+            if not result.is_valid or not result.inchi_key:
+                continue
+
+            if result.inchi_key in seen_inchi_keys or result.inchi_key in new_keys:
+                dup_types[i] = "batch"
+                if record_errors and upload.duplicate_action == DuplicateAction.ERROR:
+                    await self.service.add_row_error(
+                        upload,
+                        result.row_number,
+                        UploadErrorCode.DUPLICATE_IN_BATCH,
+                        f"Duplicate of another row in this upload",
+                        raw_data=result.raw_data,
+                        duplicate_inchi_key=result.inchi_key,
+                    )
+                continue
+
+            if result.inchi_key in existing:
+                dup_types[i] = "exact"
+                if record_errors and upload.duplicate_action == DuplicateAction.ERROR:
+                    await self.service.add_row_error(
+                        upload,
+                        result.row_number,
+                        UploadErrorCode.EXACT_DUPLICATE,
+                        f"Molecule already exists",
+                        raw_data=result.raw_data,
+                        duplicate_inchi_key=result.inchi_key,
+                    )
+                continue
+
+            match = similar_to_library.get(i)
+            for j, similarity in similar_to_earlier.get(i, []):
+                if j in new_rows:
+                    if match is None or similarity > match[1]:
+                        match = (results[j].inchi_key, similarity)
+                    break
+            if match is not None:
+                dup_types[i] = "similar"
+                if record_errors and upload.duplicate_action == DuplicateAction.ERROR:
+                    duplicate_inchi_key, similarity = match
+                    await self.service.add_row_error(
+                        upload,
+                        result.row_number,
+                        UploadErrorCode.SIMILAR_DUPLICATE,
+                        f"Similar molecule found (Tanimoto={similarity:.2f})",
+                        raw_data=result.raw_data,
+                        duplicate_inchi_key=duplicate_inchi_key,
+                        duplicate_similarity=Decimal(str(similarity)),
+                    )
+                continue
 
-        return None
+            new_rows.add(i)
+            new_keys.add(result.inchi_key)
+
+        return dup_types
 
     # =========================================================================
     # Database Operations
     # =========================================================================
 
-    async def _insert_molecule(
+    def _molecule_values(
         self,
         upload: Upload,
         result: ValidationResult,
-    ) -> Molecule:
+    ) -> dict:
         """
-        Insert a new molecule into the database.
+        Build the column values for a new molecule.
+
+        Every row has the same keys so rows can share one multi-row INSERT.
 
         Stores:
         - Chemical identifiers (SMILES, InChI, InChIKey)
@@ -985,50 +1548,16 @@ class UploadProcessor:
             result: Validation result
 
         Returns:
-            Created Molecule
+            Dict of Molecule attribute -> value
         """
-        # Calculate descriptors if RDKit available
-        descriptors = {}
-        fingerprints = {}
-
-        if RDKIT_AVAILABLE and result.mol:
-            try:
-                desc = calculate_descriptors_rdkit(result.mol)
-                descriptors = {
-                    "molecular_weight": desc.molecular_weight,
-                    "logp": desc.logp,
-                    "hbd": desc.num_h_donors,
-                    "hba": desc.num_h_acceptors,
-                    "tpsa": desc.tpsa,
-                    "rotatable_bonds": desc.num_rotatable_bonds,
-                    "num_rings": desc.num_rings,
-                    "num_aromatic_rings": desc.num_aromatic_rings,
-                    "num_heavy_atoms": desc.num_heavy_atoms,
-                    "fraction_sp3": desc.fraction_csp3,
-                }
-            except Exception as e:
-                logger.warning(f"Failed to calculate descriptors for row {result.row_number}: {e}")
-
-            # Calculate fingerprints
-            try:
-                fp = calculate_morgan_fingerprint(result.mol)
-                fingerprints["fingerprint_morgan"] = fp.to_bytes()
-            except Exception as e:
-                logger.warning(f"Failed to calculate Morgan fingerprint for row {result.row_number}: {e}")
-
-            try:
-                from rdkit.Chem import MACCSkeys
-                maccs = MACCSkeys.GenMACCSKeys(result.mol)
-                fingerprints["fingerprint_maccs"] = maccs.ToBitString().encode()
-            except Exception:
-                pass
-
-            try:
-                from rdkit.Chem import RDKFingerprint
-                rdkit_fp = RDKFingerprint(result.mol)
-                fingerprints["fingerprint_rdkit"] = rdkit_fp.ToBitString().encode()
-            except Exception:
-                pass
+        # Descriptors and fingerprints were computed during validation
+        descriptors = dict.fromkeys(MOLECULE_DESCRIPTOR_COLUMNS)
+        descriptors.update(result.descriptors or {})
+        fingerprints = {
+            "fingerprint_morgan": result.fingerprint_morgan,
+            "fingerprint_maccs": result.fingerprint_maccs,
+            "fingerprint_rdkit": result.fingerprint_rdkit,
+        }
 
         # Build metadata with provenance
         metadata = {
@@ -1055,28 +1584,110 @@ class UploadProcessor:
             or result.raw_data.get("Compound_Name")
         )
 
-        # Create molecule
-        molecule = Molecule(
-            organization_id=upload.organization_id,
-            created_by=upload.created_by,
-            canonical_smiles=result.canonical_smiles,
-            inchi=result.inchi,
-            inchi_key=result.inchi_key,
-            smiles_hash=result.smiles_hash,
-            name=name,
-            metadata_=metadata,
+        return {
+            "id": uuid.uuid4(),
+            "organization_id": upload.organization_id,
+            "created_by": upload.created_by,
+            "canonical_smiles": result.canonical_smiles,
+            "inchi": result.inchi,
+            "inchi_key": result.inchi_key,
+            "smiles_hash": result.smiles_hash,
+            "name": name,
+            "metadata_": metadata,
             **descriptors,
             **fingerprints,
-        )
-        self.db.add(molecule)
-        await self.db.flush()
+        }
+
+    async def _insert_molecules(
+        self,
+        upload: Upload,
+        results: list[ValidationResult],
+    ) -> BulkInsertResult:
+        """
+        Insert new molecules with multi-row INSERT statements.
+
+        Rows are written INSERT_BATCH_SIZE at a time with
+        ``INSERT ... ON CONFLICT (organization_id, inchi_key) DO NOTHING
+        RETURNING id, inchi_key``. Rows whose InChIKey already exists (e.g.
+        inserted by a concurrent upload) are reported as conflicts. If a chunk
+        fails, it is retried row by row inside savepoints so the error is
+        recorded against the offending row number.
+
+        Args:
+            upload: Upload record
+            results: Validated, non-duplicate rows to insert
+
+        Returns:
+            BulkInsertResult with inserted, conflicting and failed rows
+        """
+        outcome = BulkInsertResult(inserted=[], conflicts=[], failed=[])
+
+        for start in range(0, len(results), self.INSERT_BATCH_SIZE):
+            chunk = results[start:start + self.INSERT_BATCH_SIZE]
+            rows = [self._molecule_values(upload, result) for result in chunk]
+            failed_rows: set[int] = set()
+
+            try:
+                async with self.db.begin_nested():
+                    inserted_ids = await self._execute_molecule_insert(rows)
+            except Exception as e:
+                logger.warning(
+                    f"Bulk insert of {len(rows)} molecules failed for upload {upload.id}, "
+                    f"retrying row by row: {e}"
+                )
+                inserted_ids = {}
+                for result, row in zip(chunk, rows, strict=True):
+                    try:
+                        async with self.db.begin_nested():
+                            inserted_ids.update(await self._execute_molecule_insert([row]))
+                    except Exception as row_error:
+                        failed_rows.add(result.row_number)
+                        outcome.failed.append(result)
+                        await self.service.add_row_error(
+                            upload,
+                            result.row_number,
+                            UploadErrorCode.DB_INSERT_FAILED,
+                            str(row_error),
+                            raw_data=result.raw_data,
+                        )
 
-        return molecule
+            for result in chunk:
+                if result.row_number in failed_rows:
+                    continue
+                molecule_id = inserted_ids.get(result.inchi_key)
+                if molecule_id is None:
+                    outcome.conflicts.append(result)
+                else:
+                    outcome.inserted.append((result, molecule_id))
+
+        return outcome
+
+    async def _execute_molecule_insert(self, rows: list[dict]) -> dict[str, uuid.UUID]:
+        """
+        Execute one multi-row molecule INSERT.
+
+        Args:
+            rows: Column values from _molecule_values
+
+        Returns:
+            Dict of inchi_key -> molecule ID for rows actually inserted
+        """
+        from sqlalchemy.dialects.postgresql import insert
+
+        stmt = (
+            insert(Molecule)
+            .values(rows)
+            .on_conflict_do_nothing(constraint="uq_molecule_org_inchikey")
+            .returning(Molecule.id, Molecule.inchi_key)
+        )
+        result = await self.db.execute(stmt)
+        return {row.inchi_key: row.id for row in result}
 
     async def _update_molecule(
         self,
         upload: Upload,
         result: ValidationResult,
+        existing: Molecule | None,
     ) -> Molecule | None:
         """
         Update an existing molecule (upsert logic).
@@ -1090,14 +1701,11 @@ class UploadProcessor:
         Args:
             upload: Upload record
             result: Validation result
+            existing: Existing molecule with the same InChIKey
 
         Returns:
             Updated Molecule or None
         """
-        existing = await self.service.check_exact_duplicate(
-            upload.organization_id,
-            result.inchi_key,
-        )
         if not existing:
             return None
 
@@ -1122,32 +1730,18 @@ class UploadProcessor:
         })
         existing.metadata_ = metadata
 
-        # Update computed properties if missing and RDKit available
-        if RDKIT_AVAILABLE and result.mol:
-            # Update descriptors if missing
-            if existing.molecular_weight is None:
-                try:
-                    desc = calculate_descriptors_rdkit(result.mol)
-                    existing.molecular_weight = desc.molecular_weight
-                    existing.logp = desc.logp
-                    existing.hbd = desc.num_h_donors
-                    existing.hba = desc.num_h_acceptors
-                    existing.tpsa = desc.tpsa
-                    existing.rotatable_bonds = desc.num_rotatable_bonds
-                    existing.num_rings = desc.num_rings
-                    existing.num_aromatic_rings = desc.num_aromatic_rings
-                    existing.num_heavy_atoms = desc.num_heavy_atoms
-                    existing.fraction_sp3 = desc.fraction_csp3
-                except Exception:
-                    pass
-
-            # Update fingerprints if missing
-            if existing.fingerprint_morgan is None:
-                try:
-                    fp = calculate_morgan_fingerprint(result.mol)
-                    existing.fingerprint_morgan = fp.to_bytes()
-                except Exception:
-                    pass
+        # Update computed properties if missing (computed during validation)
+        if existing.molecular_weight is None and result.descriptors:
+            for column, value in result.descriptors.items():
+                setattr(existing, column, value)
+
+        # Update fingerprints if missing, or still in the legacy bit-string
+        # format (a packed value is a different length)
+        for column in MOLECULE_FINGERPRINT_COLUMNS:
+            value = getattr(result, column)
+            current = getattr(existing, column)
+            if value is not None and (current is None or len(current) != len(value)):
+                setattr(existing, column, value)
 
         existing.updated_by = upload.created_by
         await self.db.flush()
@@ -1179,7 +1773,7 @@ async def run_validation_task(
     if not upload:
         return
 
-    processor = UploadProcessor(db, service)
+    processor = UploadProcessor(db, service, redis_client=get_progress_redis())
     await processor.process_validation(upload)
 
 
@@ -1202,5 +1796,5 @@ async def run_insertion_task(
     if not upload:
         return
 
-    processor = UploadProcessor(db, service)
+    processor = UploadProcessor(db, service, redis_client=get_progress_redis())
     await processor.process_insertion(upload)
@@ -10,31 +10,200 @@ Usage:
 
     # Or with custom redis
     arq apps.api.uploads.worker.WorkerSettings --redis redis://localhost:6379/1
+
+    # Fast lane for small uploads (see apps.api.uploads.scheduling)
+    arq apps.api.uploads.worker.FastLaneWorkerSettings
 """
 
-import asyncio
+import functools
 import logging
+import time
 import uuid
+from collections.abc import Awaitable, Callable
 from datetime import timedelta
 from typing import Any
 
-from arq import create_pool
+from arq import Retry, create_pool, cron
 from arq.connections import ArqRedis, RedisSettings
 
 from apps.api.config import get_settings
+from apps.api.uploads.compute import get_compute_executor, shutdown_compute_executor
+from apps.api.uploads.scheduling import (
+    BULK_QUEUE,
+    FAST_QUEUE,
+    UploadScheduler,
+    choose_queue,
+    estimate_cost,
+)
 from apps.api.uploads.service import UploadService
-from apps.api.uploads.tasks import UploadProcessor
+from apps.api.uploads.tasks import UploadCheckpointed, UploadProcessor
+from db.models.upload import FileType, ShardStatus, Upload, UploadShard, UploadStatus
 from db.session import async_session_factory
+from packages.chemistry.change_feed import (
+    prune_fingerprint_changes,
+    start_change_listener,
+    stop_change_listener,
+)
 from packages.shared.storage import get_storage_backend
 
 logger = logging.getLogger(__name__)
 
+# Insertion stops at a checkpoint this long before the job timeout and
+# continues in a new job, so a large upload is never killed mid-batch
+JOB_DEADLINE_MARGIN = timedelta(minutes=2)
+
+# Wait before a job over its organization's cap is ready again
+ORG_SLOT_RETRY_DELAY = timedelta(seconds=5)
+
+UploadJob = Callable[..., Awaitable[dict[str, Any]]]
+
 
 # =============================================================================
 # Job Functions
 # =============================================================================
 
 
+def _is_final_try(ctx: dict[str, Any]) -> bool:
+    """Whether a failure of the running job will not be retried."""
+    return ctx.get("job_try", 1) >= WorkerSettings.max_tries
+
+
+def _retry(ctx: dict[str, Any]) -> Retry:
+    """Retry of the running job, backing off with each try."""
+    return Retry(defer=WorkerSettings.retry_delay * ctx.get("job_try", 1))
+
+
+def _requeued_job_id(job_id: str) -> str:
+    """Job ID for another attempt to start a job held back by its org's cap."""
+    base, sep, count = job_id.rpartition(":requeued:")
+    if sep and count.isdigit():
+        return f"{base}:requeued:{int(count) + 1}"
+    return f"{job_id}:requeued:1"
+
+
+def _is_requeued(job_id: str) -> bool:
+    """Whether a job is another attempt made by _requeued_job_id."""
+    return ":requeued:" in job_id
+
+
+def fair_share(job: UploadJob) -> UploadJob:
+    """
+    Run an upload job within its organization's fair share of workers.
+
+    The job is counted as started for queue metrics and takes one of its
+    organization's job slots. If the organization is at its cap while
+    others have jobs queued, the job is requeued behind the queued work
+    instead of running. Scheduling is advisory: if it fails, the job runs.
+    """
+
+    @functools.wraps(job)
+    async def run(
+        ctx: dict[str, Any],
+        upload_id: str,
+        organization_id: str,
+        *args: Any,
+    ) -> dict[str, Any]:
+        job_id = ctx.get("job_id")
+        if job_id is None:
+            # Called directly rather than by an ARQ worker
+            return await job(ctx, upload_id, organization_id, *args)
+
+        queue = ctx["redis"].default_queue_name
+        scheduler = UploadScheduler(ctx["redis"])
+        try:
+            if ctx.get("job_try", 1) == 1:
+                await scheduler.job_started(
+                    queue,
+                    organization_id,
+                    ctx["enqueue_time"],
+                    record_wait=not _is_requeued(job_id),
+                )
+            lease = WorkerSettings.job_timeout + JOB_DEADLINE_MARGIN
+            acquired = await scheduler.acquire_slot(queue, organization_id, job_id, lease)
+        except Exception as e:
+            logger.warning(f"Upload job scheduling unavailable for job {job_id}: {e}")
+            acquired = None
+
+        if acquired is False:
+            await scheduler.requeue(
+                job.__name__,
+                upload_id,
+                organization_id,
+                *args,
+                queue=queue,
+                job_id=_requeued_job_id(job_id),
+                delay=ORG_SLOT_RETRY_DELAY,
+            )
+            logger.info(f"Organization {organization_id} is at its job cap; requeued {job_id}")
+            return {"status": "deferred", "upload_id": upload_id}
+
+        try:
+            return await job(ctx, upload_id, organization_id, *args)
+        finally:
+            if acquired:
+                try:
+                    await scheduler.release_slot(organization_id, job_id)
+                except Exception as e:
+                    logger.warning(f"Failed to release job slot of {job_id}: {e}")
+
+    return run
+
+
+def _processor(ctx: dict[str, Any], db: Any, service: UploadService) -> UploadProcessor:
+    """Upload processor using the worker's shared executor and Redis."""
+    return UploadProcessor(
+        db,
+        service,
+        executor=ctx.get("compute_executor"),
+        redis_client=ctx.get("redis"),
+    )
+
+
+async def _enqueue_shard_jobs(
+    ctx: dict[str, Any],
+    function: str,
+    upload: Upload,
+    shards: list[UploadShard],
+) -> None:
+    """Enqueue one bulk job per shard; job IDs keep a shard from running twice."""
+    scheduler = UploadScheduler(ctx["redis"])
+    validating = function == "validate_upload_shard_job"
+    for shard in shards:
+        if not validating:
+            cost = estimate_cost(total_rows=shard.valid_rows)
+        elif upload.file_type == FileType.EXCEL:
+            cost = estimate_cost(total_rows=shard.end_offset - shard.start_offset)
+        else:
+            cost = estimate_cost(file_size_bytes=shard.end_offset - shard.start_offset)
+        await scheduler.enqueue(
+            function,
+            str(upload.id),
+            str(upload.organization_id),
+            shard.shard_index,
+            queue=BULK_QUEUE,
+            cost=cost,
+            job_id=f"upload-shard:{shard.id}:{'validate' if validating else 'insert'}",
+        )
+
+
+async def _enqueue_merge_job(ctx: dict[str, Any], service: UploadService, upload: Upload) -> None:
+    """
+    Enqueue the job merging an upload's shards, once per phase.
+
+    Shards finishing at the same time may both see they were the last;
+    the job ID (unique per set of shards and phase) drops the second.
+    """
+    first = await service.get_shard(upload, 0)
+    await UploadScheduler(ctx["redis"]).enqueue(
+        "merge_upload_shards_job",
+        str(upload.id),
+        str(upload.organization_id),
+        queue=BULK_QUEUE,
+        job_id=f"upload-merge:{first.id if first else upload.id}:{upload.status.value}",
+    )
+
+
+@fair_share
 async def validate_upload_job(
     ctx: dict[str, Any],
     upload_id: str,
@@ -66,16 +235,27 @@ async def validate_upload_job(
             logger.error(f"Upload {upload_id} not found")
             return {"status": "error", "message": "Upload not found"}
 
+        final_try = _is_final_try(ctx)
         try:
-            processor = UploadProcessor(db, service)
-            await processor.process_validation(upload)
+            processor = _processor(ctx, db, service)
+            shards = await processor.process_validation(
+                upload, final_attempt=final_try, allow_sharding=True
+            )
+            if shards:
+                await _enqueue_shard_jobs(ctx, "validate_upload_shard_job", upload, shards)
+                logger.info(f"Validating upload {upload_id} in {len(shards)} shards")
+                return {"status": "sharded", "shards": len(shards)}
             logger.info(f"Validation completed for upload {upload_id}")
             return {"status": "success", "upload_id": upload_id}
         except Exception as e:
+            if not final_try:
+                logger.warning(f"Validation failed for upload {upload_id}, retrying: {e}")
+                raise _retry(ctx) from e
             logger.exception(f"Validation failed for upload {upload_id}")
             return {"status": "error", "message": str(e)}
 
 
+@fair_share
 async def process_upload_job(
     ctx: dict[str, Any],
     upload_id: str,
@@ -84,6 +264,11 @@ async def process_upload_job(
     """
     Background job to process (insert molecules) for a confirmed upload.
 
+    Insertion resumes from the upload's last checkpoint. Failures are
+    retried up to max_tries; a run nearing job_timeout stops at a
+    checkpoint and enqueues its own continuation. An upload validated in
+    shards is inserted by one process_upload_shard_job per shard instead.
+
     Args:
         ctx: ARQ context
         upload_id: Upload UUID as string
@@ -93,6 +278,8 @@ async def process_upload_job(
         Job result dict
     """
     logger.info(f"Starting processing for upload {upload_id}")
+    time_budget = WorkerSettings.job_timeout - JOB_DEADLINE_MARGIN
+    deadline = time.monotonic() + time_budget.total_seconds()
 
     async with async_session_factory() as db:
         storage = get_storage_backend()
@@ -107,16 +294,215 @@ async def process_upload_job(
             logger.error(f"Upload {upload_id} not found")
             return {"status": "error", "message": "Upload not found"}
 
+        shards = await service.get_shards(upload)
+        if shards:
+            await _enqueue_shard_jobs(ctx, "process_upload_shard_job", upload, shards)
+            logger.info(f"Processing upload {upload_id} in {len(shards)} shards")
+            return {"status": "sharded", "shards": len(shards)}
+
+        final_try = _is_final_try(ctx)
         try:
-            processor = UploadProcessor(db, service)
-            await processor.process_insertion(upload)
+            processor = _processor(ctx, db, service)
+            await processor.process_insertion(
+                upload, deadline=deadline, final_attempt=final_try
+            )
             logger.info(f"Processing completed for upload {upload_id}")
             return {"status": "success", "upload_id": upload_id}
+        except UploadCheckpointed as e:
+            # A new job, so continuations do not use up retries; it is
+            # charged for another full run, behind other orgs' queued work
+            await UploadScheduler(ctx["redis"]).enqueue(
+                "process_upload_job",
+                upload_id,
+                organization_id,
+                queue=ctx["redis"].default_queue_name,
+                cost=time_budget.total_seconds(),
+            )
+            logger.info(f"{e}; continuing in a new job")
+            return {"status": "checkpointed", "processed_rows": e.processed_rows}
         except Exception as e:
+            if not final_try:
+                logger.warning(f"Processing failed for upload {upload_id}, resuming: {e}")
+                raise _retry(ctx) from e
             logger.exception(f"Processing failed for upload {upload_id}")
             return {"status": "error", "message": str(e)}
 
 
+@fair_share
+async def validate_upload_shard_job(
+    ctx: dict[str, Any],
+    upload_id: str,
+    organization_id: str,
+    shard_index: int,
+) -> dict[str, Any]:
+    """
+    Background job to validate one shard of a large upload.
+
+    The job that validates the last shard enqueues merge_upload_shards_job.
+
+    Args:
+        ctx: ARQ context
+        upload_id: Upload UUID as string
+        organization_id: Organization UUID as string
+        shard_index: Shard to validate
+
+    Returns:
+        Job result dict
+    """
+    async with async_session_factory() as db:
+        service = UploadService(db, get_storage_backend())
+        upload = await service.get_upload(uuid.UUID(upload_id), uuid.UUID(organization_id))
+        if not upload:
+            logger.error(f"Upload {upload_id} not found")
+            return {"status": "error", "message": "Upload not found"}
+
+        shard = await service.get_shard(upload, shard_index)
+        if upload.status != UploadStatus.VALIDATING or shard is None:
+            # Failed, cancelled or revalidated since the job was enqueued
+            return {"status": "skipped", "upload_id": upload_id}
+
+        final_try = _is_final_try(ctx)
+        try:
+            if shard.status == ShardStatus.PENDING:
+                processor = _processor(ctx, db, service)
+                done = await processor.process_shard_validation(
+                    upload, shard, final_attempt=final_try
+                )
+            else:
+                # Validated by an earlier try that failed to enqueue the merge
+                done = await service.all_shards_reached(upload, ShardStatus.VALIDATED)
+            if done:
+                await _enqueue_merge_job(ctx, service, upload)
+            return {"status": "success", "upload_id": upload_id, "shard": shard_index}
+        except Exception as e:
+            if not final_try:
+                logger.warning(
+                    f"Validation of shard {shard_index} failed for upload {upload_id}, "
+                    f"retrying: {e}"
+                )
+                raise _retry(ctx) from e
+            logger.exception(f"Validation of shard {shard_index} failed for upload {upload_id}")
+            return {"status": "error", "message": str(e)}
+
+
+@fair_share
+async def process_upload_shard_job(
+    ctx: dict[str, Any],
+    upload_id: str,
+    organization_id: str,
+    shard_index: int,
+) -> dict[str, Any]:
+    """
+    Background job to insert the molecules of one shard of a large upload.
+
+    Checkpoints, retries and continuations work as in process_upload_job,
+    per shard. The job that inserts the last shard enqueues
+    merge_upload_shards_job.
+
+    Args:
+        ctx: ARQ context
+        upload_id: Upload UUID as string
+        organization_id: Organization UUID as string
+        shard_index: Shard to insert
+
+    Returns:
+        Job result dict
+    """
+    time_budget = WorkerSettings.job_timeout - JOB_DEADLINE_MARGIN
+    deadline = time.monotonic() + time_budget.total_seconds()
+
+    async with async_session_factory() as db:
+        service = UploadService(db, get_storage_backend())
+        upload = await service.get_upload(uuid.UUID(upload_id), uuid.UUID(organization_id))
+        if not upload:
+            logger.error(f"Upload {upload_id} not found")
+            return {"status": "error", "message": "Upload not found"}
+
+        shard = await service.get_shard(upload, shard_index)
+        if upload.status != UploadStatus.PROCESSING or shard is None:
+            return {"status": "skipped", "upload_id": upload_id}
+
+        final_try = _is_final_try(ctx)
+        try:
+            if shard.status == ShardStatus.VALIDATED:
+                processor = _processor(ctx, db, service)
+                done = await processor.process_shard_insertion(
+                    upload, shard, deadline=deadline, final_attempt=final_try
+                )
+            else:
+                done = await service.all_shards_reached(upload, ShardStatus.INSERTED)
+            if done:
+                await _enqueue_merge_job(ctx, service, upload)
+            return {"status": "success", "upload_id": upload_id, "shard": shard_index}
+        except UploadCheckpointed as e:
+            await UploadScheduler(ctx["redis"]).enqueue(
+                "process_upload_shard_job",
+                upload_id,
+                organization_id,
+                shard_index,
+                queue=BULK_QUEUE,
+                cost=time_budget.total_seconds(),
+                job_id=f"upload-shard:{shard.id}:insert:{e.processed_rows}",
+            )
+            logger.info(f"{e} in shard {shard_index}; continuing in a new job")
+            return {"status": "checkpointed", "processed_rows": e.processed_rows}
+        except Exception as e:
+            if not final_try:
+                logger.warning(
+                    f"Processing of shard {shard_index} failed for upload {upload_id}, "
+                    f"resuming: {e}"
+                )
+                raise _retry(ctx) from e
+            logger.exception(f"Processing of shard {shard_index} failed for upload {upload_id}")
+            return {"status": "error", "message": str(e)}
+
+
+@fair_share
+async def merge_upload_shards_job(
+    ctx: dict[str, Any],
+    upload_id: str,
+    organization_id: str,
+) -> dict[str, Any]:
+    """
+    Background job to merge the shards of an upload after a phase.
+
+    After validation it reconciles duplicates across shards and completes
+    validation; after insertion it writes the upload's summary.
+
+    Args:
+        ctx: ARQ context
+        upload_id: Upload UUID as string
+        organization_id: Organization UUID as string
+
+    Returns:
+        Job result dict
+    """
+    async with async_session_factory() as db:
+        service = UploadService(db, get_storage_backend())
+        upload = await service.get_upload(uuid.UUID(upload_id), uuid.UUID(organization_id))
+        if not upload:
+            logger.error(f"Upload {upload_id} not found")
+            return {"status": "error", "message": "Upload not found"}
+
+        final_try = _is_final_try(ctx)
+        try:
+            processor = _processor(ctx, db, service)
+            if upload.status == UploadStatus.VALIDATING:
+                await processor.merge_shard_validation(upload, final_attempt=final_try)
+            elif upload.status == UploadStatus.PROCESSING:
+                await processor.merge_shard_insertion(upload, final_attempt=final_try)
+            else:
+                return {"status": "skipped", "upload_id": upload_id}
+            logger.info(f"Merged shards of upload {upload_id}")
+            return {"status": "success", "upload_id": upload_id}
+        except Exception as e:
+            if not final_try:
+                logger.warning(f"Merging shards failed for upload {upload_id}, retrying: {e}")
+                raise _retry(ctx) from e
+            logger.exception(f"Merging shards failed for upload {upload_id}")
+            return {"status": "error", "message": str(e)}
+
+
 async def cleanup_expired_uploads_job(ctx: dict[str, Any]) -> dict[str, Any]:
     """
     Periodic job to cleanup expired unconfirmed uploads.
@@ -135,6 +521,18 @@ async def cleanup_expired_uploads_job(ctx: dict[str, Any]) -> dict[str, Any]:
         return {"status": "success", "cleaned_up": count}
 
 
+async def prune_fingerprint_changes_job(ctx: dict[str, Any]) -> dict[str, Any]:
+    """
+    Periodic job to drop fingerprint change feed rows past retention.
+    """
+    async with async_session_factory() as db:
+        count = await prune_fingerprint_changes(db)
+        await db.commit()
+
+    logger.info(f"Pruned {count} fingerprint change feed rows")
+    return {"status": "success", "pruned": count}
+
+
 # =============================================================================
 # Startup/Shutdown Hooks
 # =============================================================================
@@ -143,11 +541,17 @@ async def cleanup_expired_uploads_job(ctx: dict[str, Any]) -> dict[str, Any]:
 async def startup(ctx: dict[str, Any]) -> None:
     """Called when worker starts."""
     logger.info("Upload worker starting up")
+    # RDKit validation runs in a process pool shared by all jobs
+    ctx["compute_executor"] = get_compute_executor()
+    # Cached fingerprint indexes only poll the change feed after a NOTIFY
+    await start_change_listener(get_settings().database_url)
 
 
 async def shutdown(ctx: dict[str, Any]) -> None:
     """Called when worker shuts down."""
     logger.info("Upload worker shutting down")
+    shutdown_compute_executor()
+    await stop_change_listener()
 
 
 # =============================================================================
@@ -181,19 +585,26 @@ def get_redis_settings() -> RedisSettings:
 
 
 class WorkerSettings:
-    """ARQ worker settings."""
+    """ARQ worker settings (bulk queue)."""
+
+    queue_name = BULK_QUEUE
 
     # Job functions
     functions = [
         validate_upload_job,
         process_upload_job,
+        validate_upload_shard_job,
+        process_upload_shard_job,
+        merge_upload_shards_job,
         cleanup_expired_uploads_job,
+        prune_fingerprint_changes_job,
     ]
 
     # Cron jobs (periodic tasks)
     cron_jobs = [
         # Cleanup expired uploads every hour
         # cron(cleanup_expired_uploads_job, hour={0, 1, 2, ...}, minute=0)
+        cron(prune_fingerprint_changes_job, minute=17),
     ]
 
     # Lifecycle hooks
@@ -206,10 +617,18 @@ class WorkerSettings:
     # Job settings
     max_jobs = 10  # Max concurrent jobs
     job_timeout = timedelta(minutes=30)  # Max job duration
-    max_tries = 3  # Retry failed jobs
+    max_tries = 3  # Retry failed jobs; insertion resumes from its checkpoint
     retry_delay = timedelta(seconds=10)
 
 
+class FastLaneWorkerSettings(WorkerSettings):
+    """ARQ worker settings for the fast lane of small uploads."""
+
+    queue_name = FAST_QUEUE
+    cron_jobs = []  # Run by the bulk workers
+    max_jobs = 4
+
+
 # =============================================================================
 # Job Enqueueing Helper
 # =============================================================================
@@ -229,6 +648,7 @@ async def get_redis_pool() -> ArqRedis:
 async def enqueue_validation_job(
     upload_id: uuid.UUID,
     organization_id: uuid.UUID,
+    file_size_bytes: int | None = None,
 ) -> str | None:
     """
     Enqueue a validation job.
@@ -236,16 +656,19 @@ async def enqueue_validation_job(
     Args:
         upload_id: Upload to validate
         organization_id: Organization ID
+        file_size_bytes: Size of the upload file, to pick the queue lane
 
     Returns:
         Job ID or None if enqueueing failed
     """
     try:
         redis = await get_redis_pool()
-        job = await redis.enqueue_job(
+        job = await UploadScheduler(redis).enqueue(
             "validate_upload_job",
             str(upload_id),
             str(organization_id),
+            queue=choose_queue(file_size_bytes=file_size_bytes),
+            cost=estimate_cost(file_size_bytes=file_size_bytes),
         )
         return job.job_id if job else None
     except Exception as e:
@@ -256,6 +679,7 @@ async def enqueue_validation_job(
 async def enqueue_processing_job(
     upload_id: uuid.UUID,
     organization_id: uuid.UUID,
+    total_rows: int | None = None,
 ) -> str | None:
     """
     Enqueue a processing job.
@@ -263,16 +687,19 @@ async def enqueue_processing_job(
     Args:
         upload_id: Upload to process
         organization_id: Organization ID
+        total_rows: Rows to insert (valid rows), to pick the queue lane
 
     Returns:
         Job ID or None if enqueueing failed
     """
     try:
         redis = await get_redis_pool()
-        job = await redis.enqueue_job(
+        job = await UploadScheduler(redis).enqueue(
             "process_upload_job",
             str(upload_id),
             str(organization_id),
+            queue=choose_queue(total_rows=total_rows),
+            cost=estimate_cost(total_rows=total_rows),
         )
         return job.job_id if job else None
     except Exception as e:
@@ -9,6 +9,7 @@ from db.models.base_model import (
 )
 from db.models.discovery import (
     Assay,
+    FingerprintChange,
     Molecule,
     MoleculeFingerprint,
     MoleculeTarget,
@@ -32,11 +33,13 @@ from db.models.ml_registry import (
 from db.models.upload import (
     DuplicateAction,
     FileType,
+    ShardStatus,
     Upload,
     UploadFile,
     UploadProgress,
     UploadResultSummary,
     UploadRowError,
+    UploadShard,
     UploadStatus,
     can_transition,
 )
@@ -50,6 +53,7 @@ __all__ = [
     "TimestampMixin",
     # Discovery models
     "Assay",
+    "FingerprintChange",
     "Molecule",
     "MoleculeFingerprint",
     "MoleculeTarget",
@@ -71,11 +75,13 @@ __all__ = [
     # Upload models
     "DuplicateAction",
     "FileType",
+    "ShardStatus",
     "Upload",
     "UploadFile",
     "UploadProgress",
     "UploadResultSummary",
     "UploadRowError",
+    "UploadShard",
     "UploadStatus",
     "can_transition",
 ]
@@ -12,6 +12,9 @@ Association tables:
 - MoleculeTarget: Many-to-many molecule-target relationships
 - ProjectMolecule: Many-to-many project-molecule relationships
 - ProjectTarget: Many-to-many project-target relationships
+
+Change feed:
+- FingerprintChange: Trigger-maintained log of fingerprint writes and deletes
 """
 
 import uuid
@@ -20,10 +23,13 @@ from decimal import Decimal
 
 from sqlalchemy import (
     ARRAY,
+    BigInteger,
     Boolean,
     CheckConstraint,
+    Computed,
     DateTime,
     ForeignKey,
+    Identity,
     Index,
     LargeBinary,
     Numeric,
@@ -32,16 +38,21 @@ from sqlalchemy import (
     Text,
     UniqueConstraint,
     func,
+    text,
 )
-from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.dialects.postgresql import BIT, JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from db.base import Base
 from db.models.base_model import AuditedModel, BaseModel, TimestampMixin
 
 # =============================================================================
 # Molecule Model
 # =============================================================================
 
+# Deferred column group holding the Molecule fingerprint columns
+FINGERPRINT_GROUP = "fingerprints"
+
 
 class Molecule(AuditedModel):
     """
@@ -154,20 +165,28 @@ class Molecule(AuditedModel):
     )
 
     # --- Fingerprints (for similarity search) ---
+    # Deferred: entity queries skip them; similarity scans select them
+    # directly and single-row readers use undefer_group(FINGERPRINT_GROUP)
     fingerprint_morgan: Mapped[bytes | None] = mapped_column(
         LargeBinary,
         nullable=True,
+        deferred=True,
+        deferred_group=FINGERPRINT_GROUP,
         comment="Morgan fingerprint (2048 bits, radius 2)",
     )
     fingerprint_maccs: Mapped[bytes | None] = mapped_column(
         LargeBinary,
         nullable=True,
-        comment="MACCS keys (167 bits)",
+        deferred=True,
+        deferred_group=FINGERPRINT_GROUP,
+        comment="MACCS keys (167 bits, packed)",
     )
     fingerprint_rdkit: Mapped[bytes | None] = mapped_column(
         LargeBinary,
         nullable=True,
-        comment="RDKit topological fingerprint (2048 bits)",
+        deferred=True,
+        deferred_group=FINGERPRINT_GROUP,
+        comment="RDKit topological fingerprint (2048 bits, packed)",
     )
 
     # --- Naming ---
@@ -234,6 +253,11 @@ class Molecule(AuditedModel):
 # MoleculeFingerprint Model (for vector similarity indexing)
 # =============================================================================
 
+# fingerprint_bytes as a bit string, so PostgreSQL can AND two fingerprints
+# (bytea has no bitwise operators). Byte order is kept; bit order within a
+# byte differs from the packed layout, which popcounts do not care about.
+FINGERPRINT_BITS_EXPRESSION = "('x' || encode(fingerprint_bytes, 'hex'))::bit varying"
+
 
 class MoleculeFingerprint(BaseModel, TimestampMixin):
     """
@@ -283,6 +307,12 @@ class MoleculeFingerprint(BaseModel, TimestampMixin):
         nullable=True,
         comment="Hex encoded for debugging",
     )
+    fingerprint_bits: Mapped[str | None] = mapped_column(
+        BIT(varying=True),
+        Computed(FINGERPRINT_BITS_EXPRESSION, persisted=True),
+        deferred=True,
+        comment="fingerprint_bytes as BIT VARYING for bit_count(a & b) search (generated)",
+    )
 
     # --- Generation Parameters (for reproducibility) ---
     num_bits: Mapped[int] = mapped_column(
@@ -333,7 +363,11 @@ class MoleculeFingerprint(BaseModel, TimestampMixin):
             name="uq_molecule_fingerprint_type",
         ),
         Index("ix_molecule_fp_type", "fingerprint_type"),
+        # Incremental arena refresh (rows changed since watermark)
+        Index("ix_molecule_fp_type_updated_at", "fingerprint_type", "updated_at"),
         Index("ix_molecule_fp_external_id", "external_index_id"),
+        # Popcount window for in-database Tanimoto search
+        Index("ix_molecule_fp_type_on_bits", "fingerprint_type", "num_on_bits"),
         # Note: For pg_similarity or pgvector, add specialized indexes via migration
         {"comment": "Molecular fingerprints for similarity search"},
     )
@@ -342,6 +376,71 @@ class MoleculeFingerprint(BaseModel, TimestampMixin):
         return f"<MoleculeFingerprint {self.fingerprint_type} ({self.num_bits} bits)>"
 
 
+# =============================================================================
+# Fingerprint Change Feed
+# =============================================================================
+
+# Values of FingerprintChange.source
+CHANGE_SOURCE_MOLECULES = "molecules"  # molecules.fingerprint_morgan
+CHANGE_SOURCE_FINGERPRINTS = "molecule_fingerprints"
+
+# The writing transaction's id, as a plain bigint
+CURRENT_TXID_EXPRESSION = "(pg_current_xact_id()::text)::bigint"
+
+
+class FingerprintChange(Base):
+    """
+    One fingerprint write or delete, recorded by database triggers.
+
+    Rows are appended by triggers on ``molecules`` and
+    ``molecule_fingerprints`` (see migration h8i9j0k1l2m3), so every writer
+    is covered, including bulk COPY and cascaded deletes. In-memory and
+    on-disk fingerprint indexes replay the log as deltas instead of
+    reloading (packages.chemistry.change_feed). Rows carry no fingerprint
+    bytes; readers join back to the current row, so a log row is only a
+    "this molecule changed" marker and deletes are rows whose source row is
+    gone. ``txid`` lets readers page by transaction visibility rather than
+    by commit-order-unsafe sequence values.
+    """
+
+    __tablename__ = "fingerprint_changes"
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    source: Mapped[str] = mapped_column(
+        String(32),
+        nullable=False,
+        comment="molecules or molecule_fingerprints",
+    )
+    fingerprint_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    molecule_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    organization_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True),
+        nullable=True,
+        comment="Set for the molecules source",
+    )
+    deleted: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default="false")
+    txid: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+        server_default=text(CURRENT_TXID_EXPRESSION),
+        comment="Writing transaction id",
+    )
+    changed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+    )
+
+    __table_args__ = (
+        Index("ix_fingerprint_changes_source_txid", "source", "fingerprint_type", "txid"),
+        Index("ix_fingerprint_changes_changed_at", "changed_at"),
+        {"comment": "Trigger-maintained fingerprint change feed"},
+    )
+
+    def __repr__(self) -> str:
+        return f"<FingerprintChange {self.source} {self.molecule_id} deleted={self.deleted}>"
+
+
 # =============================================================================
 # Target Model
 # =============================================================================
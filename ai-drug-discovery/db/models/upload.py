@@ -7,6 +7,7 @@ Tables:
 - UploadProgress: Real-time progress tracking
 - UploadRowError: Per-row validation errors
 - UploadResultSummary: Final processing statistics
+- UploadShard: Record-aligned part of a large upload processed by its own jobs
 """
 
 import uuid
@@ -15,6 +16,7 @@ from decimal import Decimal
 from enum import Enum
 
 from sqlalchemy import (
+    BigInteger,
     DateTime,
     ForeignKey,
     Index,
@@ -61,6 +63,14 @@ class DuplicateAction(str, Enum):
     ERROR = "error"  # Treat duplicates as errors
 
 
+class ShardStatus(str, Enum):
+    """Upload shard states."""
+
+    PENDING = "pending"  # Planned, not yet validated
+    VALIDATED = "validated"  # Validated, artifacts stored
+    INSERTED = "inserted"  # Molecules inserted
+
+
 # Valid state transitions
 VALID_TRANSITIONS: dict[UploadStatus, list[UploadStatus]] = {
     UploadStatus.INITIATED: [UploadStatus.VALIDATING],
@@ -213,6 +223,12 @@ class Upload(BaseModel, TimestampMixin):
         cascade="all, delete-orphan",
         order_by="UploadRowError.row_number",
     )
+    shards: Mapped[list["UploadShard"]] = relationship(
+        "UploadShard",
+        back_populates="upload",
+        cascade="all, delete-orphan",
+        order_by="UploadShard.shard_index",
+    )
 
     # --- Table Configuration ---
     __table_args__ = (
@@ -286,6 +302,11 @@ class UploadFile(BaseModel, TimestampMixin):
         nullable=False,
         comment="Relative path (local) or S3 key",
     )
+    artifact_storage_path: Mapped[str | None] = mapped_column(
+        String(500),
+        nullable=True,
+        comment="Computed per-row artifacts from validation, reused by insertion",
+    )
 
     # --- Integrity ---
     sha256_hash: Mapped[str] = mapped_column(
@@ -311,8 +332,8 @@ class UploadProgress(BaseModel):
     """
     Real-time progress tracking for upload processing.
 
-    Updated frequently during validation and processing phases
-    to provide live feedback to users.
+    Written at phase boundaries; live counters between them are
+    published to Redis (apps.api.uploads.progress).
     """
 
     __tablename__ = "upload_progress"
@@ -359,6 +380,20 @@ class UploadProgress(BaseModel):
         comment="Tanimoto similarity matches",
     )
 
+    # --- Error Counts ---
+    error_counts: Mapped[dict | None] = mapped_column(
+        JSONB,
+        nullable=True,
+        comment="Row errors per error code, as of the last phase boundary",
+    )
+
+    # --- Resume State ---
+    checkpoint: Mapped[dict | None] = mapped_column(
+        JSONB,
+        nullable=True,
+        comment="Rows consumed and running totals as of the last committed batch",
+    )
+
     # --- Current Phase ---
     phase: Mapped[str] = mapped_column(
         String(50),
@@ -545,3 +580,108 @@ class UploadResultSummary(BaseModel):
             f"<UploadResultSummary created={self.molecules_created} "
             f"errors={self.errors_count}>"
         )
+
+
+class UploadShard(BaseModel):
+    """
+    Record-aligned part of a large upload.
+
+    Large uploads are split into shards that are validated and inserted by
+    separate worker jobs; a merge job then reconciles them into the upload's
+    progress and result summary. Text files are split on byte offsets at
+    record boundaries, Excel files on worksheet rows.
+    """
+
+    __tablename__ = "upload_shards"
+
+    # --- Foreign Key ---
+    upload_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("uploads.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    # --- Range ---
+    shard_index: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        comment="0-based position of the shard in the file",
+    )
+    start_offset: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+        comment="First byte (text) or worksheet row (Excel) of the shard",
+    )
+    end_offset: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+        comment="Byte or worksheet row after the shard (exclusive)",
+    )
+    row_offset: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        comment="Row number of the last row before the shard",
+    )
+    status: Mapped[ShardStatus] = mapped_column(
+        default=ShardStatus.PENDING,
+        nullable=False,
+    )
+
+    # --- Validation Counters ---
+    total_rows: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+    )
+    valid_rows: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+    )
+    invalid_rows: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+    )
+    duplicate_exact: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+    )
+    duplicate_similar: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+    )
+    error_counts: Mapped[dict | None] = mapped_column(
+        JSONB,
+        nullable=True,
+        comment="Row errors per error code recorded by the shard's jobs",
+    )
+
+    # --- Phase State ---
+    artifact_storage_path: Mapped[str | None] = mapped_column(
+        String(500),
+        nullable=True,
+        comment="Computed per-row artifacts of the shard",
+    )
+    checkpoint: Mapped[dict | None] = mapped_column(
+        JSONB,
+        nullable=True,
+        comment="Insertion totals as of the last committed batch",
+    )
+
+    # --- Relationship ---
+    upload: Mapped["Upload"] = relationship("Upload", back_populates="shards")
+
+    # --- Table Configuration ---
+    __table_args__ = (
+        UniqueConstraint("upload_id", "shard_index", name="uq_upload_shard_index"),
+        {"comment": "Record-aligned shards of large uploads"},
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<UploadShard {self.shard_index} "
+            f"[{self.start_offset}, {self.end_offset}) ({self.status.value})>"
+        )
@@ -156,15 +156,19 @@ from packages.chemistry.smiles import validate_smiles, canonicalize_smiles
 from packages.chemistry.features import (
     DescriptorCalculationError,
     Fingerprint,
+    FingerprintBatch,
     FingerprintCalculationError,
     FingerprintType as FeatureFingerprintType,
     MolecularDescriptors as FeatureMolecularDescriptors,
     calculate_all_fingerprints,
     calculate_descriptors as calculate_descriptors_rdkit,
     calculate_fingerprint as calculate_fingerprint_rdkit,
+    calculate_fingerprint_batch,
     calculate_maccs_fingerprint,
     calculate_morgan_fingerprint,
     calculate_rdkit_fingerprint,
+    pack_bitstring,
+    read_stored_fingerprint,
 )
 
 # Rendering (2D depiction)
@@ -180,6 +184,17 @@ from packages.chemistry.render import (
     render_svg,
 )
 
+# Vectorized similarity engine
+from packages.chemistry.similarity_engine import (
+    FingerprintMatrix,
+    SimilarityMetric,
+    pack_fingerprints,
+    popcount_bounds,
+    popcount_bytes,
+    popcount_rows,
+    similarity_join,
+)
+
 # Similarity search
 from packages.chemistry.similarity import (
     FingerprintIndex,
@@ -200,12 +215,32 @@ from packages.chemistry.similarity import (
 from packages.chemistry.fingerprint_index import (
     FingerprintIndexAdapter,
     IndexStats,
+    LSHFingerprintIndex,
+    PgVectorFingerprintIndex,
     PineconeFingerprintIndex,
+    PostgresBitCountFingerprintIndex,
     PostgresFingerprintIndex,
     SimilarityMatch,
     get_fingerprint_index,
 )
 
+# Memory-mapped fingerprint arena
+from packages.chemistry.fingerprint_arena import (
+    ArenaManifest,
+    FingerprintArena,
+    get_shared_arena,
+)
+
+# Per-organization index cache with memory budget
+from packages.chemistry.index_manager import FingerprintIndexManager
+
+# In-process approximate nearest-neighbour index
+from packages.chemistry.fingerprint_lsh import (
+    MinHashLSHIndex,
+    candidate_probability,
+    recall_at_k,
+)
+
 # Molecule Repository (database operations)
 from packages.chemistry.molecule_repository import (
     BulkUpsertResult,
@@ -313,6 +348,7 @@ __all__ = [
     "CanonicalizeResult",
     # Features (descriptors + fingerprints)
     "Fingerprint",
+    "FingerprintBatch",
     "FeatureFingerprintType",
     "FeatureMolecularDescriptors",
     "DescriptorCalculationError",
@@ -323,6 +359,9 @@ __all__ = [
     "calculate_maccs_fingerprint",
     "calculate_rdkit_fingerprint",
     "calculate_all_fingerprints",
+    "calculate_fingerprint_batch",
+    "pack_bitstring",
+    "read_stored_fingerprint",
     # Rendering
     "ImageFormat",
     "RenderOptions",
@@ -346,13 +385,33 @@ __all__ = [
     "similarity_matrix",
     "find_similar_molecules",
     "cluster_by_similarity",
+    "FingerprintMatrix",
+    "SimilarityMetric",
+    "pack_fingerprints",
+    "popcount_bounds",
+    "popcount_bytes",
+    "popcount_rows",
+    "similarity_join",
     # Fingerprint Index Adapters
     "FingerprintIndexAdapter",
     "PostgresFingerprintIndex",
+    "PostgresBitCountFingerprintIndex",
+    "PgVectorFingerprintIndex",
     "PineconeFingerprintIndex",
     "SimilarityMatch",
     "IndexStats",
     "get_fingerprint_index",
+    # Fingerprint Arena
+    "ArenaManifest",
+    "FingerprintArena",
+    "get_shared_arena",
+    # Index Manager
+    "FingerprintIndexManager",
+    # Approximate Nearest-Neighbour Index
+    "MinHashLSHIndex",
+    "LSHFingerprintIndex",
+    "candidate_probability",
+    "recall_at_k",
     # Molecule Repository
     "MoleculeRepository",
     "MoleculeData",
@@ -0,0 +1,409 @@
+"""
+Incremental fingerprint change feed for in-memory and on-disk indexes.
+
+Fingerprint indexes (the per-organization upload index, the memory-mapped
+FingerprintArena, MinHash LSH indexes) snapshot the library once and then
+need to follow writes made by every other process. Database triggers append
+one ``fingerprint_changes`` row per write or delete, whatever the writer,
+and send ``NOTIFY fingerprint_changes`` when the transaction commits (see
+db.models.FingerprintChange). Indexes replay those rows as deltas.
+
+Epochs:
+    A consumer's position in the feed is an *epoch*: the transaction-id
+    horizon ``pg_snapshot_xmin(pg_current_snapshot())``. Every transaction
+    below the horizon has finished, so reading all changes with
+    ``txid >= epoch`` and then advancing to the new horizon never skips a
+    transaction that committed late, unlike a sequence or ``updated_at``
+    watermark. Rows of transactions still open at the horizon are read again
+    on the next sync; applying a change twice is harmless because changes
+    are resolved against current table state.
+
+Usage:
+    epoch = await current_epoch(session)          # before the snapshot scan
+    ...                                           # load the full snapshot
+    changes = await fetch_fingerprint_changes(session, epoch)
+    for delta in changes.deltas:
+        index.remove(delta.molecule_id) if delta.deleted else index.upsert(...)
+    epoch = changes.epoch
+
+Retention:
+    ``prune_fingerprint_changes`` drops rows older than ``CHANGE_RETENTION``;
+    a consumer that has not synced for that long must reload from a snapshot
+    (``needs_snapshot``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING, Any
+from uuid import UUID
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+# NOTIFY channel raised by the fingerprint_changes statement trigger
+CHANGE_CHANNEL = "fingerprint_changes"
+
+# Change log rows older than this are pruned
+CHANGE_RETENTION = timedelta(days=1)
+
+# Seconds between LISTEN reconnect attempts, doubling up to the maximum
+RECONNECT_MIN_DELAY = 1.0
+RECONNECT_MAX_DELAY = 60.0
+
+SOURCE_MOLECULES = "molecules"
+SOURCE_FINGERPRINTS = "molecule_fingerprints"
+
+
+@dataclass(frozen=True)
+class FingerprintDelta:
+    """Current state of one changed molecule."""
+
+    molecule_id: UUID
+    fingerprint: bytes | None  # None = removed from the index
+    inchi_key: str | None = None  # Set for the molecules source
+
+    @property
+    def deleted(self) -> bool:
+        return self.fingerprint is None
+
+
+@dataclass(frozen=True)
+class ChangeSet:
+    """Deltas since an epoch and the epoch to resume from."""
+
+    epoch: int
+    deltas: list[FingerprintDelta]
+
+    def __len__(self) -> int:
+        return len(self.deltas)
+
+
+async def current_epoch(session: AsyncSession) -> int:
+    """
+    Current transaction-id horizon.
+
+    Take it *before* scanning a snapshot, so changes racing with the scan
+    are replayed afterwards.
+    """
+    from sqlalchemy import text
+
+    result = await session.execute(
+        text("SELECT (pg_snapshot_xmin(pg_current_snapshot())::text)::bigint")
+    )
+    return int(result.scalar_one())
+
+
+def changed_molecules_query(
+    since_epoch: int,
+    source: str = SOURCE_FINGERPRINTS,
+    fingerprint_type: str = "morgan",
+    organization_id: UUID | None = None,
+):
+    """
+    SELECT of the distinct molecule ids changed since an epoch.
+
+    molecule_fingerprints changes carry no organization, so an
+    organization-scoped query on that source reads the type's changes of
+    every organization plus the organization's molecule (soft-)deletes;
+    current_state_query resolves other organizations' molecules as removals.
+    """
+    from sqlalchemy import and_, or_, select
+
+    from db.models import FingerprintChange
+
+    this_source = and_(
+        FingerprintChange.source == source,
+        FingerprintChange.fingerprint_type == fingerprint_type,
+    )
+    stmt = select(FingerprintChange.molecule_id).where(FingerprintChange.txid >= since_epoch)
+    if organization_id is None:
+        stmt = stmt.where(this_source)
+    elif source == SOURCE_MOLECULES:
+        stmt = stmt.where(this_source, FingerprintChange.organization_id == organization_id)
+    else:
+        stmt = stmt.where(
+            or_(
+                this_source,
+                and_(
+                    FingerprintChange.source == SOURCE_MOLECULES,
+                    FingerprintChange.organization_id == organization_id,
+                ),
+            )
+        )
+    return stmt.distinct()
+
+
+def current_state_query(
+    since_epoch: int,
+    source: str = SOURCE_FINGERPRINTS,
+    fingerprint_type: str = "morgan",
+    organization_id: UUID | None = None,
+):
+    """
+    SELECT of (molecule_id, fingerprint[, inchi_key]) for changed molecules.
+
+    The fingerprint is NULL for molecules that were deleted, soft-deleted,
+    lost their fingerprint or belong to another organization. inchi_key is
+    selected whenever the query is organization-scoped.
+    """
+    from sqlalchemy import and_, case, select
+
+    from db.models import Molecule, MoleculeFingerprint
+
+    changed = changed_molecules_query(
+        since_epoch, source, fingerprint_type, organization_id
+    ).subquery("changed")
+
+    if source == SOURCE_MOLECULES:
+        live = and_(Molecule.id.isnot(None), Molecule.deleted_at.is_(None))
+        return select(
+            changed.c.molecule_id,
+            case((live, Molecule.fingerprint_morgan), else_=None).label("fingerprint"),
+            Molecule.inchi_key,
+        ).outerjoin(Molecule, Molecule.id == changed.c.molecule_id)
+
+    if source == SOURCE_FINGERPRINTS:
+        fingerprint_row = and_(
+            MoleculeFingerprint.molecule_id == changed.c.molecule_id,
+            MoleculeFingerprint.fingerprint_type == fingerprint_type,
+        )
+        if organization_id is None:
+            return select(
+                changed.c.molecule_id,
+                MoleculeFingerprint.fingerprint_bytes.label("fingerprint"),
+            ).outerjoin(MoleculeFingerprint, fingerprint_row)
+
+        live = and_(Molecule.organization_id == organization_id, Molecule.deleted_at.is_(None))
+        return (
+            select(
+                changed.c.molecule_id,
+                case((live, MoleculeFingerprint.fingerprint_bytes), else_=None).label("fingerprint"),
+                Molecule.inchi_key,
+            )
+            .outerjoin(MoleculeFingerprint, fingerprint_row)
+            .outerjoin(Molecule, Molecule.id == changed.c.molecule_id)
+        )
+
+    raise ValueError(f"Unknown change source: {source}")
+
+
+async def fetch_fingerprint_changes(
+    session: AsyncSession,
+    since_epoch: int,
+    source: str = SOURCE_FINGERPRINTS,
+    fingerprint_type: str = "morgan",
+    organization_id: UUID | None = None,
+) -> ChangeSet:
+    """
+    Resolve every change since an epoch to current fingerprint state.
+
+    Args:
+        session: Database session
+        since_epoch: Epoch from current_epoch() or a previous ChangeSet
+        source: SOURCE_FINGERPRINTS (molecule_fingerprints rows) or
+            SOURCE_MOLECULES (molecules.fingerprint_morgan)
+        fingerprint_type: Fingerprint type (molecule_fingerprints source)
+        organization_id: Only this organization's molecules
+
+    Returns:
+        ChangeSet with one delta per changed molecule
+    """
+    epoch = await current_epoch(session)
+    stmt = current_state_query(since_epoch, source, fingerprint_type, organization_id)
+    rows = (await session.execute(stmt)).all()
+    deltas = [
+        FingerprintDelta(
+            molecule_id=row.molecule_id,
+            fingerprint=bytes(row.fingerprint) if row.fingerprint else None,
+            inchi_key=getattr(row, "inchi_key", None),
+        )
+        for row in rows
+    ]
+    return ChangeSet(epoch=epoch, deltas=deltas)
+
+
+async def prune_fingerprint_changes(
+    session: AsyncSession,
+    retention: timedelta = CHANGE_RETENTION,
+) -> int:
+    """
+    Delete change log rows older than the retention window.
+
+    Returns:
+        Number of rows deleted
+    """
+    from sqlalchemy import delete
+
+    from db.models import FingerprintChange
+
+    cutoff = datetime.now(UTC) - retention
+    result = await session.execute(
+        delete(FingerprintChange).where(FingerprintChange.changed_at < cutoff)
+    )
+    return result.rowcount or 0
+
+
+def needs_snapshot(synced_at: datetime | None, retention: timedelta = CHANGE_RETENTION) -> bool:
+    """Whether a consumer last synced too long ago to trust the pruned log."""
+    if synced_at is None:
+        return True
+    # Half the window leaves room for clock skew and slow prune jobs
+    return datetime.now(UTC) - synced_at > retention / 2
+
+
+class FingerprintChangeListener:
+    """
+    LISTEN for fingerprint change notifications on a dedicated connection.
+
+    ``version`` increases on every notification and whenever the connection
+    is (re)established, so a consumer that remembers the version it last
+    synced at can skip polling the change log while nothing was committed.
+    While disconnected, ``connected`` is False and consumers should poll; a
+    lost connection is re-established in the background with backoff.
+    """
+
+    def __init__(self, dsn: str, channel: str = CHANGE_CHANNEL):
+        """
+        Initialize the listener.
+
+        Args:
+            dsn: PostgreSQL DSN (``postgresql://`` or ``postgresql+asyncpg://``)
+            channel: Notification channel
+        """
+        self.dsn = dsn.replace("postgresql+asyncpg://", "postgresql://", 1)
+        self.channel = channel
+        self.version = 0
+        self._connection: Any = None
+        self._changed = asyncio.Event()
+        self._reconnect_task: asyncio.Task | None = None
+        self._closed = False
+
+    @property
+    def connected(self) -> bool:
+        return self._connection is not None and not self._connection.is_closed()
+
+    async def start(self) -> None:
+        """Open the connection and start listening."""
+        import asyncpg
+
+        self._closed = False
+        connection = await asyncpg.connect(self.dsn)
+        try:
+            await connection.add_listener(self.channel, self._on_notification)
+        except Exception:
+            await connection.close()
+            raise
+        connection.add_termination_listener(self._on_terminated)
+        self._connection = connection
+        # Anything committed before LISTEN took effect was not notified
+        self._bump()
+
+    async def close(self) -> None:
+        """Stop listening, stop reconnecting and close the connection."""
+        self._closed = True
+        task, self._reconnect_task = self._reconnect_task, None
+        if task is not None:
+            task.cancel()
+        connection, self._connection = self._connection, None
+        if connection is not None and not connection.is_closed():
+            await connection.close()
+
+    def _bump(self) -> None:
+        self.version += 1
+        self._changed.set()
+
+    def _on_notification(self, *args: Any) -> None:
+        self._bump()
+
+    def _on_terminated(self, *args: Any) -> None:
+        if self._closed:
+            return
+        logger.warning("Fingerprint change listener connection lost; polling until it reconnects")
+        self._connection = None
+        self._bump()
+        self.reconnect()
+
+    def reconnect(self) -> None:
+        """Re-establish the connection in a background task, with backoff."""
+        if self._closed or self.connected:
+            return
+        if self._reconnect_task is not None and not self._reconnect_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop to reconnect on; consumers keep polling
+            return
+        self._reconnect_task = loop.create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        delay = RECONNECT_MIN_DELAY
+        while not self._closed and not self.connected:
+            await asyncio.sleep(delay)
+            try:
+                await self.start()
+            except Exception:
+                logger.debug("Fingerprint change listener reconnect failed", exc_info=True)
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+            else:
+                logger.info("Fingerprint change listener reconnected")
+
+    def changed_since(self, version: int) -> bool:
+        """Whether a change may have been committed since ``version``."""
+        return not self.connected or self.version != version
+
+    async def wait(self, timeout: float) -> bool:
+        """
+        Wait for the next notification.
+
+        Returns:
+            True if notified, False on timeout
+        """
+        self._changed.clear()
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            return True
+        except TimeoutError:
+            return False
+
+
+_listener: FingerprintChangeListener | None = None
+
+
+def get_change_listener() -> FingerprintChangeListener | None:
+    """Process-wide listener, if one was started."""
+    return _listener
+
+
+async def start_change_listener(dsn: str) -> FingerprintChangeListener:
+    """
+    Start the process-wide listener.
+
+    Failures are logged; consumers poll while the listener keeps retrying in
+    the background.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+    listener = FingerprintChangeListener(dsn)
+    try:
+        await listener.start()
+    except Exception:
+        logger.warning("Could not LISTEN for fingerprint changes; polling instead", exc_info=True)
+        listener.reconnect()
+    _listener = listener
+    return listener
+
+
+async def stop_change_listener() -> None:
+    """Close the process-wide listener."""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is not None:
+        await listener.close()
@@ -8,7 +8,9 @@ Provides:
 """
 
 from decimal import Decimal
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Sequence
+
+import numpy as np
 
 from packages.chemistry.exceptions import ChemistryErrorCode, ComputationError
 from packages.chemistry.schemas import (
@@ -20,6 +22,13 @@ from packages.chemistry.schemas import (
 if TYPE_CHECKING:
     from rdkit.Chem import Mol
 
+    from packages.chemistry.features import FingerprintBatch
+
+# Fingerprint types computed with the batch kernel in packages.chemistry.features
+_KERNEL_FINGERPRINT_TYPES = frozenset(
+    {FingerprintType.MORGAN, FingerprintType.MACCS, FingerprintType.RDKIT}
+)
+
 # Lazy imports for RDKit modules
 _rdkit_available: bool | None = None
 
@@ -157,6 +166,15 @@ class DescriptorCalculator:
             )
 
 
+def _pack_bitvect(fp, n_bits: int) -> bytes:
+    """Pack an RDKit bit vector into little-endian bytes (bit i -> byte i // 8)."""
+    from rdkit import DataStructs
+
+    dense = np.zeros(n_bits, dtype=np.uint8)
+    DataStructs.ConvertToNumpyArray(fp, dense)
+    return np.packbits(dense, bitorder="little").tobytes()
+
+
 class FingerprintCalculator:
     """Calculator for molecular fingerprints."""
 
@@ -192,12 +210,11 @@ class FingerprintCalculator:
             )
 
         try:
-            if fp_type == FingerprintType.MORGAN:
-                return self._calculate_morgan(mol, **kwargs)
-            elif fp_type == FingerprintType.MACCS:
-                return self._calculate_maccs(mol)
-            elif fp_type == FingerprintType.RDKIT:
-                return self._calculate_rdkit_fp(mol, **kwargs)
+            if fp_type in _KERNEL_FINGERPRINT_TYPES:
+                batch = self._calculate_kernel([mol], fp_type, **kwargs)
+                if not batch.valid[0]:
+                    raise RuntimeError(batch.errors.get(0, "unknown error"))
+                return self._batch_row_data(batch, fp_type, 0)
             elif fp_type == FingerprintType.ATOM_PAIR:
                 return self._calculate_atom_pair(mol, **kwargs)
             elif fp_type == FingerprintType.TORSION:
@@ -216,83 +233,71 @@ class FingerprintCalculator:
                 details={"fp_type": fp_type.value, "error": str(e)},
             )
 
-    def _calculate_morgan(
+    def calculate_batch(
         self,
-        mol: "Mol",
-        radius: int = 2,
-        n_bits: int = 2048,
-    ) -> FingerprintData:
-        """Calculate Morgan (circular) fingerprint."""
-        from rdkit import DataStructs
-
-        fp = self._AllChem.GetMorganFingerprintAsBitVect(
-            mol, radius=radius, nBits=n_bits
-        )
-
-        # Convert to bytes
-        arr = bytearray(n_bits // 8)
-        DataStructs.ConvertToNumpyArray(fp, arr)
-        bits_bytes = bytes(arr)
-
-        # Get on bits
-        on_bits = list(fp.GetOnBits())
-
-        return FingerprintData(
-            fingerprint_type=FingerprintType.MORGAN,
-            bit_length=n_bits,
-            bits=bits_bytes,
-            on_bits=on_bits,
-            num_on_bits=len(on_bits),
-        )
-
-    def _calculate_maccs(self, mol: "Mol") -> FingerprintData:
-        """Calculate MACCS keys fingerprint."""
-        from rdkit import DataStructs
-
-        fp = self._MACCSkeys.GenMACCSKeys(mol)
-
-        # MACCS has 167 bits (0-166)
-        n_bits = 167
-        arr = bytearray((n_bits + 7) // 8)
-        DataStructs.ConvertToNumpyArray(fp, arr)
-        bits_bytes = bytes(arr)
+        mols: Sequence["Mol | None"],
+        fp_type: FingerprintType,
+        **kwargs,
+    ) -> list[FingerprintData | None]:
+        """
+        Calculate one fingerprint type for many molecules.
 
-        on_bits = list(fp.GetOnBits())
+        Morgan, MACCS and RDKit fingerprints go through the batch kernel
+        (one reusable generator, one packed matrix); other types fall back
+        to per-molecule calculation.
 
-        return FingerprintData(
-            fingerprint_type=FingerprintType.MACCS,
-            bit_length=n_bits,
-            bits=bits_bytes,
-            on_bits=on_bits,
-            num_on_bits=len(on_bits),
-        )
+        Args:
+            mols: RDKit Mol objects (None entries yield None).
+            fp_type: Type of fingerprint to calculate.
+            **kwargs: Additional parameters for fingerprint generation.
 
-    def _calculate_rdkit_fp(
-        self,
-        mol: "Mol",
-        min_path: int = 1,
-        max_path: int = 7,
-        n_bits: int = 2048,
+        Returns:
+            FingerprintData per molecule, None where calculation failed.
+        """
+        if fp_type not in _KERNEL_FINGERPRINT_TYPES:
+            results: list[FingerprintData | None] = []
+            for mol in mols:
+                try:
+                    results.append(self.calculate(mol, fp_type, **kwargs))
+                except ComputationError:
+                    results.append(None)
+            return results
+
+        batch = self._calculate_kernel(mols, fp_type, **kwargs)
+        return [
+            self._batch_row_data(batch, fp_type, row) if ok else None
+            for row, ok in enumerate(batch.valid.tolist())
+        ]
+
+    @staticmethod
+    def _calculate_kernel(
+        mols: Sequence["Mol | None"],
+        fp_type: FingerprintType,
+        n_bits: int | None = None,
+        **kwargs,
+    ) -> "FingerprintBatch":
+        """Run the batch fingerprint kernel (n_bits maps to num_bits)."""
+        from packages.chemistry.features import FingerprintType as KernelFingerprintType
+        from packages.chemistry.features import calculate_fingerprint_batch
+
+        if n_bits is not None:
+            kwargs["num_bits"] = n_bits
+        return calculate_fingerprint_batch(mols, KernelFingerprintType(fp_type.value), **kwargs)
+
+    @staticmethod
+    def _batch_row_data(
+        batch: "FingerprintBatch",
+        fp_type: FingerprintType,
+        row: int,
     ) -> FingerprintData:
-        """Calculate RDKit topological fingerprint."""
-        from rdkit import DataStructs
-
-        fp = self._Chem.RDKFingerprint(
-            mol, minPath=min_path, maxPath=max_path, fpSize=n_bits
-        )
-
-        arr = bytearray(n_bits // 8)
-        DataStructs.ConvertToNumpyArray(fp, arr)
-        bits_bytes = bytes(arr)
-
-        on_bits = list(fp.GetOnBits())
-
+        packed = batch.packed[row]
+        dense = np.unpackbits(packed, count=batch.num_bits, bitorder="little")
         return FingerprintData(
-            fingerprint_type=FingerprintType.RDKIT,
-            bit_length=n_bits,
-            bits=bits_bytes,
-            on_bits=on_bits,
-            num_on_bits=len(on_bits),
+            fingerprint_type=fp_type,
+            bit_length=batch.num_bits,
+            bits=packed.tobytes(),
+            on_bits=np.flatnonzero(dense).tolist(),
+            num_on_bits=int(batch.popcounts[row]),
         )
 
     def _calculate_atom_pair(
@@ -301,15 +306,10 @@ class FingerprintCalculator:
         n_bits: int = 2048,
     ) -> FingerprintData:
         """Calculate atom pair fingerprint."""
-        from rdkit import DataStructs
-
         fp = self._rdMolDescriptors.GetHashedAtomPairFingerprintAsBitVect(
             mol, nBits=n_bits
         )
-
-        arr = bytearray(n_bits // 8)
-        DataStructs.ConvertToNumpyArray(fp, arr)
-        bits_bytes = bytes(arr)
+        bits_bytes = _pack_bitvect(fp, n_bits)
 
         on_bits = list(fp.GetOnBits())
 
@@ -327,15 +327,10 @@ class FingerprintCalculator:
         n_bits: int = 2048,
     ) -> FingerprintData:
         """Calculate topological torsion fingerprint."""
-        from rdkit import DataStructs
-
         fp = self._rdMolDescriptors.GetHashedTopologicalTorsionFingerprintAsBitVect(
             mol, nBits=n_bits
         )
-
-        arr = bytearray(n_bits // 8)
-        DataStructs.ConvertToNumpyArray(fp, arr)
-        bits_bytes = bytes(arr)
+        bits_bytes = _pack_bitvect(fp, n_bits)
 
         on_bits = list(fp.GetOnBits())
 
@@ -371,6 +366,28 @@ class FingerprintCalculator:
                 pass
         return results
 
+    def calculate_multiple_batch(
+        self,
+        mols: Sequence["Mol | None"],
+        fp_types: list[FingerprintType],
+    ) -> list[dict[FingerprintType, FingerprintData]]:
+        """
+        Calculate multiple fingerprint types for many molecules.
+
+        Args:
+            mols: RDKit Mol objects.
+            fp_types: List of fingerprint types to calculate.
+
+        Returns:
+            Dict per molecule mapping fingerprint type to data; failed
+            fingerprints are skipped, as in calculate_multiple.
+        """
+        per_type = {fp_type: self.calculate_batch(mols, fp_type) for fp_type in fp_types}
+        return [
+            {fp_type: data[row] for fp_type, data in per_type.items() if data[row] is not None}
+            for row in range(len(mols))
+        ]
+
 
 class MoleculeRenderer:
     """2D structure renderer for molecules."""
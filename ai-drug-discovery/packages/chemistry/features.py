@@ -10,19 +10,33 @@ Fingerprints are returned in multiple representations for flexibility:
 - Base64 string (JSON-safe)
 - Hex string (human-readable)
 - Bit vector (for similarity calculations)
+
+For many molecules at once, ``calculate_fingerprint_batch`` writes packed
+fingerprints for the whole batch into one preallocated matrix using reusable
+RDKit fingerprint generators, and counts on-bits in the same pass.
 """
 
 from __future__ import annotations
 
 import base64
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from decimal import Decimal
 from enum import Enum
-from typing import TYPE_CHECKING
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Sequence
+
+import numpy as np
 
 if TYPE_CHECKING:
     from rdkit.Chem import Mol
-    from rdkit.DataStructs import ExplicitBitVect
+
+    from packages.chemistry.similarity_engine import FingerprintMatrix
+
+# MACCS has 167 bits (0-166, bit 0 unused)
+MACCS_NUM_BITS = 167
+
+# Rows fingerprinted per block of the batch kernel (bounds scratch memory)
+FINGERPRINT_BLOCK_ROWS = 1024
 
 
 class FingerprintType(str, Enum):
@@ -83,22 +97,129 @@ class MolecularDescriptors:
         return self.lipinski_violations() == 0
 
 
-@dataclass(frozen=True)
 class Fingerprint:
-    """Container for molecular fingerprint with multiple representations."""
+    """
+    Molecular fingerprint with on-demand representations.
+
+    Only the packed bits are stored; the base64 and hex encodings are derived
+    when read. ``__slots__`` keeps instances free of a per-object ``__dict__``.
+    The bits may be a ``memoryview`` over a shared buffer (e.g. a row of a
+    FingerprintBatch or FingerprintIndex), in which case the fingerprint keeps
+    that buffer alive instead of copying it.
+
+    Instances are immutable and compare by value.
+    """
+
+    __slots__ = ("fp_type", "num_bits", "num_on_bits", "_data", "radius", "use_features")
 
     fp_type: FingerprintType
     num_bits: int
     num_on_bits: int
+    radius: int | None  # For Morgan
+    use_features: bool  # For Morgan (FCFP vs ECFP)
+
+    def __init__(
+        self,
+        fp_type: FingerprintType,
+        num_bits: int,
+        num_on_bits: int,
+        bytes_data: bytes | memoryview,
+        base64_str: str | None = None,
+        hex_str: str | None = None,
+        radius: int | None = None,
+        use_features: bool = False,
+    ):
+        """
+        Create a fingerprint.
+
+        Args:
+            fp_type: Fingerprint type
+            num_bits: Number of bits
+            num_on_bits: Number of set bits
+            bytes_data: Packed bits (bytes, or a memoryview over a shared buffer)
+            base64_str: Accepted for compatibility; derived from the bits
+            hex_str: Accepted for compatibility; derived from the bits
+            radius: Morgan radius used to generate (for reproducibility)
+            use_features: Morgan feature invariants used to generate
+        """
+        if isinstance(bytes_data, memoryview):
+            bytes_data = bytes_data.cast("B") if bytes_data.format != "B" else bytes_data
+        set_ = object.__setattr__
+        set_(self, "fp_type", fp_type)
+        set_(self, "num_bits", num_bits)
+        set_(self, "num_on_bits", num_on_bits)
+        set_(self, "_data", bytes_data)
+        set_(self, "radius", radius)
+        set_(self, "use_features", use_features)
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError(f"Fingerprint is immutable; cannot set {name!r}")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"Fingerprint is immutable; cannot delete {name!r}")
 
     # Representations
-    bytes_data: bytes  # Raw binary
-    base64_str: str  # Base64 encoded
-    hex_str: str  # Hexadecimal
 
-    # Parameters used to generate (for reproducibility)
-    radius: int | None = None  # For Morgan
-    use_features: bool = False  # For Morgan (FCFP vs ECFP)
+    @property
+    def bytes_data(self) -> bytes:
+        """Raw packed bits (little-endian: bit i is in byte i // 8)."""
+        data = self._data
+        return data if isinstance(data, bytes) else data.tobytes()
+
+    @property
+    def base64_str(self) -> str:
+        """Base64 encoding of the bits (computed on access)."""
+        return base64.b64encode(self._data).decode("ascii")
+
+    @property
+    def hex_str(self) -> str:
+        """Hex encoding of the bits (computed on access)."""
+        return self._data.hex()
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the packed bits in bytes."""
+        return len(self._data)
+
+    def _key(self) -> tuple:
+        return (
+            self.fp_type,
+            self.num_bits,
+            self.num_on_bits,
+            self.bytes_data,
+            self.radius,
+            self.use_features,
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._key() == other._key()  # type: ignore[attr-defined]
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __repr__(self) -> str:
+        return (
+            f"Fingerprint(fp_type={self.fp_type!r}, num_bits={self.num_bits}, "
+            f"num_on_bits={self.num_on_bits}, radius={self.radius}, "
+            f"use_features={self.use_features})"
+        )
+
+    def __reduce__(self):
+        return (
+            self.__class__,
+            (
+                self.fp_type,
+                self.num_bits,
+                self.num_on_bits,
+                self.bytes_data,
+                None,
+                None,
+                self.radius,
+                self.use_features,
+            ),
+        )
 
     def to_dict(self) -> dict:
         """Convert to dictionary for JSON serialization."""
@@ -123,30 +244,19 @@ class Fingerprint:
     ) -> "Fingerprint":
         """Reconstruct fingerprint from base64 representation."""
         bytes_data = base64.b64decode(base64_str)
-        hex_str = bytes_data.hex()
-        # Count on bits from bytes
-        num_on_bits = sum(bin(b).count("1") for b in bytes_data)
         return cls(
             fp_type=fp_type,
             num_bits=num_bits,
-            num_on_bits=num_on_bits,
+            num_on_bits=int.from_bytes(bytes_data, "little").bit_count(),
             bytes_data=bytes_data,
-            base64_str=base64_str,
-            hex_str=hex_str,
             radius=radius,
             use_features=use_features,
         )
 
     def get_on_bits(self) -> list[int]:
         """Get list of bit indices that are set to 1."""
-        on_bits = []
-        for byte_idx, byte_val in enumerate(self.bytes_data):
-            for bit_idx in range(8):
-                if byte_val & (1 << bit_idx):
-                    global_bit_idx = byte_idx * 8 + bit_idx
-                    if global_bit_idx < self.num_bits:
-                        on_bits.append(global_bit_idx)
-        return sorted(on_bits)
+        bits = np.unpackbits(np.frombuffer(self._data, dtype=np.uint8), bitorder="little")
+        return np.flatnonzero(bits[:self.num_bits]).tolist()
 
 
 class DescriptorCalculationError(Exception):
@@ -223,15 +333,239 @@ def calculate_descriptors(mol_or_smiles: "Mol | str") -> MolecularDescriptors:
         raise DescriptorCalculationError(f"Failed to calculate descriptors: {e}") from e
 
 
-def _bitvect_to_bytes(bitvect: "ExplicitBitVect") -> bytes:
-    """Convert RDKit bit vector to bytes."""
-    num_bits = bitvect.GetNumBits()
+# =============================================================================
+# Fingerprint Kernel
+# =============================================================================
+
+
+@lru_cache(maxsize=32)
+def _dense_fingerprinter(
+    fp_type: FingerprintType,
+    num_bits: int,
+    radius: int = 2,
+    use_features: bool = False,
+    min_path: int = 1,
+    max_path: int = 7,
+) -> Callable[["Mol"], np.ndarray]:
+    """
+    Get a reusable function mapping a Mol to a dense 0/1 uint8 bit array.
+
+    Generators are built once per parameter set (and per process) instead of
+    on every call. Output is bit-identical to the legacy
+    GetMorganFingerprintAsBitVect / RDKFingerprint / GenMACCSKeys functions.
+    """
+    from rdkit import DataStructs
+    from rdkit.Chem import MACCSkeys, rdFingerprintGenerator
+
+    if fp_type == FingerprintType.MORGAN:
+        generator = rdFingerprintGenerator.GetMorganGenerator(
+            radius=radius,
+            fpSize=num_bits,
+            atomInvariantsGenerator=(
+                rdFingerprintGenerator.GetMorganFeatureAtomInvGen() if use_features else None
+            ),
+        )
+        return generator.GetFingerprintAsNumPy
+    if fp_type == FingerprintType.RDKIT:
+        generator = rdFingerprintGenerator.GetRDKitFPGenerator(
+            minPath=min_path,
+            maxPath=max_path,
+            fpSize=num_bits,
+        )
+        return generator.GetFingerprintAsNumPy
+    if fp_type == FingerprintType.MACCS:
+        def maccs(mol: "Mol") -> np.ndarray:
+            dense = np.zeros(MACCS_NUM_BITS, dtype=np.uint8)
+            DataStructs.ConvertToNumpyArray(MACCSkeys.GenMACCSKeys(mol), dense)
+            return dense
+
+        return maccs
+    raise ValueError(f"Unknown fingerprint type: {fp_type}")
+
+
+def _pack_bits(dense: np.ndarray) -> bytes:
+    """Pack a dense 0/1 array into little-endian bytes (bit i -> byte i // 8)."""
+    return np.packbits(dense, bitorder="little").tobytes()
+
+
+def _make_fingerprint(
+    dense: np.ndarray,
+    fp_type: FingerprintType,
+    radius: int | None = None,
+    use_features: bool = False,
+) -> Fingerprint:
+    return Fingerprint(
+        fp_type=fp_type,
+        num_bits=len(dense),
+        num_on_bits=int(np.count_nonzero(dense)),
+        bytes_data=_pack_bits(dense),
+        radius=radius,
+        use_features=use_features,
+    )
+
+
+@dataclass(frozen=True, eq=False)
+class FingerprintBatch:
+    """
+    Packed fingerprints for a batch of molecules, one row per input.
+
+    Rows are zero-padded to whole 64-bit words so ``words`` can be handed to
+    the similarity engine without repacking. Rows for molecules that failed
+    are all zero with ``valid`` False.
+    """
+
+    fp_type: FingerprintType
+    num_bits: int
+    words: np.ndarray  # (n, num_words) little-endian uint64
+    popcounts: np.ndarray  # (n,) int64
+    valid: np.ndarray  # (n,) bool
+    radius: int | None = None
+    use_features: bool = False
+    errors: dict[int, str] = field(default_factory=dict)  # Row -> error message
+
+    def __len__(self) -> int:
+        return int(self.words.shape[0])
+
+    @property
+    def num_bytes(self) -> int:
+        return (self.num_bits + 7) // 8
+
+    @property
+    def packed(self) -> np.ndarray:
+        """uint8 view of shape (n, num_bytes), without word padding."""
+        return self.words.view(np.uint8)[:, :self.num_bytes]
+
+    def row_bytes(self, row: int) -> bytes | None:
+        """Packed fingerprint bytes for one row (None if it failed)."""
+        if not self.valid[row]:
+            return None
+        return self.packed[row].tobytes()
+
+    def to_bytes(self) -> list[bytes | None]:
+        """Packed fingerprint bytes per row (None where failed)."""
+        packed = self.packed
+        return [
+            packed[row].tobytes() if ok else None
+            for row, ok in enumerate(self.valid.tolist())
+        ]
+
+    def to_bitstrings(self) -> list[bytes | None]:
+        """ASCII ``b"0101..."`` bit strings per row, as ExplicitBitVect.ToBitString()."""
+        dense = np.unpackbits(self.packed, axis=1, count=self.num_bits, bitorder="little")
+        dense += ord("0")
+        return [
+            dense[row].tobytes() if ok else None
+            for row, ok in enumerate(self.valid.tolist())
+        ]
+
+    def fingerprint(self, row: int) -> Fingerprint | None:
+        """
+        Fingerprint for one row (None if it failed).
+
+        The fingerprint is a view over this batch's buffer, not a copy.
+        """
+        if not self.valid[row]:
+            return None
+        return Fingerprint(
+            fp_type=self.fp_type,
+            num_bits=self.num_bits,
+            num_on_bits=int(self.popcounts[row]),
+            bytes_data=memoryview(self.packed[row]),
+            radius=self.radius,
+            use_features=self.use_features,
+        )
+
+    def to_matrix(self) -> "FingerprintMatrix":
+        """Similarity-engine matrix over all rows, sharing this batch's memory."""
+        from packages.chemistry.similarity_engine import FingerprintMatrix
+
+        return FingerprintMatrix(self.words, self.num_bytes, self.popcounts)
+
+
+def calculate_fingerprint_batch(
+    mols: Sequence["Mol | str | None"],
+    fp_type: FingerprintType = FingerprintType.MORGAN,
+    radius: int = 2,
+    num_bits: int = 2048,
+    use_features: bool = False,
+    min_path: int = 1,
+    max_path: int = 7,
+) -> FingerprintBatch:
+    """
+    Calculate fingerprints for many molecules into one packed matrix.
+
+    Uses one reusable RDKit generator for the whole batch and native NumPy
+    bit export. Rows are packed block by block into a preallocated matrix and
+    popcounts are taken in the same pass. Bytes match the single-molecule
+    functions (e.g. ``calculate_morgan_fingerprint(mol).bytes_data``).
+
+    Args:
+        mols: RDKit Mol objects or SMILES strings (None marks a failed row)
+        fp_type: Type of fingerprint to calculate
+        radius: Morgan radius
+        num_bits: Number of bits (ignored for MACCS, which is always 167)
+        use_features: Morgan feature invariants (FCFP) instead of ECFP
+        min_path: RDKit fingerprint minimum path length
+        max_path: RDKit fingerprint maximum path length
+
+    Returns:
+        FingerprintBatch with one row per input; failures are recorded in
+        ``valid`` and ``errors`` instead of raising
+    """
+    if fp_type == FingerprintType.MACCS:
+        num_bits = MACCS_NUM_BITS
+    to_dense = _dense_fingerprinter(
+        fp_type,
+        num_bits,
+        radius=radius,
+        use_features=use_features,
+        min_path=min_path,
+        max_path=max_path,
+    )
+
+    n = len(mols)
     num_bytes = (num_bits + 7) // 8
-    result = bytearray(num_bytes)
-    for i in range(num_bits):
-        if bitvect.GetBit(i):
-            result[i // 8] |= 1 << (i % 8)
-    return bytes(result)
+    num_words = (num_bytes + 7) // 8
+    buffer = np.zeros((n, num_words * 8), dtype=np.uint8)
+    popcounts = np.zeros(n, dtype=np.int64)
+    valid = np.zeros(n, dtype=bool)
+    errors: dict[int, str] = {}
+
+    scratch = np.zeros((min(n, FINGERPRINT_BLOCK_ROWS), num_bits), dtype=np.uint8)
+    for start in range(0, n, FINGERPRINT_BLOCK_ROWS):
+        block = scratch[:min(FINGERPRINT_BLOCK_ROWS, n - start)]
+        block[:] = 0
+        for offset in range(len(block)):
+            row = start + offset
+            mol = mols[row]
+            if mol is None:
+                errors[row] = "No molecule"
+                continue
+            try:
+                block[offset] = to_dense(_get_mol(mol))
+                valid[row] = True
+            except Exception as e:
+                errors[row] = str(e)
+
+        end = start + len(block)
+        buffer[start:end, :num_bytes] = np.packbits(block, axis=1, bitorder="little")
+        popcounts[start:end] = block.sum(axis=1, dtype=np.int64)
+
+    return FingerprintBatch(
+        fp_type=fp_type,
+        num_bits=num_bits,
+        words=buffer.view("<u8"),
+        popcounts=popcounts,
+        valid=valid,
+        radius=radius if fp_type == FingerprintType.MORGAN else None,
+        use_features=use_features if fp_type == FingerprintType.MORGAN else False,
+        errors=errors,
+    )
+
+
+# =============================================================================
+# Single-molecule Fingerprints
+# =============================================================================
 
 
 def calculate_morgan_fingerprint(
@@ -253,26 +587,15 @@ def calculate_morgan_fingerprint(
         Fingerprint object with multiple representations
     """
     try:
-        from rdkit.Chem import AllChem
-
         mol = _get_mol(mol_or_smiles)
 
         # Generate fingerprint (deterministic with same parameters)
-        fp = AllChem.GetMorganFingerprintAsBitVect(
-            mol,
-            radius=radius,
-            nBits=num_bits,
-            useFeatures=use_features,
+        to_dense = _dense_fingerprinter(
+            FingerprintType.MORGAN, num_bits, radius=radius, use_features=use_features
         )
-
-        bytes_data = _bitvect_to_bytes(fp)
-        return Fingerprint(
-            fp_type=FingerprintType.MORGAN,
-            num_bits=num_bits,
-            num_on_bits=fp.GetNumOnBits(),
-            bytes_data=bytes_data,
-            base64_str=base64.b64encode(bytes_data).decode("ascii"),
-            hex_str=bytes_data.hex(),
+        return _make_fingerprint(
+            to_dense(mol),
+            FingerprintType.MORGAN,
             radius=radius,
             use_features=use_features,
         )
@@ -293,21 +616,10 @@ def calculate_maccs_fingerprint(mol_or_smiles: "Mol | str") -> Fingerprint:
         Fingerprint object with multiple representations
     """
     try:
-        from rdkit.Chem import MACCSkeys
-
         mol = _get_mol(mol_or_smiles)
 
-        fp = MACCSkeys.GenMACCSKeys(mol)
-
-        bytes_data = _bitvect_to_bytes(fp)
-        return Fingerprint(
-            fp_type=FingerprintType.MACCS,
-            num_bits=167,  # MACCS has 167 bits (0-166, bit 0 unused)
-            num_on_bits=fp.GetNumOnBits(),
-            bytes_data=bytes_data,
-            base64_str=base64.b64encode(bytes_data).decode("ascii"),
-            hex_str=bytes_data.hex(),
-        )
+        to_dense = _dense_fingerprinter(FingerprintType.MACCS, MACCS_NUM_BITS)
+        return _make_fingerprint(to_dense(mol), FingerprintType.MACCS)
     except ValueError:
         raise
     except Exception as e:
@@ -333,21 +645,12 @@ def calculate_rdkit_fingerprint(
         Fingerprint object with multiple representations
     """
     try:
-        from rdkit.Chem import RDKFingerprint
-
         mol = _get_mol(mol_or_smiles)
 
-        fp = RDKFingerprint(mol, minPath=min_path, maxPath=max_path, fpSize=num_bits)
-
-        bytes_data = _bitvect_to_bytes(fp)
-        return Fingerprint(
-            fp_type=FingerprintType.RDKIT,
-            num_bits=num_bits,
-            num_on_bits=fp.GetNumOnBits(),
-            bytes_data=bytes_data,
-            base64_str=base64.b64encode(bytes_data).decode("ascii"),
-            hex_str=bytes_data.hex(),
+        to_dense = _dense_fingerprinter(
+            FingerprintType.RDKIT, num_bits, min_path=min_path, max_path=max_path
         )
+        return _make_fingerprint(to_dense(mol), FingerprintType.RDKIT)
     except ValueError:
         raise
     except Exception as e:
@@ -406,3 +709,62 @@ def calculate_all_fingerprints(
         FingerprintType.MACCS: calculate_maccs_fingerprint(mol),
         FingerprintType.RDKIT: calculate_rdkit_fingerprint(mol, num_bits=rdkit_bits),
     }
+
+
+# =============================================================================
+# Stored Fingerprint Formats
+# =============================================================================
+
+
+def pack_bitstring(bits: bytes | str) -> bytes:
+    """
+    Pack an ASCII bit string into fingerprint bytes.
+
+    Args:
+        bits: ``"0101..."`` as produced by ExplicitBitVect.ToBitString()
+
+    Returns:
+        Packed bits in the Fingerprint layout (bit i -> byte i // 8, LSB first)
+
+    Raises:
+        ValueError: If the string contains anything but ``0`` and ``1``
+    """
+    if isinstance(bits, str):
+        bits = bits.encode("ascii")
+    dense = np.frombuffer(bits, dtype=np.uint8) - ord("0")
+    if dense.size and dense.max() > 1:
+        raise ValueError("Bit string may only contain '0' and '1'")
+    return _pack_bits(dense)
+
+
+def is_bitstring_fingerprint(value: bytes, num_bits: int) -> bool:
+    """
+    Check whether a stored fingerprint uses the legacy ASCII bit-string format.
+
+    Packed fingerprints are ``ceil(num_bits / 8)`` bytes long, bit strings are
+    ``num_bits`` bytes long, so the length alone tells the formats apart.
+    """
+    return num_bits > 1 and len(value) == num_bits
+
+
+def read_stored_fingerprint(value: bytes | None, num_bits: int) -> bytes | None:
+    """
+    Read a fingerprint column that may hold either storage format.
+
+    MACCS and RDKit fingerprints were stored as ASCII bit strings before the
+    packed format; rows are rewritten by a backfill migration, and readers use
+    this helper so both formats work while it runs.
+
+    Args:
+        value: Stored column value
+        num_bits: Fingerprint length in bits (e.g. MACCS_NUM_BITS)
+
+    Returns:
+        Packed fingerprint bytes, or None if the column is NULL
+    """
+    if value is None:
+        return None
+    value = bytes(value)
+    if is_bitstring_fingerprint(value, num_bits):
+        return pack_bitstring(value)
+    return value
@@ -0,0 +1,856 @@
+"""
+Persistent memory-mapped fingerprint arena.
+
+PostgresFingerprintIndex used to SELECT every fingerprint into a per-session
+dict before its first search, so each request handler paid a full table scan
+and every process held its own copy of the library. The arena instead keeps
+the packed library on local disk as ``.npy`` files that every uvicorn and ARQ
+worker process maps read-only; the OS page cache holds a single shared copy,
+cold start is an ``mmap`` and per-process RSS no longer grows with library
+size.
+
+On-disk layout (one directory per fingerprint type):
+
+    <root>/<fingerprint_type>/
+        manifest.json          # current generation, row count, watermark
+        .lock                  # builder lock (flock)
+        gen-000003/
+            bits.npy           # uint64 [n, words]  fixed-stride packed bits
+            ids.npy            # uint8  [n, 16]     molecule UUID bytes
+            popcounts.npy      # int64  [n]         precomputed |A|
+            id_hi.npy          # uint64 [n]         sorted first UUID half
+            id_order.npy       # int64  [n]         row of each id_hi entry
+
+Rows are stored in ascending popcount order, so a thresholded search only
+scans the popcount buckets that can reach the threshold.
+
+Refresh model:
+- ``build`` records the change feed epoch (packages.chemistry.change_feed),
+  then streams ``molecule_fingerprints`` into a new generation.
+- ``refresh`` resolves the rows changed since the process's epoch into an
+  in-memory delta: new or replaced rows plus tombstones over mapped rows,
+  which searches merge in (as MinHashLSHIndex does). Each process follows
+  the feed on its own; nothing is rewritten per refresh.
+- Once the delta passes ``COMPACT_FRACTION`` of the mapped rows, the process
+  holding the builder lock compacts it into a new generation in a worker
+  thread and atomically swaps the manifest.
+- Readers notice the new manifest on their next staleness check, remap it
+  and drop their delta, resuming the feed from the generation's epoch.
+  Old generations stay readable by processes that still map them (POSIX keeps
+  unlinked files alive) and are pruned after one further generation.
+
+Arenas built before the change feed existed have no epoch and are rebuilt
+on their first refresh.
+
+Usage:
+    arena = get_shared_arena("/var/lib/chem/arena", "morgan")
+    await arena.ensure_fresh(session, max_age=30)
+    hits = arena.search(query_bytes, threshold=0.7, limit=100)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import shutil
+import time
+from collections.abc import AsyncIterator, Iterator, Sequence
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING
+from uuid import UUID
+
+import numpy as np
+
+from packages.chemistry.change_feed import (
+    SOURCE_FINGERPRINTS,
+    ChangeSet,
+    current_epoch,
+    fetch_fingerprint_changes,
+)
+from packages.chemistry.similarity_engine import (
+    FingerprintMatrix,
+    pack_fingerprints,
+    popcount_rows,
+)
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+LOCK_NAME = ".lock"
+
+# Rows streamed per round trip while building
+BUILD_BATCH_SIZE = 10_000
+
+# Seconds between attempts while another process holds the builder lock
+LOCK_POLL_SECONDS = 0.5
+
+# Pending changes are compacted into a new generation once they exceed this
+# fraction of the mapped rows (and at least COMPACT_MIN_ROWS)
+COMPACT_FRACTION = 0.05
+COMPACT_MIN_ROWS = 10_000
+
+
+@dataclass(frozen=True)
+class ArenaManifest:
+    """Describes the current on-disk generation of an arena."""
+
+    generation: int
+    fingerprint_type: str
+    num_bytes: int
+    count: int
+    watermark: datetime | None
+    built_at: datetime
+    sorted_by_popcount: bool = False
+    epoch: int | None = None  # Change feed position the generation reflects
+
+    def to_dict(self) -> dict:
+        return {
+            "generation": self.generation,
+            "fingerprint_type": self.fingerprint_type,
+            "num_bytes": self.num_bytes,
+            "count": self.count,
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+            "built_at": self.built_at.isoformat(),
+            "sorted_by_popcount": self.sorted_by_popcount,
+            "epoch": self.epoch,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> ArenaManifest:
+        watermark = data.get("watermark")
+        return cls(
+            generation=data["generation"],
+            fingerprint_type=data["fingerprint_type"],
+            num_bytes=data["num_bytes"],
+            count=data["count"],
+            watermark=datetime.fromisoformat(watermark) if watermark else None,
+            built_at=datetime.fromisoformat(data["built_at"]),
+            sorted_by_popcount=data.get("sorted_by_popcount", False),
+            epoch=data.get("epoch"),
+        )
+
+
+class FingerprintArena:
+    """
+    Memory-mapped, read-mostly fingerprint library for one fingerprint type.
+
+    Instances are cheap; the heavy arrays are ``np.memmap`` views shared with
+    every other process mapping the same generation. Use
+    :func:`get_shared_arena` to reuse one instance per process.
+    """
+
+    def __init__(self, root: str | Path, fingerprint_type: str = "morgan"):
+        self.root = Path(root)
+        self.fingerprint_type = fingerprint_type
+        self.directory = self.root / fingerprint_type
+        self.manifest: ArenaManifest | None = None
+        self._matrix: FingerprintMatrix | None = None
+        self._ids: np.ndarray | None = None
+        self._manifest_version: tuple[int, int] | None = None
+        self._last_checked: float = 0.0
+        self._refresh_lock = asyncio.Lock()
+        self._id_hi: np.ndarray | None = None
+        self._id_order: np.ndarray | None = None
+
+        # Change feed position of the mapped rows plus the delta
+        self.epoch: int | None = None
+        # Delta: rows changed since the mapped generation, keyed by UUID bytes
+        self._deleted: np.ndarray | None = None  # tombstones over mapped rows
+        self._num_deleted = 0
+        self._delta: dict[bytes, bytes] = {}
+        self._delta_rows: tuple[np.ndarray, FingerprintMatrix] | None = None
+
+    # -------------------------------------------------------------------------
+    # Reading
+    # -------------------------------------------------------------------------
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.directory / MANIFEST_NAME
+
+    def _generation_dir(self, generation: int) -> Path:
+        return self.directory / f"gen-{generation:06d}"
+
+    def exists(self) -> bool:
+        """Whether a built generation is available on disk."""
+        return self.manifest_path.exists()
+
+    def load(self) -> bool:
+        """
+        Map the current generation if the manifest changed since last load.
+
+        Returns:
+            True if a generation is mapped after the call
+        """
+        try:
+            stat = self.manifest_path.stat()
+        except FileNotFoundError:
+            return False
+
+        # The manifest is replaced atomically, so a new inode means a new generation
+        version = (stat.st_ino, stat.st_mtime_ns)
+        if self._matrix is not None and version == self._manifest_version:
+            return True
+
+        manifest = ArenaManifest.from_dict(json.loads(self.manifest_path.read_text()))
+        gen_dir = self._generation_dir(manifest.generation)
+        count = manifest.count
+
+        words = np.load(gen_dir / "bits.npy", mmap_mode="r")[:count]
+        ids = np.load(gen_dir / "ids.npy", mmap_mode="r")[:count]
+        popcounts = np.load(gen_dir / "popcounts.npy", mmap_mode="r")[:count]
+
+        self._matrix = FingerprintMatrix(
+            words,
+            manifest.num_bytes,
+            popcounts,
+            sorted_by_popcount=manifest.sorted_by_popcount,
+        )
+        self._ids = ids
+        self._id_hi = self._id_order = None
+        if (gen_dir / "id_order.npy").exists():
+            self._id_hi = np.load(gen_dir / "id_hi.npy", mmap_mode="r")
+            self._id_order = np.load(gen_dir / "id_order.npy", mmap_mode="r")
+        self.manifest = manifest
+        self._manifest_version = version
+
+        # The delta was relative to the previous generation; the feed is
+        # replayed from this generation's epoch instead
+        self.epoch = manifest.epoch
+        self._deleted = None
+        self._num_deleted = 0
+        self._delta = {}
+        self._delta_rows = None
+        return True
+
+    def __len__(self) -> int:
+        if self._matrix is None:
+            return 0
+        return len(self._matrix) - self._num_deleted + len(self._delta)
+
+    @property
+    def pending(self) -> int:
+        """Changes held in the delta, not yet compacted into a generation."""
+        return len(self._delta) + self._num_deleted
+
+    @property
+    def matrix(self) -> FingerprintMatrix | None:
+        """Packed fingerprints of the mapped generation."""
+        return self._matrix
+
+    @property
+    def ids(self) -> np.ndarray | None:
+        """Molecule UUID bytes of the mapped generation, uint8 [n, 16]."""
+        return self._ids
+
+    def molecule_id(self, row: int) -> UUID:
+        """Molecule id stored at a row."""
+        assert self._ids is not None
+        return UUID(bytes=self._ids[row].tobytes())
+
+    def search(
+        self,
+        query_fingerprint: bytes,
+        threshold: float = 0.7,
+        limit: int = 100,
+        exclude_ids: Sequence[UUID] | None = None,
+    ) -> list[tuple[UUID, float]]:
+        """
+        Tanimoto search over the mapped generation.
+
+        Args:
+            query_fingerprint: Query fingerprint bytes
+            threshold: Minimum similarity
+            limit: Maximum number of hits
+            exclude_ids: Molecule ids to leave out of the results
+
+        Returns:
+            (molecule_id, similarity) pairs sorted by similarity descending
+        """
+        matrix = self._matrix
+        if matrix is None or len(self) == 0:
+            return []
+        if len(query_fingerprint) != matrix.num_bytes:
+            # Fingerprints with a different length are not comparable
+            return []
+
+        exclude_set = set(exclude_ids) if exclude_ids else set()
+
+        # Over-fetch by the number of exclusions so the limit still holds;
+        # only popcount buckets that can reach the threshold are scanned
+        fetch = limit + len(exclude_set)
+        hits = [
+            (self.molecule_id(row), sim)
+            for row, sim in matrix.search(
+                query_fingerprint, threshold, fetch, excluded=self._deleted
+            )
+        ]
+        if self._delta:
+            delta_ids, delta_matrix = self._delta_matrix()
+            hits += [
+                (UUID(bytes=delta_ids[row].tobytes()), sim)
+                for row, sim in delta_matrix.search(query_fingerprint, threshold, fetch)
+            ]
+            hits.sort(key=lambda hit: -hit[1])
+
+        results = []
+        for mol_id, sim in hits:
+            if mol_id in exclude_set:
+                continue
+            results.append((mol_id, sim))
+            if len(results) >= limit:
+                break
+        return results
+
+    def search_many(
+        self,
+        query_fingerprints: Sequence[bytes],
+        thresholds: float | Sequence[float] = 0.7,
+        limits: int | Sequence[int] = 100,
+        exclude_ids: Sequence[UUID] | None = None,
+    ) -> list[list[tuple[UUID, float]]]:
+        """
+        Tanimoto search for many queries in one pass over the mapped generation.
+
+        Args:
+            query_fingerprints: Query fingerprint bytes
+            thresholds: Minimum similarity, shared or one per query
+            limits: Maximum hits, shared or one per query
+            exclude_ids: Molecule ids to leave out of every result
+
+        Returns:
+            One list of (molecule_id, similarity) pairs per query, as search()
+        """
+        results: list[list[tuple[UUID, float]]] = [[] for _ in query_fingerprints]
+        matrix = self._matrix
+        if matrix is None or len(self) == 0:
+            return results
+
+        # Queries of another length are not comparable and stay empty
+        positions = [i for i, fp in enumerate(query_fingerprints) if len(fp) == matrix.num_bytes]
+        if not positions:
+            return results
+        threshold_array = np.broadcast_to(np.asarray(thresholds, dtype=np.float64), len(results))
+        limit_array = np.broadcast_to(np.asarray(limits, dtype=np.int64), len(results))
+
+        exclude_set = set(exclude_ids) if exclude_ids else set()
+        queries = [query_fingerprints[i] for i in positions]
+        fetch = limit_array[positions] + len(exclude_set)
+        hits = [
+            [(self.molecule_id(row), sim) for row, sim in query_hits]
+            for query_hits in matrix.search_many(
+                queries, threshold_array[positions], fetch, excluded=self._deleted
+            )
+        ]
+        if self._delta:
+            delta_ids, delta_matrix = self._delta_matrix()
+            delta_hits = delta_matrix.search_many(queries, threshold_array[positions], fetch)
+            for query_hits, extra in zip(hits, delta_hits, strict=True):
+                query_hits += [(UUID(bytes=delta_ids[row].tobytes()), sim) for row, sim in extra]
+                query_hits.sort(key=lambda hit: -hit[1])
+
+        for position, query_hits in zip(positions, hits, strict=True):
+            limit = int(limit_array[position])
+            found = results[position]
+            for mol_id, sim in query_hits:
+                if len(found) >= limit:
+                    break
+                if mol_id not in exclude_set:
+                    found.append((mol_id, sim))
+        return results
+
+    def _delta_matrix(self) -> tuple[np.ndarray, FingerprintMatrix]:
+        """Ids and packed rows of the delta, rebuilt after it changes."""
+        if self._delta_rows is None:
+            assert self._matrix is not None
+            ids = np.frombuffer(b"".join(self._delta), dtype=np.uint8).reshape(-1, 16)
+            matrix = FingerprintMatrix.from_bytes(
+                list(self._delta.values()), num_bytes=self._matrix.num_bytes, bucketed=True
+            )
+            self._delta_rows = (ids, matrix)
+        return self._delta_rows
+
+    # -------------------------------------------------------------------------
+    # Incremental updates
+    # -------------------------------------------------------------------------
+
+    def _base_row(self, key: bytes) -> int | None:
+        """Live mapped row holding a molecule id, if any."""
+        if self._id_order is None:
+            self._id_hi, self._id_order = _sorted_id_index(self._ids)
+        assert self._id_hi is not None and self._ids is not None
+        hi = np.uint64(int.from_bytes(key[:8], "little"))
+        start = int(np.searchsorted(self._id_hi, hi, side="left"))
+        end = int(np.searchsorted(self._id_hi, hi, side="right"))
+        for position in range(start, end):
+            row = int(self._id_order[position])
+            deleted = self._deleted is not None and self._deleted[row]
+            if not deleted and self._ids[row].tobytes() == key:
+                return row
+        return None
+
+    def _discard(self, key: bytes) -> None:
+        self._delta.pop(key, None)
+        row = self._base_row(key)
+        if row is not None:
+            if self._deleted is None:
+                self._deleted = np.zeros(len(self._ids), dtype=bool)
+            self._deleted[row] = True
+            self._num_deleted += 1
+
+    def apply_changes(self, changes: ChangeSet) -> None:
+        """
+        Apply change feed deltas to the in-memory delta and advance the epoch.
+
+        Fingerprints of another length can't be compared with this arena and
+        are treated as removals.
+        """
+        assert self._matrix is not None
+        for delta in changes.deltas:
+            key = delta.molecule_id.bytes
+            self._discard(key)
+            if delta.fingerprint is not None and len(delta.fingerprint) == self._matrix.num_bytes:
+                self._delta[key] = delta.fingerprint
+        self._delta_rows = None
+        self.epoch = changes.epoch
+
+    # -------------------------------------------------------------------------
+    # Building and refreshing
+    # -------------------------------------------------------------------------
+
+    @contextmanager
+    def _builder_lock(self, blocking: bool = True) -> Iterator[bool]:
+        """Serialize builders across processes; yields False if not acquired."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if fcntl is None:
+            yield True
+            return
+
+        with open(self.directory / LOCK_NAME, "a+") as lock_file:
+            flags = fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB)
+            try:
+                fcntl.flock(lock_file.fileno(), flags)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    @asynccontextmanager
+    async def _wait_builder_lock(self) -> AsyncIterator[None]:
+        """Take the builder lock without blocking the event loop while waiting."""
+        while True:
+            with self._builder_lock(blocking=False) as acquired:
+                if acquired:
+                    yield
+                    return
+            await asyncio.sleep(LOCK_POLL_SECONDS)
+
+    def _next_generation(self) -> int:
+        if self.exists():
+            current = json.loads(self.manifest_path.read_text())
+            return int(current["generation"]) + 1
+        return 1
+
+    def _publish(self, manifest: ArenaManifest) -> None:
+        """Atomically point the manifest at a finished generation."""
+        tmp_path = self.directory / f"{MANIFEST_NAME}.tmp"
+        tmp_path.write_text(json.dumps(manifest.to_dict()))
+        os.replace(tmp_path, self.manifest_path)
+
+        # Keep the previous generation for readers still mapping it
+        for path in self.directory.glob("gen-*"):
+            try:
+                generation = int(path.name.split("-", 1)[1])
+            except ValueError:
+                continue
+            if generation < manifest.generation - 1:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def write_generation(
+        self,
+        ids: np.ndarray,
+        words: np.ndarray,
+        popcounts: np.ndarray,
+        num_bytes: int,
+        watermark: datetime | None,
+        epoch: int | None = None,
+    ) -> ArenaManifest:
+        """
+        Write arrays as a new generation and publish it.
+
+        Rows are stored sorted by popcount so searches can skip buckets.
+        Callers must hold the builder lock.
+        """
+        generation = self._next_generation()
+        gen_dir = self._generation_dir(generation)
+        gen_dir.mkdir(parents=True, exist_ok=True)
+
+        order = np.argsort(popcounts, kind="stable")
+        np.save(gen_dir / "bits.npy", np.ascontiguousarray(words[order]))
+        np.save(gen_dir / "ids.npy", np.ascontiguousarray(ids[order]))
+        np.save(gen_dir / "popcounts.npy", np.ascontiguousarray(popcounts[order]))
+        _write_id_index(gen_dir)
+
+        manifest = ArenaManifest(
+            generation=generation,
+            fingerprint_type=self.fingerprint_type,
+            num_bytes=num_bytes,
+            count=int(words.shape[0]),
+            watermark=watermark,
+            built_at=datetime.utcnow(),
+            sorted_by_popcount=True,
+            epoch=epoch,
+        )
+        self._publish(manifest)
+        self.load()
+        return manifest
+
+    async def build(self, session: AsyncSession) -> ArenaManifest:
+        """
+        Build a fresh generation from molecule_fingerprints.
+
+        Rows are streamed straight into memory-mapped output files, so the
+        builder never holds the whole library as Python objects. Rows are
+        requested in ``num_on_bits`` order; if stored counts are missing or
+        stale the files are re-sorted in bounded chunks afterwards.
+
+        If another process publishes a generation while this one waits for
+        the builder lock, that generation is mapped and returned instead.
+        """
+        from sqlalchemy import func, select
+
+        from db.models import MoleculeFingerprint
+
+        type_filter = MoleculeFingerprint.fingerprint_type == self.fingerprint_type
+        expected_generation = self._next_generation()
+
+        async with self._wait_builder_lock():
+            generation = self._next_generation()
+            if generation != expected_generation and self.load():
+                assert self.manifest is not None
+                return self.manifest
+
+            # Taken before the scan, so writes racing with it are replayed
+            epoch = await current_epoch(session)
+            stats = (
+                await session.execute(
+                    select(
+                        func.count(),
+                        func.max(func.octet_length(MoleculeFingerprint.fingerprint_bytes)),
+                    ).where(type_filter)
+                )
+            ).one()
+            total, num_bytes = int(stats[0] or 0), int(stats[1] or 0)
+            num_words = (num_bytes + 7) // 8
+
+            gen_dir = self._generation_dir(generation)
+            gen_dir.mkdir(parents=True, exist_ok=True)
+
+            open_memmap = np.lib.format.open_memmap
+            words = open_memmap(
+                gen_dir / "bits.unsorted.npy", mode="w+", dtype="<u8", shape=(total, num_words)
+            )
+            ids = open_memmap(
+                gen_dir / "ids.unsorted.npy", mode="w+", dtype=np.uint8, shape=(total, 16)
+            )
+            popcounts = open_memmap(
+                gen_dir / "popcounts.unsorted.npy", mode="w+", dtype=np.int64, shape=(total,)
+            )
+
+            stmt = (
+                select(
+                    MoleculeFingerprint.molecule_id,
+                    MoleculeFingerprint.fingerprint_bytes,
+                    MoleculeFingerprint.updated_at,
+                )
+                .where(type_filter)
+                .order_by(MoleculeFingerprint.num_on_bits)
+                .execution_options(yield_per=BUILD_BATCH_SIZE)
+            )
+
+            count = 0
+            watermark: datetime | None = None
+            result = await session.stream(stmt)
+            async for partition in result.partitions():
+                batch_ids = []
+                batch_fps = []
+                for mol_id, fp_bytes, updated_at in partition:
+                    if updated_at is not None and (
+                        watermark is None or updated_at > watermark
+                    ):
+                        watermark = updated_at
+                    # Rows written concurrently after the COUNT, or with a
+                    # different length, are skipped; refresh picks up the former.
+                    if len(fp_bytes) != num_bytes or count + len(batch_ids) >= total:
+                        continue
+                    batch_ids.append(mol_id.bytes)
+                    batch_fps.append(fp_bytes)
+
+                if not batch_ids:
+                    continue
+                end = count + len(batch_ids)
+                packed = pack_fingerprints(batch_fps, num_bytes)
+                words[count:end] = packed
+                popcounts[count:end] = popcount_rows(packed)
+                ids[count:end] = np.frombuffer(b"".join(batch_ids), dtype=np.uint8).reshape(
+                    -1, 16
+                )
+                count = end
+
+            words.flush()
+            ids.flush()
+            popcounts.flush()
+            self._sort_build_files(gen_dir, popcounts[:count])
+            del words, ids, popcounts
+            _write_id_index(gen_dir)
+
+            manifest = ArenaManifest(
+                generation=generation,
+                fingerprint_type=self.fingerprint_type,
+                num_bytes=num_bytes,
+                count=count,
+                watermark=watermark,
+                built_at=datetime.utcnow(),
+                sorted_by_popcount=True,
+                epoch=epoch,
+            )
+            self._publish(manifest)
+
+        logger.info(
+            "Built %s fingerprint arena generation %d (%d rows)",
+            self.fingerprint_type,
+            manifest.generation,
+            manifest.count,
+        )
+        self.load()
+        return manifest
+
+    @staticmethod
+    def _sort_build_files(gen_dir: Path, popcounts: np.ndarray) -> None:
+        """Move streamed ``*.unsorted.npy`` files into popcount order."""
+        names = ("bits", "ids", "popcounts")
+        if len(popcounts) == 0 or bool(np.all(popcounts[1:] >= popcounts[:-1])):
+            for name in names:
+                os.replace(gen_dir / f"{name}.unsorted.npy", gen_dir / f"{name}.npy")
+            return
+
+        order = np.argsort(popcounts, kind="stable")
+        for name in names:
+            source = np.load(gen_dir / f"{name}.unsorted.npy", mmap_mode="r")
+            target = np.lib.format.open_memmap(
+                gen_dir / f"{name}.npy", mode="w+", dtype=source.dtype, shape=source.shape
+            )
+            for start in range(0, len(order), BUILD_BATCH_SIZE):
+                chunk = order[start : start + BUILD_BATCH_SIZE]
+                target[start : start + len(chunk)] = source[chunk]
+            target.flush()
+            del source, target
+            os.remove(gen_dir / f"{name}.unsorted.npy")
+
+    async def refresh(self, session: AsyncSession) -> int:
+        """
+        Apply fingerprints changed since the arena epoch to the delta.
+
+        Once the delta passes ``COMPACT_FRACTION`` of the mapped rows it is
+        compacted into a new generation in a worker thread.
+
+        Returns:
+            Number of changed rows applied (0 if already up to date or
+            another task in this process is refreshing)
+        """
+        if not self.load() or self.manifest is None or self.manifest.epoch is None:
+            # Nothing built yet, or built before the change feed existed
+            manifest = await self.build(session)
+            return manifest.count
+        if self._refresh_lock.locked():
+            return 0
+
+        async with self._refresh_lock:
+            generation = self.manifest.generation
+            if self._id_order is None:
+                # Generations written before the id index existed
+                ids = self._ids
+                id_index = await asyncio.to_thread(_sorted_id_index, ids)
+                if self.manifest.generation == generation:
+                    self._id_hi, self._id_order = id_index
+
+            assert self.epoch is not None
+            changes = await fetch_fingerprint_changes(
+                session, self.epoch, SOURCE_FINGERPRINTS, self.fingerprint_type
+            )
+            if self.manifest.generation != generation:
+                # Remapped meanwhile; the next refresh resumes from its epoch
+                return 0
+            self.apply_changes(changes)
+
+            assert self._matrix is not None
+            if self.pending >= max(COMPACT_MIN_ROWS, COMPACT_FRACTION * len(self._matrix)):
+                await self._compact_in_thread()
+
+        return len(changes)
+
+    async def _compact_in_thread(self) -> None:
+        """Compact the delta off the event loop, unless another process is writing."""
+        assert self.manifest is not None
+        with self._builder_lock(blocking=False) as acquired:
+            # Another process may be writing, or have published past our generation
+            if not acquired or self._next_generation() != self.manifest.generation + 1:
+                return
+            await asyncio.to_thread(self._write_compacted, *self._compaction_inputs())
+        self.load()
+
+    def compact(self) -> ArenaManifest | None:
+        """
+        Fold the delta into a new generation and map it.
+
+        Callers must hold the builder lock.
+
+        Returns:
+            The published manifest, or None if nothing was pending
+        """
+        if not self.pending:
+            return None
+        manifest = self._write_compacted(*self._compaction_inputs())
+        self.load()
+        return manifest
+
+    def _compaction_inputs(self) -> tuple:
+        """Snapshot of the mapped rows and delta for _write_compacted."""
+        assert self._matrix is not None and self._ids is not None and self.manifest is not None
+        delta_ids, delta_matrix = self._delta_matrix()
+        deleted = None if self._deleted is None else self._deleted.copy()
+        return (
+            self._matrix,
+            self._ids,
+            deleted,
+            delta_ids,
+            delta_matrix,
+            self.manifest.watermark,
+            self.epoch,
+        )
+
+    def _write_compacted(
+        self,
+        base: FingerprintMatrix,
+        base_ids: np.ndarray,
+        deleted: np.ndarray | None,
+        delta_ids: np.ndarray,
+        delta: FingerprintMatrix,
+        watermark: datetime | None,
+        epoch: int | None,
+    ) -> ArenaManifest:
+        """
+        Merge live mapped rows and the delta into a new generation.
+
+        Both inputs are in popcount order, so rows are streamed into their
+        merged positions in bounded chunks. Only touches the filesystem, so
+        it can run in a worker thread; callers must hold the builder lock.
+        """
+        live = np.arange(len(base)) if deleted is None else np.flatnonzero(~deleted)
+        # The bucketed delta stores rows in popcount order; row_ids maps back
+        delta_rows = delta.row_ids if delta.row_ids is not None else np.arange(len(delta))
+        live_popcounts = np.asarray(base.popcounts)[live]
+        # Delta row j goes after the first insert[j] live rows
+        insert = np.searchsorted(live_popcounts, delta.popcounts, side="right")
+        delta_targets = insert + np.arange(len(delta))
+        total = len(live) + len(delta)
+
+        generation = self._next_generation()
+        gen_dir = self._generation_dir(generation)
+        gen_dir.mkdir(parents=True, exist_ok=True)
+        open_memmap = np.lib.format.open_memmap
+        words = open_memmap(
+            gen_dir / "bits.npy", mode="w+", dtype="<u8", shape=(total, base.words.shape[1])
+        )
+        ids = open_memmap(gen_dir / "ids.npy", mode="w+", dtype=np.uint8, shape=(total, 16))
+        popcounts = open_memmap(gen_dir / "popcounts.npy", mode="w+", dtype=np.int64, shape=(total,))
+
+        for start in range(0, len(live), BUILD_BATCH_SIZE):
+            rows = live[start : start + BUILD_BATCH_SIZE]
+            positions = np.arange(start, start + len(rows))
+            targets = positions + np.searchsorted(insert, positions, side="right")
+            words[targets] = base.words[rows]
+            ids[targets] = base_ids[rows]
+            popcounts[targets] = base.popcounts[rows]
+        words[delta_targets] = delta.words
+        ids[delta_targets] = delta_ids[delta_rows]
+        popcounts[delta_targets] = delta.popcounts
+
+        words.flush()
+        ids.flush()
+        popcounts.flush()
+        del words, ids, popcounts
+        _write_id_index(gen_dir)
+
+        manifest = ArenaManifest(
+            generation=generation,
+            fingerprint_type=self.fingerprint_type,
+            num_bytes=base.num_bytes,
+            count=total,
+            watermark=watermark,
+            built_at=datetime.utcnow(),
+            sorted_by_popcount=True,
+            epoch=epoch,
+        )
+        self._publish(manifest)
+        logger.info(
+            "Compacted %s fingerprint arena into generation %d (%d rows)",
+            self.fingerprint_type,
+            generation,
+            total,
+        )
+        return manifest
+
+    async def ensure_fresh(self, session: AsyncSession, max_age: float = 30.0) -> None:
+        """
+        Make sure a generation is mapped and at most ``max_age`` seconds stale.
+
+        Builds the arena on first use and refreshes incrementally afterwards.
+        """
+        now = time.monotonic()
+        if self.load() and now - self._last_checked < max_age:
+            return
+        self._last_checked = now
+        await self.refresh(session)
+
+
+def _sorted_id_index(ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Sorted first UUID halves and the row of each, for id lookups."""
+    halves = np.ascontiguousarray(ids).view("<u8").reshape(-1, 2)[:, 0]
+    order = np.argsort(halves, kind="stable")
+    return halves[order], order
+
+
+def _write_id_index(gen_dir: Path) -> None:
+    """Write id_hi.npy and id_order.npy for a generation's ids.npy."""
+    id_hi, id_order = _sorted_id_index(np.load(gen_dir / "ids.npy", mmap_mode="r"))
+    np.save(gen_dir / "id_hi.npy", id_hi)
+    np.save(gen_dir / "id_order.npy", id_order)
+
+
+# Process-wide registry so every adapter instance shares one mapping
+_ARENAS: dict[tuple[str, str], FingerprintArena] = {}
+
+
+def get_shared_arena(root: str | Path, fingerprint_type: str = "morgan") -> FingerprintArena:
+    """Get the process-wide arena instance for a directory and type."""
+    key = (str(Path(root).resolve()), fingerprint_type)
+    if key not in _ARENAS:
+        _ARENAS[key] = FingerprintArena(root, fingerprint_type)
+    return _ARENAS[key]
@@ -9,12 +9,22 @@ storing and searching molecular fingerprints using different backends:
    - Good for small-medium datasets (<1M molecules)
    - No external dependencies beyond PostgreSQL
 
+   - PostgresBitCountFingerprintIndex needs no extension at all: it
+     scores Tanimoto in SQL with bit_count(a & b) (PostgreSQL 14+)
+
 2. PostgreSQL with pgvector
    - Converts fingerprints to float vectors
    - Uses IVFFlat or HNSW indexes for approximate nearest neighbor
    - Better scalability than raw BIT operations
+   - PgVectorFingerprintIndex indexes the bit strings directly (HNSW on
+     Jaccard distance) and re-ranks candidates with exact Tanimoto
+
+3. In-process MinHash LSH (LSHFingerprintIndex)
+   - Banded MinHash tables over the packed fingerprint store
+   - Memory-mapped from local disk, incremental insert/delete
+   - Candidates scored with exact Tanimoto
 
-3. Pinecone (external vector database)
+4. Pinecone (external vector database)
    - Cloud-hosted vector similarity search
    - Best for large datasets (>1M molecules)
    - Requires API key and network access
@@ -47,10 +57,22 @@ Pinecone / External Vector DB:
 - Eventual consistency with main database
 - Requires sync mechanism to keep fingerprints up to date
 
+PostgreSQL bit_count():
++ Exact Tanimoto, no extension, only top hits leave the database
++ Popcount window on an indexed column, parallel sequential scan
+- Still O(n) within the popcount window
+
+MinHash LSH:
++ Sub-linear search without an external service
++ Exact scores for every hit; recall tunable with bands / rows_per_band
+- Index lives on each node's disk; writes go through save()
+- Recall drops for thresholds well below what the banding targets
+
 RECOMMENDATION:
 - < 100K molecules: PostgreSQL with simple BYTEA and in-memory search
+  (or bit_count() search to keep fingerprints in the database)
 - 100K - 1M molecules: PostgreSQL with pgvector (IVFFlat index)
-- > 1M molecules: Pinecone or similar vector database
+- > 1M molecules: MinHash LSH, or Pinecone or a similar vector database
 
 Usage:
     # PostgreSQL adapter (in-memory search for small datasets)
@@ -58,6 +80,15 @@ Usage:
     await adapter.index_molecule(molecule_id, fingerprint_bytes)
     results = await adapter.search_similar(query_fp, threshold=0.7, limit=100)
 
+    # In-database bit_count() search
+    adapter = get_fingerprint_index("postgres_bitcount", session, parallel_workers=4)
+    results = await adapter.search_similar(query_fp, threshold=0.7, limit=100)
+
+    # Local approximate index built from the memory-mapped arena
+    adapter = get_fingerprint_index("lsh", directory="/var/lib/chem/lsh")
+    adapter.build_from_arena(arena)
+    adapter.save()
+
     # Pinecone adapter
     adapter = PineconeFingerprintIndex(api_key="...", index_name="molecules")
     await adapter.index_molecule(molecule_id, fingerprint_bytes)
@@ -67,15 +98,41 @@ Usage:
 from __future__ import annotations
 
 import base64
+import re
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from datetime import datetime
+from pathlib import Path
 from typing import TYPE_CHECKING, Any, Protocol, Sequence
 from uuid import UUID
 
+import numpy as np
+
+from packages.chemistry.change_feed import (
+    SOURCE_FINGERPRINTS,
+    current_epoch,
+    fetch_fingerprint_changes,
+)
+from packages.chemistry.fingerprint_arena import FingerprintArena, get_shared_arena
+from packages.chemistry.fingerprint_lsh import (
+    DEFAULT_BANDS,
+    DEFAULT_ROWS_PER_BAND,
+    MANIFEST_NAME as LSH_MANIFEST_NAME,
+    MinHashLSHIndex,
+)
+from packages.chemistry.similarity_engine import (
+    FingerprintMatrix,
+    popcount_bounds,
+    popcount_bytes,
+    tanimoto_bytes,
+)
+
 if TYPE_CHECKING:
     from sqlalchemy.ext.asyncio import AsyncSession
 
+# Fingerprint type names that may appear in DDL (index names, predicates)
+_FINGERPRINT_TYPE_PATTERN = re.compile(r"[a-z][a-z0-9_]{0,31}")
+
 
 @dataclass(frozen=True)
 class SimilarityMatch:
@@ -107,6 +164,9 @@ class FingerprintIndexAdapter(ABC):
     - search_similar: Find molecules similar to a query fingerprint
     - bulk_index: Efficiently index multiple molecules
     - get_stats: Return index statistics
+
+    search_many answers a batch of queries; the default runs search_similar
+    per query, backends override it to share one pass over the corpus.
     """
 
     @abstractmethod
@@ -173,6 +233,35 @@ class FingerprintIndexAdapter(ABC):
         """
         pass
 
+    async def search_many(
+        self,
+        query_fingerprints: Sequence[bytes],
+        fingerprint_type: str = "morgan",
+        thresholds: float | Sequence[float] = 0.7,
+        limits: int | Sequence[int] = 100,
+        exclude_ids: Sequence[UUID] | None = None,
+    ) -> list[list[SimilarityMatch]]:
+        """
+        Search for molecules similar to each of many query fingerprints.
+
+        Args:
+            query_fingerprints: Query fingerprint bytes
+            fingerprint_type: Type of fingerprint to search
+            thresholds: Minimum Tanimoto similarity, shared or one per query
+            limits: Maximum results, shared or one per query
+            exclude_ids: Molecule IDs to exclude from every result
+
+        Returns:
+            One list of SimilarityMatch per query, in query order, each
+            as search_similar would return it
+        """
+        thresholds = _per_query(thresholds, len(query_fingerprints), "thresholds")
+        limits = _per_query(limits, len(query_fingerprints), "limits")
+        return [
+            await self.search_similar(fp, fingerprint_type, threshold, limit, exclude_ids)
+            for fp, threshold, limit in zip(query_fingerprints, thresholds, limits, strict=True)
+        ]
+
     @abstractmethod
     async def bulk_index(
         self,
@@ -201,15 +290,57 @@ def _tanimoto_from_bytes(fp1: bytes, fp2: bytes) -> float:
     """Calculate Tanimoto similarity between two fingerprints."""
     if len(fp1) != len(fp2):
         raise ValueError(f"Fingerprint length mismatch: {len(fp1)} vs {len(fp2)}")
+    return tanimoto_bytes(fp1, fp2)
+
+
+def _per_query(values: Any, count: int, name: str) -> list:
+    """Broadcast a shared value to every query, or check one value per query."""
+    if isinstance(values, (int, float)):
+        return [values] * count
+    values = list(values)
+    if len(values) != count:
+        raise ValueError(f"{name} must have one entry per query: {len(values)} vs {count}")
+    return values
+
+
+def _group_by_length(query_fingerprints: Sequence[bytes]) -> dict[int, list[int]]:
+    """Query positions per fingerprint length (empty queries are dropped)."""
+    groups: dict[int, list[int]] = {}
+    for position, fp in enumerate(query_fingerprints):
+        if fp:
+            groups.setdefault(len(fp), []).append(position)
+    return groups
+
+
+def _to_matches(
+    hits: Sequence[tuple[UUID, float]], fingerprint_type: str
+) -> list[SimilarityMatch]:
+    return [
+        SimilarityMatch(molecule_id=mol_id, similarity=sim, fingerprint_type=fingerprint_type)
+        for mol_id, sim in hits
+    ]
+
+
+def _search_packed(
+    ids: Sequence[UUID],
+    matrix: FingerprintMatrix,
+    query_fingerprint: bytes,
+    fingerprint_type: str,
+    threshold: float,
+    limit: int,
+) -> list[SimilarityMatch]:
+    """Score a packed corpus against the query and build ranked matches."""
+    if len(query_fingerprint) != matrix.num_bytes or len(matrix) == 0:
+        return []
 
-    bits_a = sum(bin(b).count("1") for b in fp1)
-    bits_b = sum(bin(b).count("1") for b in fp2)
-    common = sum(bin(a & b).count("1") for a, b in zip(fp1, fp2))
-
-    union = bits_a + bits_b - common
-    if union == 0:
-        return 1.0
-    return common / union
+    return [
+        SimilarityMatch(
+            molecule_id=ids[row],
+            similarity=sim,
+            fingerprint_type=fingerprint_type,
+        )
+        for row, sim in matrix.search(query_fingerprint, threshold, limit)
+    ]
 
 
 class PostgresFingerprintIndex(FingerprintIndexAdapter):
@@ -239,11 +370,25 @@ class PostgresFingerprintIndex(FingerprintIndexAdapter):
         WHERE fingerprint_bytes % :query_fp  -- uses GiST index
         ORDER BY sim DESC
         LIMIT 100;
+
+    Memory-mapped arena:
+        When ``arena_dir`` is set, searches run against a FingerprintArena
+        on local disk that all processes share read-only, instead of querying
+        the table on every search. The arena is refreshed
+        incrementally from the change feed at most every
+        ``arena_refresh_seconds``, so writes become searchable within that
+        window.
     """
 
-    def __init__(self, session: "AsyncSession"):
+    def __init__(
+        self,
+        session: "AsyncSession",
+        arena_dir: str | Path | None = None,
+        arena_refresh_seconds: float = 30.0,
+    ):
         self.session = session
-        self._cache: dict[str, dict[UUID, bytes]] = {}
+        self.arena_dir = arena_dir
+        self.arena_refresh_seconds = arena_refresh_seconds
 
     async def index_molecule(
         self,
@@ -266,7 +411,7 @@ class PostgresFingerprintIndex(FingerprintIndexAdapter):
             fingerprint_base64=base64.b64encode(fingerprint_bytes).decode("ascii"),
             fingerprint_hex=fingerprint_bytes.hex(),
             num_bits=len(fingerprint_bytes) * 8,
-            num_on_bits=sum(bin(b).count("1") for b in fingerprint_bytes),
+            num_on_bits=popcount_bytes(fingerprint_bytes),
             radius=metadata.get("radius") if metadata else None,
             use_features=metadata.get("use_features", False) if metadata else False,
         )
@@ -276,16 +421,12 @@ class PostgresFingerprintIndex(FingerprintIndexAdapter):
                 "fingerprint_bytes": fingerprint_bytes,
                 "fingerprint_base64": base64.b64encode(fingerprint_bytes).decode("ascii"),
                 "fingerprint_hex": fingerprint_bytes.hex(),
-                "num_on_bits": sum(bin(b).count("1") for b in fingerprint_bytes),
+                "num_on_bits": popcount_bytes(fingerprint_bytes),
                 "updated_at": datetime.utcnow(),
             },
         )
         await self.session.execute(stmt)
 
-        # Invalidate cache
-        if fingerprint_type in self._cache:
-            self._cache[fingerprint_type][molecule_id] = fingerprint_bytes
-
         return True
 
     async def remove_molecule(
@@ -304,10 +445,6 @@ class PostgresFingerprintIndex(FingerprintIndexAdapter):
         )
         result = await self.session.execute(stmt)
 
-        # Invalidate cache
-        if fingerprint_type in self._cache:
-            self._cache[fingerprint_type].pop(molecule_id, None)
-
         return result.rowcount > 0
 
     async def search_similar(
@@ -321,48 +458,126 @@ class PostgresFingerprintIndex(FingerprintIndexAdapter):
         """
         Search for similar fingerprints using in-memory Tanimoto calculation.
 
-        Note: For large datasets, this scans all fingerprints. Consider using
-        RDKit cartridge or pgvector for better performance.
+        Candidates are pruned by popcount before any bits are compared:
+        Tanimoto >= t requires the candidate popcount to lie in [t*q, q/t],
+        so that window is pushed into the WHERE clause on ``num_on_bits``
+        (and, with an arena, applied to its popcount buckets).
         """
-        from sqlalchemy import select
+        from sqlalchemy import and_, func, or_, select
 
         from db.models import MoleculeFingerprint
 
-        # Load fingerprints (with caching for repeated searches)
-        if fingerprint_type not in self._cache:
-            stmt = select(
-                MoleculeFingerprint.molecule_id,
-                MoleculeFingerprint.fingerprint_bytes,
-            ).where(MoleculeFingerprint.fingerprint_type == fingerprint_type)
+        if self.arena_dir is not None:
+            arena = get_shared_arena(self.arena_dir, fingerprint_type)
+            await arena.ensure_fresh(self.session, max_age=self.arena_refresh_seconds)
+            return [
+                SimilarityMatch(
+                    molecule_id=mol_id,
+                    similarity=sim,
+                    fingerprint_type=fingerprint_type,
+                )
+                for mol_id, sim in arena.search(
+                    query_fingerprint, threshold, limit, exclude_ids
+                )
+            ]
+
+        # Only rows whose popcount can reach the threshold are fetched
+        low, high = popcount_bounds(popcount_bytes(query_fingerprint), threshold)
+        popcount_window = MoleculeFingerprint.num_on_bits >= low
+        if high != float("inf"):
+            popcount_window = and_(popcount_window, MoleculeFingerprint.num_on_bits <= high)
 
-            result = await self.session.execute(stmt)
-            self._cache[fingerprint_type] = {
-                row.molecule_id: row.fingerprint_bytes for row in result.fetchall()
-            }
+        stmt = select(
+            MoleculeFingerprint.molecule_id,
+            MoleculeFingerprint.fingerprint_bytes,
+        ).where(
+            MoleculeFingerprint.fingerprint_type == fingerprint_type,
+            func.octet_length(MoleculeFingerprint.fingerprint_bytes)
+            == len(query_fingerprint),
+            # Rows written before num_on_bits was populated are scored in full
+            or_(popcount_window, MoleculeFingerprint.num_on_bits.is_(None)),
+        )
+        if exclude_ids:
+            stmt = stmt.where(MoleculeFingerprint.molecule_id.notin_(list(exclude_ids)))
+
+        rows = (await self.session.execute(stmt)).all()
+        ids = [row.molecule_id for row in rows]
+        matrix = FingerprintMatrix.from_bytes(
+            [row.fingerprint_bytes for row in rows],
+            num_bytes=len(query_fingerprint),
+        )
+        return _search_packed(
+            ids, matrix, query_fingerprint, fingerprint_type, threshold, limit
+        )
 
-        # Calculate similarities
-        exclude_set = set(exclude_ids) if exclude_ids else set()
-        matches = []
+    async def search_many(
+        self,
+        query_fingerprints: Sequence[bytes],
+        fingerprint_type: str = "morgan",
+        thresholds: float | Sequence[float] = 0.7,
+        limits: int | Sequence[int] = 100,
+        exclude_ids: Sequence[UUID] | None = None,
+    ) -> list[list[SimilarityMatch]]:
+        """
+        Search many queries with one corpus read per fingerprint length.
 
-        for mol_id, fp_bytes in self._cache[fingerprint_type].items():
-            if mol_id in exclude_set:
-                continue
+        With an arena, every query is answered from one blocked pass over
+        the mapped generation. Otherwise the rows inside the union of the
+        queries' popcount windows are fetched once and searched the same way.
+        """
+        from sqlalchemy import and_, func, or_, select
 
-            try:
-                sim = _tanimoto_from_bytes(query_fingerprint, fp_bytes)
-                if sim >= threshold:
-                    matches.append(SimilarityMatch(
-                        molecule_id=mol_id,
-                        similarity=sim,
-                        fingerprint_type=fingerprint_type,
-                    ))
-            except ValueError:
-                # Skip fingerprints with mismatched length
-                continue
+        from db.models import MoleculeFingerprint
 
-        # Sort by similarity descending and limit
-        matches.sort(key=lambda m: m.similarity, reverse=True)
-        return matches[:limit]
+        thresholds = _per_query(thresholds, len(query_fingerprints), "thresholds")
+        limits = _per_query(limits, len(query_fingerprints), "limits")
+        results: list[list[SimilarityMatch]] = [[] for _ in query_fingerprints]
+
+        if self.arena_dir is not None:
+            arena = get_shared_arena(self.arena_dir, fingerprint_type)
+            await arena.ensure_fresh(self.session, max_age=self.arena_refresh_seconds)
+            hits = arena.search_many(query_fingerprints, thresholds, limits, exclude_ids)
+            return [_to_matches(query_hits, fingerprint_type) for query_hits in hits]
+
+        for num_bytes, positions in _group_by_length(query_fingerprints).items():
+            bounds = [
+                popcount_bounds(popcount_bytes(query_fingerprints[i]), thresholds[i])
+                for i in positions
+            ]
+            low = min(bound[0] for bound in bounds)
+            high = max(bound[1] for bound in bounds)
+            popcount_window = MoleculeFingerprint.num_on_bits >= low
+            if high != float("inf"):
+                popcount_window = and_(popcount_window, MoleculeFingerprint.num_on_bits <= high)
+
+            stmt = select(
+                MoleculeFingerprint.molecule_id,
+                MoleculeFingerprint.fingerprint_bytes,
+            ).where(
+                MoleculeFingerprint.fingerprint_type == fingerprint_type,
+                func.octet_length(MoleculeFingerprint.fingerprint_bytes) == num_bytes,
+                or_(popcount_window, MoleculeFingerprint.num_on_bits.is_(None)),
+            )
+            if exclude_ids:
+                stmt = stmt.where(MoleculeFingerprint.molecule_id.notin_(list(exclude_ids)))
+
+            rows = (await self.session.execute(stmt)).all()
+            if not rows:
+                continue
+            ids = [row.molecule_id for row in rows]
+            matrix = FingerprintMatrix.from_bytes(
+                [row.fingerprint_bytes for row in rows], num_bytes=num_bytes, bucketed=True
+            )
+            hits = matrix.search_many(
+                [query_fingerprints[i] for i in positions],
+                [thresholds[i] for i in positions],
+                [limits[i] for i in positions],
+            )
+            for position, query_hits in zip(positions, hits, strict=True):
+                results[position] = _to_matches(
+                    [(ids[row], sim) for row, sim in query_hits], fingerprint_type
+                )
+        return results
 
     async def bulk_index(
         self,
@@ -385,7 +600,7 @@ class PostgresFingerprintIndex(FingerprintIndexAdapter):
                 "fingerprint_base64": base64.b64encode(fp_bytes).decode("ascii"),
                 "fingerprint_hex": fp_bytes.hex(),
                 "num_bits": len(fp_bytes) * 8,
-                "num_on_bits": sum(bin(b).count("1") for b in fp_bytes),
+                "num_on_bits": popcount_bytes(fp_bytes),
                 "use_features": False,
             }
             for mol_id, fp_bytes in molecules
@@ -403,9 +618,6 @@ class PostgresFingerprintIndex(FingerprintIndexAdapter):
         )
         await self.session.execute(stmt)
 
-        # Invalidate cache
-        self._cache.pop(fingerprint_type, None)
-
         return len(molecules)
 
     async def get_stats(self, fingerprint_type: str = "morgan") -> IndexStats:
@@ -422,17 +634,790 @@ class PostgresFingerprintIndex(FingerprintIndexAdapter):
         result = await self.session.execute(stmt)
         row = result.fetchone()
 
+        metadata: dict[str, Any] = {}
+        if self.arena_dir is not None:
+            arena = get_shared_arena(self.arena_dir, fingerprint_type)
+            if arena.load() and arena.manifest is not None:
+                metadata["arena_generation"] = arena.manifest.generation
+                metadata["arena_size"] = len(arena)
+                metadata["arena_watermark"] = arena.manifest.watermark
+
         return IndexStats(
             total_indexed=row[0] if row else 0,
             fingerprint_type=fingerprint_type,
             last_updated=row[1] if row else None,
             backend="postgresql",
-            metadata={"cache_size": len(self._cache.get(fingerprint_type, {}))},
+            metadata=metadata,
+        )
+
+
+class PostgresBitCountFingerprintIndex(PostgresFingerprintIndex):
+    """
+    PostgreSQL fingerprint index that scores similarity inside the database.
+
+    PostgreSQL 14+ computes popcounts natively, so Tanimoto needs no
+    extension::
+
+        common = bit_count(fingerprint_bits & :query)
+        sim    = common / (:query_popcount + num_on_bits - common)
+
+    ``fingerprint_bits`` is a generated BIT VARYING copy of
+    ``fingerprint_bytes``. Candidates are first restricted to the popcount
+    window [t*q, q/t] on ``num_on_bits`` (indexed together with the
+    fingerprint type); the remaining rows are scored by a sequential scan
+    that PostgreSQL can run with parallel workers. Only the ranked top hits
+    are returned to the application, instead of every candidate fingerprint.
+
+    Writes, stats and removal are inherited from PostgresFingerprintIndex.
+    """
+
+    def __init__(
+        self,
+        session: "AsyncSession",
+        parallel_workers: int | None = None,
+    ):
+        """
+        Initialize the adapter.
+
+        Args:
+            session: SQLAlchemy async session
+            parallel_workers: If set, max_parallel_workers_per_gather for
+                the search transaction (None = server default)
+        """
+        super().__init__(session)
+        self.parallel_workers = parallel_workers
+
+    def similarity_query(
+        self,
+        query_fingerprint: bytes,
+        fingerprint_type: str = "morgan",
+        threshold: float = 0.7,
+        limit: int = 100,
+        exclude_ids: Sequence[UUID] | None = None,
+    ):
+        """
+        Build the ranked similarity SELECT of (molecule_id, similarity).
+
+        Args:
+            query_fingerprint: Query fingerprint bytes
+            fingerprint_type: Type of fingerprint to search
+            threshold: Minimum Tanimoto similarity (0.0 - 1.0)
+            limit: Maximum number of results
+            exclude_ids: Molecule IDs to exclude from results
+
+        Returns:
+            SQLAlchemy Select ordered by similarity descending, then molecule ID
+        """
+        from sqlalchemy import Float, Integer, String, and_, case, cast, func, literal, or_, select
+        from sqlalchemy.dialects.postgresql import BIT
+
+        from db.models import MoleculeFingerprint as MF
+
+        query_popcount = popcount_bytes(query_fingerprint)
+        query_bits = cast(literal("x" + query_fingerprint.hex(), String), BIT(varying=True))
+
+        low, high = popcount_bounds(query_popcount, threshold)
+        popcount_window = MF.num_on_bits >= low
+        if high != float("inf"):
+            popcount_window = and_(popcount_window, MF.num_on_bits <= high)
+
+        # Per-candidate counts. The length check inside CASE guards the AND,
+        # which fails on unequal lengths if evaluated before the WHERE clause.
+        candidates = select(
+            MF.molecule_id,
+            case(
+                (
+                    func.octet_length(MF.fingerprint_bytes) == len(query_fingerprint),
+                    func.bit_count(MF.fingerprint_bits.op("&")(query_bits)),
+                ),
+                else_=0,
+            ).label("common"),
+            func.coalesce(MF.num_on_bits, func.bit_count(MF.fingerprint_bytes)).label("on_bits"),
+        ).where(
+            MF.fingerprint_type == fingerprint_type,
+            func.octet_length(MF.fingerprint_bytes) == len(query_fingerprint),
+            # Rows written before num_on_bits was populated are scored in full
+            or_(popcount_window, MF.num_on_bits.is_(None)),
+        )
+        if exclude_ids:
+            candidates = candidates.where(MF.molecule_id.notin_(list(exclude_ids)))
+        candidates = candidates.subquery("candidates")
+
+        union = literal(query_popcount, Integer) + candidates.c.on_bits - candidates.c.common
+        similarity = case(
+            (union == 0, 1.0),  # Both empty, as tanimoto_bytes
+            else_=cast(candidates.c.common, Float) / cast(union, Float),
+        ).label("similarity")
+
+        return (
+            select(candidates.c.molecule_id, similarity)
+            .where(similarity >= threshold)
+            .order_by(similarity.desc(), candidates.c.molecule_id)
+            .limit(limit)
+        )
+
+    def similarity_many_query(
+        self,
+        query_fingerprints: Sequence[bytes],
+        fingerprint_type: str = "morgan",
+        thresholds: Sequence[float] = (),
+        limits: Sequence[int] = (),
+        exclude_ids: Sequence[UUID] | None = None,
+    ):
+        """
+        Build one SELECT of (ord, molecule_id, similarity) for many queries.
+
+        The queries are passed as parallel arrays and unnested WITH
+        ORDINALITY; a LATERAL subquery runs the popcount-windowed bit_count()
+        search of similarity_query for each of them, so the whole batch is a
+        single statement and round trip.
+
+        Args:
+            query_fingerprints: Non-empty query fingerprint bytes
+            fingerprint_type: Type of fingerprint to search
+            thresholds: Minimum Tanimoto similarity per query
+            limits: Maximum results per query
+            exclude_ids: Molecule IDs to exclude from every result
+
+        Returns:
+            SQLAlchemy Select ordered by ord (1-based query position), then
+            similarity descending, then molecule ID
+        """
+        from sqlalchemy import (
+            Float,
+            Integer,
+            String,
+            and_,
+            bindparam,
+            case,
+            cast,
+            func,
+            or_,
+            select,
+            true,
+        )
+        from sqlalchemy.dialects.postgresql import ARRAY, BIT
+
+        from db.models import MoleculeFingerprint as MF
+
+        popcounts = [popcount_bytes(fp) for fp in query_fingerprints]
+        bounds = [
+            popcount_bounds(popcount, threshold)
+            for popcount, threshold in zip(popcounts, thresholds, strict=True)
+        ]
+        queries = func.unnest(
+            bindparam("query_bits", ["x" + fp.hex() for fp in query_fingerprints], type_=ARRAY(String)),
+            bindparam("query_bytes", [len(fp) for fp in query_fingerprints], type_=ARRAY(Integer)),
+            bindparam("query_popcounts", popcounts, type_=ARRAY(Integer)),
+            bindparam("min_on_bits", [low for low, _ in bounds], type_=ARRAY(Integer)),
+            # An unbounded window is capped at the fingerprint length
+            bindparam(
+                "max_on_bits",
+                [
+                    len(fp) * 8 if high == float("inf") else int(high)
+                    for fp, (_, high) in zip(query_fingerprints, bounds, strict=True)
+                ],
+                type_=ARRAY(Integer),
+            ),
+            bindparam("thresholds", [float(t) for t in thresholds], type_=ARRAY(Float)),
+            bindparam("limits", [int(limit) for limit in limits], type_=ARRAY(Integer)),
+        ).table_valued(
+            "bits", "num_bytes", "popcount", "min_on_bits", "max_on_bits", "threshold", "max_hits",
+            with_ordinality="ord",
+        ).alias("queries")
+
+        candidates = select(
+            MF.molecule_id,
+            case(
+                (
+                    func.octet_length(MF.fingerprint_bytes) == queries.c.num_bytes,
+                    func.bit_count(
+                        MF.fingerprint_bits.op("&")(cast(queries.c.bits, BIT(varying=True)))
+                    ),
+                ),
+                else_=0,
+            ).label("common"),
+            func.coalesce(MF.num_on_bits, func.bit_count(MF.fingerprint_bytes)).label("on_bits"),
+        ).where(
+            MF.fingerprint_type == fingerprint_type,
+            func.octet_length(MF.fingerprint_bytes) == queries.c.num_bytes,
+            or_(
+                and_(
+                    MF.num_on_bits >= queries.c.min_on_bits,
+                    MF.num_on_bits <= queries.c.max_on_bits,
+                ),
+                MF.num_on_bits.is_(None),
+            ),
+        )
+        if exclude_ids:
+            candidates = candidates.where(MF.molecule_id.notin_(list(exclude_ids)))
+        candidates = candidates.correlate(queries).subquery("candidates")
+
+        union = queries.c.popcount + candidates.c.on_bits - candidates.c.common
+        similarity = case(
+            (union == 0, 1.0),
+            else_=cast(candidates.c.common, Float) / cast(union, Float),
+        ).label("similarity")
+        hits = (
+            select(candidates.c.molecule_id, similarity)
+            .where(similarity >= queries.c.threshold)
+            .order_by(similarity.desc(), candidates.c.molecule_id)
+            .limit(queries.c.max_hits)
+            .lateral("hits")
+        )
+        return (
+            select(queries.c.ord, hits.c.molecule_id, hits.c.similarity)
+            .select_from(queries.join(hits, true()))
+            .order_by(queries.c.ord, hits.c.similarity.desc(), hits.c.molecule_id)
+        )
+
+    async def _set_parallel_workers(self) -> None:
+        from sqlalchemy import text
+
+        if self.parallel_workers is not None:
+            await self.session.execute(
+                text(f"SET LOCAL max_parallel_workers_per_gather = {int(self.parallel_workers)}")
+            )
+
+    async def search_many(
+        self,
+        query_fingerprints: Sequence[bytes],
+        fingerprint_type: str = "morgan",
+        thresholds: float | Sequence[float] = 0.7,
+        limits: int | Sequence[int] = 100,
+        exclude_ids: Sequence[UUID] | None = None,
+    ) -> list[list[SimilarityMatch]]:
+        """Search many fingerprints with one LATERAL bit_count() statement."""
+        thresholds = _per_query(thresholds, len(query_fingerprints), "thresholds")
+        limits = _per_query(limits, len(query_fingerprints), "limits")
+        results: list[list[SimilarityMatch]] = [[] for _ in query_fingerprints]
+        positions = [
+            i for i, fp in enumerate(query_fingerprints) if fp and limits[i] > 0
+        ]
+        if not positions:
+            return results
+
+        await self._set_parallel_workers()
+        stmt = self.similarity_many_query(
+            [query_fingerprints[i] for i in positions],
+            fingerprint_type,
+            [thresholds[i] for i in positions],
+            [limits[i] for i in positions],
+            exclude_ids,
+        )
+        for row in (await self.session.execute(stmt)).all():
+            results[positions[row.ord - 1]].append(
+                SimilarityMatch(
+                    molecule_id=row.molecule_id,
+                    similarity=float(row.similarity),
+                    fingerprint_type=fingerprint_type,
+                )
+            )
+        return results
+
+    async def search_similar(
+        self,
+        query_fingerprint: bytes,
+        fingerprint_type: str = "morgan",
+        threshold: float = 0.7,
+        limit: int = 100,
+        exclude_ids: Sequence[UUID] | None = None,
+    ) -> list[SimilarityMatch]:
+        """Search for similar fingerprints with bit_count() in PostgreSQL."""
+        if not query_fingerprint or limit <= 0:
+            return []
+
+        await self._set_parallel_workers()
+        stmt = self.similarity_query(
+            query_fingerprint, fingerprint_type, threshold, limit, exclude_ids
+        )
+        rows = (await self.session.execute(stmt)).all()
+        return [
+            SimilarityMatch(
+                molecule_id=row.molecule_id,
+                similarity=float(row.similarity),
+                fingerprint_type=fingerprint_type,
+            )
+            for row in rows
+        ]
+
+    async def get_stats(self, fingerprint_type: str = "morgan") -> IndexStats:
+        """Get index statistics."""
+        stats = await super().get_stats(fingerprint_type)
+        return replace(stats, backend="postgresql-bitcount")
+
+
+class PgVectorFingerprintIndex(PostgresBitCountFingerprintIndex):
+    """
+    Approximate fingerprint index on pgvector HNSW, re-ranked exactly.
+
+    pgvector (0.7+) indexes PostgreSQL ``bit`` values directly: the Jaccard
+    distance operator ``<%>`` is 1 - Tanimoto, and ``bit_jaccard_ops``
+    builds an HNSW graph over it. The graph is built on the generated
+    ``fingerprint_bits`` column, as a partial expression index per
+    fingerprint type and length (see create_hnsw_index), so no separate
+    vector copy of the fingerprints has to be kept in sync.
+
+    A search walks the graph for ``limit * candidate_factor`` nearest
+    candidates, then re-scores them with exact Tanimoto from
+    ``fingerprint_bytes``. Scores and ordering therefore match
+    PostgresBitCountFingerprintIndex for every molecule that is found;
+    recall is traded for latency with ``ef_search`` and
+    ``candidate_factor``. (IVFFlat ``probes`` do not apply: pgvector's
+    IVFFlat supports only Hamming distance on bit columns.)
+
+    Requires the ``vector`` extension; the docker-compose database image
+    ships it.
+    """
+
+    def __init__(
+        self,
+        session: "AsyncSession",
+        ef_search: int = 100,
+        candidate_factor: int = 4,
+        iterative_scan: str | None = None,
+    ):
+        """
+        Initialize the adapter.
+
+        Args:
+            session: SQLAlchemy async session
+            ef_search: HNSW candidate list size (higher = better recall,
+                slower); raised to the candidate count when smaller
+            candidate_factor: Candidates re-ranked per requested result
+            iterative_scan: pgvector 0.8+ ``hnsw.iterative_scan`` mode
+                ("relaxed_order" or "strict_order") so filtered searches,
+                e.g. with exclude_ids, keep scanning until enough rows pass
+        """
+        super().__init__(session)
+        self.ef_search = ef_search
+        self.candidate_factor = candidate_factor
+        self.iterative_scan = iterative_scan
+
+    @staticmethod
+    def _check_type(fingerprint_type: str) -> str:
+        # Rendered into index names and partial-index predicates
+        if not _FINGERPRINT_TYPE_PATTERN.fullmatch(fingerprint_type):
+            raise ValueError(f"Invalid fingerprint type: {fingerprint_type!r}")
+        return fingerprint_type
+
+    @classmethod
+    def hnsw_index_name(cls, fingerprint_type: str, num_bits: int) -> str:
+        """Name of the HNSW index for one fingerprint type and length."""
+        return f"ix_molecule_fp_hnsw_{cls._check_type(fingerprint_type)}_{int(num_bits)}"
+
+    async def create_hnsw_index(
+        self,
+        fingerprint_type: str = "morgan",
+        num_bits: int = 2048,
+        m: int = 16,
+        ef_construction: int = 64,
+    ) -> str:
+        """
+        Create the vector extension and the HNSW index for one fingerprint type.
+
+        Building the graph takes a while on large tables and blocks writes
+        to molecule_fingerprints until it finishes.
+
+        Args:
+            fingerprint_type: Fingerprint type to index
+            num_bits: Fingerprint length in bits
+            m: Max connections per graph node
+            ef_construction: Candidate list size while building
+
+        Returns:
+            Index name
+        """
+        from sqlalchemy import text
+
+        name = self.hnsw_index_name(fingerprint_type, num_bits)
+        await self.session.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        await self.session.execute(text(
+            f"CREATE INDEX IF NOT EXISTS {name} ON molecule_fingerprints "
+            f"USING hnsw ((fingerprint_bits::bit({int(num_bits)})) bit_jaccard_ops) "
+            f"WITH (m = {int(m)}, ef_construction = {int(ef_construction)}) "
+            f"WHERE fingerprint_type = '{fingerprint_type}' AND num_bits = {int(num_bits)}"
+        ))
+        return name
+
+    def candidate_query(
+        self,
+        query_fingerprint: bytes,
+        fingerprint_type: str = "morgan",
+        num_candidates: int = 400,
+        exclude_ids: Sequence[UUID] | None = None,
+    ):
+        """
+        Build the HNSW nearest-neighbour SELECT of (molecule_id, fingerprint_bytes).
+
+        The type and length are inlined so the planner can match the
+        partial index.
+        """
+        from sqlalchemy import String, bindparam, cast, literal, select
+        from sqlalchemy.dialects.postgresql import BIT
+
+        from db.models import MoleculeFingerprint as MF
+
+        num_bits = len(query_fingerprint) * 8
+        query_bits = cast(literal("x" + query_fingerprint.hex(), String), BIT(num_bits))
+        distance = cast(MF.fingerprint_bits, BIT(num_bits)).op("<%>")(query_bits)
+
+        stmt = select(MF.molecule_id, MF.fingerprint_bytes).where(
+            MF.fingerprint_type
+            == bindparam("fp_type", self._check_type(fingerprint_type), literal_execute=True),
+            MF.num_bits == bindparam("num_bits", num_bits, literal_execute=True),
+        )
+        if exclude_ids:
+            stmt = stmt.where(MF.molecule_id.notin_(list(exclude_ids)))
+        return stmt.order_by(distance).limit(num_candidates)
+
+    def candidate_many_query(
+        self,
+        query_fingerprints: Sequence[bytes],
+        fingerprint_type: str = "morgan",
+        num_candidates: Sequence[int] = (),
+        exclude_ids: Sequence[UUID] | None = None,
+    ):
+        """
+        Build one HNSW SELECT of (ord, molecule_id, fingerprint_bytes) for many queries.
+
+        All queries must have the same length, which is inlined with the
+        type so every LATERAL probe can use the partial index.
+        """
+        from sqlalchemy import Integer, String, bindparam, cast, func, select, true
+        from sqlalchemy.dialects.postgresql import ARRAY, BIT
+
+        from db.models import MoleculeFingerprint as MF
+
+        num_bits = len(query_fingerprints[0]) * 8
+        queries = func.unnest(
+            bindparam("query_bits", ["x" + fp.hex() for fp in query_fingerprints], type_=ARRAY(String)),
+            bindparam("num_candidates", [int(n) for n in num_candidates], type_=ARRAY(Integer)),
+        ).table_valued("bits", "num_candidates", with_ordinality="ord").alias("queries")
+        distance = cast(MF.fingerprint_bits, BIT(num_bits)).op("<%>")(
+            cast(queries.c.bits, BIT(num_bits))
+        )
+
+        candidates = select(MF.molecule_id, MF.fingerprint_bytes).where(
+            MF.fingerprint_type
+            == bindparam("fp_type", self._check_type(fingerprint_type), literal_execute=True),
+            MF.num_bits == bindparam("num_bits", num_bits, literal_execute=True),
+        )
+        if exclude_ids:
+            candidates = candidates.where(MF.molecule_id.notin_(list(exclude_ids)))
+        candidates = (
+            candidates.order_by(distance).limit(queries.c.num_candidates).lateral("candidates")
+        )
+        return select(
+            queries.c.ord, candidates.c.molecule_id, candidates.c.fingerprint_bytes
+        ).select_from(queries.join(candidates, true()))
+
+    async def _set_search_options(self, num_candidates: int) -> None:
+        from sqlalchemy import text
+
+        await self.session.execute(
+            text(f"SET LOCAL hnsw.ef_search = {max(int(self.ef_search), num_candidates)}")
+        )
+        if self.iterative_scan:
+            await self.session.execute(
+                text("SELECT set_config('hnsw.iterative_scan', :mode, true)"),
+                {"mode": self.iterative_scan},
+            )
+
+    @staticmethod
+    def _rerank(
+        rows: Sequence[Any],
+        query_fingerprint: bytes,
+        fingerprint_type: str,
+        threshold: float,
+        limit: int,
+    ) -> list[SimilarityMatch]:
+        if not rows:
+            return []
+        matrix = FingerprintMatrix.from_bytes(
+            [row.fingerprint_bytes for row in rows], num_bytes=len(query_fingerprint)
+        )
+        matches = _search_packed(
+            [row.molecule_id for row in rows],
+            matrix,
+            query_fingerprint,
+            fingerprint_type,
+            threshold,
+            len(rows),
+        )
+        # Same tie order as the exact backends
+        matches.sort(key=lambda match: (-match.similarity, match.molecule_id))
+        return matches[:limit]
+
+    async def search_many(
+        self,
+        query_fingerprints: Sequence[bytes],
+        fingerprint_type: str = "morgan",
+        thresholds: float | Sequence[float] = 0.7,
+        limits: int | Sequence[int] = 100,
+        exclude_ids: Sequence[UUID] | None = None,
+    ) -> list[list[SimilarityMatch]]:
+        """
+        Probe the HNSW index for many queries and re-rank exactly.
+
+        One LATERAL statement per fingerprint length fetches every query's
+        candidates; re-ranking is done in-process per query.
+        """
+        thresholds = _per_query(thresholds, len(query_fingerprints), "thresholds")
+        limits = _per_query(limits, len(query_fingerprints), "limits")
+        results: list[list[SimilarityMatch]] = [[] for _ in query_fingerprints]
+        factor = max(self.candidate_factor, 1)
+
+        for positions in _group_by_length(query_fingerprints).values():
+            positions = [i for i in positions if limits[i] > 0]
+            if not positions:
+                continue
+            num_candidates = [limits[i] * factor for i in positions]
+            await self._set_search_options(max(num_candidates))
+            stmt = self.candidate_many_query(
+                [query_fingerprints[i] for i in positions],
+                fingerprint_type,
+                num_candidates,
+                exclude_ids,
+            )
+            candidates: dict[int, list[Any]] = {}
+            for row in (await self.session.execute(stmt)).all():
+                candidates.setdefault(row.ord, []).append(row)
+            for ord_, position in enumerate(positions, start=1):
+                results[position] = self._rerank(
+                    candidates.get(ord_, []),
+                    query_fingerprints[position],
+                    fingerprint_type,
+                    thresholds[position],
+                    limits[position],
+                )
+        return results
+
+    async def search_similar(
+        self,
+        query_fingerprint: bytes,
+        fingerprint_type: str = "morgan",
+        threshold: float = 0.7,
+        limit: int = 100,
+        exclude_ids: Sequence[UUID] | None = None,
+    ) -> list[SimilarityMatch]:
+        """Search the HNSW index and re-rank candidates with exact Tanimoto."""
+        if not query_fingerprint or limit <= 0:
+            return []
+
+        num_candidates = limit * max(self.candidate_factor, 1)
+        await self._set_search_options(num_candidates)
+
+        stmt = self.candidate_query(
+            query_fingerprint, fingerprint_type, num_candidates, exclude_ids
+        )
+        rows = (await self.session.execute(stmt)).all()
+        return self._rerank(rows, query_fingerprint, fingerprint_type, threshold, limit)
+
+    async def get_stats(self, fingerprint_type: str = "morgan") -> IndexStats:
+        """Get index statistics."""
+        stats = await super().get_stats(fingerprint_type)
+        return replace(
+            stats,
+            backend="pgvector",
+            metadata={
+                **stats.metadata,
+                "ef_search": self.ef_search,
+                "candidate_factor": self.candidate_factor,
+                "iterative_scan": self.iterative_scan,
+            },
+        )
+
+
+class LSHFingerprintIndex(FingerprintIndexAdapter):
+    """
+    In-process approximate fingerprint index using MinHash LSH.
+
+    Keeps one MinHashLSHIndex per fingerprint type, memory-mapped from
+    ``<directory>/<fingerprint_type>/`` when saved there. Candidates are
+    scored with exact Tanimoto, so every reported similarity is exact and
+    only recall depends on ``bands`` / ``rows_per_band`` (see
+    packages.chemistry.fingerprint_lsh). Index and remove calls update an
+    in-memory delta; call :meth:`save` to compact it to disk.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path | None = None,
+        bands: int = DEFAULT_BANDS,
+        rows_per_band: int = DEFAULT_ROWS_PER_BAND,
+        seed: int = 0,
+    ):
+        """
+        Initialize the adapter.
+
+        Args:
+            directory: Root directory for saved indexes (None = memory only)
+            bands: Hash tables per index (higher = better recall)
+            rows_per_band: MinHash values per table key (higher = fewer candidates)
+            seed: Seed for the MinHash permutations
+        """
+        self.directory = Path(directory) if directory is not None else None
+        self.bands = bands
+        self.rows_per_band = rows_per_band
+        self.seed = seed
+        self._indexes: dict[str, MinHashLSHIndex] = {}
+
+    def get_index(
+        self, fingerprint_type: str = "morgan", num_bytes: int | None = None
+    ) -> MinHashLSHIndex | None:
+        """
+        Index for a fingerprint type, loading or creating it as needed.
+
+        Args:
+            fingerprint_type: Fingerprint type
+            num_bytes: Fingerprint length for a new index (None = don't create)
+
+        Returns:
+            The index, or None if none exists and num_bytes was not given
+        """
+        index = self._indexes.get(fingerprint_type)
+        if index is not None:
+            return index
+        if self.directory is not None:
+            path = self.directory / fingerprint_type
+            if (path / LSH_MANIFEST_NAME).exists():
+                index = MinHashLSHIndex.load(path)
+        if index is None and num_bytes is not None:
+            index = MinHashLSHIndex(num_bytes, self.bands, self.rows_per_band, self.seed)
+        if index is not None:
+            self._indexes[fingerprint_type] = index
+        return index
+
+    def build_from_arena(self, arena: FingerprintArena) -> MinHashLSHIndex:
+        """Rebuild the index for the arena's fingerprint type from its packed store."""
+        index = MinHashLSHIndex.from_arena(arena, self.bands, self.rows_per_band, self.seed)
+        if arena.manifest is not None:
+            # Resume the change feed where the arena snapshot left off
+            index.epoch = arena.manifest.epoch
+        self._indexes[arena.fingerprint_type] = index
+        return index
+
+    async def sync(self, session: "AsyncSession", fingerprint_type: str = "morgan") -> int:
+        """
+        Apply molecule_fingerprints changes since the index epoch.
+
+        An index without an epoch starts following the feed from now.
+
+        Returns:
+            Number of molecules updated or removed
+        """
+        index = self.get_index(fingerprint_type)
+        if index is None:
+            return 0
+        if index.epoch is None:
+            index.epoch = await current_epoch(session)
+            return 0
+        changes = await fetch_fingerprint_changes(
+            session, index.epoch, SOURCE_FINGERPRINTS, fingerprint_type
+        )
+        index.apply_changes(changes)
+        return len(changes)
+
+    def save(self) -> None:
+        """Compact and persist every loaded index."""
+        if self.directory is None:
+            raise ValueError("LSH index has no directory to save to")
+        for fingerprint_type, index in self._indexes.items():
+            index.save(self.directory / fingerprint_type)
+
+    async def index_molecule(
+        self,
+        molecule_id: UUID,
+        fingerprint_bytes: bytes,
+        fingerprint_type: str = "morgan",
+        metadata: dict[str, Any] | None = None,
+    ) -> bool:
+        """Add or replace a fingerprint in the in-memory delta."""
+        index = self.get_index(fingerprint_type, len(fingerprint_bytes))
+        if index is None or index.num_bytes != len(fingerprint_bytes):
+            return False
+        index.insert(molecule_id, fingerprint_bytes)
+        return True
+
+    async def remove_molecule(
+        self,
+        molecule_id: UUID,
+        fingerprint_type: str = "morgan",
+    ) -> bool:
+        """Tombstone a fingerprint."""
+        index = self.get_index(fingerprint_type)
+        return index.delete(molecule_id) if index is not None else False
+
+    async def search_similar(
+        self,
+        query_fingerprint: bytes,
+        fingerprint_type: str = "morgan",
+        threshold: float = 0.7,
+        limit: int = 100,
+        exclude_ids: Sequence[UUID] | None = None,
+    ) -> list[SimilarityMatch]:
+        """Search hash-bucket candidates and score them exactly."""
+        index = self.get_index(fingerprint_type)
+        if index is None:
+            return []
+        return [
+            SimilarityMatch(
+                molecule_id=mol_id,
+                similarity=sim,
+                fingerprint_type=fingerprint_type,
+            )
+            for mol_id, sim in index.search(query_fingerprint, threshold, limit, exclude_ids)
+        ]
+
+    async def search_many(
+        self,
+        query_fingerprints: Sequence[bytes],
+        fingerprint_type: str = "morgan",
+        thresholds: float | Sequence[float] = 0.7,
+        limits: int | Sequence[int] = 100,
+        exclude_ids: Sequence[UUID] | None = None,
+    ) -> list[list[SimilarityMatch]]:
+        """Hash every query in one pass, then probe and score per query."""
+        thresholds = _per_query(thresholds, len(query_fingerprints), "thresholds")
+        limits = _per_query(limits, len(query_fingerprints), "limits")
+        index = self.get_index(fingerprint_type)
+        if index is None:
+            return [[] for _ in query_fingerprints]
+        hits = index.search_many(query_fingerprints, thresholds, limits, exclude_ids)
+        return [_to_matches(query_hits, fingerprint_type) for query_hits in hits]
+
+    async def bulk_index(
+        self,
+        molecules: Sequence[tuple[UUID, bytes]],
+        fingerprint_type: str = "morgan",
+    ) -> int:
+        """Add or replace fingerprints with one vectorized hashing pass."""
+        if not molecules:
+            return 0
+        index = self.get_index(fingerprint_type, len(molecules[0][1]))
+        assert index is not None
+        return index.insert_many(
+            [(mol_id, fp) for mol_id, fp in molecules if len(fp) == index.num_bytes]
         )
 
-    def clear_cache(self) -> None:
-        """Clear the fingerprint cache."""
-        self._cache.clear()
+    async def get_stats(self, fingerprint_type: str = "morgan") -> IndexStats:
+        """Get index statistics."""
+        index = self.get_index(fingerprint_type)
+        return IndexStats(
+            total_indexed=len(index) if index is not None else 0,
+            fingerprint_type=fingerprint_type,
+            last_updated=index.built_at if index is not None else None,
+            backend="lsh",
+            metadata={
+                "bands": self.bands,
+                "rows_per_band": self.rows_per_band,
+                "pending": index.pending if index is not None else 0,
+                "generation": index.generation if index is not None else 0,
+                "epoch": index.epoch if index is not None else None,
+                "nbytes": index.nbytes if index is not None else 0,
+            },
+        )
 
 
 class PineconeFingerprintIndex(FingerprintIndexAdapter):
@@ -489,17 +1474,14 @@ class PineconeFingerprintIndex(FingerprintIndexAdapter):
         pass
 
     def _fp_to_vector(self, fp_bytes: bytes) -> list[float]:
-        """Convert fingerprint bytes to float vector."""
-        # Expand bytes to bits, normalize
-        bits = []
-        for byte in fp_bytes:
-            for i in range(8):
-                bits.append(1.0 if (byte >> i) & 1 else 0.0)
-        # Normalize to unit length
-        norm = sum(b * b for b in bits) ** 0.5
-        if norm > 0:
-            bits = [b / norm for b in bits]
-        return bits
+        """Convert fingerprint bytes to a unit-length float vector."""
+        bits = np.unpackbits(np.frombuffer(fp_bytes, dtype=np.uint8), bitorder="little")
+        vector = bits.astype(np.float32)
+        # Norm of a 0/1 vector is sqrt(popcount)
+        on_bits = int(bits.sum())
+        if on_bits:
+            vector /= np.sqrt(on_bits)
+        return vector.tolist()
 
     async def index_molecule(
         self,
@@ -572,6 +1554,36 @@ class PineconeFingerprintIndex(FingerprintIndexAdapter):
 
         return []
 
+    async def search_many(
+        self,
+        query_fingerprints: Sequence[bytes],
+        fingerprint_type: str = "morgan",
+        thresholds: float | Sequence[float] = 0.7,
+        limits: int | Sequence[int] = 100,
+        exclude_ids: Sequence[UUID] | None = None,
+    ) -> list[list[SimilarityMatch]]:
+        """Search Pinecone with batched query requests."""
+        if not self._index:
+            raise RuntimeError("Pinecone not initialized.")
+
+        thresholds = _per_query(thresholds, len(query_fingerprints), "thresholds")
+        limits = _per_query(limits, len(query_fingerprints), "limits")
+        vectors = [self._fp_to_vector(fp) for fp in query_fingerprints]
+
+        # Placeholder - would send the vectors in batches of 100 concurrently:
+        # responses = await asyncio.gather(*(
+        #     asyncio.to_thread(
+        #         self._index.query,
+        #         vector=vector,
+        #         top_k=limit,
+        #         filter={"fingerprint_type": fingerprint_type},
+        #     )
+        #     for vector, limit in batch
+        # ))
+        # and keep matches with score >= threshold per query
+
+        return [[] for _ in vectors]
+
     async def bulk_index(
         self,
         molecules: Sequence[tuple[UUID, bytes]],
@@ -614,9 +1626,12 @@ def get_fingerprint_index(
     Factory function to get appropriate fingerprint index adapter.
 
     Args:
-        backend: "postgres" or "pinecone"
-        session: SQLAlchemy async session (required for postgres)
-        **kwargs: Backend-specific configuration
+        backend: "postgres", "postgres_bitcount", "pgvector", "lsh" or "pinecone"
+        session: SQLAlchemy async session (required for postgres backends)
+        **kwargs: Backend-specific configuration (postgres: arena_dir,
+            arena_refresh_seconds; postgres_bitcount: parallel_workers;
+            pgvector: ef_search, candidate_factor, iterative_scan;
+            lsh: directory, bands, rows_per_band)
 
     Returns:
         Configured FingerprintIndexAdapter
@@ -624,7 +1639,33 @@ def get_fingerprint_index(
     if backend == "postgres":
         if session is None:
             raise ValueError("PostgreSQL backend requires session parameter")
-        return PostgresFingerprintIndex(session)
+        return PostgresFingerprintIndex(
+            session,
+            arena_dir=kwargs.get("arena_dir"),
+            arena_refresh_seconds=kwargs.get("arena_refresh_seconds", 30.0),
+        )
+    elif backend == "postgres_bitcount":
+        if session is None:
+            raise ValueError("PostgreSQL backend requires session parameter")
+        return PostgresBitCountFingerprintIndex(
+            session,
+            parallel_workers=kwargs.get("parallel_workers"),
+        )
+    elif backend == "pgvector":
+        if session is None:
+            raise ValueError("PostgreSQL backend requires session parameter")
+        return PgVectorFingerprintIndex(
+            session,
+            ef_search=kwargs.get("ef_search", 100),
+            candidate_factor=kwargs.get("candidate_factor", 4),
+            iterative_scan=kwargs.get("iterative_scan"),
+        )
+    elif backend == "lsh":
+        return LSHFingerprintIndex(
+            directory=kwargs.get("directory"),
+            bands=kwargs.get("bands", DEFAULT_BANDS),
+            rows_per_band=kwargs.get("rows_per_band", DEFAULT_ROWS_PER_BAND),
+        )
     elif backend == "pinecone":
         return PineconeFingerprintIndex(
             api_key=kwargs.get("api_key"),
@@ -632,4 +1673,7 @@ def get_fingerprint_index(
             index_name=kwargs.get("index_name", "molecules"),
         )
     else:
-        raise ValueError(f"Unknown backend: {backend}. Use 'postgres' or 'pinecone'")
+        raise ValueError(
+            f"Unknown backend: {backend}. "
+            "Use 'postgres', 'postgres_bitcount', 'pgvector', 'lsh' or 'pinecone'"
+        )
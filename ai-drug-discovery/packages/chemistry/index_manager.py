@@ -0,0 +1,248 @@
+"""
+Process-wide cache of per-organization fingerprint indexes.
+
+Every similarity path is scoped by organization, and library sizes are very
+skewed: a few organizations hold millions of molecules while hundreds hold a
+few thousand. FingerprintIndexManager keeps one in-memory index per
+(organization, fingerprint type) resident under a single process-wide memory
+budget. Indexes are built lazily by the caller on a miss; when the resident
+total exceeds the budget, the least recently used indexes are evicted first,
+so hot organizations stay resident and cold ones are reloaded on demand. An
+index larger than the whole budget is served but never cached.
+
+Indexes only need ``nbytes`` and ``__len__``. Callers that grow a cached
+index in place (appends, change feed syncs) call ``resize`` afterwards so
+the budget is re-checked.
+
+Usage:
+    manager = FingerprintIndexManager(memory_budget=2 * 1024**3)
+    async with manager.lock(org_id, "morgan"):
+        index = manager.get(org_id, "morgan")
+        if index is None:
+            index = await load_index(org_id, "morgan")
+            manager.put(org_id, "morgan", index)
+    stats = manager.get_stats()
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Generic, Protocol, TypeVar
+from uuid import UUID
+
+from packages.chemistry.fingerprint_index import IndexStats
+
+logger = logging.getLogger(__name__)
+
+# Largest indexes listed in IndexStats.metadata
+STATS_TOP_INDEXES = 10
+
+
+class ManagedIndex(Protocol):
+    """What the manager needs from a cached index."""
+
+    @property
+    def nbytes(self) -> int: ...
+
+    def __len__(self) -> int: ...
+
+
+IndexT = TypeVar("IndexT", bound=ManagedIndex)
+IndexKey = tuple[UUID, str]
+
+
+@dataclass
+class _Entry(Generic[IndexT]):
+    index: IndexT
+    nbytes: int
+    loaded_at: datetime
+    hits: int = 0
+
+
+class FingerprintIndexManager(Generic[IndexT]):
+    """
+    LRU cache of per-organization indexes under a memory budget.
+
+    Not thread-safe; meant to be shared by the coroutines of one event loop.
+    """
+
+    def __init__(self, memory_budget: int, backend: str = "memory"):
+        """
+        Initialize an empty manager.
+
+        Args:
+            memory_budget: Maximum resident bytes across all cached indexes
+            backend: Backend name reported in IndexStats
+        """
+        if memory_budget <= 0:
+            raise ValueError("memory_budget must be positive")
+        self.memory_budget = memory_budget
+        self.backend = backend
+        self.resident_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.evictions = 0
+        self.rejected = 0
+        self._entries: OrderedDict[IndexKey, _Entry[IndexT]] = OrderedDict()
+        self._locks: dict[IndexKey, asyncio.Lock] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: IndexKey) -> bool:
+        return key in self._entries
+
+    def lock(self, organization_id: UUID, fingerprint_type: str) -> asyncio.Lock:
+        """Lock serializing loads and syncs of one index."""
+        return self._locks.setdefault((organization_id, fingerprint_type), asyncio.Lock())
+
+    def get(self, organization_id: UUID, fingerprint_type: str) -> IndexT | None:
+        """
+        Get a cached index and mark it most recently used.
+
+        Counts a hit or a miss.
+        """
+        entry = self._entries.get((organization_id, fingerprint_type))
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        entry.hits += 1
+        self._entries.move_to_end((organization_id, fingerprint_type))
+        return entry.index
+
+    def peek(self, organization_id: UUID, fingerprint_type: str) -> IndexT | None:
+        """Get a cached index without touching LRU order or statistics."""
+        entry = self._entries.get((organization_id, fingerprint_type))
+        return entry.index if entry is not None else None
+
+    def put(self, organization_id: UUID, fingerprint_type: str, index: IndexT) -> bool:
+        """
+        Cache a freshly loaded index, evicting cold indexes to fit it.
+
+        Returns:
+            False if the index alone exceeds the budget and was not cached
+        """
+        key = (organization_id, fingerprint_type)
+        self.loads += 1
+        self._drop(key)
+
+        nbytes = int(index.nbytes)
+        if nbytes > self.memory_budget:
+            self.rejected += 1
+            logger.warning(
+                f"Fingerprint index for organization {organization_id} ({fingerprint_type}) "
+                f"needs {nbytes} bytes, over the {self.memory_budget} byte budget; not cached"
+            )
+            return False
+
+        self._entries[key] = _Entry(index=index, nbytes=nbytes, loaded_at=datetime.now(UTC))
+        self.resident_bytes += nbytes
+        self._evict(keep=key)
+        return True
+
+    def resize(self, organization_id: UUID, fingerprint_type: str) -> None:
+        """Re-measure an index that changed size and enforce the budget."""
+        key = (organization_id, fingerprint_type)
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        nbytes = int(entry.index.nbytes)
+        self.resident_bytes += nbytes - entry.nbytes
+        entry.nbytes = nbytes
+        if nbytes > self.memory_budget:
+            self._drop(key)
+            self.evictions += 1
+            return
+        self._evict(keep=key)
+
+    def invalidate(
+        self,
+        organization_id: UUID | None = None,
+        fingerprint_type: str | None = None,
+    ) -> int:
+        """
+        Drop cached indexes so they are reloaded on next use.
+
+        Args:
+            organization_id: Only this organization (None = all)
+            fingerprint_type: Only this fingerprint type (None = all)
+
+        Returns:
+            Number of indexes dropped
+        """
+        keys = [
+            key for key in self._entries
+            if organization_id in (None, key[0]) and fingerprint_type in (None, key[1])
+        ]
+        for key in keys:
+            self._drop(key)
+        return len(keys)
+
+    def _drop(self, key: IndexKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.resident_bytes -= entry.nbytes
+
+    def _evict(self, keep: IndexKey) -> None:
+        """Evict least recently used indexes until within budget."""
+        while self.resident_bytes > self.memory_budget:
+            key = next((k for k in self._entries if k != keep), None)
+            if key is None:
+                break
+            entry = self._entries[key]
+            self._drop(key)
+            self.evictions += 1
+            logger.info(
+                f"Evicted fingerprint index for organization {key[0]} ({key[1]}): "
+                f"{entry.nbytes} bytes, {entry.hits} hits"
+            )
+
+    def get_stats(self, fingerprint_type: str | None = None) -> IndexStats:
+        """
+        Resident size and cache statistics.
+
+        Args:
+            fingerprint_type: Only count indexes of this type (None = all)
+
+        Returns:
+            IndexStats; counters in metadata cover every type
+        """
+        entries = [
+            (key, entry) for key, entry in self._entries.items()
+            if fingerprint_type in (None, key[1])
+        ]
+        largest = sorted(entries, key=lambda item: item[1].nbytes, reverse=True)
+        lookups = self.hits + self.misses
+        return IndexStats(
+            total_indexed=sum(len(entry.index) for _, entry in entries),
+            fingerprint_type=fingerprint_type or "all",
+            last_updated=max((entry.loaded_at for _, entry in entries), default=None),
+            backend=self.backend,
+            metadata={
+                "indexes": len(entries),
+                "resident_bytes": sum(entry.nbytes for _, entry in entries),
+                "memory_budget": self.memory_budget,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "rejected": self.rejected,
+                "largest": [
+                    {
+                        "organization_id": str(org_id),
+                        "fingerprint_type": fp_type,
+                        "nbytes": entry.nbytes,
+                        "molecules": len(entry.index),
+                        "hits": entry.hits,
+                    }
+                    for (org_id, fp_type), entry in largest[:STATS_TOP_INDEXES]
+                ],
+            },
+        )
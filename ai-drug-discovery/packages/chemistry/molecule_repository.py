@@ -124,11 +124,14 @@ class MoleculeRepository:
             Molecule if found, None otherwise
         """
         from sqlalchemy import select
+        from sqlalchemy.orm import undefer_group
 
         from db.models import Molecule
+        from db.models.discovery import FINGERPRINT_GROUP
 
         stmt = (
             select(Molecule)
+            .options(undefer_group(FINGERPRINT_GROUP))
             .where(
                 Molecule.organization_id == self.organization_id,
                 Molecule.inchi_key == inchi_key,
@@ -149,11 +152,14 @@ class MoleculeRepository:
             Molecule if found, None otherwise
         """
         from sqlalchemy import select
+        from sqlalchemy.orm import undefer_group
 
         from db.models import Molecule
+        from db.models.discovery import FINGERPRINT_GROUP
 
         stmt = (
             select(Molecule)
+            .options(undefer_group(FINGERPRINT_GROUP))
             .where(
                 Molecule.organization_id == self.organization_id,
                 Molecule.smiles_hash == smiles_hash,
@@ -395,13 +401,14 @@ class MoleculeRepository:
             Tuple of (Molecule, list of MoleculeFingerprint)
         """
         from sqlalchemy import select
-        from sqlalchemy.orm import selectinload
+        from sqlalchemy.orm import selectinload, undefer_group
 
         from db.models import Molecule, MoleculeFingerprint
+        from db.models.discovery import FINGERPRINT_GROUP
 
         stmt = (
             select(Molecule)
-            .options(selectinload(Molecule.fingerprints))
+            .options(selectinload(Molecule.fingerprints), undefer_group(FINGERPRINT_GROUP))
             .where(
                 Molecule.id == molecule_id,
                 Molecule.organization_id == self.organization_id,
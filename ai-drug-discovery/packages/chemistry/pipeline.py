@@ -124,6 +124,19 @@ class MoleculeProcessor:
         Raises:
             ChemistryError: If processing fails.
         """
+        mol, identifiers, descriptors, warnings = self._prepare(input_data)
+
+        # Step 4: Compute fingerprints
+        fingerprints = {}
+        if self.options.compute_fingerprints:
+            fingerprints = self._fingerprint_calc.calculate_multiple(
+                mol, self.options.compute_fingerprints
+            )
+
+        return self._finish(input_data, mol, identifiers, descriptors, fingerprints, warnings)
+
+    def _prepare(self, input_data: MoleculeInput) -> tuple:
+        """Parse, normalize and compute descriptors (steps 1-3)."""
         warnings = []
 
         # Step 1: Parse input to RDKit Mol
@@ -140,13 +153,18 @@ class MoleculeProcessor:
             except ChemistryError as e:
                 warnings.append(f"Descriptor calculation failed: {e.message}")
 
-        # Step 4: Compute fingerprints
-        fingerprints = {}
-        if self.options.compute_fingerprints:
-            fingerprints = self._fingerprint_calc.calculate_multiple(
-                mol, self.options.compute_fingerprints
-            )
+        return mol, identifiers, descriptors, warnings
 
+    def _finish(
+        self,
+        input_data: MoleculeInput,
+        mol,
+        identifiers,
+        descriptors,
+        fingerprints: dict,
+        warnings: list[str],
+    ) -> ProcessedMolecule:
+        """Render and assemble the processed molecule (step 5)."""
         # Step 5: Render 2D structure
         svg_image = None
         png_image = None
@@ -225,33 +243,33 @@ class MoleculeProcessor:
         successful = []
         failed = []
 
+        # Parse, normalize and compute descriptors per molecule
+        prepared = []
         for idx, mol_input in enumerate(molecules):
             try:
-                result = self.process(mol_input)
-                successful.append(result)
-            except ChemistryError as e:
-                if not self.options.skip_errors:
-                    raise
-                failed.append(
-                    {
-                        "row_index": idx,
-                        "input_value": mol_input.value,
-                        "error_code": e.code.value,
-                        "error_message": e.message,
-                        "details": e.details,
-                    }
-                )
+                prepared.append((idx, mol_input, self._prepare(mol_input)))
             except Exception as e:
-                if not self.options.skip_errors:
-                    raise
-                failed.append(
-                    {
-                        "row_index": idx,
-                        "input_value": mol_input.value,
-                        "error_code": ChemistryErrorCode.UNKNOWN_ERROR.value,
-                        "error_message": str(e),
-                    }
+                self._record_failure(failed, idx, mol_input, e)
+
+        # Fingerprint all parsed molecules at once
+        mols = [mol for _, _, (mol, _, _, _) in prepared]
+        fingerprints = [{} for _ in mols]
+        if self.options.compute_fingerprints:
+            fingerprints = self._fingerprint_calc.calculate_multiple_batch(
+                mols, self.options.compute_fingerprints
+            )
+
+        for (idx, mol_input, (mol, identifiers, descriptors, warnings)), fps in zip(
+            prepared, fingerprints
+        ):
+            try:
+                successful.append(
+                    self._finish(mol_input, mol, identifiers, descriptors, fps, warnings)
                 )
+            except Exception as e:
+                self._record_failure(failed, idx, mol_input, e)
+
+        failed.sort(key=lambda failure: failure["row_index"])
 
         return BatchProcessingResult(
             successful=successful,
@@ -262,6 +280,37 @@ class MoleculeProcessor:
         )
 
 
+    def _record_failure(
+        self,
+        failed: list[dict],
+        idx: int,
+        mol_input: MoleculeInput,
+        error: Exception,
+    ) -> None:
+        """Record a failed molecule, or re-raise unless skipping errors."""
+        if not self.options.skip_errors:
+            raise error
+        if isinstance(error, ChemistryError):
+            failed.append(
+                {
+                    "row_index": idx,
+                    "input_value": mol_input.value,
+                    "error_code": error.code.value,
+                    "error_message": error.message,
+                    "details": error.details,
+                }
+            )
+        else:
+            failed.append(
+                {
+                    "row_index": idx,
+                    "input_value": mol_input.value,
+                    "error_code": ChemistryErrorCode.UNKNOWN_ERROR.value,
+                    "error_message": str(error),
+                }
+            )
+
+
 # =============================================================================
 # Public API Functions
 # =============================================================================
@@ -7,7 +7,9 @@ This module provides:
 - Fingerprint-based similarity matrix
 - Dice similarity (alternative metric)
 
-Designed for deterministic results in tests.
+Bulk operations delegate to the vectorized popcount engine in
+packages.chemistry.similarity_engine. Results are deterministic: ties are
+ordered by target index.
 """
 
 from __future__ import annotations
@@ -15,12 +17,21 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import TYPE_CHECKING, Sequence
 
+import numpy as np
+
 from packages.chemistry.features import (
     Fingerprint,
     FingerprintType,
     calculate_fingerprint,
+    calculate_fingerprint_batch,
     calculate_morgan_fingerprint,
 )
+from packages.chemistry.similarity_engine import (
+    WORD_BYTES,
+    FingerprintMatrix,
+    dice_bytes,
+    tanimoto_bytes,
+)
 
 if TYPE_CHECKING:
     from rdkit.Chem import Mol
@@ -60,24 +71,7 @@ def tanimoto_similarity_bytes(fp1_bytes: bytes, fp2_bytes: bytes) -> float:
     Returns:
         Tanimoto similarity coefficient (0.0 to 1.0)
     """
-    if len(fp1_bytes) != len(fp2_bytes):
-        raise ValueError(
-            f"Fingerprints must have same length: {len(fp1_bytes)} vs {len(fp2_bytes)}"
-        )
-
-    # Count bits
-    bits_a = sum(bin(b).count("1") for b in fp1_bytes)
-    bits_b = sum(bin(b).count("1") for b in fp2_bytes)
-
-    # Count common bits (AND operation)
-    common_bits = sum(bin(a & b).count("1") for a, b in zip(fp1_bytes, fp2_bytes))
-
-    # Tanimoto formula
-    union_bits = bits_a + bits_b - common_bits
-    if union_bits == 0:
-        return 1.0  # Both fingerprints are empty, consider identical
-
-    return common_bits / union_bits
+    return tanimoto_bytes(fp1_bytes, fp2_bytes)
 
 
 def tanimoto_similarity(fp1: Fingerprint, fp2: Fingerprint) -> float:
@@ -111,20 +105,7 @@ def dice_similarity_bytes(fp1_bytes: bytes, fp2_bytes: bytes) -> float:
     Returns:
         Dice similarity coefficient (0.0 to 1.0)
     """
-    if len(fp1_bytes) != len(fp2_bytes):
-        raise ValueError(
-            f"Fingerprints must have same length: {len(fp1_bytes)} vs {len(fp2_bytes)}"
-        )
-
-    bits_a = sum(bin(b).count("1") for b in fp1_bytes)
-    bits_b = sum(bin(b).count("1") for b in fp2_bytes)
-    common_bits = sum(bin(a & b).count("1") for a, b in zip(fp1_bytes, fp2_bytes))
-
-    total_bits = bits_a + bits_b
-    if total_bits == 0:
-        return 1.0
-
-    return (2 * common_bits) / total_bits
+    return dice_bytes(fp1_bytes, fp2_bytes)
 
 
 def dice_similarity(fp1: Fingerprint, fp2: Fingerprint) -> float:
@@ -195,21 +176,60 @@ def bulk_tanimoto(
     else:
         query_fp = query
 
-    results = []
-    for i, target in enumerate(targets):
-        # Convert target to fingerprint if needed
-        if isinstance(target, str):
-            target_fp = calculate_fingerprint(target, fp_type, **fp_kwargs)
-        else:
-            target_fp = target
+    target_fps = _to_fingerprints(targets, fp_type, **fp_kwargs)
+    _check_fp_types(query_fp, target_fps)
+
+    matrix = FingerprintMatrix.from_bytes(
+        [fp.bytes_data for fp in target_fps],
+        num_bytes=len(query_fp.bytes_data),
+    )
+    return matrix.search(query_fp.bytes_data, threshold=threshold)
+
 
-        sim = tanimoto_similarity(query_fp, target_fp)
-        if sim >= threshold:
-            results.append((i, sim))
+def _to_fingerprints(
+    molecules: Sequence[Fingerprint | str],
+    fp_type: FingerprintType,
+    **fp_kwargs,
+) -> list[Fingerprint]:
+    """Calculate fingerprints for any SMILES entries, passing others through."""
+    positions = [i for i, mol in enumerate(molecules) if isinstance(mol, str)]
+    fingerprints = list(molecules)
+    computed = _calculate_many([molecules[i] for i in positions], fp_type, **fp_kwargs)
+    for i, fp in zip(positions, computed):
+        fingerprints[i] = fp
+    return fingerprints  # type: ignore[return-value]
+
+
+def _calculate_many(
+    smiles_list: Sequence[str],
+    fp_type: FingerprintType,
+    **fp_kwargs,
+) -> list[Fingerprint]:
+    """
+    Calculate fingerprints for many SMILES with the batch kernel.
 
-    # Sort by similarity descending
-    results.sort(key=lambda x: x[1], reverse=True)
-    return results
+    Raises the same error as calculate_fingerprint for the first SMILES
+    that fails.
+    """
+    if not smiles_list:
+        return []
+    batch = calculate_fingerprint_batch(smiles_list, fp_type, **fp_kwargs)
+    fingerprints = []
+    for row, smiles in enumerate(smiles_list):
+        fp = batch.fingerprint(row)
+        if fp is None:
+            fp = calculate_fingerprint(smiles, fp_type, **fp_kwargs)  # Raises
+        fingerprints.append(fp)
+    return fingerprints
+
+
+def _check_fp_types(query_fp: Fingerprint, targets: Sequence[Fingerprint]) -> None:
+    """Raise if any target fingerprint type differs from the query."""
+    for target_fp in targets:
+        if target_fp.fp_type != query_fp.fp_type:
+            raise ValueError(
+                f"Fingerprint types must match: {query_fp.fp_type} vs {target_fp.fp_type}"
+            )
 
 
 def similarity_matrix(
@@ -228,25 +248,25 @@ def similarity_matrix(
     Returns:
         2D list where result[i][j] is similarity between molecule i and j
     """
-    # Convert all to fingerprints
-    fps = []
-    for mol in molecules:
-        if isinstance(mol, str):
-            fps.append(calculate_fingerprint(mol, fp_type, **fp_kwargs))
-        else:
-            fps.append(mol)
+    fps = _to_fingerprints(molecules, fp_type, **fp_kwargs)
+    if fps:
+        _check_fp_types(fps[0], fps)
 
-    n = len(fps)
-    matrix = [[0.0] * n for _ in range(n)]
+    return [row.tolist() for row in _pairwise_tanimoto(fps)]
 
-    for i in range(n):
-        matrix[i][i] = 1.0  # Self-similarity
-        for j in range(i + 1, n):
-            sim = tanimoto_similarity(fps[i], fps[j])
-            matrix[i][j] = sim
-            matrix[j][i] = sim  # Symmetric
 
-    return matrix
+def _pairwise_tanimoto(fps: Sequence[Fingerprint]) -> np.ndarray:
+    """Pairwise Tanimoto matrix with a unit diagonal."""
+    n = len(fps)
+    if n == 0:
+        return np.zeros((0, 0), dtype=np.float64)
+
+    matrix = FingerprintMatrix.from_bytes([fp.bytes_data for fp in fps])
+    result = np.empty((n, n), dtype=np.float64)
+    for i, fp in enumerate(fps):
+        result[i] = matrix.scores(fp.bytes_data)
+    np.fill_diagonal(result, 1.0)  # Self-similarity
+    return result
 
 
 def find_similar_molecules(
@@ -272,17 +292,13 @@ def find_similar_molecules(
         SimilaritySearchResult with matches
     """
     query_fp = calculate_fingerprint(query_smiles, fp_type, **fp_kwargs)
+    target_fps = _to_fingerprints(database_smiles, fp_type, **fp_kwargs)
 
-    matches = bulk_tanimoto(
-        query_fp,
-        database_smiles,
-        threshold=threshold,
-        fp_type=fp_type,
-        **fp_kwargs,
+    matrix = FingerprintMatrix.from_bytes(
+        [fp.bytes_data for fp in target_fps],
+        num_bytes=len(query_fp.bytes_data),
     )
-
-    if top_n is not None:
-        matches = matches[:top_n]
+    matches = matrix.search(query_fp.bytes_data, threshold=threshold, top_k=top_n)
 
     return SimilaritySearchResult(
         query_smiles=query_smiles,
@@ -310,9 +326,10 @@ def cluster_by_similarity(
     Returns:
         List of clusters, where each cluster is a list of molecule indices
     """
-    # Calculate fingerprints
+    # Calculate fingerprints and all pairwise similarities up front
     fps = [calculate_fingerprint(s, fp_type, **fp_kwargs) for s in molecules]
     n = len(fps)
+    sims = _pairwise_tanimoto(fps)
 
     # Track which molecules have been assigned to clusters
     assigned = [False] * n
@@ -332,8 +349,7 @@ def cluster_by_similarity(
             current = cluster[j]
             for k in range(n):
                 if not assigned[k]:
-                    sim = tanimoto_similarity(fps[current], fps[k])
-                    if sim >= threshold:
+                    if sims[current, k] >= threshold:
                         cluster.append(k)
                         assigned[k] = True
             j += 1
@@ -347,10 +363,16 @@ class FingerprintIndex:
     """
     In-memory index for fast similarity search.
 
+    Fingerprints are stored packed in one contiguous, word-aligned buffer
+    (plus a popcount per row) rather than as individual objects, so memory
+    is close to ``len(index) * num_bytes``. The buffer grows by doubling.
+
     This is a simple implementation for testing. For production use,
     consider specialized libraries like chemfp or database extensions.
     """
 
+    INITIAL_CAPACITY = 64
+
     def __init__(
         self,
         fp_type: FingerprintType = FingerprintType.MORGAN,
@@ -358,9 +380,54 @@ class FingerprintIndex:
     ):
         self.fp_type = fp_type
         self.fp_kwargs = fp_kwargs
-        self._fingerprints: list[Fingerprint] = []
+        self._rows = np.zeros((0, 0), dtype=np.uint8)  # (capacity, stride)
+        self._popcounts = np.zeros(0, dtype=np.int64)
+        self._count = 0
+        self._num_bits = 0
+        self._num_bytes = 0
+        self._radius: int | None = None
+        self._use_features = False
         self._smiles: list[str] = []
         self._ids: list[str | int] = []
+        self._matrix: FingerprintMatrix | None = None
+
+    def _append(self, fingerprints: Sequence[Fingerprint]) -> int:
+        """Copy fingerprints into the packed buffer; returns the first row."""
+        first = self._count
+        if not fingerprints:
+            return first
+        if not self._count:
+            fp = fingerprints[0]
+            self._num_bits = fp.num_bits
+            self._num_bytes = len(fp.bytes_data)
+            self._radius = fp.radius
+            self._use_features = fp.use_features
+
+        needed = self._count + len(fingerprints)
+        if needed > len(self._rows):
+            capacity = max(self.INITIAL_CAPACITY, len(self._rows))
+            while capacity < needed:
+                capacity *= 2
+            stride = -(-self._num_bytes // WORD_BYTES) * WORD_BYTES
+            rows = np.zeros((capacity, stride), dtype=np.uint8)
+            popcounts = np.zeros(capacity, dtype=np.int64)
+            if self._count:
+                rows[:self._count] = self._rows[:self._count]
+                popcounts[:self._count] = self._popcounts[:self._count]
+            self._rows, self._popcounts = rows, popcounts
+
+        for row, fp in enumerate(fingerprints, start=first):
+            data = fp.bytes_data
+            if len(data) != self._num_bytes:
+                raise ValueError(
+                    f"Fingerprints must have same length: {len(data)} vs {self._num_bytes}"
+                )
+            self._rows[row, :self._num_bytes] = np.frombuffer(data, dtype=np.uint8)
+            self._popcounts[row] = fp.num_on_bits
+
+        self._count = needed
+        self._matrix = None  # Repacked lazily on next search
+        return first
 
     def add(self, smiles: str, mol_id: str | int | None = None) -> int:
         """
@@ -374,8 +441,7 @@ class FingerprintIndex:
             Index of added molecule
         """
         fp = calculate_fingerprint(smiles, self.fp_type, **self.fp_kwargs)
-        idx = len(self._fingerprints)
-        self._fingerprints.append(fp)
+        idx = self._append([fp])
         self._smiles.append(smiles)
         self._ids.append(mol_id if mol_id is not None else idx)
         return idx
@@ -383,10 +449,40 @@ class FingerprintIndex:
     def add_many(
         self, smiles_list: list[str], ids: list[str | int] | None = None
     ) -> list[int]:
-        """Add multiple molecules to the index."""
+        """Add multiple molecules to the index, fingerprinting them as one batch."""
         if ids is None:
             ids = [None] * len(smiles_list)  # type: ignore
-        return [self.add(s, i) for s, i in zip(smiles_list, ids)]
+        fingerprints = _calculate_many(smiles_list, self.fp_type, **self.fp_kwargs)
+
+        first = self._append(fingerprints)
+        indices = list(range(first, first + len(fingerprints)))
+        for idx, smiles, mol_id in zip(indices, smiles_list, ids):
+            self._smiles.append(smiles)
+            self._ids.append(mol_id if mol_id is not None else idx)
+        return indices
+
+    def fingerprint(self, idx: int) -> Fingerprint:
+        """
+        Fingerprint of an indexed molecule.
+
+        The fingerprint is a view over the index buffer; it stays valid (but
+        detached) if the index later grows.
+        """
+        if not 0 <= idx < self._count:
+            raise IndexError(f"Index {idx} out of range")
+        return Fingerprint(
+            fp_type=self.fp_type,
+            num_bits=self._num_bits,
+            num_on_bits=int(self._popcounts[idx]),
+            bytes_data=memoryview(self._rows[idx, :self._num_bytes]),
+            radius=self._radius,
+            use_features=self._use_features,
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the stored fingerprints and popcounts."""
+        return int(self._rows[:self._count].nbytes + self._popcounts[:self._count].nbytes)
 
     def search(
         self,
@@ -409,17 +505,21 @@ class FingerprintIndex:
             query_smiles, self.fp_type, **self.fp_kwargs
         )
 
-        results = []
-        for i, fp in enumerate(self._fingerprints):
-            sim = tanimoto_similarity(query_fp, fp)
-            if sim >= threshold:
-                results.append((self._ids[i], self._smiles[i], sim))
-
-        results.sort(key=lambda x: x[2], reverse=True)
-        if top_n is not None:
-            results = results[:top_n]
-
-        return results
+        if self._matrix is None:
+            if self._count:
+                words = self._rows[:self._count].view("<u8")
+                num_bytes = self._num_bytes
+            else:
+                num_bytes = len(query_fp.bytes_data)
+                words = np.zeros((0, -(-num_bytes // WORD_BYTES)), dtype="<u8")
+            self._matrix = FingerprintMatrix(
+                words, num_bytes, self._popcounts[:self._count]
+            ).bucketed()
+
+        hits = self._matrix.search(
+            query_fp.bytes_data, threshold=threshold, top_k=top_n
+        )
+        return [(self._ids[i], self._smiles[i], sim) for i, sim in hits]
 
     def __len__(self) -> int:
-        return len(self._fingerprints)
+        return self._count
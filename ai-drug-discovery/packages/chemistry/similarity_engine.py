@@ -0,0 +1,801 @@
+"""
+Vectorized similarity engine for packed binary fingerprints.
+
+The pure-Python similarity helpers count bits byte by byte, which is fine for
+a handful of comparisons but far too slow for library-scale searches. This
+module packs a fingerprint corpus into a contiguous ``uint64`` matrix (one row
+per fingerprint) and evaluates Tanimoto or Dice for a query against every row
+in a single vectorized popcount pass.
+
+Layout:
+- Each fingerprint is zero-padded to a multiple of 8 bytes and viewed as
+  little-endian 64-bit words, so bit ``i`` of the original byte string stays
+  at the same position inside the packed row.
+- Row popcounts are computed once when the matrix is built and reused for
+  every query (|A| and |B| never change, only |A & B| does).
+- Optionally rows are bucketed by popcount so thresholded searches only scan
+  the buckets that can reach the threshold (see ``popcount_bounds``).
+- ``similarity_join`` scores a whole query batch against a corpus in row
+  blocks, reading each block once for the batch.
+- ``FingerprintMatrix.search_many`` does the same with per-query thresholds
+  and top-k, returning what ``search`` would for each query.
+
+Usage:
+    matrix = FingerprintMatrix.from_bytes([fp.bytes_data for fp in fps])
+    hits = matrix.search(query_fp.bytes_data, threshold=0.7, top_k=100)
+    # [(row_index, similarity), ...] sorted by similarity descending
+
+Results are deterministic: ties are broken by ascending row index, matching
+the ordering of the original per-target loops.
+"""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Sequence
+from enum import Enum
+
+import numpy as np
+
+
+class SimilarityMetric(str, Enum):
+    """Supported similarity coefficients for binary fingerprints."""
+
+    TANIMOTO = "tanimoto"
+    DICE = "dice"
+
+
+# Bytes per packed word
+WORD_BYTES = 8
+
+# Target number of (query, target) accumulator cells per join block
+JOIN_BLOCK_CELLS = 1 << 20
+
+# Corpus rows ANDed with the query at once by search
+SEARCH_BLOCK_ROWS = 1 << 14
+
+# Buffered hits before search_many trims each query to its top k
+SEARCH_MANY_TRIM_PAIRS = 1 << 18
+
+# Queries unpacked at once by search_many (bounds its float32 working set)
+SEARCH_MANY_QUERY_CHUNK = 1024
+
+# Budget for the unpacked float32 corpus bits of one search_many block
+SEARCH_MANY_UNPACKED_BYTES = 32 << 20
+
+# Batches up to this size use the packed popcount kernel in search_many
+SEARCH_MANY_PACKED_QUERIES = 16
+
+# Per-byte popcount lookup table (fallback for NumPy < 2.0)
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount_rows(words: np.ndarray) -> np.ndarray:
+    """
+    Count set bits per row of a packed fingerprint matrix.
+
+    Args:
+        words: 2D array of unsigned integers (any width), one row per fingerprint
+
+    Returns:
+        1D int64 array of popcounts, one per row
+    """
+    if words.ndim != 2:
+        raise ValueError(f"Expected a 2D matrix, got shape {words.shape}")
+    if words.shape[0] == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int64)
+
+    as_bytes = np.ascontiguousarray(words).view(np.uint8)
+    return _POPCOUNT_TABLE[as_bytes].sum(axis=1, dtype=np.int64)
+
+
+def pack_fingerprints(
+    fingerprints: Sequence[bytes],
+    num_bytes: int | None = None,
+) -> np.ndarray:
+    """
+    Pack fingerprint byte strings into a contiguous uint64 matrix.
+
+    Args:
+        fingerprints: Fingerprints as raw bytes (all the same length)
+        num_bytes: Expected fingerprint length in bytes (inferred if None)
+
+    Returns:
+        Array of shape (len(fingerprints), ceil(num_bytes / 8)) with dtype uint64
+
+    Raises:
+        ValueError: If fingerprints have different lengths
+    """
+    if num_bytes is None:
+        num_bytes = len(fingerprints[0]) if len(fingerprints) else 0
+
+    num_words = (num_bytes + WORD_BYTES - 1) // WORD_BYTES
+    stride = num_words * WORD_BYTES
+    buffer = np.zeros((len(fingerprints), stride), dtype=np.uint8)
+
+    for row, fp in enumerate(fingerprints):
+        if len(fp) != num_bytes:
+            raise ValueError(
+                f"Fingerprints must have same length: {len(fp)} vs {num_bytes}"
+            )
+        buffer[row, :num_bytes] = np.frombuffer(fp, dtype=np.uint8)
+
+    return buffer.view("<u8")
+
+
+def pack_query(query: bytes, num_bytes: int) -> np.ndarray:
+    """
+    Pack a single query fingerprint into a 1D uint64 row.
+
+    Args:
+        query: Query fingerprint bytes
+        num_bytes: Fingerprint length of the corpus it will be compared with
+
+    Returns:
+        1D uint64 array of ceil(num_bytes / 8) words
+
+    Raises:
+        ValueError: If the query length does not match num_bytes
+    """
+    if len(query) != num_bytes:
+        raise ValueError(
+            f"Fingerprints must have same length: {len(query)} vs {num_bytes}"
+        )
+    return pack_fingerprints([query], num_bytes)[0]
+
+
+def similarity_from_counts(
+    common: np.ndarray,
+    popcount_a: np.ndarray | int,
+    popcount_b: np.ndarray | int,
+    metric: SimilarityMetric = SimilarityMetric.TANIMOTO,
+) -> np.ndarray:
+    """
+    Turn intersection and operand popcounts into similarity coefficients.
+
+    Empty-vs-empty comparisons score 1.0, consistent with the scalar helpers.
+
+    Args:
+        common: |A & B| per pair
+        popcount_a: |A| (scalar or per pair)
+        popcount_b: |B| (scalar or per pair)
+        metric: Similarity coefficient to compute
+
+    Returns:
+        float64 array of similarities in [0.0, 1.0]
+    """
+    common = np.asarray(common, dtype=np.float64)
+    total = np.asarray(popcount_a, dtype=np.float64) + np.asarray(
+        popcount_b, dtype=np.float64
+    )
+
+    if metric == SimilarityMetric.TANIMOTO:
+        numerator = common
+        denominator = total - common
+    elif metric == SimilarityMetric.DICE:
+        numerator = 2.0 * common
+        denominator = total
+    else:
+        raise ValueError(f"Unknown similarity metric: {metric}")
+
+    numerator, denominator = np.broadcast_arrays(numerator, denominator)
+    scores = np.ones(numerator.shape, dtype=np.float64)
+    np.divide(numerator, denominator, out=scores, where=denominator > 0)
+    return scores
+
+
+def rank_hits(
+    scores: np.ndarray,
+    threshold: float = 0.0,
+    top_k: int | None = None,
+    indices: np.ndarray | None = None,
+) -> list[tuple[int, float]]:
+    """
+    Select and order hits from a score vector.
+
+    Args:
+        scores: Similarity per candidate
+        threshold: Minimum similarity to keep
+        top_k: Maximum number of hits (None = all above threshold)
+        indices: Row index of each score (defaults to 0..len(scores)-1)
+
+    Returns:
+        (row_index, similarity) pairs sorted by similarity descending,
+        ties broken by ascending row index
+    """
+    if indices is None:
+        indices = np.arange(len(scores))
+
+    keep = np.flatnonzero(scores >= threshold)
+    if top_k is not None and top_k < len(keep):
+        if top_k <= 0:
+            return []
+        # Partial selection first so large corpora avoid a full sort; the
+        # k-th score may be tied, so keep every candidate at that score.
+        kth = np.partition(scores[keep], len(keep) - top_k)[len(keep) - top_k]
+        keep = keep[scores[keep] >= kth]
+
+    kept_scores = scores[keep]
+    kept_indices = indices[keep]
+    order = np.lexsort((kept_indices, -kept_scores))
+    if top_k is not None:
+        order = order[:top_k]
+
+    return [(int(kept_indices[i]), float(kept_scores[i])) for i in order]
+
+
+def popcount_bytes(data: bytes) -> int:
+    """Number of bits set in a fingerprint byte string."""
+    return int.from_bytes(data, "little").bit_count()
+
+
+def tanimoto_bytes(fp1: bytes, fp2: bytes) -> float:
+    """
+    Tanimoto similarity of two fingerprints using machine-word popcounts.
+
+    Args:
+        fp1: First fingerprint bytes
+        fp2: Second fingerprint bytes
+
+    Returns:
+        Tanimoto coefficient (0.0 to 1.0); 1.0 if both are empty
+
+    Raises:
+        ValueError: If the fingerprints have different lengths
+    """
+    if len(fp1) != len(fp2):
+        raise ValueError(
+            f"Fingerprints must have same length: {len(fp1)} vs {len(fp2)}"
+        )
+    a = int.from_bytes(fp1, "little")
+    b = int.from_bytes(fp2, "little")
+    common = (a & b).bit_count()
+    union = a.bit_count() + b.bit_count() - common
+    if union == 0:
+        return 1.0
+    return common / union
+
+
+def dice_bytes(fp1: bytes, fp2: bytes) -> float:
+    """
+    Dice similarity of two fingerprints using machine-word popcounts.
+
+    Args:
+        fp1: First fingerprint bytes
+        fp2: Second fingerprint bytes
+
+    Returns:
+        Dice coefficient (0.0 to 1.0); 1.0 if both are empty
+
+    Raises:
+        ValueError: If the fingerprints have different lengths
+    """
+    if len(fp1) != len(fp2):
+        raise ValueError(
+            f"Fingerprints must have same length: {len(fp1)} vs {len(fp2)}"
+        )
+    a = int.from_bytes(fp1, "little")
+    b = int.from_bytes(fp2, "little")
+    total = a.bit_count() + b.bit_count()
+    if total == 0:
+        return 1.0
+    return (2 * (a & b).bit_count()) / total
+
+
+def popcount_bounds(
+    query_popcount: int,
+    threshold: float,
+    metric: SimilarityMetric = SimilarityMetric.TANIMOTO,
+) -> tuple[int, float]:
+    """
+    Popcount window a candidate must fall in to reach the threshold.
+
+    For Tanimoto, sim(A, B) <= min(a, b) / max(a, b) (Swamidass & Baldi), so
+    any candidate with popcount outside [t*q, q/t] can be skipped without
+    looking at its bits. For Dice the window is [t*q/(2-t), q*(2-t)/t].
+    The bounds are widened by a tiny epsilon so float rounding never prunes
+    a genuine hit.
+
+    Args:
+        query_popcount: Number of bits set in the query
+        threshold: Minimum similarity (> 0)
+        metric: Similarity coefficient
+
+    Returns:
+        (min_popcount, max_popcount) inclusive; max is ``inf`` when
+        threshold <= 0 (no pruning possible)
+    """
+    if threshold <= 0:
+        return 0, float("inf")
+
+    eps = 1e-9
+    if metric == SimilarityMetric.TANIMOTO:
+        low = threshold * query_popcount
+        high = query_popcount / threshold
+    elif metric == SimilarityMetric.DICE:
+        low = threshold * query_popcount / (2.0 - threshold)
+        high = query_popcount * (2.0 - threshold) / threshold
+    else:
+        raise ValueError(f"Unknown similarity metric: {metric}")
+
+    return max(0, math.ceil(low - eps)), math.floor(high + eps)
+
+
+class FingerprintMatrix:
+    """
+    Packed, immutable fingerprint corpus for vectorized similarity search.
+
+    Row indices returned by :meth:`search` always refer to the order in which
+    fingerprints were supplied, so they map straight back to caller-side
+    identifiers.
+
+    A matrix can be *bucketed*: rows are stored sorted by popcount with a
+    bucket offset table, so a thresholded search only scans the contiguous
+    slice of buckets inside :func:`popcount_bounds`. ``row_ids`` then maps each
+    stored row back to its caller index.
+    """
+
+    __slots__ = ("words", "popcounts", "num_bytes", "row_ids", "bucket_offsets")
+
+    def __init__(
+        self,
+        words: np.ndarray,
+        num_bytes: int,
+        popcounts: np.ndarray | None = None,
+        row_ids: np.ndarray | None = None,
+        sorted_by_popcount: bool = False,
+    ):
+        """
+        Wrap an already-packed matrix.
+
+        Args:
+            words: uint64 matrix of shape (n, num_words)
+            num_bytes: Original fingerprint length in bytes
+            popcounts: Precomputed row popcounts (computed if None)
+            row_ids: Caller index of each stored row (None = identity)
+            sorted_by_popcount: Rows are in ascending popcount order, enabling
+                bucket pruning
+        """
+        if words.ndim != 2:
+            raise ValueError(f"Expected a 2D matrix, got shape {words.shape}")
+        self.words = words
+        self.num_bytes = num_bytes
+        self.popcounts = popcount_rows(words) if popcounts is None else popcounts
+        self.row_ids = row_ids
+        self.bucket_offsets: np.ndarray | None = None
+        if sorted_by_popcount:
+            # bucket_offsets[c] = first row whose popcount is >= c
+            self.bucket_offsets = np.searchsorted(
+                self.popcounts, np.arange(num_bytes * 8 + 2), side="left"
+            )
+
+    @classmethod
+    def from_bytes(
+        cls,
+        fingerprints: Sequence[bytes],
+        num_bytes: int | None = None,
+        bucketed: bool = False,
+    ) -> FingerprintMatrix:
+        """
+        Build a matrix from raw fingerprint bytes.
+
+        Args:
+            fingerprints: Fingerprints as raw bytes (all the same length)
+            num_bytes: Fingerprint length (required when the sequence is empty)
+            bucketed: Sort rows into popcount buckets for pruned searches
+
+        Returns:
+            FingerprintMatrix over the given fingerprints
+        """
+        if num_bytes is None:
+            num_bytes = len(fingerprints[0]) if len(fingerprints) else 0
+        matrix = cls(pack_fingerprints(fingerprints, num_bytes), num_bytes)
+        return matrix.bucketed() if bucketed else matrix
+
+    def bucketed(self) -> FingerprintMatrix:
+        """Copy of this matrix with rows sorted into popcount buckets."""
+        if self.bucket_offsets is not None:
+            return self
+        order = np.argsort(self.popcounts, kind="stable")
+        row_ids = order if self.row_ids is None else self.row_ids[order]
+        return FingerprintMatrix(
+            self.words[order],
+            self.num_bytes,
+            self.popcounts[order],
+            row_ids=row_ids,
+            sorted_by_popcount=True,
+        )
+
+    def __len__(self) -> int:
+        return int(self.words.shape[0])
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the packed rows and popcounts."""
+        return int(self.words.nbytes + self.popcounts.nbytes)
+
+    def _block_mask(self, mask: np.ndarray, start: int, end: int) -> np.ndarray:
+        """Values of a row-index mask for the stored rows start:end."""
+        if self.row_ids is None:
+            return np.asarray(mask[start:end])
+        return np.asarray(mask)[self.row_ids[start:end]]
+
+    def _query_words(self, query: bytes) -> tuple[np.ndarray, int]:
+        query_words = pack_query(query, self.num_bytes)
+        return query_words, int(popcount_rows(query_words[np.newaxis, :])[0])
+
+    def candidate_window(
+        self,
+        query_popcount: int,
+        threshold: float,
+        metric: SimilarityMetric = SimilarityMetric.TANIMOTO,
+    ) -> tuple[int, int]:
+        """
+        Stored-row slice that can reach the threshold.
+
+        Returns the full range for unbucketed matrices.
+        """
+        if self.bucket_offsets is None or threshold <= 0:
+            return 0, len(self)
+        low, high = popcount_bounds(query_popcount, threshold, metric)
+        max_bucket = len(self.bucket_offsets) - 1
+        start = int(self.bucket_offsets[min(low, max_bucket)])
+        end = int(self.bucket_offsets[min(int(min(high, max_bucket - 1)) + 1, max_bucket)])
+        return start, end
+
+    def scores(
+        self,
+        query: bytes,
+        metric: SimilarityMetric = SimilarityMetric.TANIMOTO,
+    ) -> np.ndarray:
+        """
+        Similarity of the query against every row (no pruning).
+
+        Args:
+            query: Query fingerprint bytes
+            metric: Similarity coefficient to compute
+
+        Returns:
+            float64 array with one score per fingerprint, in caller order
+        """
+        query_words, query_popcount = self._query_words(query)
+
+        if len(self) == 0:
+            return np.zeros(0, dtype=np.float64)
+
+        common = popcount_rows(self.words & query_words)
+        scores = similarity_from_counts(common, query_popcount, self.popcounts, metric)
+        if self.row_ids is None:
+            return scores
+        in_caller_order = np.empty_like(scores)
+        in_caller_order[self.row_ids] = scores
+        return in_caller_order
+
+    def search(
+        self,
+        query: bytes,
+        threshold: float = 0.0,
+        top_k: int | None = None,
+        metric: SimilarityMetric = SimilarityMetric.TANIMOTO,
+        excluded: np.ndarray | None = None,
+    ) -> list[tuple[int, float]]:
+        """
+        Find rows similar to the query.
+
+        On a bucketed matrix only the popcount buckets that can reach the
+        threshold are compared.
+
+        Args:
+            query: Query fingerprint bytes
+            threshold: Minimum similarity (0.0 to 1.0)
+            top_k: Maximum number of hits (None = all above threshold)
+            metric: Similarity coefficient to compute
+            excluded: Boolean mask by row index; True rows are never returned
+
+        Returns:
+            (row_index, similarity) pairs sorted by similarity descending
+        """
+        query_words, query_popcount = self._query_words(query)
+        start, end = self.candidate_window(query_popcount, threshold, metric)
+        if start >= end or (top_k is not None and top_k <= 0):
+            return []
+
+        # The window is scanned in fixed-size blocks so only hits, not the
+        # whole window, are materialized out of a memory-mapped corpus
+        hit_rows: list[np.ndarray] = []
+        hit_scores: list[np.ndarray] = []
+        pending = 0
+        for block_start in range(start, end, SEARCH_BLOCK_ROWS):
+            block_end = min(block_start + SEARCH_BLOCK_ROWS, end)
+            common = popcount_rows(self.words[block_start:block_end] & query_words)
+            scores = similarity_from_counts(
+                common, query_popcount, self.popcounts[block_start:block_end], metric
+            )
+            passed = scores >= threshold
+            if excluded is not None:
+                passed &= ~self._block_mask(excluded, block_start, block_end)
+            keep = np.flatnonzero(passed)
+            if len(keep) == 0:
+                continue
+            hit_rows.append(keep + block_start)
+            hit_scores.append(scores[keep])
+            pending += len(keep)
+
+            if top_k is not None and pending > max(2 * top_k, SEARCH_BLOCK_ROWS):
+                # Keep the running top k (and ties with the k-th score)
+                rows = np.concatenate(hit_rows)
+                scores = np.concatenate(hit_scores)
+                if len(scores) > top_k:
+                    kth = np.partition(scores, len(scores) - top_k)[len(scores) - top_k]
+                    keep = scores >= kth
+                    rows, scores = rows[keep], scores[keep]
+                hit_rows[:], hit_scores[:] = [rows], [scores]
+                pending = len(rows)
+
+        if not hit_rows:
+            return []
+        rows = np.concatenate(hit_rows)
+        scores = np.concatenate(hit_scores)
+        indices = rows if self.row_ids is None else np.asarray(self.row_ids)[rows]
+        return rank_hits(scores, threshold, top_k, indices)
+
+    def search_many(
+        self,
+        queries: Sequence[bytes] | FingerprintMatrix,
+        threshold: float | Sequence[float] = 0.0,
+        top_k: int | Sequence[int] | None = None,
+        metric: SimilarityMetric = SimilarityMetric.TANIMOTO,
+        block_rows: int | None = None,
+        excluded: np.ndarray | None = None,
+    ) -> list[list[tuple[int, float]]]:
+        """
+        Search many queries with one blocked pass over the corpus.
+
+        Each corpus block is read once and scored against every query whose
+        popcount window overlaps it. For larger batches intersection counts
+        come from a float32 product of the unpacked bits, which is exact and
+        runs on BLAS; blocks are then sized so the unpacked bits stay within
+        ``SEARCH_MANY_UNPACKED_BYTES``. Up to ``SEARCH_MANY_PACKED_QUERIES``
+        queries use the packed AND and popcount kernel of
+        :func:`similarity_join` instead, which needs no unpacking. With
+        ``top_k``, each query's running k-th best score raises its threshold
+        (and narrows its window) as the pass proceeds. Results equal calling
+        :meth:`search` per query.
+
+        Args:
+            queries: Query fingerprints (bytes or an unbucketed matrix)
+            threshold: Minimum similarity, shared or one per query
+            top_k: Maximum hits, shared or one per query (None = all)
+            metric: Similarity coefficient to compute
+            block_rows: Corpus rows per block (sized from the working-set
+                budgets if None)
+            excluded: Boolean mask by row index; True rows are never returned
+
+        Returns:
+            One list of (row_index, similarity) pairs per query, each sorted
+            by similarity descending, ties broken by ascending row index
+        """
+        if not isinstance(queries, FingerprintMatrix):
+            queries = FingerprintMatrix.from_bytes(queries, num_bytes=self.num_bytes)
+        if queries.num_bytes != self.num_bytes:
+            raise ValueError(
+                f"Fingerprints must have same length: {queries.num_bytes} vs {self.num_bytes}"
+            )
+        num_queries = len(queries)
+        results: list[list[tuple[int, float]]] = [[] for _ in range(num_queries)]
+        if num_queries == 0 or len(self) == 0:
+            return results
+
+        thresholds = np.array(np.broadcast_to(np.asarray(threshold, dtype=np.float64), num_queries))
+        limits = None
+        if top_k is not None:
+            limits = np.array(np.broadcast_to(np.asarray(top_k, dtype=np.int64), num_queries))
+            thresholds[limits <= 0] = np.inf  # Nothing to return
+
+        query_popcounts = np.asarray(queries.popcounts, dtype=np.int64)
+        starts = np.zeros(num_queries, dtype=np.int64)
+        ends = np.zeros(num_queries, dtype=np.int64)
+
+        def update_windows(which: np.ndarray) -> None:
+            for q in which.tolist():
+                if np.isinf(thresholds[q]):
+                    starts[q] = ends[q] = 0
+                else:
+                    starts[q], ends[q] = self.candidate_window(
+                        int(query_popcounts[q]), float(thresholds[q]), metric
+                    )
+
+        update_windows(np.arange(num_queries))
+        packed = num_queries <= SEARCH_MANY_PACKED_QUERIES
+        if block_rows is None:
+            if packed:
+                block_rows = max(1, JOIN_BLOCK_CELLS // num_queries)
+            else:
+                # Unpacked bits take 4 bytes per bit, so bound them directly
+                unpacked_row_bytes = max(1, self.words.shape[1] * 64 * 4)
+                block_rows = max(
+                    1,
+                    min(
+                        JOIN_BLOCK_CELLS // min(num_queries, SEARCH_MANY_QUERY_CHUNK),
+                        SEARCH_MANY_UNPACKED_BYTES // unpacked_row_bytes,
+                    ),
+                )
+
+        hit_queries: list[np.ndarray] = []
+        hit_rows: list[np.ndarray] = []
+        hit_scores: list[np.ndarray] = []
+        pending = 0
+
+        def trim() -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+            q = np.concatenate(hit_queries) if hit_queries else np.zeros(0, dtype=np.int64)
+            r = np.concatenate(hit_rows) if hit_rows else np.zeros(0, dtype=np.int64)
+            s = np.concatenate(hit_scores) if hit_scores else np.zeros(0)
+            order = np.lexsort((r, -s, q))
+            q, r, s = q[order], r[order], s[order]
+            if limits is not None and len(q):
+                first = np.searchsorted(q, q, side="left")
+                keep = (np.arange(len(q)) - first) < limits[q]
+                q, r, s = q[keep], r[keep], s[keep]
+                # Queries holding k hits only accept ties or better from now on
+                present, offsets, counts = np.unique(q, return_index=True, return_counts=True)
+                full = counts >= limits[present]
+                kth = s[offsets[full] + limits[present[full]] - 1]
+                raised = present[full][kth > thresholds[present[full]]]
+                thresholds[present[full]] = np.maximum(thresholds[present[full]], kth)
+                update_windows(raised)
+            hit_queries[:], hit_rows[:], hit_scores[:] = [q], [r], [s]
+            return q, r, s
+
+        scan_start = int(starts[np.isfinite(thresholds)].min(initial=len(self)))
+        scan_end = int(ends[np.isfinite(thresholds)].max(initial=0))
+        row_ids = None if self.row_ids is None else np.asarray(self.row_ids)
+
+        for block_start in range(scan_start, scan_end, block_rows):
+            block_end = min(block_start + block_rows, scan_end)
+            active = np.flatnonzero((starts < block_end) & (ends > block_start))
+            if len(active) == 0:
+                continue
+
+            block = self.words[block_start:block_end]
+            block_bits = None if packed else _unpack_bits(block)
+            block_live = None
+            if excluded is not None:
+                block_live = ~self._block_mask(excluded, block_start, block_end)
+            for chunk_start in range(0, len(active), SEARCH_MANY_QUERY_CHUNK):
+                chunk = active[chunk_start : chunk_start + SEARCH_MANY_QUERY_CHUNK]
+                if block_bits is None:
+                    common = _common_counts(queries.words[chunk], block)
+                else:
+                    # |A & B| for every pair as one float32 matrix product
+                    common = _unpack_bits(queries.words[chunk]) @ block_bits.T
+                scores = similarity_from_counts(
+                    common,
+                    query_popcounts[chunk, np.newaxis],
+                    self.popcounts[block_start:block_end],
+                    metric,
+                )
+
+                passed = scores >= thresholds[chunk, np.newaxis]
+                if block_live is not None:
+                    passed &= block_live
+                query_idx, block_idx = np.nonzero(passed)
+                if len(query_idx) == 0:
+                    continue
+                rows = block_idx + block_start
+                hit_queries.append(chunk[query_idx])
+                hit_rows.append(rows if row_ids is None else row_ids[rows])
+                hit_scores.append(scores[query_idx, block_idx])
+                pending += len(query_idx)
+
+            if limits is not None and pending > SEARCH_MANY_TRIM_PAIRS:
+                trim()
+                pending = 0
+
+        q, r, s = trim()
+        bounds = np.searchsorted(q, np.arange(num_queries + 1), side="left")
+        rows_list, scores_list = r.tolist(), s.tolist()
+        for query in np.flatnonzero(bounds[1:] > bounds[:-1]).tolist():
+            lo, hi = bounds[query], bounds[query + 1]
+            results[query] = list(zip(rows_list[lo:hi], scores_list[lo:hi], strict=True))
+        return results
+
+
+def similarity_join(
+    queries: Sequence[bytes] | FingerprintMatrix,
+    corpus: FingerprintMatrix,
+    threshold: float,
+    metric: SimilarityMetric = SimilarityMetric.TANIMOTO,
+    block_rows: int | None = None,
+) -> list[tuple[int, int, float]]:
+    """
+    Many-vs-many similarity join of a query batch against a corpus.
+
+    The corpus is processed in row blocks; each block is ANDed against every
+    query word by word, so a block is read once for the whole batch and the
+    working set stays at ``len(queries) * block_rows`` counters. On a bucketed
+    corpus only the popcount range reachable by some query is scanned.
+
+    Args:
+        queries: Query fingerprints (bytes or an unbucketed matrix)
+        corpus: Corpus to search
+        threshold: Minimum similarity for a pair to be emitted
+        metric: Similarity coefficient to compute
+        block_rows: Corpus rows per block (sized from JOIN_BLOCK_CELLS if None)
+
+    Returns:
+        (query_index, target_index, similarity) triples ordered by query
+        index, then similarity descending, then target index
+    """
+    if not isinstance(queries, FingerprintMatrix):
+        queries = FingerprintMatrix.from_bytes(queries, num_bytes=corpus.num_bytes)
+    if queries.num_bytes != corpus.num_bytes:
+        raise ValueError(
+            f"Fingerprints must have same length: {queries.num_bytes} vs {corpus.num_bytes}"
+        )
+    if len(queries) == 0 or len(corpus) == 0:
+        return []
+
+    # Union of the per-query popcount windows
+    start, end = 0, len(corpus)
+    if corpus.bucket_offsets is not None and threshold > 0:
+        windows = [
+            corpus.candidate_window(int(pc), threshold, metric) for pc in queries.popcounts
+        ]
+        start = min(w[0] for w in windows)
+        end = max(w[1] for w in windows)
+
+    if block_rows is None:
+        block_rows = max(1, JOIN_BLOCK_CELLS // len(queries))
+
+    query_words = queries.words
+    query_popcounts = queries.popcounts[:, np.newaxis]
+    pairs: list[tuple[int, int, float]] = []
+
+    for block_start in range(start, end, block_rows):
+        block_end = min(block_start + block_rows, end)
+        common = _common_counts(query_words, corpus.words[block_start:block_end])
+        scores = similarity_from_counts(
+            common, query_popcounts, corpus.popcounts[block_start:block_end], metric
+        )
+        query_idx, block_idx = np.nonzero(scores >= threshold)
+        if len(query_idx) == 0:
+            continue
+
+        rows = block_idx + block_start
+        targets = rows if corpus.row_ids is None else np.asarray(corpus.row_ids)[rows]
+        pairs.extend(
+            zip(
+                query_idx.tolist(),
+                targets.tolist(),
+                scores[query_idx, block_idx].tolist(),
+                strict=True,
+            )
+        )
+
+    pairs.sort(key=lambda p: (p[0], -p[2], p[1]))
+    return pairs
+
+
+def _common_counts(query_words: np.ndarray, block: np.ndarray) -> np.ndarray:
+    """|A & B| for every (query, block row) pair, ANDed word by word."""
+    common = np.zeros((len(query_words), len(block)), dtype=np.int64)
+    for word in range(query_words.shape[1]):
+        common += _bitwise_count(query_words[:, word, np.newaxis] & block[np.newaxis, :, word])
+    return common
+
+
+def _unpack_bits(words: np.ndarray) -> np.ndarray:
+    """Unpack uint64 rows into float32 0/1 rows (padding bits are zero)."""
+    as_bytes = np.ascontiguousarray(words).view(np.uint8)
+    return np.unpackbits(as_bytes, axis=1, bitorder="little").astype(np.float32)
+
+
+def _bitwise_count(words: np.ndarray) -> np.ndarray:
+    """Element-wise popcount of a uint64 array."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words)
+    as_bytes = np.ascontiguousarray(words).view(np.uint8)
+    return _POPCOUNT_TABLE[as_bytes].reshape(*words.shape, 8).sum(axis=-1, dtype=np.int64)
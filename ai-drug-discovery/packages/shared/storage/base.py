@@ -3,7 +3,10 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 import hashlib
-from typing import BinaryIO
+from typing import AsyncIterator, BinaryIO
+
+# Default chunk size for streaming reads
+STREAM_CHUNK_SIZE = 1024 * 1024
 
 
 @dataclass
@@ -65,6 +68,47 @@ class FileStorageBackend(ABC):
         """
         pass
 
+    async def iter_chunks(
+        self,
+        path: str,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        start: int = 0,
+        end: int | None = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream a file by its storage path in chunks.
+
+        The default implementation reads the file via get(); backends
+        override it to stream without buffering the whole file.
+
+        Args:
+            path: Storage path/key returned from save()
+            chunk_size: Maximum bytes per chunk
+            start: Byte offset to start reading at
+            end: Byte offset to stop reading at (exclusive); None reads to
+                the end of the file
+
+        Yields:
+            Non-empty byte chunks, in order
+
+        Raises:
+            FileNotFoundError: If file doesn't exist
+        """
+        file = await self.get(path)
+        try:
+            file.seek(start)
+            remaining = end - start if end is not None else None
+            while remaining is None or remaining > 0:
+                size = chunk_size if remaining is None else min(chunk_size, remaining)
+                chunk = file.read(size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            file.close()
+
     @abstractmethod
     async def delete(self, path: str) -> bool:
         """
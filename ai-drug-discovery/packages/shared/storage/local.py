@@ -4,12 +4,12 @@ import uuid
 from datetime import datetime
 from io import BytesIO
 from pathlib import Path
-from typing import BinaryIO
+from typing import AsyncIterator, BinaryIO
 
 import aiofiles
 import aiofiles.os
 
-from packages.shared.storage.base import FileStorageBackend, StoredFile
+from packages.shared.storage.base import STREAM_CHUNK_SIZE, FileStorageBackend, StoredFile
 
 
 class LocalFileStorage(FileStorageBackend):
@@ -83,11 +83,11 @@ class LocalFileStorage(FileStorageBackend):
         # Create directory if needed
         await aiofiles.os.makedirs(full_path.parent, exist_ok=True)
 
-        # Write file
+        # Write file in chunks
         file.seek(0)
-        content = file.read()
         async with aiofiles.open(full_path, "wb") as f:
-            await f.write(content)
+            for chunk in iter(lambda: file.read(STREAM_CHUNK_SIZE), b""):
+                await f.write(chunk)
 
         return StoredFile(
             storage_path=relative_path,
@@ -117,6 +117,45 @@ class LocalFileStorage(FileStorageBackend):
 
         return BytesIO(content)
 
+    async def iter_chunks(
+        self,
+        path: str,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        start: int = 0,
+        end: int | None = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream a file from local disk in chunks.
+
+        Args:
+            path: Relative storage path
+            chunk_size: Maximum bytes per chunk
+            start: Byte offset to start reading at
+            end: Byte offset to stop reading at (exclusive); None reads to
+                the end of the file
+
+        Yields:
+            Non-empty byte chunks, in order
+
+        Raises:
+            FileNotFoundError: If file doesn't exist
+        """
+        full_path = self.base_path / path
+        if not full_path.exists():
+            raise FileNotFoundError(f"File not found: {path}")
+
+        async with aiofiles.open(full_path, "rb") as f:
+            await f.seek(start)
+            remaining = end - start if end is not None else None
+            while remaining is None or remaining > 0:
+                size = chunk_size if remaining is None else min(chunk_size, remaining)
+                chunk = await f.read(size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
     async def delete(self, path: str) -> bool:
         """
         Delete a file from local disk.
@@ -3,9 +3,9 @@
 import uuid
 from datetime import datetime
 from io import BytesIO
-from typing import BinaryIO
+from typing import AsyncIterator, BinaryIO
 
-from packages.shared.storage.base import FileStorageBackend, StoredFile
+from packages.shared.storage.base import STREAM_CHUNK_SIZE, FileStorageBackend, StoredFile
 
 # Optional dependency - only required if using S3 storage
 try:
@@ -163,6 +163,50 @@ class S3FileStorage(FileStorageBackend):
                     raise FileNotFoundError(f"File not found: {path}")
                 raise
 
+    async def iter_chunks(
+        self,
+        path: str,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        start: int = 0,
+        end: int | None = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream a file from S3 in chunks.
+
+        The object body is read incrementally from the response stream.
+        Partial reads use an HTTP Range request.
+
+        Args:
+            path: S3 key
+            chunk_size: Maximum bytes per chunk
+            start: Byte offset to start reading at
+            end: Byte offset to stop reading at (exclusive); None reads to
+                the end of the object
+
+        Yields:
+            Non-empty byte chunks, in order
+
+        Raises:
+            FileNotFoundError: If file doesn't exist
+        """
+        if end is not None and end <= start:
+            return
+        request = {"Bucket": self.bucket, "Key": path}
+        if start or end is not None:
+            request["Range"] = f"bytes={start}-{end - 1 if end is not None else ''}"
+
+        async with self._session.client("s3", **self._get_client_kwargs()) as s3:
+            try:
+                response = await s3.get_object(**request)
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") == "NoSuchKey":
+                    raise FileNotFoundError(f"File not found: {path}")
+                raise
+
+            async with response["Body"] as body:
+                async for chunk in body.iter_chunks(chunk_size):
+                    yield chunk
+
     async def delete(self, path: str) -> bool:
         """
         Delete a file from S3.
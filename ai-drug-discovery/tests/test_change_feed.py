@@ -0,0 +1,158 @@
+"""Tests for the fingerprint change feed."""
+
+import asyncio
+import uuid
+from datetime import UTC
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+import apps.api.auth.models  # noqa: F401  (registers Organization for the mapper)
+from packages.chemistry.change_feed import (
+    SOURCE_FINGERPRINTS,
+    SOURCE_MOLECULES,
+    FingerprintChangeListener,
+    current_state_query,
+    fetch_fingerprint_changes,
+    needs_snapshot,
+)
+
+ORG_ID = uuid.uuid4()
+
+
+def _sql(stmt):
+    return str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+class TestChangeQueries:
+    """Tests for resolving logged changes to current state."""
+
+    def test_fingerprint_source_joins_current_rows(self):
+        sql = _sql(current_state_query(42, SOURCE_FINGERPRINTS, "maccs"))
+
+        assert "fingerprint_changes.txid >= 42" in sql
+        assert "fingerprint_changes.fingerprint_type = 'maccs'" in sql
+        assert "LEFT OUTER JOIN molecule_fingerprints" in sql
+        assert "molecule_fingerprints.fingerprint_type = 'maccs'" in sql
+        assert "SELECT DISTINCT fingerprint_changes.molecule_id" in sql
+
+    def test_molecule_source_hides_soft_deleted(self):
+        sql = _sql(current_state_query(7, SOURCE_MOLECULES, organization_id=ORG_ID))
+
+        assert f"fingerprint_changes.organization_id = '{ORG_ID}'" in sql
+        assert "LEFT OUTER JOIN molecules" in sql
+        assert "molecules.deleted_at IS NULL) THEN molecules.fingerprint_morgan" in sql
+        assert "molecules.inchi_key" in sql
+
+    def test_org_scoped_fingerprint_source_keeps_own_live_molecules(self):
+        sql = _sql(current_state_query(3, SOURCE_FINGERPRINTS, "maccs", organization_id=ORG_ID))
+
+        # Fingerprint rows carry no organization; the org's molecule deletes are included
+        assert "fingerprint_changes.source = 'molecules' AND fingerprint_changes.organization_id" in sql
+        assert (
+            f"molecules.organization_id = '{ORG_ID}' AND molecules.deleted_at IS NULL) "
+            "THEN molecule_fingerprints.fingerprint_bytes"
+        ) in sql
+        assert "LEFT OUTER JOIN molecules ON molecules.id = changed.molecule_id" in sql
+
+    def test_unknown_source(self):
+        with pytest.raises(ValueError, match="Unknown change source"):
+            current_state_query(0, "targets")
+
+    @pytest.mark.asyncio
+    async def test_fetch_returns_epoch_and_deltas(self):
+        kept, removed = uuid.uuid4(), uuid.uuid4()
+        session = MagicMock()
+        session.execute = AsyncMock(side_effect=[
+            MagicMock(scalar_one=MagicMock(return_value=1234)),
+            MagicMock(all=MagicMock(return_value=[
+                SimpleNamespace(molecule_id=kept, fingerprint=memoryview(b"\x01\x02"), inchi_key="KEY"),
+                SimpleNamespace(molecule_id=removed, fingerprint=None, inchi_key=None),
+            ])),
+        ])
+
+        changes = await fetch_fingerprint_changes(session, 1000, SOURCE_MOLECULES, organization_id=ORG_ID)
+
+        assert changes.epoch == 1234
+        assert [(d.molecule_id, d.fingerprint, d.inchi_key, d.deleted) for d in changes.deltas] == [
+            (kept, b"\x01\x02", "KEY", False),
+            (removed, None, None, True),
+        ]
+        # The horizon is read before the changes
+        assert "pg_snapshot_xmin" in str(session.execute.await_args_list[0].args[0])
+
+    def test_needs_snapshot(self):
+        from datetime import datetime, timedelta
+
+        now = datetime.now(UTC)
+        assert needs_snapshot(None)
+        assert not needs_snapshot(now - timedelta(hours=1))
+        assert needs_snapshot(now - timedelta(hours=13))
+
+
+class TestChangeListener:
+    """Tests for LISTEN bookkeeping."""
+
+    def test_disconnected_listener_always_reports_changes(self):
+        listener = FingerprintChangeListener("postgresql+asyncpg://db/test")
+
+        assert listener.dsn == "postgresql://db/test"
+        assert not listener.connected
+        assert listener.changed_since(listener.version)
+
+    def test_notifications_bump_version(self):
+        listener = FingerprintChangeListener("postgresql://db/test")
+        listener._connection = MagicMock(is_closed=MagicMock(return_value=False))
+        version = listener.version
+
+        assert not listener.changed_since(version)
+        listener._on_notification(None, 1, "fingerprint_changes", "")
+        assert listener.changed_since(version)
+
+    def test_connection_loss_falls_back_to_polling(self):
+        listener = FingerprintChangeListener("postgresql://db/test")
+        listener._connection = MagicMock(is_closed=MagicMock(return_value=False))
+        version = listener.version
+
+        listener._on_terminated(listener._connection)
+
+        assert not listener.connected
+        assert listener.changed_since(version)
+
+    @pytest.mark.asyncio
+    async def test_lost_connection_reconnects_with_backoff(self, monkeypatch):
+        monkeypatch.setattr("packages.chemistry.change_feed.RECONNECT_MIN_DELAY", 0.001)
+        listener = FingerprintChangeListener("postgresql://db/test")
+        connection = MagicMock(is_closed=MagicMock(return_value=False))
+        attempts = []
+
+        async def start():
+            attempts.append(len(attempts))
+            if len(attempts) < 3:
+                raise OSError("connection refused")
+            listener._connection = connection
+
+        monkeypatch.setattr(listener, "start", start)
+        listener._connection = connection
+        listener._on_terminated(connection)
+        assert not listener.connected
+
+        await asyncio.wait_for(listener._reconnect_task, timeout=1)
+
+        assert len(attempts) == 3
+        assert listener.connected
+
+    @pytest.mark.asyncio
+    async def test_close_stops_reconnecting(self, monkeypatch):
+        monkeypatch.setattr("packages.chemistry.change_feed.RECONNECT_MIN_DELAY", 60)
+        listener = FingerprintChangeListener("postgresql://db/test")
+        listener._on_terminated(None)
+        task = listener._reconnect_task
+
+        await listener.close()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        listener._on_terminated(None)
+        assert listener._reconnect_task is None
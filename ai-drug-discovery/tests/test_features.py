@@ -3,20 +3,26 @@
 import base64
 from decimal import Decimal
 
+import numpy as np
 import pytest
 
 from packages.chemistry.features import (
+    FINGERPRINT_BLOCK_ROWS,
     DescriptorCalculationError,
     Fingerprint,
+    FingerprintBatch,
     FingerprintCalculationError,
     FingerprintType,
     MolecularDescriptors,
     calculate_all_fingerprints,
     calculate_descriptors,
     calculate_fingerprint,
+    calculate_fingerprint_batch,
     calculate_maccs_fingerprint,
     calculate_morgan_fingerprint,
     calculate_rdkit_fingerprint,
+    pack_bitstring,
+    read_stored_fingerprint,
 )
 
 
@@ -325,6 +331,85 @@ class TestFingerprintSerialization:
         )
 
         assert fp2.bytes_data == fp1.bytes_data
+        assert fp2 == fp1
+
+
+class TestFingerprintValue:
+    """Tests for the slot-based Fingerprint value object."""
+
+    def test_has_no_instance_dict(self):
+        fp = calculate_morgan_fingerprint(ASPIRIN)
+        assert not hasattr(fp, "__dict__")
+
+    def test_is_immutable(self):
+        fp = calculate_morgan_fingerprint(ASPIRIN)
+        with pytest.raises(AttributeError):
+            fp.num_bits = 1024
+
+    def test_encodings_derive_from_bits(self):
+        fp = calculate_morgan_fingerprint(ASPIRIN)
+        assert fp.base64_str == base64.b64encode(fp.bytes_data).decode()
+        assert fp.hex_str == fp.bytes_data.hex()
+        assert fp.num_on_bits == len(fp.get_on_bits())
+
+    def test_legacy_constructor_arguments(self):
+        fp = calculate_morgan_fingerprint(ASPIRIN)
+        rebuilt = Fingerprint(
+            fp.fp_type, fp.num_bits, fp.num_on_bits, fp.bytes_data,
+            fp.base64_str, fp.hex_str, radius=2,
+        )
+        assert rebuilt == fp
+        assert hash(rebuilt) == hash(fp)
+
+    def test_view_over_shared_buffer(self):
+        fp = calculate_morgan_fingerprint(ASPIRIN)
+        buffer = bytearray(b"\x00" * 8 + fp.bytes_data)
+        view = Fingerprint(
+            FingerprintType.MORGAN, fp.num_bits, fp.num_on_bits,
+            memoryview(buffer)[8:], radius=2,
+        )
+
+        assert isinstance(view.bytes_data, bytes)
+        assert view == fp
+        assert view.to_dict() == fp.to_dict()
+        assert view.get_on_bits() == fp.get_on_bits()
+
+    def test_batch_rows_are_views(self):
+        batch = calculate_fingerprint_batch([ETHANOL, ASPIRIN])
+        fp = batch.fingerprint(1)
+        assert isinstance(fp._data, memoryview)
+        assert fp == calculate_morgan_fingerprint(ASPIRIN)
+
+    def test_pickle_round_trip(self):
+        import pickle
+
+        fp = calculate_fingerprint_batch([ASPIRIN]).fingerprint(0)
+        assert pickle.loads(pickle.dumps(fp)) == fp
+
+
+class TestStoredFingerprintFormats:
+    """Tests for reading packed and legacy bit-string fingerprint columns."""
+
+    @pytest.mark.parametrize("fp_type", [FingerprintType.MACCS, FingerprintType.RDKIT])
+    def test_bitstring_packs_to_fingerprint_bytes(self, fp_type):
+        from rdkit import Chem
+        from rdkit.Chem import MACCSkeys, RDKFingerprint
+
+        mol = Chem.MolFromSmiles(ASPIRIN)
+        legacy = (MACCSkeys.GenMACCSKeys(mol) if fp_type == FingerprintType.MACCS else RDKFingerprint(mol))
+        fp = calculate_fingerprint(mol, fp_type)
+
+        assert pack_bitstring(legacy.ToBitString()) == fp.bytes_data
+        assert read_stored_fingerprint(legacy.ToBitString().encode(), fp.num_bits) == fp.bytes_data
+
+    def test_packed_value_passes_through(self):
+        fp = calculate_maccs_fingerprint(ASPIRIN)
+        assert read_stored_fingerprint(fp.bytes_data, fp.num_bits) == fp.bytes_data
+        assert read_stored_fingerprint(None, fp.num_bits) is None
+
+    def test_invalid_bitstring_raises(self):
+        with pytest.raises(ValueError):
+            read_stored_fingerprint(b"01x" + b"0" * 164, 167)
 
 
 class TestDifferentMolecules:
@@ -378,3 +463,110 @@ class TestEdgeCases:
         # Morgan fingerprints don't distinguish stereochemistry by default
         # So they should be the same
         assert fp_l.bytes_data == fp_d.bytes_data
+
+
+def _legacy_bytes(bitvect) -> bytes:
+    """Bit-by-bit packing used before the batch kernel."""
+    result = bytearray((bitvect.GetNumBits() + 7) // 8)
+    for i in range(bitvect.GetNumBits()):
+        if bitvect.GetBit(i):
+            result[i // 8] |= 1 << (i % 8)
+    return bytes(result)
+
+
+class TestFingerprintBatch:
+    """Tests for the batch fingerprint kernel."""
+
+    MOLECULES = [ETHANOL, ASPIRIN, CAFFEINE, BENZENE, "[Na+]", "N[C@@H](C)C(=O)O"]
+
+    @pytest.mark.filterwarnings("ignore::DeprecationWarning")
+    def test_matches_legacy_rdkit_functions(self):
+        """Packed rows are bit-identical to the legacy RDKit fingerprint functions."""
+        from rdkit import Chem, RDLogger
+        from rdkit.Chem import AllChem, MACCSkeys, RDKFingerprint
+
+        RDLogger.DisableLog("rdApp.*")
+        mols = [Chem.MolFromSmiles(s) for s in self.MOLECULES]
+        cases = [
+            (
+                calculate_fingerprint_batch(mols, FingerprintType.MORGAN, radius=2, num_bits=2048),
+                [AllChem.GetMorganFingerprintAsBitVect(m, 2, nBits=2048) for m in mols],
+            ),
+            (
+                calculate_fingerprint_batch(mols, FingerprintType.MORGAN, radius=3, use_features=True),
+                [AllChem.GetMorganFingerprintAsBitVect(m, 3, nBits=2048, useFeatures=True) for m in mols],
+            ),
+            (
+                calculate_fingerprint_batch(mols, FingerprintType.MACCS),
+                [MACCSkeys.GenMACCSKeys(m) for m in mols],
+            ),
+            (
+                calculate_fingerprint_batch(mols, FingerprintType.RDKIT, max_path=5, num_bits=1024),
+                [RDKFingerprint(m, maxPath=5, fpSize=1024) for m in mols],
+            ),
+        ]
+        for batch, legacy in cases:
+            assert batch.to_bytes() == [_legacy_bytes(fp) for fp in legacy]
+            assert batch.popcounts.tolist() == [fp.GetNumOnBits() for fp in legacy]
+            assert batch.to_bitstrings() == [fp.ToBitString().encode() for fp in legacy]
+
+    def test_matches_single_molecule_functions(self):
+        """Batch rows equal the single-molecule Fingerprint objects."""
+        batch = calculate_fingerprint_batch(self.MOLECULES, FingerprintType.MORGAN)
+
+        assert isinstance(batch, FingerprintBatch)
+        assert [batch.fingerprint(i) for i in range(len(batch))] == [
+            calculate_morgan_fingerprint(s) for s in self.MOLECULES
+        ]
+
+    def test_failed_rows_are_marked(self):
+        """Invalid inputs produce empty rows instead of raising."""
+        batch = calculate_fingerprint_batch([ETHANOL, INVALID_SMILES, None, BENZENE])
+
+        assert batch.valid.tolist() == [True, False, False, True]
+        assert set(batch.errors) == {1, 2}
+        assert batch.row_bytes(1) is None and batch.fingerprint(2) is None
+        assert batch.popcounts[1] == 0
+        assert batch.to_bytes()[3] == calculate_morgan_fingerprint(BENZENE).bytes_data
+
+    def test_layout_feeds_similarity_engine(self):
+        """Rows are word-padded and usable as a FingerprintMatrix without repacking."""
+        batch = calculate_fingerprint_batch([ETHANOL, ASPIRIN, BENZENE], FingerprintType.MACCS)
+
+        assert batch.words.dtype == np.dtype("<u8")
+        assert batch.words.shape == (3, 3)  # 167 bits -> 21 bytes -> 3 words
+        assert batch.packed.shape == (3, 21)
+
+        matrix = batch.to_matrix()
+        hits = matrix.search(batch.row_bytes(1), threshold=0.99)
+        assert hits == [(1, 1.0)]
+
+    def test_spans_blocks(self):
+        """Batches larger than one block keep row order."""
+        smiles = [ETHANOL, BENZENE, ASPIRIN] * (FINGERPRINT_BLOCK_ROWS // 3 + 2)
+        batch = calculate_fingerprint_batch(smiles)
+
+        expected = {s: calculate_morgan_fingerprint(s).bytes_data for s in set(smiles)}
+        assert batch.to_bytes() == [expected[s] for s in smiles]
+
+    def test_empty_batch(self):
+        batch = calculate_fingerprint_batch([])
+        assert len(batch) == 0 and batch.to_bytes() == []
+
+    def test_pipeline_calculator_uses_kernel(self):
+        """FingerprintCalculator returns packed bytes matching features."""
+        from rdkit import Chem
+
+        from packages.chemistry.compute import FingerprintCalculator
+        from packages.chemistry.schemas import FingerprintType as SchemaFingerprintType
+
+        calc = FingerprintCalculator()
+        mols = [Chem.MolFromSmiles(s) for s in (ETHANOL, ASPIRIN)] + [None]
+        data = calc.calculate_batch(mols, SchemaFingerprintType.MORGAN)
+
+        assert data[2] is None
+        assert data[1].bits == calculate_morgan_fingerprint(ASPIRIN).bytes_data
+        assert data[1].num_on_bits == len(data[1].on_bits)
+        single = calc.calculate(mols[1], SchemaFingerprintType.MACCS, n_bits=1024)
+        assert single.bit_length == 167
+        assert single.bits == calculate_maccs_fingerprint(ASPIRIN).bytes_data
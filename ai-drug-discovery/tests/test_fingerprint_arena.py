@@ -0,0 +1,328 @@
+"""Tests for the memory-mapped fingerprint arena."""
+
+import asyncio
+import uuid
+from datetime import UTC, datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+
+from packages.chemistry.change_feed import ChangeSet, FingerprintDelta
+from packages.chemistry.fingerprint_arena import FingerprintArena, get_shared_arena
+from packages.chemistry.similarity import tanimoto_similarity_bytes
+from packages.chemistry.similarity_engine import pack_fingerprints, popcount_rows
+
+NUM_BYTES = 16
+WATERMARK = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+def _write(
+    arena: FingerprintArena,
+    entries: list[tuple[uuid.UUID, bytes]],
+    watermark=WATERMARK,
+    epoch=None,
+):
+    ids = np.frombuffer(b"".join(mol_id.bytes for mol_id, _ in entries), dtype=np.uint8)
+    words = pack_fingerprints([fp for _, fp in entries], NUM_BYTES)
+    with arena._builder_lock():
+        return arena.write_generation(
+            ids=ids.reshape(-1, 16),
+            words=words,
+            popcounts=popcount_rows(words),
+            num_bytes=NUM_BYTES,
+            watermark=watermark,
+            epoch=epoch,
+        )
+
+
+@pytest.fixture
+def entries():
+    fps = [
+        b"\xff" * NUM_BYTES,
+        b"\xff" * 8 + b"\x00" * 8,
+        b"\x0f" * NUM_BYTES,
+        b"\x00" * NUM_BYTES,
+    ]
+    return [(uuid.uuid4(), fp) for fp in fps]
+
+
+class TestArenaReadWrite:
+    """Tests for writing generations and mapping them back."""
+
+    def test_missing_arena_does_not_load(self, tmp_path):
+        arena = FingerprintArena(tmp_path, "morgan")
+        assert not arena.exists()
+        assert arena.load() is False
+        assert arena.search(b"\xff" * NUM_BYTES) == []
+
+    def test_roundtrip_is_memory_mapped(self, tmp_path, entries):
+        arena = FingerprintArena(tmp_path, "morgan")
+        manifest = _write(arena, entries)
+
+        assert manifest.generation == 1
+        assert manifest.count == len(entries)
+        assert len(arena) == len(entries)
+        assert isinstance(arena.matrix.words, np.memmap)
+        stored = {arena.molecule_id(i) for i in range(len(entries))}
+        assert stored == {mol_id for mol_id, _ in entries}
+        # Rows are bucketed by popcount
+        assert arena.matrix.bucket_offsets is not None
+        assert list(arena.matrix.popcounts) == sorted(arena.matrix.popcounts)
+
+    def test_search_matches_scalar_tanimoto(self, tmp_path, entries):
+        arena = FingerprintArena(tmp_path, "morgan")
+        _write(arena, entries)
+
+        query = entries[0][1]
+        hits = arena.search(query, threshold=0.0, limit=10)
+        expected = {mol_id: tanimoto_similarity_bytes(query, fp) for mol_id, fp in entries}
+
+        assert hits[0] == (entries[0][0], 1.0)
+        assert dict(hits) == pytest.approx(expected)
+
+    def test_search_excludes_ids_and_respects_limit(self, tmp_path, entries):
+        arena = FingerprintArena(tmp_path, "morgan")
+        _write(arena, entries)
+
+        hits = arena.search(entries[0][1], threshold=0.0, limit=2, exclude_ids=[entries[0][0]])
+        assert [mol_id for mol_id, _ in hits] == [entries[1][0], entries[2][0]]
+
+    def test_length_mismatch_returns_no_hits(self, tmp_path, entries):
+        arena = FingerprintArena(tmp_path, "morgan")
+        _write(arena, entries)
+        assert arena.search(b"\xff" * 8) == []
+
+    def test_other_process_sees_new_generation(self, tmp_path, entries):
+        writer = FingerprintArena(tmp_path, "morgan")
+        reader = FingerprintArena(tmp_path, "morgan")
+        _write(writer, entries[:2])
+        assert reader.load()
+        assert len(reader) == 2
+
+        _write(writer, entries)
+        assert reader.load()
+        assert reader.manifest.generation == 2
+        assert len(reader) == len(entries)
+
+    def test_old_generations_are_pruned(self, tmp_path, entries):
+        arena = FingerprintArena(tmp_path, "morgan")
+        for _ in range(4):
+            _write(arena, entries)
+
+        generations = sorted(p.name for p in (tmp_path / "morgan").glob("gen-*"))
+        assert generations == ["gen-000003", "gen-000004"]
+
+
+class TestArenaSearchMany:
+    """Tests for batched arena search."""
+
+    def test_matches_single_searches(self, tmp_path, entries):
+        arena = FingerprintArena(tmp_path, "morgan")
+        _write(arena, entries)
+        queries = [fp for _, fp in entries] + [b"\x01"]
+
+        results = arena.search_many(
+            queries, [0.3, 0.9, 0.0, 0.5, 0.5], limits=2, exclude_ids=[entries[0][0]]
+        )
+
+        assert results[-1] == []
+        thresholds = [0.3, 0.9, 0.0, 0.5]
+        for query, threshold, hits in zip(queries[:-1], thresholds, results[:-1], strict=True):
+            assert hits == arena.search(query, threshold, 2, exclude_ids=[entries[0][0]])
+
+    def test_missing_arena(self, tmp_path):
+        assert FingerprintArena(tmp_path, "morgan").search_many([b"\xff" * NUM_BYTES]) == [[]]
+
+
+class TestArenaDelta:
+    """Tests for applying changes as an in-memory delta and compacting it."""
+
+    def _changes(self, entries, new_id, epoch=5):
+        return ChangeSet(epoch=epoch, deltas=[
+            FingerprintDelta(entries[3][0], b"\xff" * NUM_BYTES),  # previously empty
+            FingerprintDelta(new_id, b"\xf0" * NUM_BYTES),
+            FingerprintDelta(entries[0][0], None),
+        ])
+
+    def test_apply_changes_is_merged_into_searches(self, tmp_path, entries):
+        arena = FingerprintArena(tmp_path, "morgan")
+        _write(arena, entries, epoch=1)
+        new_id = uuid.uuid4()
+
+        arena.apply_changes(self._changes(entries, new_id))
+
+        # Nothing was rewritten on disk
+        assert arena.manifest.generation == 1
+        assert arena.epoch == 5
+        assert arena.pending == 4  # Two tombstones, two delta rows
+        assert len(arena) == len(entries)
+        assert dict(arena.search(b"\xff" * NUM_BYTES, threshold=0.99, limit=10)) == {
+            entries[3][0]: 1.0
+        }
+        assert dict(arena.search(b"\xf0" * NUM_BYTES, threshold=0.99, limit=10)) == {
+            new_id: 1.0
+        }
+        queries = [b"\xff" * NUM_BYTES, b"\xf0" * NUM_BYTES, b"\x0f" * NUM_BYTES]
+        assert arena.search_many(queries, 0.2, 2, exclude_ids=[new_id]) == [
+            arena.search(query, 0.2, 2, exclude_ids=[new_id]) for query in queries
+        ]
+
+    def test_wrong_length_change_removes_row(self, tmp_path, entries):
+        arena = FingerprintArena(tmp_path, "morgan")
+        _write(arena, entries, epoch=1)
+
+        arena.apply_changes(ChangeSet(epoch=2, deltas=[FingerprintDelta(entries[2][0], b"\x01")]))
+
+        assert len(arena) == len(entries) - 1
+        assert entries[2][0] not in dict(arena.search(b"\x0f" * NUM_BYTES, 0.0, 10))
+
+    def test_compact_folds_delta_into_new_generation(self, tmp_path, entries):
+        arena = FingerprintArena(tmp_path, "morgan")
+        _write(arena, entries, epoch=1)
+        new_id = uuid.uuid4()
+        arena.apply_changes(self._changes(entries, new_id))
+        expected = arena.search(b"\xff" * NUM_BYTES, threshold=0.0, limit=10)
+
+        with arena._builder_lock():
+            manifest = arena.compact()
+
+        assert manifest.generation == 2
+        assert manifest.epoch == 5
+        assert manifest.watermark == WATERMARK
+        assert arena.pending == 0
+        assert len(arena) == len(entries)
+        assert list(arena.matrix.popcounts) == sorted(arena.matrix.popcounts)
+        assert sorted(arena.search(b"\xff" * NUM_BYTES, threshold=0.0, limit=10)) == sorted(
+            expected
+        )
+
+        reopened = FingerprintArena(tmp_path, "morgan")
+        assert reopened.load()
+        assert reopened.epoch == 5
+        assert {reopened.molecule_id(i) for i in range(len(reopened))} == {
+            entries[1][0], entries[2][0], entries[3][0], new_id
+        }
+
+    def test_new_generation_drops_delta(self, tmp_path, entries):
+        reader = FingerprintArena(tmp_path, "morgan")
+        _write(reader, entries, epoch=1)
+        reader.apply_changes(ChangeSet(epoch=3, deltas=[FingerprintDelta(entries[0][0], None)]))
+
+        _write(FingerprintArena(tmp_path, "morgan"), entries, epoch=7)
+        assert reader.load()
+
+        assert reader.pending == 0
+        assert reader.epoch == 7
+        assert len(reader) == len(entries)
+
+    @pytest.mark.asyncio
+    async def test_refresh_replays_change_feed(self, tmp_path, entries):
+        arena = FingerprintArena(tmp_path, "morgan")
+        _write(arena, entries, epoch=10)
+        new_id = uuid.uuid4()
+        changes = ChangeSet(epoch=12, deltas=[
+            FingerprintDelta(entries[1][0], None),
+            FingerprintDelta(entries[2][0], b"\x01"),  # Wrong length: dropped
+            FingerprintDelta(new_id, b"\xf0" * NUM_BYTES),
+        ])
+        fetch = AsyncMock(return_value=changes)
+
+        with patch("packages.chemistry.fingerprint_arena.fetch_fingerprint_changes", fetch):
+            assert await arena.refresh(session=None) == 3
+
+        assert fetch.await_args.args[1] == 10
+        assert arena.manifest.generation == 1
+        assert arena.epoch == 12
+        assert len(arena) == len(entries) - 1
+        assert dict(arena.search(b"\xf0" * NUM_BYTES, threshold=0.99, limit=10)) == {new_id: 1.0}
+
+    @pytest.mark.asyncio
+    async def test_refresh_compacts_large_delta(self, tmp_path, entries, monkeypatch):
+        monkeypatch.setattr("packages.chemistry.fingerprint_arena.COMPACT_MIN_ROWS", 2)
+        arena = FingerprintArena(tmp_path, "morgan")
+        _write(arena, entries, epoch=10)
+        new_id = uuid.uuid4()
+        fetch = AsyncMock(return_value=self._changes(entries, new_id, epoch=12))
+
+        with patch("packages.chemistry.fingerprint_arena.fetch_fingerprint_changes", fetch):
+            assert await arena.refresh(session=None) == 3
+
+        assert arena.manifest.generation == 2
+        assert arena.manifest.epoch == 12
+        assert arena.pending == 0
+        assert dict(arena.search(b"\xf0" * NUM_BYTES, threshold=0.99, limit=10)) == {new_id: 1.0}
+
+    @pytest.mark.asyncio
+    async def test_refresh_rebuilds_arena_without_epoch(self, tmp_path, entries):
+        arena = FingerprintArena(tmp_path, "morgan")
+        _write(arena, entries)
+        build = AsyncMock(return_value=MagicMock(count=4))
+
+        with patch.object(arena, "build", build):
+            assert await arena.refresh(session=None) == 4
+        build.assert_awaited_once()
+
+
+class TestBuildLock:
+    """Tests for builders racing on the same arena."""
+
+    @pytest.mark.asyncio
+    async def test_waiting_builder_adopts_published_generation(
+        self, tmp_path, entries, monkeypatch
+    ):
+        monkeypatch.setattr("packages.chemistry.fingerprint_arena.LOCK_POLL_SECONDS", 0.01)
+        other = FingerprintArena(tmp_path, "morgan")
+        arena = FingerprintArena(tmp_path, "morgan")
+        session = MagicMock()
+        session.execute = AsyncMock()
+
+        with other._builder_lock():
+            task = asyncio.create_task(arena.build(session))
+            # The waiting builder must not block the event loop
+            await asyncio.sleep(0.05)
+            assert not task.done()
+
+            # Published by the lock holder while the builder waits
+            ids = np.frombuffer(b"".join(mol_id.bytes for mol_id, _ in entries), dtype=np.uint8)
+            words = pack_fingerprints([fp for _, fp in entries], NUM_BYTES)
+            other.write_generation(
+                ids=ids.reshape(-1, 16),
+                words=words,
+                popcounts=popcount_rows(words),
+                num_bytes=NUM_BYTES,
+                watermark=WATERMARK,
+            )
+
+        manifest = await task
+        assert manifest.generation == 1
+        assert len(arena) == len(entries)
+        session.execute.assert_not_awaited()
+        session.stream.assert_not_called()
+
+
+class TestBuildSorting:
+    """Tests for re-sorting streamed build files into popcount order."""
+
+    @pytest.mark.parametrize("popcounts", [[1, 2, 2, 5], [5, 1, 3, 0]])
+    def test_sort_build_files(self, tmp_path, popcounts):
+        counts = np.array(popcounts, dtype=np.int64)
+        words = np.arange(len(counts) * 2, dtype="<u8").reshape(-1, 2)
+        ids = np.arange(len(counts) * 16, dtype=np.uint8).reshape(-1, 16)
+        np.save(tmp_path / "bits.unsorted.npy", words)
+        np.save(tmp_path / "ids.unsorted.npy", ids)
+        np.save(tmp_path / "popcounts.unsorted.npy", counts)
+
+        FingerprintArena._sort_build_files(tmp_path, counts)
+
+        order = np.argsort(counts, kind="stable")
+        assert np.load(tmp_path / "popcounts.npy").tolist() == sorted(popcounts)
+        assert np.array_equal(np.load(tmp_path / "bits.npy"), words[order])
+        assert np.array_equal(np.load(tmp_path / "ids.npy"), ids[order])
+        assert not list(tmp_path.glob("*.unsorted.npy"))
+
+
+class TestSharedArena:
+    def test_same_instance_per_directory_and_type(self, tmp_path):
+        assert get_shared_arena(tmp_path, "morgan") is get_shared_arena(tmp_path, "morgan")
+        assert get_shared_arena(tmp_path, "morgan") is not get_shared_arena(tmp_path, "maccs")
@@ -0,0 +1,145 @@
+"""Tests for the per-organization fingerprint index manager."""
+
+import asyncio
+import uuid
+
+import pytest
+
+from packages.chemistry.index_manager import FingerprintIndexManager
+
+
+class FakeIndex:
+    def __init__(self, nbytes: int, molecules: int = 1):
+        self.nbytes = nbytes
+        self.molecules = molecules
+
+    def __len__(self) -> int:
+        return self.molecules
+
+
+ORGS = [uuid.uuid4() for _ in range(4)]
+
+
+class TestLRUEviction:
+    """Tests for caching under the memory budget."""
+
+    def test_get_counts_hits_and_misses(self):
+        manager = FingerprintIndexManager(memory_budget=100)
+        index = FakeIndex(10)
+
+        assert manager.get(ORGS[0], "morgan") is None
+        assert manager.put(ORGS[0], "morgan", index)
+        assert manager.get(ORGS[0], "morgan") is index
+        assert manager.get(ORGS[0], "maccs") is None
+
+        assert (manager.hits, manager.misses, manager.loads) == (1, 2, 1)
+
+    def test_least_recently_used_is_evicted_first(self):
+        manager = FingerprintIndexManager(memory_budget=100)
+        for org in ORGS[:3]:
+            manager.put(org, "morgan", FakeIndex(40))
+        # 120 > 100: the first org went; touching the second keeps it
+        assert (ORGS[0], "morgan") not in manager
+        manager.get(ORGS[1], "morgan")
+
+        manager.put(ORGS[3], "morgan", FakeIndex(40))
+
+        assert (ORGS[1], "morgan") in manager
+        assert (ORGS[2], "morgan") not in manager
+        assert manager.resident_bytes == 80
+        assert manager.evictions == 2
+
+    def test_index_over_budget_is_not_cached(self):
+        manager = FingerprintIndexManager(memory_budget=100)
+        manager.put(ORGS[0], "morgan", FakeIndex(50))
+
+        assert manager.put(ORGS[1], "morgan", FakeIndex(500)) is False
+
+        assert (ORGS[0], "morgan") in manager
+        assert (ORGS[1], "morgan") not in manager
+        assert manager.rejected == 1
+
+    def test_replacing_an_index_releases_its_bytes(self):
+        manager = FingerprintIndexManager(memory_budget=100)
+        manager.put(ORGS[0], "morgan", FakeIndex(60))
+        manager.put(ORGS[0], "morgan", FakeIndex(70))
+
+        assert manager.resident_bytes == 70
+        assert manager.evictions == 0
+
+    def test_resize_evicts_others_when_an_index_grows(self):
+        manager = FingerprintIndexManager(memory_budget=100)
+        manager.put(ORGS[0], "morgan", FakeIndex(40))
+        grown = FakeIndex(40)
+        manager.put(ORGS[1], "morgan", grown)
+
+        grown.nbytes = 90
+        manager.resize(ORGS[1], "morgan")
+
+        assert list(manager._entries) == [(ORGS[1], "morgan")]
+        assert manager.resident_bytes == 90
+
+        grown.nbytes = 200
+        manager.resize(ORGS[1], "morgan")
+        assert len(manager) == 0
+        assert manager.resident_bytes == 0
+
+    def test_invalidate_by_org_and_type(self):
+        manager = FingerprintIndexManager(memory_budget=1000)
+        for org in ORGS[:2]:
+            for fp_type in ("morgan", "maccs"):
+                manager.put(org, fp_type, FakeIndex(10))
+
+        assert manager.invalidate(ORGS[0]) == 2
+        assert manager.invalidate(fingerprint_type="maccs") == 1
+        assert list(manager._entries) == [(ORGS[1], "morgan")]
+        assert manager.invalidate() == 1
+        assert manager.resident_bytes == 0
+
+    def test_rejects_non_positive_budget(self):
+        with pytest.raises(ValueError, match="memory_budget"):
+            FingerprintIndexManager(memory_budget=0)
+
+    @pytest.mark.asyncio
+    async def test_lock_is_shared_per_key(self):
+        manager = FingerprintIndexManager(memory_budget=100)
+
+        assert manager.lock(ORGS[0], "morgan") is manager.lock(ORGS[0], "morgan")
+        assert manager.lock(ORGS[0], "morgan") is not manager.lock(ORGS[0], "maccs")
+        assert isinstance(manager.lock(ORGS[0], "morgan"), asyncio.Lock)
+
+
+class TestManagerStats:
+    """Tests for IndexStats reporting."""
+
+    def test_stats_report_size_hits_and_evictions(self):
+        manager = FingerprintIndexManager(memory_budget=100)
+        manager.put(ORGS[0], "morgan", FakeIndex(30, molecules=3))
+        manager.put(ORGS[1], "morgan", FakeIndex(50, molecules=5))
+        manager.put(ORGS[2], "maccs", FakeIndex(40, molecules=4))
+        manager.get(ORGS[1], "morgan")
+        manager.get(ORGS[3], "morgan")
+
+        stats = manager.get_stats()
+
+        assert stats.backend == "memory"
+        assert stats.fingerprint_type == "all"
+        assert stats.total_indexed == 9
+        assert stats.last_updated is not None
+        meta = stats.metadata
+        assert (meta["indexes"], meta["resident_bytes"], meta["memory_budget"]) == (2, 90, 100)
+        assert (meta["hits"], meta["misses"], meta["evictions"], meta["loads"]) == (1, 1, 1, 3)
+        assert meta["hit_rate"] == 0.5
+        assert [entry["nbytes"] for entry in meta["largest"]] == [50, 40]
+        assert meta["largest"][0]["organization_id"] == str(ORGS[1])
+
+    def test_stats_filter_by_type(self):
+        manager = FingerprintIndexManager(memory_budget=100)
+        manager.put(ORGS[0], "morgan", FakeIndex(30, molecules=3))
+        manager.put(ORGS[0], "maccs", FakeIndex(20, molecules=2))
+
+        stats = manager.get_stats("maccs")
+
+        assert (stats.fingerprint_type, stats.total_indexed) == ("maccs", 2)
+        assert stats.metadata["resident_bytes"] == 20
+        assert manager.get_stats("ecfp4").last_updated is None
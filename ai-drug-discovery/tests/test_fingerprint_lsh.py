@@ -0,0 +1,259 @@
+"""Tests for the MinHash LSH approximate fingerprint index."""
+
+import uuid
+
+import numpy as np
+import pytest
+
+from packages.chemistry.change_feed import ChangeSet, FingerprintDelta
+from packages.chemistry.fingerprint_arena import FingerprintArena
+from packages.chemistry.fingerprint_index import (
+    LSHFingerprintIndex,
+    get_fingerprint_index,
+)
+from packages.chemistry.fingerprint_lsh import (
+    EMPTY_SIGNATURE,
+    MinHashLSHIndex,
+    band_keys,
+    candidate_probability,
+    make_ranks,
+    minhash_signatures,
+    recall_at_k,
+)
+from packages.chemistry.similarity import tanimoto_similarity_bytes
+from packages.chemistry.similarity_engine import (
+    FingerprintMatrix,
+    pack_fingerprints,
+    popcount_rows,
+)
+
+NUM_BYTES = 64
+NUM_BITS = NUM_BYTES * 8
+
+
+def _fp(bits) -> bytes:
+    array = np.zeros(NUM_BITS, dtype=np.uint8)
+    array[list(bits)] = 1
+    return np.packbits(array, bitorder="little").tobytes()
+
+
+@pytest.fixture(scope="module")
+def library():
+    """Clusters of sparse fingerprints around random centres, like analogue series."""
+    rng = np.random.default_rng(7)
+    entries = []
+    for _ in range(60):
+        centre = set(rng.choice(NUM_BITS, 40, replace=False).tolist())
+        for _ in range(10):
+            bits = centre - set(rng.choice(sorted(centre), int(rng.integers(0, 6)), replace=False).tolist())
+            bits |= set(rng.choice(NUM_BITS, int(rng.integers(0, 6))).tolist())
+            entries.append((uuid.uuid4(), _fp(bits)))
+    return entries
+
+
+def _build(entries, **kwargs) -> MinHashLSHIndex:
+    ids = np.frombuffer(b"".join(mol_id.bytes for mol_id, _ in entries), dtype=np.uint8)
+    matrix = FingerprintMatrix.from_bytes([fp for _, fp in entries], NUM_BYTES)
+    return MinHashLSHIndex.from_matrix(ids.reshape(-1, 16), matrix, **kwargs)
+
+
+class TestMinHash:
+    """Tests for signatures and band keys."""
+
+    def test_signature_is_min_rank_over_on_bits(self):
+        ranks = make_ranks(NUM_BITS, 8, seed=3)
+        fps = [_fp([1, 100, 300]), _fp([])]
+        signatures = minhash_signatures(pack_fingerprints(fps, NUM_BYTES), NUM_BYTES, ranks)
+
+        assert signatures[0].tolist() == ranks[:, [1, 100, 300]].min(axis=1).tolist()
+        assert (signatures[1] == EMPTY_SIGNATURE).all()
+
+    def test_collision_rate_tracks_tanimoto(self):
+        a = _fp(range(0, 60))
+        b = _fp(range(20, 80))  # Tanimoto 40 / 80 = 0.5
+        ranks = make_ranks(NUM_BITS, 2000, seed=1)
+        signatures = minhash_signatures(pack_fingerprints([a, b], NUM_BYTES), NUM_BYTES, ranks)
+
+        assert (signatures[0] == signatures[1]).mean() == pytest.approx(0.5, abs=0.05)
+
+    def test_identical_fingerprints_share_every_bucket(self):
+        ranks = make_ranks(NUM_BITS, 32)
+        words = pack_fingerprints([_fp([5, 9, 77])] * 2, NUM_BYTES)
+        keys = band_keys(minhash_signatures(words, NUM_BYTES, ranks), 8, 4)
+
+        assert keys.shape == (2, 8)
+        assert (keys[0] == keys[1]).all()
+
+    def test_candidate_probability(self):
+        assert candidate_probability(1.0) == 1.0
+        assert candidate_probability(0.0) == 0.0
+        assert candidate_probability(0.7, bands=16, rows_per_band=4) > 0.98
+        assert candidate_probability(0.1, bands=16, rows_per_band=4) < 0.01
+
+
+class TestSearch:
+    """Tests for approximate search against the exact engine."""
+
+    def test_scores_are_exact(self, library):
+        index = _build(library)
+        query = library[0][1]
+        fps = dict(library)
+
+        hits = index.search(query, threshold=0.3, limit=20)
+
+        assert hits[0][1] == 1.0
+        for mol_id, sim in hits:
+            assert sim == pytest.approx(tanimoto_similarity_bytes(query, fps[mol_id]))
+        assert [sim for _, sim in hits] == sorted((sim for _, sim in hits), reverse=True)
+
+    def test_recall_against_exact_search(self, library):
+        index = _build(library)
+        queries = [fp for _, fp in library[::25]]
+
+        assert recall_at_k(index, queries, k=5, threshold=0.6) >= 0.95
+
+    def test_exclude_and_limit(self, library):
+        index = _build(library)
+        query = library[0][1]
+
+        hits = index.search(query, threshold=0.0, limit=3, exclude_ids=[library[0][0]])
+
+        assert len(hits) == 3
+        assert library[0][0] not in {mol_id for mol_id, _ in hits}
+
+    def test_search_many_matches_single_searches(self, library):
+        index = _build(library)
+        index.insert(uuid.uuid4(), _fp([3, 4, 5, 6, 7, 8]))
+        queries = [fp for _, fp in library[::40]] + [_fp([3, 4, 5, 6, 7, 8]), b"\x01"]
+        thresholds = [0.3 + 0.05 * (i % 8) for i in range(len(queries))]
+        exclude = [library[0][0]]
+
+        results = index.search_many(queries, thresholds, limits=4, exclude_ids=exclude)
+
+        assert results[-1] == []
+        assert results[:-1] == [
+            index.search(query, threshold, 4, exclude)
+            for query, threshold in zip(queries[:-1], thresholds[:-1], strict=True)
+        ]
+
+    def test_wrong_length_query(self, library):
+        assert _build(library).search(b"\xff" * 8) == []
+
+
+class TestIncrementalUpdates:
+    """Tests for inserts, replacements and deletes on top of a built index."""
+
+    def test_insert_is_searchable(self, library):
+        index = _build(library)
+        new_id = uuid.uuid4()
+        index.insert(new_id, _fp([3, 4, 5, 6, 7, 8]))
+
+        assert len(index) == len(library) + 1
+        assert index.search(_fp([3, 4, 5, 6, 7, 8]), threshold=0.9) == [(new_id, 1.0)]
+
+    def test_replace_moves_fingerprint(self, library):
+        index = _build(library)
+        mol_id, old_fp = library[0]
+        index.insert(mol_id, _fp([400, 401, 402]))
+
+        assert len(index) == len(library)
+        assert mol_id not in {hit for hit, _ in index.search(old_fp, threshold=0.99)}
+        assert index.search(_fp([400, 401, 402]), threshold=0.99) == [(mol_id, 1.0)]
+
+    def test_delete(self, library):
+        index = _build(library)
+        mol_id, fp = library[5]
+
+        assert index.delete(mol_id) is True
+        assert index.delete(mol_id) is False
+        assert mol_id not in {hit for hit, _ in index.search(fp, threshold=0.5)}
+        assert index.pending == 1
+
+    def test_apply_changes(self, library):
+        index = _build(library)
+        new_id = uuid.uuid4()
+
+        index.apply_changes(ChangeSet(epoch=5, deltas=[
+            FingerprintDelta(library[0][0], None),
+            FingerprintDelta(library[1][0], b"\x01"),  # Other length: removed
+            FingerprintDelta(new_id, _fp([3, 4, 5, 6, 7, 8])),
+        ]))
+
+        assert index.epoch == 5
+        assert len(index) == len(library) - 1
+        assert library[0][0] not in {hit for hit, _ in index.search(library[0][1], threshold=0.5)}
+        assert index.search(_fp([3, 4, 5, 6, 7, 8]), threshold=0.9) == [(new_id, 1.0)]
+
+    def test_rejects_wrong_length(self, library):
+        with pytest.raises(ValueError, match="length mismatch"):
+            _build(library).insert(uuid.uuid4(), b"\x01")
+
+
+class TestPersistence:
+    """Tests for saving, memory-mapping and compacting generations."""
+
+    def test_save_and_load_are_memory_mapped(self, tmp_path, library):
+        index = _build(library, bands=12, rows_per_band=3, seed=5)
+        index.save(tmp_path / "morgan")
+
+        loaded = MinHashLSHIndex.load(tmp_path / "morgan")
+
+        assert (loaded.bands, loaded.rows_per_band, loaded.generation) == (12, 3, 1)
+        assert isinstance(loaded._band_keys, np.memmap)
+        query = library[42][1]
+        assert loaded.search(query, threshold=0.4) == index.search(query, threshold=0.4)
+
+    def test_save_compacts_delta(self, tmp_path, library):
+        index = _build(library[:100])
+        index.save(tmp_path)
+        index.delete(library[0][0])
+        index.insert_many(library[100:150])
+
+        index.save()
+        loaded = MinHashLSHIndex.load(tmp_path)
+
+        assert loaded.generation == 2
+        assert len(loaded) == 149
+        assert loaded.pending == 0
+        assert loaded.search(library[120][1], threshold=0.99)[0] == (library[120][0], 1.0)
+        assert library[0][0] not in {mol_id for mol_id, _ in loaded.search(library[0][1], 0.5)}
+        # Deletes against a mapped generation work without copying it
+        assert loaded.delete(library[120][0]) is True
+
+    def test_from_arena(self, tmp_path, library):
+        arena = FingerprintArena(tmp_path, "morgan")
+        ids = np.frombuffer(b"".join(mol_id.bytes for mol_id, _ in library), dtype=np.uint8)
+        words = pack_fingerprints([fp for _, fp in library], NUM_BYTES)
+        with arena._builder_lock():
+            arena.write_generation(ids.reshape(-1, 16), words, popcount_rows(words), NUM_BYTES, None)
+
+        index = MinHashLSHIndex.from_arena(arena)
+
+        assert len(index) == len(library)
+        assert index.search(library[3][1], threshold=0.99)[0] == (library[3][0], 1.0)
+
+
+class TestLSHAdapter:
+    """Tests for the FingerprintIndexAdapter wrapper."""
+
+    @pytest.mark.asyncio
+    async def test_index_search_remove(self, tmp_path, library):
+        adapter = get_fingerprint_index("lsh", directory=tmp_path, bands=20)
+        assert isinstance(adapter, LSHFingerprintIndex)
+
+        assert await adapter.bulk_index(library[:50]) == 50
+        assert await adapter.index_molecule(uuid.uuid4(), b"\x01") is False
+        matches = await adapter.search_similar(library[0][1], threshold=0.9)
+        assert matches[0].molecule_id == library[0][0]
+        assert matches[0].fingerprint_type == "morgan"
+        batch = await adapter.search_many([library[0][1], library[1][1]], thresholds=[0.9, 0.8])
+        assert batch[0] == matches
+        assert batch[1] == await adapter.search_similar(library[1][1], threshold=0.8)
+
+        assert await adapter.remove_molecule(library[0][0]) is True
+        adapter.save()
+
+        reloaded = LSHFingerprintIndex(tmp_path)
+        stats = await reloaded.get_stats()
+        assert (stats.backend, stats.total_indexed, stats.metadata["pending"]) == ("lsh", 49, 0)
+        assert await reloaded.search_similar(library[0][1], "maccs") == []
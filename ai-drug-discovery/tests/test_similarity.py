@@ -357,6 +357,17 @@ class TestFingerprintIndex:
         results = index.search(ASPIRIN)
         assert len(results) >= 1
 
+    def test_index_storage_is_packed(self):
+        """Test that fingerprints are stored as packed rows, not objects."""
+        index = FingerprintIndex(num_bits=2048)
+        index.add_many([BENZENE, TOLUENE, PHENOL] * 100)
+        index.add(ASPIRIN)
+
+        assert len(index) == 301
+        assert index.nbytes == 301 * (256 + 8)
+        assert index.fingerprint(300) == calculate_morgan_fingerprint(ASPIRIN)
+        assert index.search(ASPIRIN, threshold=0.99) == [(300, ASPIRIN, 1.0)]
+
 
 class TestEdgeCases:
     """Tests for edge cases."""
@@ -0,0 +1,345 @@
+"""Tests for the vectorized fingerprint similarity engine."""
+
+import random
+
+import numpy as np
+import pytest
+
+from packages.chemistry.features import FingerprintType, calculate_fingerprint
+from packages.chemistry.similarity import (
+    dice_similarity_bytes,
+    tanimoto_similarity_bytes,
+)
+from packages.chemistry.similarity_engine import (
+    FingerprintMatrix,
+    SimilarityMetric,
+    pack_fingerprints,
+    popcount_bounds,
+    popcount_rows,
+    rank_hits,
+    similarity_join,
+)
+
+
+def _reference_tanimoto(fp1: bytes, fp2: bytes) -> float:
+    """Byte-by-byte Tanimoto used as ground truth."""
+    bits_a = sum(bin(b).count("1") for b in fp1)
+    bits_b = sum(bin(b).count("1") for b in fp2)
+    common = sum(bin(a & b).count("1") for a, b in zip(fp1, fp2, strict=True))
+    union = bits_a + bits_b - common
+    return 1.0 if union == 0 else common / union
+
+
+def _random_fps(n: int, num_bytes: int, seed: int = 42) -> list[bytes]:
+    rng = random.Random(seed)
+    return [bytes(rng.getrandbits(8) for _ in range(num_bytes)) for _ in range(n)]
+
+
+class TestPacking:
+    """Tests for packing fingerprints into uint64 words."""
+
+    def test_pads_to_word_boundary(self):
+        """MACCS-sized fingerprints (21 bytes) are padded to 3 words."""
+        packed = pack_fingerprints([b"\x01" * 21])
+        assert packed.shape == (1, 3)
+        assert packed.dtype == np.dtype("<u8")
+
+    def test_bit_positions_preserved(self):
+        """Bit i of the byte string stays bit i of the packed row."""
+        packed = pack_fingerprints([b"\x01\x00\x00\x00\x00\x00\x00\x80"])
+        assert int(packed[0, 0]) == (1 | (1 << 63))
+
+    def test_mismatched_lengths_raise(self):
+        with pytest.raises(ValueError, match="same length"):
+            pack_fingerprints([b"\x00\x00", b"\x00"])
+
+    def test_popcount_rows(self):
+        fps = [b"\xff" * 16, b"\x00" * 16, b"\x0f" * 16]
+        assert popcount_rows(pack_fingerprints(fps)).tolist() == [128, 0, 64]
+
+
+class TestFingerprintMatrix:
+    """Tests for vectorized scoring and search."""
+
+    @pytest.mark.parametrize("num_bytes", [4, 21, 128, 256])
+    def test_matches_reference_tanimoto(self, num_bytes):
+        fps = _random_fps(50, num_bytes)
+        matrix = FingerprintMatrix.from_bytes(fps)
+        scores = matrix.scores(fps[0])
+        expected = [_reference_tanimoto(fps[0], fp) for fp in fps]
+        assert scores.tolist() == pytest.approx(expected)
+
+    def test_matches_scalar_dice(self):
+        fps = _random_fps(20, 32)
+        matrix = FingerprintMatrix.from_bytes(fps)
+        scores = matrix.scores(fps[3], SimilarityMetric.DICE)
+        expected = [dice_similarity_bytes(fps[3], fp) for fp in fps]
+        assert scores.tolist() == pytest.approx(expected)
+
+    def test_empty_vs_empty_is_one(self):
+        matrix = FingerprintMatrix.from_bytes([b"\x00" * 8])
+        assert matrix.scores(b"\x00" * 8).tolist() == [1.0]
+
+    def test_query_length_mismatch_raises(self):
+        matrix = FingerprintMatrix.from_bytes([b"\x00" * 8])
+        with pytest.raises(ValueError, match="same length"):
+            matrix.scores(b"\x00" * 4)
+
+    def test_empty_corpus(self):
+        matrix = FingerprintMatrix.from_bytes([], num_bytes=256)
+        assert len(matrix) == 0
+        assert matrix.search(b"\x00" * 256) == []
+
+    def test_search_threshold_and_order(self):
+        fps = _random_fps(100, 16, seed=7)
+        matrix = FingerprintMatrix.from_bytes(fps)
+        hits = matrix.search(fps[10], threshold=0.3)
+
+        expected = sorted(
+            (
+                (i, _reference_tanimoto(fps[10], fp))
+                for i, fp in enumerate(fps)
+                if _reference_tanimoto(fps[10], fp) >= 0.3
+            ),
+            key=lambda x: x[1],
+            reverse=True,
+        )
+        assert [i for i, _ in hits] == [i for i, _ in expected]
+        assert hits[0] == (10, 1.0)
+
+    def test_search_top_k(self):
+        fps = _random_fps(100, 16, seed=3)
+        matrix = FingerprintMatrix.from_bytes(fps)
+        full = matrix.search(fps[0])
+        assert matrix.search(fps[0], top_k=5) == full[:5]
+
+    def test_real_fingerprints(self):
+        smiles = ["CCO", "CCCO", "c1ccccc1", "Cc1ccccc1", "CC(=O)Oc1ccccc1C(=O)O"]
+        fps = [calculate_fingerprint(s, FingerprintType.MORGAN).bytes_data for s in smiles]
+        matrix = FingerprintMatrix.from_bytes(fps)
+        for query in fps:
+            expected = [tanimoto_similarity_bytes(query, fp) for fp in fps]
+            assert matrix.scores(query).tolist() == pytest.approx(expected)
+
+
+class TestPopcountBuckets:
+    """Tests for popcount-bounded candidate pruning."""
+
+    def test_tanimoto_bounds(self):
+        assert popcount_bounds(100, 0.9) == (90, 111)
+        assert popcount_bounds(100, 1.0) == (100, 100)
+
+    def test_dice_bounds(self):
+        low, high = popcount_bounds(100, 0.9, SimilarityMetric.DICE)
+        assert (low, high) == (82, 122)
+
+    def test_zero_threshold_does_not_prune(self):
+        assert popcount_bounds(50, 0.0) == (0, float("inf"))
+
+    def test_bound_is_exact_at_edges(self):
+        """A candidate exactly on the bound can still reach the threshold."""
+        query = b"\xff" * 9 + b"\x00" * 7  # 72 bits
+        subset = b"\xff" * 8 + b"\x00" * 8  # 64 bits, Tanimoto = 64/72
+        matrix = FingerprintMatrix.from_bytes([subset], bucketed=True)
+        assert matrix.search(query, threshold=64 / 72) == [(0, 1.0 * 64 / 72)]
+
+    @pytest.mark.parametrize("threshold", [0.0, 0.3, 0.6, 0.9])
+    @pytest.mark.parametrize("metric", list(SimilarityMetric))
+    def test_bucketed_search_matches_full_scan(self, threshold, metric):
+        rng = random.Random(11)
+        # Vary density so popcounts spread across many buckets
+        fps = [
+            bytes(rng.getrandbits(8) & rng.choice([0x01, 0x11, 0x55, 0xFF]) for _ in range(32))
+            for _ in range(300)
+        ]
+        full = FingerprintMatrix.from_bytes(fps)
+        bucketed = FingerprintMatrix.from_bytes(fps, bucketed=True)
+
+        for query in fps[:20]:
+            assert bucketed.search(query, threshold, metric=metric) == full.search(
+                query, threshold, metric=metric
+            )
+            assert bucketed.search(query, threshold, top_k=5, metric=metric) == full.search(
+                query, threshold, top_k=5, metric=metric
+            )
+
+    @pytest.mark.parametrize("bucketed", [False, True])
+    def test_search_in_small_blocks_matches_scores(self, monkeypatch, bucketed):
+        import packages.chemistry.similarity_engine as engine
+
+        monkeypatch.setattr(engine, "SEARCH_BLOCK_ROWS", 7)
+        # Short fingerprints tie often, so pruning must keep ties at the k-th score
+        fps = _random_fps(200, 2, seed=8)
+        matrix = FingerprintMatrix.from_bytes(fps, bucketed=bucketed)
+
+        for query in fps[:10]:
+            scores = matrix.scores(query)
+            assert matrix.search(query, 0.2) == rank_hits(scores, 0.2)
+            assert matrix.search(query, 0.0, top_k=3) == rank_hits(scores, 0.0, 3)
+
+    def test_bucketed_scores_in_caller_order(self):
+        fps = _random_fps(50, 16, seed=5)
+        full = FingerprintMatrix.from_bytes(fps)
+        bucketed = FingerprintMatrix.from_bytes(fps, bucketed=True)
+        assert bucketed.scores(fps[0]).tolist() == full.scores(fps[0]).tolist()
+
+    def test_high_threshold_window_is_narrow(self):
+        rng = random.Random(2)
+        fps = []
+        for _ in range(1000):
+            # Spread popcounts uniformly over the 2048-bit range
+            on_bits = rng.sample(range(2048), rng.randint(0, 2048))
+            fps.append(sum(1 << bit for bit in on_bits).to_bytes(256, "little"))
+        matrix = FingerprintMatrix.from_bytes(fps, bucketed=True)
+        start, end = matrix.candidate_window(1024, 0.9)
+        assert end - start < len(matrix) * 0.25
+
+
+class TestSimilarityJoin:
+    """Tests for the blocked many-vs-many join."""
+
+    def _brute_force(self, queries, corpus, threshold):
+        pairs = [
+            (qi, ti, _reference_tanimoto(q, t))
+            for qi, q in enumerate(queries)
+            for ti, t in enumerate(corpus)
+            if _reference_tanimoto(q, t) >= threshold
+        ]
+        return sorted(pairs, key=lambda p: (p[0], -p[2], p[1]))
+
+    @pytest.mark.parametrize("block_rows", [None, 1, 7, 1000])
+    @pytest.mark.parametrize("bucketed", [False, True])
+    def test_matches_brute_force(self, block_rows, bucketed):
+        corpus_fps = _random_fps(120, 24, seed=21)
+        # Queries include exact corpus members and unrelated fingerprints
+        queries = corpus_fps[:5] + _random_fps(5, 24, seed=99)
+        corpus = FingerprintMatrix.from_bytes(corpus_fps, bucketed=bucketed)
+
+        pairs = similarity_join(queries, corpus, threshold=0.4, block_rows=block_rows)
+        expected = self._brute_force(queries, corpus_fps, 0.4)
+
+        assert [(q, t) for q, t, _ in pairs] == [(q, t) for q, t, _ in expected]
+        assert [s for _, _, s in pairs] == pytest.approx([s for _, _, s in expected])
+
+    def test_every_query_finds_itself(self):
+        fps = _random_fps(50, 32, seed=8)
+        pairs = similarity_join(fps, FingerprintMatrix.from_bytes(fps), threshold=0.99)
+        assert [(q, t) for q, t, _ in pairs] == [(i, i) for i in range(50)]
+
+    def test_empty_inputs(self):
+        corpus = FingerprintMatrix.from_bytes(_random_fps(3, 8))
+        assert similarity_join([], corpus, threshold=0.5) == []
+        empty = FingerprintMatrix.from_bytes([], num_bytes=8)
+        assert similarity_join([b"\x00" * 8], empty, threshold=0.5) == []
+
+    def test_length_mismatch_raises(self):
+        corpus = FingerprintMatrix.from_bytes(_random_fps(3, 8))
+        with pytest.raises(ValueError, match="same length"):
+            similarity_join([b"\x00" * 16], corpus, threshold=0.5)
+
+
+class TestSearchMany:
+    """Tests for batched search with per-query thresholds and top-k."""
+
+    @pytest.mark.parametrize("block_rows", [None, 1, 13])
+    @pytest.mark.parametrize("bucketed", [False, True])
+    @pytest.mark.parametrize("packed_queries", [0, 16])
+    def test_matches_search_per_query(self, monkeypatch, block_rows, bucketed, packed_queries):
+        import packages.chemistry.similarity_engine as engine
+
+        # 0 forces the unpacked float32 kernel for this 12-query batch
+        monkeypatch.setattr(engine, "SEARCH_MANY_PACKED_QUERIES", packed_queries)
+        corpus_fps = _random_fps(150, 8, seed=5)
+        corpus = FingerprintMatrix.from_bytes(corpus_fps, bucketed=bucketed)
+        queries = corpus_fps[:6] + _random_fps(6, 8, seed=77)
+        rng = random.Random(3)
+        thresholds = [rng.choice([0.0, 0.2, 0.35, 0.5]) for _ in queries]
+        limits = [rng.choice([0, 1, 3, 10]) for _ in queries]
+
+        results = corpus.search_many(queries, thresholds, limits, block_rows=block_rows)
+
+        assert results == [
+            corpus.search(query, threshold, limit)
+            for query, threshold, limit in zip(queries, thresholds, limits, strict=True)
+        ]
+
+    def test_running_top_k_trims_buffered_hits(self, monkeypatch):
+        import packages.chemistry.similarity_engine as engine
+
+        monkeypatch.setattr(engine, "SEARCH_MANY_TRIM_PAIRS", 4)
+        # Short fingerprints tie often; ties must resolve by row index
+        corpus_fps = _random_fps(300, 2, seed=11)
+        corpus = FingerprintMatrix.from_bytes(corpus_fps, bucketed=True)
+        queries = _random_fps(20, 2, seed=12)
+
+        results = corpus.search_many(queries, threshold=0.1, top_k=5, block_rows=16)
+
+        assert results == [corpus.search(query, 0.1, 5) for query in queries]
+
+    def test_single_query_peak_memory_is_bounded(self):
+        import tracemalloc
+
+        # 50k Morgan-sized rows: unpacking them to float32 bits would take 400 MB
+        rng = np.random.default_rng(0)
+        words = rng.integers(0, 2**63, size=(50_000, 32), dtype=np.uint64)
+        corpus = FingerprintMatrix(words, num_bytes=256)
+        query = words[7].tobytes()
+
+        tracemalloc.start()
+        try:
+            hits = corpus.search_many([query], threshold=0.3, top_k=5)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert hits == [corpus.search(query, 0.3, 5)]
+        assert hits[0][0] == (7, 1.0)
+        assert peak < 16 * 1024 * 1024
+
+    def test_shared_threshold_without_limit(self):
+        corpus_fps = _random_fps(80, 16, seed=2)
+        corpus = FingerprintMatrix.from_bytes(corpus_fps)
+        queries = corpus_fps[:3]
+
+        results = corpus.search_many(queries, threshold=0.4)
+
+        assert results == [corpus.search(query, 0.4) for query in queries]
+        assert all(hits[0] == (i, 1.0) for i, hits in enumerate(results))
+
+    def test_dice_metric(self):
+        corpus_fps = _random_fps(40, 8, seed=4)
+        corpus = FingerprintMatrix.from_bytes(corpus_fps)
+        queries = _random_fps(4, 8, seed=40)
+
+        results = corpus.search_many(queries, 0.5, 3, metric=SimilarityMetric.DICE)
+
+        assert results == [
+            corpus.search(query, 0.5, 3, metric=SimilarityMetric.DICE) for query in queries
+        ]
+
+    def test_empty_inputs_and_length_mismatch(self):
+        corpus = FingerprintMatrix.from_bytes(_random_fps(3, 8))
+        assert corpus.search_many([], 0.5) == []
+        empty = FingerprintMatrix.from_bytes([], num_bytes=8)
+        assert empty.search_many([b"\x00" * 8], 0.5) == [[]]
+        with pytest.raises(ValueError, match="same length"):
+            corpus.search_many([b"\x00" * 16], 0.5)
+
+
+class TestRankHits:
+    """Tests for deterministic hit ranking."""
+
+    def test_ties_ordered_by_index(self):
+        scores = np.array([0.5, 0.9, 0.5, 0.9, 0.1])
+        assert rank_hits(scores) == [(1, 0.9), (3, 0.9), (0, 0.5), (2, 0.5), (4, 0.1)]
+
+    def test_top_k_with_ties_at_cutoff(self):
+        scores = np.array([0.5, 0.9, 0.5, 0.5])
+        assert rank_hits(scores, top_k=2) == [(1, 0.9), (0, 0.5)]
+
+    def test_top_k_zero(self):
+        assert rank_hits(np.array([0.5, 0.9]), top_k=0) == []
+
+    def test_custom_indices(self):
+        scores = np.array([0.2, 0.8])
+        assert rank_hits(scores, indices=np.array([10, 20])) == [(20, 0.8), (10, 0.2)]
@@ -0,0 +1,171 @@
+"""Tests for the columnar validation artifact file shared by upload phases."""
+
+import io
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+
+from apps.api.uploads.artifacts import (
+    ARTIFACT_MAGIC,
+    ArtifactWriter,
+    _encode_varlen,
+    decode_segment,
+    encode_segment,
+    iter_artifact_batches,
+)
+from apps.api.uploads.compute import ParsedRow, compute_rows
+from apps.api.uploads.error_codes import UploadErrorCode
+from apps.api.uploads.error_sink import UploadErrorSink
+
+SMILES = ["CCO", "", "not_a_smiles", "c1ccccc1", "CC(=O)Oc1ccccc1C(=O)O", "CCO"]
+VERDICTS = [None, None, None, "exact", "similar", "batch"]
+
+
+async def _chunks(data):
+    yield data
+
+
+@pytest.fixture
+def results():
+    rows = [
+        ParsedRow(i + 2, smiles, None, None, {"smiles": smiles, "Name": f"cpd-{i}", "µ": "ü"})
+        for i, smiles in enumerate(SMILES)
+    ]
+    return compute_rows(rows)
+
+
+class TestSegmentEncoding:
+    """Tests for encoding a batch into a columnar segment."""
+
+    def test_roundtrip_is_lossless(self, results):
+        decoded, verdicts = decode_segment(encode_segment(results, VERDICTS))
+        assert decoded == results
+        assert verdicts == VERDICTS
+
+    def test_fingerprints_and_descriptors_survive(self, results):
+        decoded, _ = decode_segment(encode_segment(results, VERDICTS))
+        aspirin = decoded[4]
+        assert aspirin.fingerprint_morgan == results[4].fingerprint_morgan
+        assert aspirin.fingerprint_rdkit == results[4].fingerprint_rdkit
+        assert aspirin.descriptors["molecular_weight"] == results[4].descriptors["molecular_weight"]
+        assert isinstance(aspirin.descriptors["hbd"], int)
+
+    def test_invalid_rows_keep_error_codes(self, results):
+        decoded, _ = decode_segment(encode_segment(results, VERDICTS))
+        assert decoded[1].error_code == results[1].error_code
+        assert decoded[2].error_detail == results[2].error_detail
+        assert decoded[1].fingerprint_morgan is None and decoded[1].descriptors is None
+
+    def test_segment_is_compact(self, results):
+        # Fingerprints are stored packed; fixed per-column overhead amortizes
+        batch = results * 50
+        segment = encode_segment(batch, VERDICTS * 50)
+        ascii_size = sum(8 * len(r.fingerprint_rdkit or b"") for r in batch)
+        assert len(segment) < ascii_size
+
+    def test_legacy_bitstring_segment_is_repacked(self, results):
+        # Older segments held ASCII bit strings, big-endian packed, plus a
+        # .bits length column
+        with np.load(io.BytesIO(encode_segment(results, VERDICTS))) as npz:
+            columns = {name: npz[name] for name in npz.files}
+        for name, num_bits in (("fingerprint_maccs", 167), ("fingerprint_rdkit", 2048)):
+            legacy = [
+                None if r.is_valid is False else np.packbits(
+                    np.unpackbits(np.frombuffer(getattr(r, name), dtype=np.uint8), bitorder="little")[:num_bits]
+                ).tobytes()
+                for r in results
+            ]
+            columns.update({f"{name}.{key}": array for key, array in _encode_varlen(legacy).items()})
+            columns[f"{name}.bits"] = np.array([num_bits * (v is not None) for v in legacy], dtype=np.int32)
+        buffer = io.BytesIO()
+        np.savez(buffer, **columns)
+
+        decoded, _ = decode_segment(buffer.getvalue())
+        assert decoded == results
+
+
+class TestArtifactFile:
+    """Tests for writing and streaming artifact files."""
+
+    def test_batches_stream_in_order(self, results):
+        writer = ArtifactWriter()
+        writer.write_batch(results[:2], VERDICTS[:2])
+        writer.write_batch([], [])
+        writer.write_batch(results[2:], VERDICTS[2:])
+        data = writer.getfile().read()
+        writer.close()
+
+        batches = list(iter_artifact_batches(io.BytesIO(data)))
+        assert [len(batch) for batch, _ in batches] == [2, 4]
+        assert [r for batch, _ in batches for r in batch] == results
+        assert [v for _, verdicts in batches for v in verdicts] == VERDICTS
+
+    def test_rejects_foreign_file(self):
+        with pytest.raises(ValueError, match="Not an upload artifact"):
+            list(iter_artifact_batches(io.BytesIO(b"smiles\nCCO\n")))
+
+    def test_rejects_truncated_file(self, results):
+        writer = ArtifactWriter()
+        writer.write_batch(results, VERDICTS)
+        data = writer.getfile().read()
+        writer.close()
+
+        with pytest.raises(ValueError, match="Truncated"):
+            list(iter_artifact_batches(io.BytesIO(data[:-10])))
+        with pytest.raises(ValueError, match="Truncated"):
+            list(iter_artifact_batches(io.BytesIO(ARTIFACT_MAGIC + b"\x01\x00")))
+
+
+class TestInsertionUsesArtifacts:
+    """Tests for UploadProcessor streaming artifacts instead of recomputing."""
+
+    @pytest.mark.asyncio
+    async def test_artifacts_replace_parsing(self, results):
+        from apps.api.uploads.tasks import UploadProcessor
+
+        writer = ArtifactWriter()
+        writer.write_batch(results, VERDICTS)
+        service = MagicMock()
+        service.get_upload_artifacts = AsyncMock(return_value=io.BytesIO(writer.getfile().read()))
+        service.iter_upload_file_chunks = MagicMock()
+        writer.close()
+
+        processor = UploadProcessor(db=MagicMock(), service=service)
+        batches = [batch async for batch in processor._iter_computed_batches(MagicMock(), set())]
+
+        assert batches == [(results, VERDICTS)]
+        service.iter_upload_file_chunks.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_parsing(self):
+        from apps.api.uploads.service import UploadService
+        from apps.api.uploads.tasks import UploadProcessor
+        from db.models.upload import FileType
+
+        service = UploadService(db=MagicMock(), storage=MagicMock())
+        service.get_upload_artifacts = AsyncMock(return_value=None)
+        service.iter_upload_file_chunks = MagicMock(return_value=_chunks(b"CCO\nnot_a_smiles\nc1ccccc1\n"))
+
+        processor = UploadProcessor(db=MagicMock(), service=service)
+        upload = MagicMock(
+            id=uuid.uuid4(),
+            file_type=FileType.SMILES_LIST,
+            progress=SimpleNamespace(error_counts=None),
+        )
+        batches = [batch async for batch in processor._iter_computed_batches(upload, set())]
+
+        assert len(batches) == 1
+        recomputed, verdicts = batches[0]
+        assert [r.canonical_smiles for r in recomputed] == ["CCO", None, "c1ccccc1"]
+        assert verdicts is None
+
+        # The re-validated row error goes to the upload's sink, written at the phase boundary
+        sink = service.error_sink(upload)
+        assert len(sink) == 1
+        with patch.object(UploadErrorSink, "flush", AsyncMock()) as flush:
+            await service.flush_row_errors(upload)
+        flush.assert_awaited_once()
+        assert upload.progress.error_counts == {UploadErrorCode.INVALID_SMILES.value: 1}
@@ -0,0 +1,130 @@
+"""Tests for the multi-row molecule insertion stage of UploadProcessor."""
+
+import uuid
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from apps.api.uploads.compute import validate_row
+from apps.api.uploads.tasks import (
+    MOLECULE_DESCRIPTOR_COLUMNS,
+    MOLECULE_FINGERPRINT_COLUMNS,
+    ParsedRow,
+    UploadProcessor,
+)
+
+
+class FakeSession:
+    """Records INSERT statements and answers RETURNING from a key filter."""
+
+    def __init__(self, existing_keys=(), failing_keys=()):
+        self.existing_keys = set(existing_keys)
+        self.failing_keys = set(failing_keys)
+        self.statements = []
+
+    @asynccontextmanager
+    async def begin_nested(self):
+        yield
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        params = stmt.compile(dialect=postgresql.dialect()).params
+        keys = [value for name, value in params.items() if name.startswith("inchi_key")]
+        ids = [value for name, value in params.items() if name.startswith("id_") or name == "id"]
+        if self.failing_keys & set(keys):
+            raise ValueError("value too long for type character varying(255)")
+        return [
+            SimpleNamespace(inchi_key=key, id=mol_id)
+            for key, mol_id in zip(keys, ids, strict=True)
+            if key not in self.existing_keys
+        ]
+
+
+@pytest.fixture
+def upload():
+    return MagicMock(
+        id=uuid.uuid4(),
+        organization_id=uuid.uuid4(),
+        created_by=uuid.uuid4(),
+    )
+
+
+def _processor(db):
+    service = MagicMock()
+    service.add_row_error = AsyncMock()
+    return UploadProcessor(db=db, service=service)
+
+
+def _results(smiles_list):
+    return [
+        validate_row(ParsedRow(i + 1, smiles, None, None, {"name": smiles}))
+        for i, smiles in enumerate(smiles_list)
+    ]
+
+
+class TestMoleculeValues:
+    """Tests for building insert rows."""
+
+    @pytest.mark.asyncio
+    async def test_rows_have_uniform_keys_and_descriptors(self, upload):
+        processor = _processor(FakeSession())
+        results = _results(["CCO", "c1ccccc1"])
+        rows = [processor._molecule_values(upload, r) for r in results]
+
+        assert rows[0].keys() == rows[1].keys()
+        assert set(MOLECULE_DESCRIPTOR_COLUMNS) <= rows[0].keys()
+        assert set(MOLECULE_FINGERPRINT_COLUMNS) <= rows[0].keys()
+        assert rows[0]["hbd"] == 1
+        assert rows[1]["num_aromatic_rings"] == 1
+        assert rows[0]["fingerprint_morgan"] == results[0].fingerprint_morgan
+        assert rows[0]["metadata_"]["source_row_number"] == 1
+        assert rows[0]["name"] == "CCO"
+
+
+class TestInsertMolecules:
+    """Tests for _insert_molecules."""
+
+    @pytest.mark.asyncio
+    async def test_single_statement_per_chunk(self, upload):
+        db = FakeSession()
+        processor = _processor(db)
+        processor.INSERT_BATCH_SIZE = 2
+        results = _results(["CCO", "CCN", "CCC"])
+
+        outcome = await processor._insert_molecules(upload, results)
+
+        assert len(db.statements) == 2
+        assert [r.row_number for r, _ in outcome.inserted] == [1, 2, 3]
+        assert outcome.conflicts == [] and outcome.failed == []
+        sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT ON CONSTRAINT uq_molecule_org_inchikey DO NOTHING" in sql
+        assert "RETURNING molecules.id, molecules.inchi_key" in sql
+
+    @pytest.mark.asyncio
+    async def test_conflicting_keys_are_reported(self, upload):
+        processor = _processor(None)
+        results = _results(["CCO", "CCN"])
+        processor.db = FakeSession(existing_keys={results[1].inchi_key})
+
+        outcome = await processor._insert_molecules(upload, results)
+
+        assert [r.row_number for r, _ in outcome.inserted] == [1]
+        assert [r.row_number for r in outcome.conflicts] == [2]
+
+    @pytest.mark.asyncio
+    async def test_failed_chunk_is_retried_per_row(self, upload):
+        processor = _processor(None)
+        results = _results(["CCO", "CCN", "CCC"])
+        db = processor.db = FakeSession(failing_keys={results[1].inchi_key})
+
+        outcome = await processor._insert_molecules(upload, results)
+
+        # One failed multi-row statement, then one per row
+        assert len(db.statements) == 4
+        assert [r.row_number for r, _ in outcome.inserted] == [1, 3]
+        assert [r.row_number for r in outcome.failed] == [2]
+        processor.service.add_row_error.assert_awaited_once()
+        assert processor.service.add_row_error.await_args.args[1] == 2
@@ -0,0 +1,225 @@
+"""Tests for checkpointed, resumable upload insertion."""
+
+import io
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from arq import Retry
+
+from apps.api.uploads.artifacts import ArtifactWriter
+from apps.api.uploads.compute import ParsedRow, compute_rows, validate_rows
+from apps.api.uploads.tasks import (
+    BulkInsertResult,
+    InsertionTotals,
+    UploadCheckpointed,
+    UploadProcessor,
+)
+from db.models.upload import DuplicateAction, FileType
+
+SMILES = ["CCO", "c1ccccc1", "CCN", "CCCl", "CC(=O)O"]
+
+
+async def _chunks(data):
+    yield data
+
+
+@pytest.fixture
+def results():
+    return compute_rows([ParsedRow(i + 1, smiles, None, None, {}) for i, smiles in enumerate(SMILES)])
+
+
+def _upload(checkpoint=None):
+    return MagicMock(
+        id=uuid.uuid4(),
+        organization_id=uuid.uuid4(),
+        duplicate_action=DuplicateAction.SKIP,
+        file_type=FileType.SMILES_LIST,
+        progress=SimpleNamespace(checkpoint=checkpoint),
+    )
+
+
+def _processor(batches, inserted_keys=()):
+    db = MagicMock(commit=AsyncMock(), rollback=AsyncMock())
+    service = MagicMock(
+        save_checkpoint=AsyncMock(),
+        get_inserted_inchi_keys=AsyncMock(return_value=set(inserted_keys)),
+        delete_upload_artifacts=AsyncMock(),
+        complete_processing=AsyncMock(),
+        fail_upload=AsyncMock(),
+    )
+    processor = UploadProcessor(db=db, service=service)
+    skipped = []
+
+    async def computed(upload, seen, skip_rows=0):
+        skipped.append(skip_rows)
+        for batch in batches:
+            yield batch, None
+
+    async def insert(upload, to_insert):
+        return BulkInsertResult([(r, uuid.uuid4()) for r in to_insert], [], [])
+
+    processor._iter_computed_batches = computed
+    processor._check_duplicates_batch = AsyncMock(side_effect=lambda u, r, seen, **kw: [None] * len(r))
+    processor._insert_molecules = insert
+    processor.skipped = skipped
+    return processor
+
+
+class TestInsertionTotals:
+    """Tests for the checkpoint payload."""
+
+    def test_roundtrip(self):
+        totals = InsertionTotals(processed_rows=40, molecules_created=35, errors_count=5, elapsed_seconds=1.5)
+
+        assert InsertionTotals.from_checkpoint(totals.to_checkpoint()) == totals
+
+    def test_missing_or_foreign_checkpoint_starts_from_zero(self):
+        validating = {"phase": "validating", "totals": {"processed_rows": 9}}
+
+        assert InsertionTotals.from_checkpoint(None) == InsertionTotals()
+        assert InsertionTotals.from_checkpoint(validating) == InsertionTotals()
+
+
+class TestSkipRows:
+    """Tests for resuming the computed row stream."""
+
+    @pytest.mark.asyncio
+    async def test_artifact_rows_are_skipped_across_batches(self, results):
+        writer = ArtifactWriter()
+        writer.write_batch(results[:2], [None, None])
+        writer.write_batch(results[2:], [None, None, None])
+        service = MagicMock(get_upload_artifacts=AsyncMock(return_value=io.BytesIO(writer.getfile().read())))
+        writer.close()
+
+        processor = UploadProcessor(db=MagicMock(), service=service)
+        batches = [b async for b in processor._iter_computed_batches(MagicMock(), set(), skip_rows=3)]
+
+        assert [[r.canonical_smiles for r in rows] for rows, _ in batches] == [["CCCl", "CC(=O)O"]]
+        assert batches[0][1] == [None, None]
+
+    @pytest.mark.asyncio
+    async def test_skipped_rows_are_not_revalidated(self):
+        service = MagicMock(
+            get_upload_artifacts=AsyncMock(return_value=None),
+            iter_upload_file_chunks=MagicMock(return_value=_chunks(b"CCO\nc1ccccc1\nCCN\n")),
+        )
+        processor = UploadProcessor(db=MagicMock(), service=service)
+
+        upload = MagicMock(file_type=FileType.SMILES_LIST)
+        with patch("apps.api.uploads.compute.validate_rows", wraps=validate_rows) as validate:
+            batches = [b async for b in processor._iter_computed_batches(upload, set(), skip_rows=2)]
+
+        assert [[r.canonical_smiles for r in rows] for rows, _ in batches] == [["CCN"]]
+        assert [[row.smiles for row in call.args[0]] for call in validate.call_args_list] == [["CCN"]]
+
+
+class TestCheckpointedInsertion:
+    """Tests for UploadProcessor.process_insertion checkpoints."""
+
+    @pytest.mark.asyncio
+    async def test_each_batch_commits_its_checkpoint(self, results):
+        processor = _processor([results[:2], results[2:]])
+        upload = _upload()
+
+        with patch("apps.api.uploads.tasks.record_inserted_molecule"):
+            await processor.process_insertion(upload)
+
+        assert processor.db.commit.await_count == 2
+        checkpoints = [c.args[1] for c in processor.service.save_checkpoint.await_args_list]
+        assert [c["totals"]["processed_rows"] for c in checkpoints] == [2, 5]
+        assert checkpoints[-1]["totals"]["molecules_created"] == 5
+        processor.service.get_inserted_inchi_keys.assert_not_awaited()
+        assert processor.service.complete_processing.await_args.kwargs["processed_rows"] == 5
+
+    @pytest.mark.asyncio
+    async def test_resumes_totals_and_seen_keys(self, results):
+        processor = _processor([results[3:]], inserted_keys={results[0].inchi_key})
+        totals = InsertionTotals(processed_rows=3, molecules_created=2, molecules_skipped=1)
+        upload = _upload(totals.to_checkpoint())
+
+        with patch("apps.api.uploads.tasks.record_inserted_molecule"):
+            await processor.process_insertion(upload)
+
+        assert processor.skipped == [3]
+        seen = processor._check_duplicates_batch.await_args.args[2]
+        assert results[0].inchi_key in seen
+        kwargs = processor.service.complete_processing.await_args.kwargs
+        assert (kwargs["processed_rows"], kwargs["molecules_created"], kwargs["molecules_skipped"]) == (5, 4, 1)
+
+    @pytest.mark.asyncio
+    async def test_deadline_stops_after_a_committed_batch(self, results):
+        processor = _processor([results[:2], results[2:]])
+
+        with patch("apps.api.uploads.tasks.record_inserted_molecule"):
+            with pytest.raises(UploadCheckpointed) as exc_info:
+                await processor.process_insertion(_upload(), deadline=0.0)
+
+        assert exc_info.value.processed_rows == 2
+        processor.db.commit.assert_awaited_once()
+        processor.service.complete_processing.assert_not_awaited()
+        processor.service.fail_upload.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_non_final_failure_leaves_upload_resumable(self, results):
+        processor = _processor([results[:2], results[2:]])
+        processor.db.commit.side_effect = [None, ConnectionError("connection reset")]
+
+        with patch("apps.api.uploads.tasks.record_inserted_molecule"):
+            with pytest.raises(ConnectionError):
+                await processor.process_insertion(_upload(), final_attempt=False)
+
+        processor.db.rollback.assert_awaited_once()
+        processor.service.fail_upload.assert_not_awaited()
+
+
+class TestWorkerRetries:
+    """Tests for the processing job's retry and continuation handling."""
+
+    @pytest.fixture
+    def job(self):
+        from apps.api.uploads import worker
+
+        upload = _upload()
+        service = MagicMock(get_upload=AsyncMock(return_value=upload), get_shards=AsyncMock(return_value=[]))
+        session = MagicMock()
+        session.__aenter__ = AsyncMock(return_value=MagicMock())
+        session.__aexit__ = AsyncMock(return_value=False)
+        with (
+            patch.object(worker, "async_session_factory", return_value=session),
+            patch.object(worker, "get_storage_backend"),
+            patch.object(worker, "UploadService", return_value=service),
+            patch.object(worker, "UploadProcessor") as processor_cls,
+            patch.object(worker, "UploadScheduler") as scheduler_cls,
+        ):
+            scheduler_cls.return_value.enqueue = AsyncMock()
+            yield worker, processor_cls.return_value, str(upload.id)
+
+    @pytest.mark.asyncio
+    async def test_failure_before_last_try_is_retried(self, job):
+        worker, processor, upload_id = job
+        processor.process_insertion = AsyncMock(side_effect=ConnectionError("db restarted"))
+
+        with pytest.raises(Retry):
+            await worker.process_upload_job({"job_try": 1, "redis": MagicMock()}, upload_id, str(uuid.uuid4()))
+
+        assert processor.process_insertion.await_args.kwargs["final_attempt"] is False
+        result = await worker.process_upload_job(
+            {"job_try": worker.WorkerSettings.max_tries, "redis": MagicMock()}, upload_id, str(uuid.uuid4())
+        )
+        assert result["status"] == "error"
+
+    @pytest.mark.asyncio
+    async def test_checkpoint_enqueues_continuation(self, job):
+        worker, processor, upload_id = job
+        processor.process_insertion = AsyncMock(side_effect=UploadCheckpointed(uuid.UUID(upload_id), 40_000))
+        redis = MagicMock(enqueue_job=AsyncMock())
+        org_id = str(uuid.uuid4())
+
+        result = await worker.process_upload_job({"job_try": 1, "redis": redis}, upload_id, org_id)
+
+        assert result == {"status": "checkpointed", "processed_rows": 40_000}
+        enqueue = worker.UploadScheduler.return_value.enqueue
+        assert enqueue.await_args.args == ("process_upload_job", upload_id, org_id)
+        assert enqueue.await_args.kwargs["queue"] == redis.default_queue_name
@@ -0,0 +1,216 @@
+"""Tests for the process-pool RDKit compute stage of upload validation."""
+
+import pickle
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from apps.api.uploads import compute
+from apps.api.uploads.compute import (
+    COMPUTE_TASKS_PER_WORKER,
+    MOLECULE_DESCRIPTOR_COLUMNS,
+    ParsedRow,
+    compute_batch,
+    compute_batches,
+    compute_rows,
+    validate_row,
+)
+from apps.api.uploads.error_codes import UploadErrorCode
+
+
+def _rows(smiles_list):
+    return [ParsedRow(i + 1, smiles, None, None, {"smiles": smiles}) for i, smiles in enumerate(smiles_list)]
+
+
+async def _batches(rows, size):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+class _CountingExecutor(ThreadPoolExecutor):
+    """Thread pool recording how many submitted tasks are unfinished at once."""
+
+    def __init__(self, max_workers):
+        super().__init__(max_workers=max_workers)
+        self._count_lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def submit(self, fn, /, *args, **kwargs):
+        with self._count_lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        future = super().submit(fn, *args, **kwargs)
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, future):
+        with self._count_lock:
+            self.in_flight -= 1
+
+
+def _slow_compute_rows(rows):
+    time.sleep(0.01)
+    return compute_rows(rows)
+
+
+MIXED = ["CCO", "", "not_a_smiles", "c1ccccc1", "C" * 2001, "CC(=O)Oc1ccccc1C(=O)O"]
+
+
+class TestValidateRow:
+    """Tests for single-row validation."""
+
+    def test_valid_row_has_features(self):
+        result = validate_row(_rows(["CCO"])[0])
+        assert result.is_valid
+        assert result.inchi_key == "LFQSCWFLJHTTHZ-UHFFFAOYSA-N"
+        assert len(result.fingerprint_morgan) == 256
+        assert len(result.fingerprint_maccs) == 21  # Packed, not one byte per bit
+        assert len(result.fingerprint_rdkit) == 256
+        assert set(result.descriptors) == set(MOLECULE_DESCRIPTOR_COLUMNS)
+        assert result.descriptors["hbd"] == 1
+
+    def test_batched_features_match_single_molecule(self):
+        from rdkit import Chem
+
+        from packages.chemistry import (
+            calculate_maccs_fingerprint,
+            calculate_morgan_fingerprint,
+            calculate_rdkit_fingerprint,
+        )
+
+        results = compute_rows(_rows(MIXED))
+        for smiles, result in zip(MIXED, results, strict=True):
+            if not result.is_valid:
+                assert result.fingerprint_morgan is None and result.descriptors is None
+                continue
+            mol = Chem.MolFromSmiles(smiles)
+            assert result.fingerprint_morgan == calculate_morgan_fingerprint(mol).bytes_data
+            assert result.fingerprint_maccs == calculate_maccs_fingerprint(mol).bytes_data
+            assert result.fingerprint_rdkit == calculate_rdkit_fingerprint(mol).bytes_data
+
+    @pytest.mark.parametrize(
+        "smiles,error_code",
+        [
+            ("", UploadErrorCode.MISSING_REQUIRED_FIELD),
+            ("C" * 2001, UploadErrorCode.SMILES_TOO_LONG),
+            ("not_a_smiles", UploadErrorCode.INVALID_SMILES),
+        ],
+    )
+    def test_error_codes(self, smiles, error_code):
+        result = validate_row(_rows([smiles])[0])
+        assert not result.is_valid
+        assert result.error_code == error_code
+
+
+class TestComputeRows:
+    """Tests for the worker-process entry point."""
+
+    def test_results_are_compact_and_picklable(self):
+        results = compute_rows(_rows(MIXED))
+        assert all(result.mol is None for result in results)
+        assert pickle.loads(pickle.dumps(results)) == results
+
+
+class TestComputeBatch:
+    """Tests for fanning batches out to an executor."""
+
+    @pytest.mark.asyncio
+    async def test_inline_keeps_mol(self):
+        results = await compute_batch(_rows(["CCO"]))
+        assert results[0].mol is not None
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("chunk_size", [1, 2, 50])
+    async def test_executor_preserves_order_and_errors(self, chunk_size):
+        rows = _rows(MIXED)
+        expected = compute_rows(rows)
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            results = await compute_batch(rows, executor, chunk_size=chunk_size)
+        assert results == expected
+        assert [r.row_number for r in results] == list(range(1, len(MIXED) + 1))
+
+    @pytest.mark.asyncio
+    async def test_process_pool(self):
+        rows = _rows(MIXED)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            results = await compute_batch(rows, executor, chunk_size=2)
+        assert results == compute_rows(rows)
+
+
+class TestComputeBatches:
+    """Tests for keeping the executor busy across a stream of batches."""
+
+    @pytest.mark.asyncio
+    async def test_inline_yields_each_batch(self):
+        rows = _rows(MIXED)
+        results = [r async for r in compute_batches(_batches(rows, 4))]
+        assert [len(r) for r in results] == [4, 2]
+        assert results[0][0].mol is not None
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("chunk_size,max_pending", [(1, 1), (2, 3), (50, 2)])
+    async def test_preserves_batches_and_order(self, chunk_size, max_pending):
+        rows = _rows(MIXED * 3)
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            results = [
+                r async for r in compute_batches(_batches(rows, 5), executor, chunk_size, max_pending)
+            ]
+        assert [len(r) for r in results] == [5, 5, 5, 3]
+        assert [r for batch in results for r in batch] == compute_rows(rows)
+
+    @pytest.mark.asyncio
+    async def test_keeps_window_of_chunks_in_flight(self):
+        rows = _rows(["CCO"] * 1000)
+        workers = 4
+        in_flight_at_yield = []
+        with (
+            _CountingExecutor(workers) as executor,
+            patch.object(compute, "compute_rows", _slow_compute_rows),
+        ):
+            async for _ in compute_batches(_batches(rows, 100), executor, chunk_size=10):
+                in_flight_at_yield.append(executor.in_flight)
+
+        assert executor.max_in_flight == COMPUTE_TASKS_PER_WORKER * workers
+        # Later chunks compute while the caller handles a batch
+        assert in_flight_at_yield[0] > 0
+
+    @pytest.mark.asyncio
+    async def test_processor_fans_out_beyond_one_parse_batch(self):
+        from apps.api.uploads.tasks import UploadProcessor
+
+        rows = _rows(["CCO"] * 1000)
+        workers = 4
+        with (
+            _CountingExecutor(workers) as executor,
+            patch.object(compute, "compute_rows", _slow_compute_rows),
+        ):
+            processor = UploadProcessor(db=MagicMock(), service=MagicMock(), executor=executor)
+            batches = _batches(rows, processor.PARSE_BATCH_SIZE)
+            results = [r async for r in processor._iter_validated_batches(MagicMock(), batches)]
+
+        assert sum(len(r) for r in results) == len(rows)
+        assert executor.max_in_flight == COMPUTE_TASKS_PER_WORKER * workers
+        assert executor.max_in_flight > processor.PARSE_BATCH_SIZE // processor.VALIDATE_BATCH_SIZE
+
+    @pytest.mark.asyncio
+    async def test_compute_error_cancels_pending_chunks(self):
+        calls = 0
+
+        def failing(rows):
+            nonlocal calls
+            calls += 1
+            time.sleep(0.01)
+            raise RuntimeError("worker died")
+
+        with (
+            ThreadPoolExecutor(max_workers=1) as executor,
+            patch.object(compute, "compute_rows", failing),
+        ):
+            with pytest.raises(RuntimeError):
+                async for _ in compute_batches(_batches(_rows(["C"] * 100), 10), executor, 10, 5):
+                    pass
+        assert calls < 10
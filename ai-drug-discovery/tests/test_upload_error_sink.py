@@ -0,0 +1,173 @@
+"""Tests for buffered COPY writes of upload row errors."""
+
+import json
+import uuid
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+import apps.api.auth.models  # noqa: F401  (registers Organization for the mapper)
+from apps.api.uploads.error_codes import UploadErrorCode
+from apps.api.uploads.error_sink import COPY_COLUMNS, UploadErrorSink, truncate_raw_data
+from apps.api.uploads.service import UploadService
+from db.models.upload import UploadStatus
+
+UPLOAD_ID = uuid.uuid4()
+
+
+def _session(driver):
+    connection = MagicMock()
+    connection.execute = AsyncMock()
+    connection.get_raw_connection = AsyncMock(return_value=SimpleNamespace(driver_connection=driver))
+    db = MagicMock()
+    db.connection = AsyncMock(return_value=connection)
+    db.execute = AsyncMock()
+    db.commit = AsyncMock()
+    return db, connection
+
+
+def _asyncpg(in_transaction=True):
+    return MagicMock(
+        copy_records_to_table=AsyncMock(),
+        is_in_transaction=MagicMock(return_value=in_transaction),
+    )
+
+
+class TestTruncation:
+    """Tests for raw_data truncation."""
+
+    def test_long_strings_are_cut_once(self):
+        data = truncate_raw_data({"smiles": "C" * 150, "n": 3, "name": "short"})
+
+        assert data["smiles"] == "C" * 100 + "..."
+        assert (data["n"], data["name"]) == (3, "short")
+        assert truncate_raw_data({}) is None
+
+
+class TestUploadErrorSink:
+    """Tests for buffering and COPY writes."""
+
+    @pytest.mark.asyncio
+    async def test_copies_in_chunks_and_counts_codes(self):
+        driver = _asyncpg()
+        db, _ = _session(driver)
+        sink = UploadErrorSink(db, UPLOAD_ID, chunk_rows=3)
+
+        for row in range(7):
+            code = UploadErrorCode.INVALID_SMILES if row % 2 else UploadErrorCode.NO_ATOMS
+            await sink.add(row + 1, code, "bad", raw_data={"smiles": "x" * 120})
+        assert driver.copy_records_to_table.await_count == 2
+        assert len(sink) == 1
+
+        await sink.flush()
+
+        assert driver.copy_records_to_table.await_count == 3
+        assert sink.written == 7
+        assert sink.counts == {"invalid_smiles": 3, "no_atoms": 4}
+        call = driver.copy_records_to_table.await_args_list[0]
+        assert call.args == ("upload_row_errors",)
+        assert call.kwargs["columns"] == COPY_COLUMNS
+        record = call.kwargs["records"][0]
+        assert record[1:5] == (UPLOAD_ID, 1, "no_atoms", "bad")
+        assert json.loads(record[5]) == {"smiles": "x" * 100 + "..."}
+
+    @pytest.mark.asyncio
+    async def test_copy_runs_inside_the_session_transaction(self):
+        driver = _asyncpg(in_transaction=False)
+        db, connection = _session(driver)
+        sink = UploadErrorSink(db, UPLOAD_ID)
+
+        await sink.add(2, UploadErrorCode.EXACT_DUPLICATE, "dup", duplicate_inchi_key="KEY")
+        await sink.flush()
+
+        # A statement through the adapter opens the transaction first
+        connection.execute.assert_awaited_once()
+        driver.copy_records_to_table.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_other_drivers_use_executemany_insert(self):
+        db, connection = _session(SimpleNamespace())
+        sink = UploadErrorSink(db, UPLOAD_ID)
+
+        await sink.add(
+            5,
+            "similar_duplicate",
+            "similar",
+            raw_data={"smiles": "CCO"},
+            duplicate_similarity=Decimal("0.910"),
+        )
+        await sink.flush()
+        await sink.flush()  # Nothing pending
+
+        connection.execute.assert_awaited_once()
+        params = connection.execute.await_args.args[1]
+        assert params[0]["raw_data"] == {"smiles": "CCO"}
+        assert params[0]["duplicate_similarity"] == Decimal("0.910")
+        assert params[0]["upload_id"] == UPLOAD_ID
+
+
+class TestServiceErrorRecording:
+    """Tests for UploadService routing errors through the sink."""
+
+    def _upload(self, status=UploadStatus.VALIDATING, error_counts=None):
+        return SimpleNamespace(
+            id=UPLOAD_ID,
+            status=status,
+            progress=SimpleNamespace(error_counts=error_counts),
+        )
+
+    @pytest.mark.asyncio
+    async def test_phase_boundary_stores_counts(self):
+        driver = _asyncpg()
+        db, _ = _session(driver)
+        service = UploadService(db, MagicMock())
+        upload = self._upload()
+
+        await service.add_row_error(upload, 2, UploadErrorCode.INVALID_SMILES, "x", raw_data={"a": "b"})
+        await service.add_row_error(upload, 3, UploadErrorCode.INVALID_SMILES)
+        assert await service.get_error_summary(upload) == {"invalid_smiles": 2}
+        db.execute.assert_not_awaited()
+
+        await service.flush_row_errors(upload)
+
+        assert upload.progress.error_counts == {"invalid_smiles": 2}
+        records = driver.copy_records_to_table.await_args.kwargs["records"]
+        assert [r[4] for r in records] == ["Cannot parse SMILES string: x", "Cannot parse SMILES string"]
+
+    @pytest.mark.asyncio
+    async def test_next_phase_continues_stored_counts(self):
+        db, _ = _session(_asyncpg())
+        service = UploadService(db, MagicMock())
+        upload = self._upload(UploadStatus.PROCESSING, {"invalid_smiles": 4})
+
+        await service.add_row_error(upload, 9, UploadErrorCode.DB_INSERT_FAILED, "boom")
+
+        assert service.error_sink(upload).counts == {"invalid_smiles": 4, "db_insert_failed": 1}
+
+    @pytest.mark.asyncio
+    async def test_summary_reads_stored_counts_after_the_run(self):
+        db, _ = _session(_asyncpg())
+        db.execute = AsyncMock(return_value=MagicMock(scalar_one_or_none=MagicMock(return_value={"no_atoms": 7})))
+        service = UploadService(db, MagicMock())
+
+        summary = await service.get_error_summary(self._upload(UploadStatus.AWAITING_CONFIRM))
+
+        assert summary == {"no_atoms": 7}
+        assert db.execute.await_count == 1
+        assert "upload_progress.error_counts" in str(db.execute.await_args.args[0])
+
+    @pytest.mark.asyncio
+    async def test_failed_upload_discards_buffered_errors(self):
+        driver = _asyncpg()
+        db, _ = _session(driver)
+        service = UploadService(db, MagicMock())
+        upload = MagicMock(id=UPLOAD_ID, progress=SimpleNamespace(error_counts=None))
+        upload.can_transition_to.return_value = True
+
+        await service.add_row_error(upload, 2, UploadErrorCode.INVALID_SMILES)
+        await service.fail_upload(upload, "worker died")
+        await service.flush_row_errors(upload)
+
+        driver.copy_records_to_table.assert_not_awaited()
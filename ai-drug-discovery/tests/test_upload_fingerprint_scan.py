@@ -0,0 +1,153 @@
+"""Tests for the narrow, streamed fingerprint read path used by similarity scans."""
+
+import uuid
+from typing import NamedTuple
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+import apps.api.auth.models  # noqa: F401  (registers Organization for the mapper)
+from apps.api.uploads.duplicate_detection import (
+    find_similar_duplicates,
+    find_similar_duplicates_batch,
+)
+from apps.api.uploads.fingerprint_scan import (
+    fingerprint_scan_statement,
+    iter_fingerprint_chunks,
+)
+from apps.api.uploads.service import UploadService
+from db.models.discovery import Molecule
+from packages.chemistry import calculate_morgan_fingerprint, tanimoto_similarity_bytes
+
+ORG_ID = uuid.uuid4()
+SMILES = ["c1ccccc1", "Cc1ccccc1", "CCO", "Oc1ccccc1", "CCc1ccccc1", "CCCO", "c1ccccc1"]
+
+
+class _Row(NamedTuple):
+    id: uuid.UUID
+    inchi_key: str
+    name: str | None
+    fingerprint_morgan: bytes
+
+
+class _Stream:
+    """Stand-in for an AsyncResult streamed with yield_per."""
+
+    def __init__(self, rows, size):
+        self.rows = rows
+        self.size = size
+
+    async def partitions(self):
+        for i in range(0, len(self.rows), self.size):
+            yield self.rows[i:i + self.size]
+
+
+def _fp(smiles):
+    return calculate_morgan_fingerprint(smiles).bytes_data
+
+
+@pytest.fixture
+def rows():
+    return [
+        _Row(uuid.uuid4(), f"KEY-{i}", f"cpd-{i}", _fp(smiles))
+        for i, smiles in enumerate(SMILES)
+    ]
+
+
+def _db(rows, size=2):
+    db = MagicMock()
+    db.stream = AsyncMock(side_effect=lambda stmt: _Stream(rows, size))
+    return db
+
+
+def _sql(stmt):
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+class TestScanStatement:
+    """Tests for the narrow fingerprint projection."""
+
+    def test_selects_only_scan_columns(self):
+        sql = _sql(fingerprint_scan_statement(ORG_ID, num_bytes=256, include_names=True))
+        selected = sql.split("FROM")[0]
+        assert selected.count(",") == 3
+        for column in ("id", "inchi_key", "name", "fingerprint_morgan"):
+            assert f"molecules.{column}" in selected
+        assert "length(molecules.fingerprint_morgan)" in sql
+
+    def test_popcount_window_and_filters(self):
+        sql = _sql(fingerprint_scan_statement(
+            ORG_ID, 256, min_popcount=10, max_popcount=float("inf"),
+            molecular_formula="C6H6", limit=5,
+        ))
+        assert "bit_count(molecules.fingerprint_morgan) >=" in sql
+        assert "<=" not in sql
+        assert "molecules.molecular_formula" in sql
+        assert "LIMIT" in sql
+
+    def test_entity_queries_defer_fingerprints(self):
+        assert "fingerprint" not in _sql(select(Molecule))
+
+
+class TestFingerprintChunks:
+    """Tests for streaming fingerprints into packed chunks."""
+
+    @pytest.mark.asyncio
+    async def test_chunks_are_packed(self, rows):
+        db = _db(rows, size=3)
+        chunks = [chunk async for chunk in iter_fingerprint_chunks(db, ORG_ID, 256, chunk_size=3)]
+
+        assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+        assert [key for chunk in chunks for key in chunk.inchi_keys] == [r.inchi_key for r in rows]
+        assert chunks[0].names is None
+        assert chunks[0].matrix.words.shape == (3, 32)
+        stmt = db.stream.await_args.args[0]
+        assert stmt.get_execution_options()["yield_per"] == 3
+
+
+class TestScansUseChunks:
+    """Tests for the similarity scans built on the chunked read path."""
+
+    @pytest.mark.asyncio
+    async def test_find_similar_duplicates(self, rows):
+        query = _fp("c1ccccc1")
+        similar = await find_similar_duplicates(_db(rows), ORG_ID, query, threshold=0.3)
+
+        expected = sorted(
+            (tanimoto_similarity_bytes(query, r.fingerprint_morgan), r.inchi_key) for r in rows
+        )
+        expected = [key for sim, key in expected if sim >= 0.3]
+        assert sorted(s.similar_molecule_inchi_key for s in similar) == sorted(expected)
+        assert similar[0].similarity_score == 1.0
+        assert similar[0].similar_molecule_name in ("cpd-0", "cpd-6")
+        scores = [s.similarity_score for s in similar]
+        assert scores == sorted(scores, reverse=True)
+
+    @pytest.mark.asyncio
+    async def test_find_similar_duplicates_batch(self, rows):
+        queries = [("KEY-0", _fp("c1ccccc1"), "C6H6"), ("NEW", _fp("CCCCO"), None)]
+        matches = await find_similar_duplicates_batch(_db(rows), ORG_ID, queries, threshold=0.99)
+
+        # Self-match skipped; the other benzene row found across chunks
+        assert [m.similar_molecule_inchi_key for m in matches["KEY-0"]] == ["KEY-6"]
+        assert "NEW" not in matches
+
+    @pytest.mark.asyncio
+    async def test_find_similar_molecules_merges_chunks(self, rows):
+        from decimal import Decimal
+
+        db = _db(rows, size=2)
+        molecules = {r.id: MagicMock(id=r.id, inchi_key=r.inchi_key) for r in rows}
+        db.execute = AsyncMock(return_value=MagicMock(
+            scalars=MagicMock(return_value=MagicMock(all=MagicMock(return_value=list(molecules.values()))))
+        ))
+        service = UploadService(db=db, storage=MagicMock())
+
+        hits = await service.find_similar_molecules(ORG_ID, _fp("c1ccccc1"), Decimal("0.1"), limit=3)
+
+        # Both benzene rows tie at 1.0 and keep scan order despite different chunks
+        assert [mol.inchi_key for mol, _ in hits[:2]] == ["KEY-0", "KEY-6"]
+        assert len(hits) == 3
+        assert hits[2][1] <= hits[1][1]
@@ -0,0 +1,241 @@
+"""Tests for write-behind upload progress reporting."""
+
+import uuid
+from datetime import UTC, datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from apps.api.uploads.progress import (
+    PROGRESS_TTL_SECONDS,
+    ProgressReporter,
+    merge_progress,
+    progress_key,
+    read_progress,
+)
+from db.models.upload import DuplicateAction, FileType, UploadStatus
+
+UPLOAD_ID = uuid.uuid4()
+
+
+class FakeRedis:
+    """Just enough of redis.asyncio.Redis for progress hashes."""
+
+    def __init__(self):
+        self.hashes: dict[str, dict[bytes, bytes]] = {}
+        self.ttls: dict[str, int] = {}
+        self.executed = 0
+        self.fail = False
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def hgetall(self, key):
+        if self.fail:
+            raise RedisConnectionError("down")
+        return dict(self.hashes.get(key, {}))
+
+    async def delete(self, key):
+        self.hashes.pop(key, None)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def delete(self, key):
+        self.commands.append(lambda: self.redis.hashes.pop(key, None))
+
+    def hset(self, key, mapping):
+        encoded = {k.encode(): str(v).encode() for k, v in mapping.items()}
+        self.commands.append(lambda: self.redis.hashes.setdefault(key, {}).update(encoded))
+
+    def expire(self, key, seconds):
+        self.commands.append(lambda: self.redis.ttls.__setitem__(key, seconds))
+
+    async def execute(self):
+        if self.redis.fail:
+            raise RedisConnectionError("down")
+        for command in self.commands:
+            command()
+        self.redis.executed += 1
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestProgressReporter:
+    """Tests for time-coalesced publishing."""
+
+    @pytest.mark.asyncio
+    async def test_publishes_at_most_once_per_interval(self):
+        redis, clock = FakeRedis(), Clock()
+        reporter = ProgressReporter(redis, UPLOAD_ID, min_interval=1.0, clock=clock)
+
+        for rows in range(0, 500, 50):
+            await reporter.update(processed_rows=rows, phase="validating")
+            clock.now += 0.3
+
+        # t = 100.0, 101.2, 102.4
+        assert reporter.publishes == 3
+        assert redis.ttls[progress_key(UPLOAD_ID)] == PROGRESS_TTL_SECONDS
+        assert await read_progress(redis, UPLOAD_ID) == {"processed_rows": 400, "phase": "validating"}
+
+    @pytest.mark.asyncio
+    async def test_first_publish_replaces_previous_run(self):
+        redis = FakeRedis()
+        redis.hashes[progress_key(UPLOAD_ID)] = {b"valid_rows": b"90", b"phase": b"validating"}
+
+        await ProgressReporter(redis, UPLOAD_ID).update(processed_rows=0, phase="inserting")
+
+        assert await read_progress(redis, UPLOAD_ID) == {"processed_rows": 0, "phase": "inserting"}
+
+    @pytest.mark.asyncio
+    async def test_redis_errors_are_not_fatal(self):
+        redis, clock = FakeRedis(), Clock()
+        redis.fail = True
+        reporter = ProgressReporter(redis, UPLOAD_ID, clock=clock)
+
+        await reporter.update(processed_rows=10)
+        redis.fail = False
+        clock.now += 5
+        await reporter.update(valid_rows=8)
+
+        # Counters missed by the failed write are carried into the next one
+        assert await read_progress(redis, UPLOAD_ID) == {"processed_rows": 10, "valid_rows": 8}
+
+    @pytest.mark.asyncio
+    async def test_without_redis_is_a_no_op(self):
+        reporter = ProgressReporter(None, UPLOAD_ID)
+
+        await reporter.update(processed_rows=10)
+        await reporter.clear()
+
+        assert reporter.publishes == 0
+
+    @pytest.mark.asyncio
+    async def test_rejects_unknown_counters(self):
+        with pytest.raises(ValueError, match="Unknown progress counters"):
+            await ProgressReporter(None, UPLOAD_ID).update(rows=1)
+
+
+class TestReadingProgress:
+    """Tests for the status endpoint's view of progress."""
+
+    @pytest.mark.asyncio
+    async def test_unreachable_redis_reads_as_no_progress(self):
+        redis = FakeRedis()
+        redis.fail = True
+
+        assert await read_progress(redis, UPLOAD_ID) is None
+        assert await read_progress(None, UPLOAD_ID) is None
+
+    def test_live_counters_overlay_stored_row(self):
+        stored = SimpleNamespace(
+            phase="parsing",
+            total_rows=200,
+            processed_rows=0,
+            valid_rows=0,
+            invalid_rows=0,
+            duplicate_exact=0,
+            duplicate_similar=0,
+        )
+
+        merged = merge_progress(stored, {"processed_rows": 50, "valid_rows": 48, "phase": "validating"})
+
+        assert merged["phase"] == "validating"
+        assert (merged["total_rows"], merged["processed_rows"], merged["valid_rows"]) == (200, 50, 48)
+        assert merged["percent_complete"] == 25.0
+        assert merge_progress(stored, None)["percent_complete"] == 0.0
+
+
+class TestProcessorProgress:
+    """Tests for UploadProcessor committing on batch boundaries only."""
+
+    @pytest.mark.asyncio
+    async def test_validation_commits_per_batch_and_reports_to_redis(self):
+        from apps.api.uploads.tasks import UploadProcessor
+
+        batches = [[MagicMock()] * 3, [MagicMock()] * 2]
+
+        async def parse(upload):
+            for batch in batches:
+                yield batch
+
+        async def validate(upload, batches):
+            async for batch in batches:
+                yield [MagicMock(is_valid=True, inchi_key=None) for _ in batch]
+
+        db = MagicMock(commit=AsyncMock())
+        service = MagicMock(
+            start_validation=AsyncMock(),
+            complete_validation=AsyncMock(),
+            save_upload_artifacts=AsyncMock(),
+            update_progress=AsyncMock(),
+        )
+        redis = FakeRedis()
+        processor = UploadProcessor(db=db, service=service, redis_client=redis)
+        processor._parse_file = parse
+        processor._iter_validated_batches = validate
+        processor._check_duplicates_batch = AsyncMock(side_effect=lambda u, results, seen: [None] * len(results))
+        upload = MagicMock(id=UPLOAD_ID, file_type=FileType.SMILES_LIST, duplicate_action=DuplicateAction.SKIP)
+
+        with patch("apps.api.uploads.tasks.ArtifactWriter"):
+            await processor.process_validation(upload)
+
+        assert db.commit.await_count == len(batches)
+        service.update_progress.assert_not_called()
+        assert service.complete_validation.await_args.kwargs["valid_rows"] == 5
+        # Phase start was published; the hash is dropped once the row is final
+        assert redis.executed >= 1
+        assert progress_key(UPLOAD_ID) not in redis.hashes
+
+    @pytest.mark.asyncio
+    async def test_status_endpoint_reads_live_progress(self):
+        from apps.api.routers.uploads import get_upload_status
+
+        redis = FakeRedis()
+        redis.hashes[progress_key(UPLOAD_ID)] = {b"processed_rows": b"30", b"phase": b"inserting"}
+        stored = SimpleNamespace(
+            phase="inserting",
+            total_rows=60,
+            processed_rows=0,
+            valid_rows=60,
+            invalid_rows=0,
+            duplicate_exact=0,
+            duplicate_similar=0,
+        )
+        upload = SimpleNamespace(
+            id=UPLOAD_ID,
+            name="batch",
+            status=UploadStatus.PROCESSING,
+            file_type=FileType.SMILES_LIST,
+            progress=stored,
+            summary=None,
+            error_message=None,
+            created_at=datetime.now(UTC),
+            updated_at=datetime.now(UTC),
+            expires_at=None,
+            validated_at=None,
+            confirmed_at=None,
+            completed_at=None,
+        )
+        service = MagicMock(get_upload_with_relations=AsyncMock(return_value=upload))
+
+        response = await get_upload_status(UPLOAD_ID, service, {"organization_id": uuid.uuid4()}, redis)
+
+        assert (response.progress.processed_rows, response.progress.percent_complete) == (30, 50.0)
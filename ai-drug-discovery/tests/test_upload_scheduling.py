@@ -0,0 +1,368 @@
+"""Tests for fair scheduling of upload jobs across organizations."""
+
+import uuid
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from apps.api.uploads.scheduling import (
+    BULK_QUEUE,
+    FAIR_HORIZON,
+    FAST_QUEUE,
+    MIN_JOB_COST,
+    RUNNING_KEY,
+    UploadScheduler,
+    choose_queue,
+    estimate_cost,
+    read_queue_metrics,
+)
+
+NOW = 1_800_000_000.0
+ORG_A = str(uuid.UUID(int=1))
+ORG_B = str(uuid.UUID(int=2))
+
+
+class FakeRedis:
+    """In-memory stand-in for the Redis commands the scheduler uses."""
+
+    def __init__(self, queue_name=BULK_QUEUE):
+        self.default_queue_name = queue_name
+        self.hashes: dict[str, dict[str, str]] = {}
+        self.lists: dict[str, list[str]] = {}
+        self.zsets: dict[str, dict[str, float]] = {}
+        self.jobs: list[tuple[str, tuple, dict]] = []
+
+    # Commands run synchronously; __getattr__ makes them awaitable
+
+    def _hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def _hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = str(value)
+
+    def _hincrby(self, key, field, delta):
+        values = self.hashes.setdefault(key, {})
+        values[field] = str(int(values.get(field, 0)) + delta)
+        return int(values[field])
+
+    def _hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def _lpush(self, key, value):
+        self.lists.setdefault(key, []).insert(0, value)
+
+    def _ltrim(self, key, start, end):
+        self.lists[key] = self.lists.get(key, [])[start:end + 1]
+
+    def _lrange(self, key, start, end):
+        items = self.lists.get(key, [])
+        return items[start:] if end == -1 else items[start:end + 1]
+
+    def _zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    def _zrem(self, key, member):
+        self.zsets.get(key, {}).pop(member, None)
+
+    def _zremrangebyscore(self, key, low, high):
+        members = self.zsets.get(key, {})
+        for member in [m for m, score in members.items() if score <= float(high)]:
+            del members[member]
+
+    def _zrange(self, key, start, end):
+        return sorted(self.zsets.get(key, {}), key=self.zsets[key].get) if key in self.zsets else []
+
+    def _zrangebyscore(self, key, low, high):
+        return [m for m, score in self.zsets.get(key, {}).items() if float(low) <= score <= float(high)]
+
+    def __getattr__(self, name):
+        command = getattr(self, f"_{name}")
+
+        async def call(*args):
+            return command(*args)
+
+        return call
+
+    def pipeline(self, transaction=True):
+        return _Pipeline(self)
+
+    async def enqueue_job(self, function, *args, **kwargs):
+        if kwargs.get("_job_id") and any(kw.get("_job_id") == kwargs["_job_id"] for _, _, kw in self.jobs):
+            return None
+        self.jobs.append((function, args, kwargs))
+        return SimpleNamespace(job_id=kwargs.get("_job_id") or uuid.uuid4().hex)
+
+    def score(self, index):
+        kwargs = self.jobs[index][2]
+        if "_defer_until" in kwargs:
+            return kwargs["_defer_until"].timestamp()
+        return NOW + kwargs["_defer_by"].total_seconds()
+
+
+class _Pipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        command = getattr(self.redis, f"_{name}")
+        return lambda *args: self.commands.append((command, args))
+
+    async def execute(self):
+        return [command(*args) for command, args in self.commands]
+
+
+def _scheduler(redis, **kwargs):
+    kwargs = {"org_max_jobs": 2, "weights": {}, **kwargs}
+    return UploadScheduler(redis, clock=lambda: NOW, **kwargs)
+
+
+class TestQueueChoice:
+    """Tests for lane selection and cost estimates."""
+
+    def test_small_uploads_take_the_fast_lane(self):
+        assert choose_queue(file_size_bytes=10_000) == FAST_QUEUE
+        assert choose_queue(file_size_bytes=50 * 1024 * 1024) == BULK_QUEUE
+        # Row counts win over the file size
+        assert choose_queue(file_size_bytes=50 * 1024 * 1024, total_rows=100) == FAST_QUEUE
+        assert choose_queue() == BULK_QUEUE
+
+    def test_cost_scales_with_size(self):
+        assert estimate_cost(total_rows=50_000) == 50.0
+        assert estimate_cost(file_size_bytes=1_000_000) == 10.0
+        assert estimate_cost(total_rows=10) == MIN_JOB_COST
+        assert estimate_cost() == MIN_JOB_COST
+
+
+class TestFairEnqueue:
+    """Tests for start-time fair queuing scores."""
+
+    @pytest.mark.asyncio
+    async def test_backlogged_org_does_not_delay_another_org(self):
+        redis = FakeRedis()
+        scheduler = _scheduler(redis)
+
+        for _ in range(5):
+            await scheduler.enqueue("validate_upload_job", "upload", ORG_A, cost=600)
+        await scheduler.enqueue("validate_upload_job", "upload", ORG_B, cost=600)
+
+        scores = [redis.score(i) for i in range(6)]
+        # B's job ties with A's first and sorts ahead of A's second
+        assert scores[5] == scores[0] < scores[1] < scores[4]
+        assert all(score <= NOW for score in scores)
+        assert redis.jobs[0][2]["_queue_name"] == BULK_QUEUE
+        assert redis.hashes[f"upload:sched:{BULK_QUEUE}:queued"] == {ORG_A: "5", ORG_B: "1"}
+
+    @pytest.mark.asyncio
+    async def test_weight_slows_the_virtual_clock(self):
+        redis = FakeRedis()
+        scheduler = _scheduler(redis, weights={ORG_A: 4.0})
+
+        for org in (ORG_A, ORG_A, ORG_B, ORG_B):
+            await scheduler.enqueue("process_upload_job", "upload", org, cost=100)
+
+        assert redis.score(1) - redis.score(0) == 25
+        assert redis.score(3) - redis.score(2) == 100
+        assert redis.score(0) == NOW - FAIR_HORIZON.total_seconds()
+
+    @pytest.mark.asyncio
+    async def test_duplicate_job_is_not_counted(self):
+        redis = FakeRedis()
+        scheduler = _scheduler(redis)
+
+        first = await scheduler.enqueue("merge_upload_shards_job", "upload", ORG_A, job_id="m")
+        again = await scheduler.enqueue("merge_upload_shards_job", "upload", ORG_A, job_id="m")
+
+        assert first is not None and again is None
+        assert redis.hashes[f"upload:sched:{BULK_QUEUE}:queued"][ORG_A] == "1"
+
+
+class TestJobSlots:
+    """Tests for the soft per-organization job cap."""
+
+    @pytest.mark.asyncio
+    async def test_cap_applies_only_while_others_wait(self):
+        redis = FakeRedis()
+        scheduler = _scheduler(redis)
+        lease = timedelta(minutes=5)
+
+        assert await scheduler.acquire_slot(BULK_QUEUE, ORG_A, "j1", lease)
+        assert await scheduler.acquire_slot(BULK_QUEUE, ORG_A, "j2", lease)
+        # Nothing else queued: spare capacity is used
+        assert await scheduler.acquire_slot(BULK_QUEUE, ORG_A, "j3", lease)
+
+        await scheduler.enqueue("validate_upload_job", "upload", ORG_B)
+        assert not await scheduler.acquire_slot(BULK_QUEUE, ORG_A, "j4", lease)
+        assert await scheduler.acquire_slot(BULK_QUEUE, ORG_B, "j5", lease)
+
+        await scheduler.release_slot(ORG_A, "j1")
+        await scheduler.release_slot(ORG_A, "j2")
+        assert await scheduler.acquire_slot(BULK_QUEUE, ORG_A, "j4", lease)
+
+    @pytest.mark.asyncio
+    async def test_expired_leases_free_their_slots(self):
+        redis = FakeRedis()
+        redis.zsets[RUNNING_KEY] = {f"{ORG_A}:dead1": NOW - 1, f"{ORG_A}:dead2": NOW - 1}
+        redis.hashes[f"upload:sched:{BULK_QUEUE}:queued"] = {ORG_B: "3"}
+
+        assert await _scheduler(redis).acquire_slot(BULK_QUEUE, ORG_A, "j1", timedelta(minutes=5))
+        assert list(redis.zsets[RUNNING_KEY]) == [f"{ORG_A}:j1"]
+
+
+class TestQueueMetrics:
+    """Tests for recorded waits and queue metrics."""
+
+    @pytest.mark.asyncio
+    async def test_metrics_report_depth_waits_and_running_jobs(self):
+        redis = FakeRedis()
+        scheduler = _scheduler(redis)
+        for _ in range(3):
+            await scheduler.enqueue("validate_upload_job", "upload", ORG_A, queue=FAST_QUEUE)
+        for wait in (1, 2, 3, 40):
+            await scheduler.job_started(FAST_QUEUE, ORG_A, datetime.fromtimestamp(NOW - wait, UTC))
+        await scheduler.enqueue("process_upload_job", "upload", ORG_B)
+        await scheduler.acquire_slot(BULK_QUEUE, ORG_A, "j1", timedelta(minutes=5))
+
+        metrics = await read_queue_metrics(redis, now=NOW)
+
+        fast, bulk = metrics.lanes
+        # The counter went negative: one job predates the bookkeeping
+        assert (fast.lane, fast.queued_jobs, fast.queued_by_org) == ("fast", 0, {})
+        assert (fast.wait_p50_seconds, fast.wait_p95_seconds, fast.wait_max_seconds) == (3.0, 40.0, 40.0)
+        assert (bulk.lane, bulk.queued_jobs, bulk.queued_by_org) == ("bulk", 1, {ORG_B: 1})
+        assert bulk.wait_p50_seconds is None
+        assert metrics.running_by_org == {ORG_A: 1}
+
+    @pytest.mark.asyncio
+    async def test_unreachable_redis_returns_none(self):
+        redis = FakeRedis()
+        redis.pipeline = lambda transaction=True: _FailingPipeline()
+
+        assert await read_queue_metrics(redis) is None
+
+
+class _FailingPipeline(_Pipeline):
+    def __init__(self):
+        super().__init__(FakeRedis())
+
+    async def execute(self):
+        raise RedisConnectionError("connection refused")
+
+
+class TestFairShareJobs:
+    """Tests for upload jobs taking organization slots."""
+
+    def _ctx(self, redis, job_try=1, job_id="job-1"):
+        return {
+            "redis": redis,
+            "job_id": job_id,
+            "job_try": job_try,
+            "enqueue_time": datetime.fromtimestamp(NOW - 5, UTC),
+        }
+
+    @pytest.mark.asyncio
+    async def test_job_over_the_cap_is_requeued(self):
+        from apps.api.uploads import worker
+
+        redis = FakeRedis()
+        redis.zsets[RUNNING_KEY] = {f"{ORG_A}:a": NOW + 60, f"{ORG_A}:b": NOW + 60}
+        redis.hashes[f"upload:sched:{BULK_QUEUE}:queued"] = {ORG_A: "1", ORG_B: "1"}
+        started = []
+
+        async def validate_upload_job(ctx, upload_id, organization_id):
+            started.append(upload_id)
+
+        with patch.object(worker, "UploadScheduler", lambda r: _scheduler(r)):
+            result = await worker.fair_share(validate_upload_job)(self._ctx(redis), "upload", ORG_A)
+
+        assert result == {"status": "deferred", "upload_id": "upload"}
+        assert started == []
+        function, args, kwargs = redis.jobs[0]
+        assert (function, args) == ("validate_upload_job", ("upload", ORG_A))
+        assert kwargs["_job_id"] == "job-1:requeued:1"
+        assert kwargs["_queue_name"] == BULK_QUEUE
+        # Counted as started, then queued again
+        assert redis.hashes[f"upload:sched:{BULK_QUEUE}:queued"][ORG_A] == "1"
+
+    @pytest.mark.asyncio
+    async def test_job_runs_in_a_slot_and_releases_it(self):
+        from apps.api.uploads import worker
+
+        redis = FakeRedis(FAST_QUEUE)
+        running = []
+
+        async def job(ctx, upload_id, organization_id, *args):
+            running.extend(redis.zsets[RUNNING_KEY])
+            return {"status": "completed"}
+
+        with patch.object(worker, "UploadScheduler", lambda r: _scheduler(r)):
+            result = await worker.fair_share(job)(self._ctx(redis), "upload", ORG_A, 3)
+
+        assert result == {"status": "completed"}
+        assert running == [f"{ORG_A}:job-1"]
+        assert redis.zsets[RUNNING_KEY] == {}
+        assert redis.lists[f"upload:sched:{FAST_QUEUE}:waits"] == ["5.000"]
+
+    @pytest.mark.asyncio
+    async def test_requeued_job_adds_no_wait_sample(self):
+        from apps.api.uploads import worker
+
+        redis = FakeRedis(FAST_QUEUE)
+        redis.hashes[f"upload:sched:{FAST_QUEUE}:queued"] = {ORG_A: "1"}
+        job = AsyncMock(return_value={"status": "completed"})
+        ctx = self._ctx(redis, job_id="job-1:requeued:2")
+
+        with patch.object(worker, "UploadScheduler", lambda r: _scheduler(r)):
+            result = await worker.fair_share(job)(ctx, "upload", ORG_A)
+
+        assert result == {"status": "completed"}
+        # Started, but its wait behind the org cap is not a queue wait sample
+        assert redis.hashes[f"upload:sched:{FAST_QUEUE}:queued"][ORG_A] == "0"
+        assert f"upload:sched:{FAST_QUEUE}:waits" not in redis.lists
+
+    @pytest.mark.asyncio
+    async def test_scheduling_failure_still_runs_the_job(self):
+        from apps.api.uploads import worker
+
+        redis = FakeRedis()
+        redis.pipeline = lambda transaction=True: _FailingPipeline()
+        job = AsyncMock(return_value={"status": "completed"})
+
+        result = await worker.fair_share(job)(self._ctx(redis, job_try=2), "upload", ORG_A)
+
+        assert result == {"status": "completed"}
+        job.assert_awaited_once()
+
+    def test_requeued_job_ids_count_up(self):
+        from apps.api.uploads.worker import _requeued_job_id
+
+        assert _requeued_job_id("abc") == "abc:requeued:1"
+        assert _requeued_job_id("abc:requeued:1") == "abc:requeued:2"
+
+
+class TestEnqueueHelpers:
+    """Tests for the API enqueue helpers choosing lanes."""
+
+    @pytest.mark.asyncio
+    async def test_validation_lane_follows_file_size(self):
+        from apps.api.uploads import worker
+
+        redis = FakeRedis()
+        upload_id, org_id = uuid.uuid4(), uuid.uuid4()
+
+        with patch.object(worker, "get_redis_pool", AsyncMock(return_value=redis)):
+            await worker.enqueue_validation_job(upload_id, org_id, file_size_bytes=2_000)
+            await worker.enqueue_validation_job(upload_id, org_id, file_size_bytes=80 * 1024 * 1024)
+            await worker.enqueue_processing_job(upload_id, org_id, total_rows=200_000)
+
+        assert [kw["_queue_name"] for _, _, kw in redis.jobs] == [FAST_QUEUE, BULK_QUEUE, BULK_QUEUE]
+        assert redis.jobs[0][1] == (str(upload_id), str(org_id))
@@ -0,0 +1,415 @@
+"""Tests for sharded validation and insertion of large uploads."""
+
+import io
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from apps.api.uploads.artifacts import ArtifactWriter, iter_artifact_batches
+from apps.api.uploads.compute import ParsedRow, compute_rows
+from apps.api.uploads.error_codes import UploadErrorCode
+from apps.api.uploads.progress import ProgressReporter, progress_key
+from apps.api.uploads.sharding import (
+    MAX_SHARDS,
+    SHARD_TARGET_ROWS,
+    ShardRange,
+    plan_row_shards,
+    plan_text_shards,
+    read_excel_max_row,
+    shard_target,
+)
+from apps.api.uploads.tasks import (
+    BulkInsertResult,
+    InsertionTotals,
+    UploadProcessor,
+)
+from db.models.upload import DuplicateAction, FileType, ShardStatus, UploadStatus
+from packages.shared.storage import LocalFileStorage
+
+CSV_CONTENT = (
+    b'smiles,name,notes\r\n'
+    b'CCO,ethanol,"multi\r\nline, with comma"\r\n'
+    b'c1ccccc1,benzene,"say ""hi"""\r\n'
+    b'CC(=O)O,acetic acid\r\n'
+    b'CCN,ethylamine,"x\n\n"\r\n'
+    b'CCCl,chloroethane,plain\r\n'
+)
+
+SDF_CONTENT = b"".join(
+    b"mol-%d\n\n\n  0  0  0  0  0  0  0  0  0  0999 V2000\nM  END\n$$$$\n" % i for i in range(5)
+)
+
+
+async def _chunks(data: bytes, size: int = 7):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def _shard(index, shard_range=None, **fields):
+    fields = {"status": ShardStatus.VALIDATED, "error_counts": None, "checkpoint": None, **fields}
+    if shard_range is not None:
+        fields.update(
+            start_offset=shard_range.start,
+            end_offset=shard_range.end,
+            row_offset=shard_range.row_offset,
+        )
+    return SimpleNamespace(id=uuid.uuid4(), shard_index=index, **fields)
+
+
+def _artifacts(*batches):
+    writer = ArtifactWriter()
+    for results, verdicts in batches:
+        writer.write_batch(results, verdicts)
+    data = writer.getfile().read()
+    writer.close()
+    return data
+
+
+class TestShardPlanning:
+    """Tests for record-aligned shard planning."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("target", [1, 20, 45, 10_000])
+    async def test_csv_shards_parse_like_the_whole_file(self, target):
+        shards = await plan_text_shards(_chunks(CSV_CONTENT), FileType.CSV, target)
+
+        assert shards[0].start == 0 and shards[-1].end == len(CSV_CONTENT)
+        assert all(a.end == b.start for a, b in zip(shards[:-1], shards[1:], strict=True))
+        assert sum(s.rows for s in shards) == 5
+
+        def iter_chunks(upload, start=0, end=None):
+            return _chunks(CSV_CONTENT[start:end])
+
+        service = MagicMock(iter_upload_file_chunks=MagicMock(side_effect=iter_chunks))
+        processor = UploadProcessor(db=MagicMock(), service=service)
+        upload = MagicMock(file_type=FileType.CSV, column_mapping={"smiles": "smiles", "name": "name"})
+        whole = [r async for batch in processor._parse_file(upload) for r in batch]
+        sharded = [
+            r
+            for index, shard_range in enumerate(shards)
+            async for batch in processor._parse_file(upload, _shard(index, shard_range))
+            for r in batch
+        ]
+
+        assert sharded == whole
+        assert [r.row_number for r in sharded] == [2, 3, 4, 5, 6]
+
+    @pytest.mark.asyncio
+    async def test_sdf_cuts_after_record_terminators(self):
+        record = len(SDF_CONTENT) // 5
+
+        shards = await plan_text_shards(_chunks(SDF_CONTENT, 10), FileType.SDF, record + 1)
+
+        assert [(s.start, s.end) for s in shards] == [(0, 2 * record), (2 * record, 4 * record), (4 * record, 5 * record)]
+        assert [(s.row_offset, s.rows) for s in shards] == [(0, 2), (2, 2), (4, 1)]
+
+    @pytest.mark.asyncio
+    async def test_smiles_list_counts_trailing_line(self):
+        data = b"# header\nCCO\n\nCCN\nCCCl"
+
+        shards = await plan_text_shards(_chunks(data, 3), FileType.SMILES_LIST, 10)
+
+        assert [(s.start, s.end, s.row_offset, s.rows) for s in shards] == [(0, 13, 0, 2), (13, 22, 2, 3)]
+
+    @pytest.mark.asyncio
+    async def test_excel_shards_read_only_the_workbook_dimension(self, monkeypatch):
+        openpyxl = pytest.importorskip("openpyxl")
+        workbook = openpyxl.Workbook()
+        workbook.active.append(["ignored"])
+        sheet = workbook.create_sheet("molecules")
+        sheet.append(["smiles", "name"])
+        for i in range(3000):
+            sheet.append([f"C{'C' * (i % 40)}O", f"molecule {i} {uuid.uuid4()}"])
+        workbook.active = 1
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        data = buffer.getvalue()
+        reads = []
+
+        def iter_chunks(upload, start=0, end=None):
+            reads.append((start, end))
+            return _chunks(data[start:end], 4096)
+
+        monkeypatch.setattr("apps.api.uploads.tasks.SHARD_MIN_ROWS", 100)
+        service = MagicMock(iter_upload_file_chunks=MagicMock(side_effect=iter_chunks))
+        processor = UploadProcessor(db=MagicMock(), service=service)
+        upload = MagicMock(file_type=FileType.EXCEL, file=MagicMock(file_size_bytes=len(data)))
+
+        shards = await processor._plan_shards(upload)
+
+        assert shards == plan_row_shards(2, 3002, shard_target(3000, SHARD_TARGET_ROWS))
+        assert sum(end - start for start, end in reads) < len(data) // 2
+        assert await read_excel_max_row(AsyncMock(return_value=b"not a zip"), 9) is None
+
+    def test_row_shards_and_target(self):
+        assert plan_row_shards(2, 8, 3) == [ShardRange(2, 5, 1, 3), ShardRange(5, 8, 4, 3)]
+        assert plan_row_shards(2, 9, 3)[-1] == ShardRange(8, 9, 7, 1)
+        assert shard_target(100, 10) == 10
+        assert shard_target(1000 * MAX_SHARDS, 10) == 1000
+
+
+class TestRangedStorage:
+    """Tests for ranged reads from storage."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(("start", "end"), [(0, None), (3, 11), (5, None), (11, 11)])
+    async def test_local_reads_byte_range(self, tmp_path, start, end):
+        storage = LocalFileStorage(str(tmp_path))
+        stored = await storage.save(io.BytesIO(b"0123456789abcdef"), "data.txt", "text/plain")
+
+        data = b"".join([c async for c in storage.iter_chunks(stored.storage_path, 4, start=start, end=end)])
+
+        assert data == b"0123456789abcdef"[start:end]
+
+
+class TestSharedProgress:
+    """Tests for shard jobs adding to one progress hash."""
+
+    @pytest.mark.asyncio
+    async def test_increments_add_to_the_stored_counters(self):
+        hashes: dict[str, dict[str, int]] = {progress_key(uuid.UUID(int=1)): {"processed_rows": 40}}
+
+        class Pipeline:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            def delete(self, key):
+                hashes.pop(key, None)
+
+            def hset(self, key, mapping):
+                hashes.setdefault(key, {}).update(mapping)
+
+            def hincrby(self, key, field, delta):
+                counters = hashes.setdefault(key, {})
+                counters[field] = counters.get(field, 0) + delta
+
+            def expire(self, key, seconds):
+                pass
+
+            async def execute(self):
+                pass
+
+        redis = MagicMock(pipeline=MagicMock(side_effect=lambda transaction=True: Pipeline()))
+        reporter = ProgressReporter(redis, uuid.UUID(int=1), min_interval=60, replace=False)
+
+        await reporter.increment(processed_rows=10)
+        await reporter.increment(processed_rows=5)  # Within the interval
+        assert hashes[reporter.key]["processed_rows"] == 50
+        await reporter.flush()
+
+        assert hashes[reporter.key]["processed_rows"] == 55
+
+
+def _upload(duplicate_action=DuplicateAction.SKIP, status=UploadStatus.VALIDATING):
+    return MagicMock(
+        id=uuid.uuid4(),
+        organization_id=uuid.uuid4(),
+        status=status,
+        duplicate_action=duplicate_action,
+        progress=SimpleNamespace(error_counts={}, checkpoint=None),
+        confirmed_at=None,
+    )
+
+
+class TestValidationMerge:
+    """Tests for reconciling duplicates across validated shards."""
+
+    @pytest.fixture
+    def results(self):
+        smiles = ["CCO", "CCN", "CCO", "CCCl", "CCN"]
+        return compute_rows([ParsedRow(i + 2, s, None, None, {"smiles": s}) for i, s in enumerate(smiles)])
+
+    @pytest.mark.asyncio
+    async def test_repeats_of_earlier_shards_become_upload_duplicates(self, results):
+        shards = [
+            _shard(0, total_rows=2, valid_rows=2, invalid_rows=0, duplicate_exact=0, duplicate_similar=0,
+                   error_counts={"invalid_smiles": 1}),
+            _shard(1, total_rows=3, valid_rows=2, invalid_rows=1, duplicate_exact=0, duplicate_similar=0),
+        ]
+        saved = []
+        stored = {
+            0: _artifacts((results[:2], [None, None])),
+            # Shard 1 saw CCO first and CCN as its own repeat
+            1: _artifacts((results[2:], [None, None, "batch"])),
+        }
+        service = MagicMock(
+            get_shards=AsyncMock(return_value=shards),
+            get_upload_artifacts=AsyncMock(side_effect=lambda u, shard: io.BytesIO(stored[shard.shard_index])),
+            save_shard_artifacts=AsyncMock(side_effect=lambda u, shard, file: saved.append((shard, file.read()))),
+            add_row_error=AsyncMock(),
+            complete_validation=AsyncMock(),
+            fail_upload=AsyncMock(),
+        )
+        processor = UploadProcessor(db=MagicMock(), service=service)
+        upload = _upload(DuplicateAction.ERROR)
+
+        await processor.merge_shard_validation(upload)
+
+        totals = service.complete_validation.await_args.kwargs
+        assert (totals["total_rows"], totals["valid_rows"], totals["invalid_rows"]) == (5, 3, 2)
+        assert upload.progress.error_counts == {"invalid_smiles": 1}
+        assert shards[0].error_counts is None
+        error = service.add_row_error.await_args
+        assert (error.args[1], error.args[2]) == (4, UploadErrorCode.DUPLICATE_IN_BATCH)
+
+        [(shard, data)] = saved
+        assert shard is shards[1]
+        [(_, verdicts)] = list(iter_artifact_batches(io.BytesIO(data)))
+        assert verdicts == ["batch", None, "batch"]
+
+    @pytest.mark.asyncio
+    async def test_unvalidated_shard_fails_the_merge(self):
+        service = MagicMock(
+            get_shards=AsyncMock(return_value=[_shard(0), _shard(1, status=ShardStatus.PENDING)]),
+            complete_validation=AsyncMock(),
+            fail_upload=AsyncMock(),
+        )
+        processor = UploadProcessor(db=MagicMock(rollback=AsyncMock()), service=service)
+
+        with pytest.raises(ValueError, match="not validated"):
+            await processor.merge_shard_validation(_upload(), final_attempt=False)
+
+        service.complete_validation.assert_not_awaited()
+        service.fail_upload.assert_not_awaited()
+
+
+class TestShardInsertion:
+    """Tests for inserting shards and merging their totals."""
+
+    @pytest.mark.asyncio
+    async def test_repeats_of_earlier_shards_are_not_inserted(self):
+        results = compute_rows([ParsedRow(i + 2, s, None, None, {}) for i, s in enumerate(["CCO", "CCN"])])
+        processor = UploadProcessor(db=MagicMock(), service=MagicMock())
+        processor._resolve_inchi_keys = AsyncMock(return_value=set())
+        inserted = []
+
+        async def insert(upload, to_insert):
+            inserted.extend(r.canonical_smiles for r in to_insert)
+            return BulkInsertResult([(r, uuid.uuid4()) for r in to_insert], [], [])
+
+        processor._insert_molecules = insert
+        totals = InsertionTotals()
+        upload = _upload(status=UploadStatus.PROCESSING)
+        upload.similarity_threshold = None
+
+        with patch("apps.api.uploads.tasks.record_inserted_molecule"):
+            await processor._insert_batch(upload, results, ["batch", None], totals, set(), from_shard=True)
+
+        assert inserted == ["CCN"]
+        assert (totals.processed_rows, totals.molecules_created, totals.molecules_skipped) == (2, 1, 1)
+
+    @pytest.mark.asyncio
+    async def test_merge_sums_shard_checkpoints_into_one_summary(self):
+        shards = [
+            _shard(0, status=ShardStatus.INSERTED, error_counts={"db_insert_failed": 1},
+                   checkpoint=InsertionTotals(processed_rows=30, molecules_created=29, errors_count=1).to_checkpoint()),
+            _shard(1, status=ShardStatus.INSERTED,
+                   checkpoint=InsertionTotals(processed_rows=20, molecules_created=18, molecules_skipped=2).to_checkpoint()),
+        ]
+        service = MagicMock(
+            get_shards=AsyncMock(return_value=shards),
+            delete_shard_artifacts=AsyncMock(),
+            complete_processing=AsyncMock(),
+        )
+        processor = UploadProcessor(db=MagicMock(), service=service)
+        upload = _upload(status=UploadStatus.PROCESSING)
+        upload.progress.error_counts = {"invalid_smiles": 3}
+
+        await processor.merge_shard_insertion(upload)
+
+        kwargs = service.complete_processing.await_args.kwargs
+        assert (kwargs["processed_rows"], kwargs["molecules_created"], kwargs["molecules_skipped"]) == (50, 47, 2)
+        assert kwargs["errors_count"] == 1
+        assert upload.progress.error_counts == {"invalid_smiles": 3, "db_insert_failed": 1}
+        service.delete_shard_artifacts.assert_awaited_once_with(upload)
+
+
+class TestShardJobs:
+    """Tests for fanning shard jobs out and merging them."""
+
+    @pytest.fixture
+    def job(self):
+        from apps.api.uploads import worker
+
+        upload = _upload()
+        service = MagicMock(
+            get_upload=AsyncMock(return_value=upload),
+            get_shard=AsyncMock(side_effect=lambda u, index: _shard(index, status=ShardStatus.PENDING)),
+            get_shards=AsyncMock(return_value=[]),
+        )
+        session = MagicMock()
+        session.__aenter__ = AsyncMock(return_value=MagicMock())
+        session.__aexit__ = AsyncMock(return_value=False)
+        with (
+            patch.object(worker, "async_session_factory", return_value=session),
+            patch.object(worker, "get_storage_backend"),
+            patch.object(worker, "UploadService", return_value=service),
+            patch.object(worker, "UploadProcessor") as processor_cls,
+            patch.object(worker, "UploadScheduler") as scheduler_cls,
+        ):
+            scheduler_cls.return_value.enqueue = AsyncMock()
+            yield worker, upload, service, processor_cls.return_value
+
+    @pytest.mark.asyncio
+    async def test_large_upload_fans_out_validation(self, job):
+        worker, upload, _, processor = job
+        shards = [_shard(i, ShardRange(i * 10, i * 10 + 10, i, 1), status=ShardStatus.PENDING) for i in range(3)]
+        processor.process_validation = AsyncMock(return_value=shards)
+        redis = MagicMock(enqueue_job=AsyncMock())
+
+        result = await worker.validate_upload_job({"redis": redis}, str(upload.id), str(upload.organization_id))
+
+        assert result == {"status": "sharded", "shards": 3}
+        assert processor.process_validation.await_args.kwargs["allow_sharding"] is True
+        calls = worker.UploadScheduler.return_value.enqueue.await_args_list
+        assert [c.args[0] for c in calls] == ["validate_upload_shard_job"] * 3
+        assert [c.args[3] for c in calls] == [0, 1, 2]
+        assert len({c.kwargs["job_id"] for c in calls}) == 3
+
+    @pytest.mark.asyncio
+    async def test_last_shard_enqueues_the_merge(self, job):
+        worker, upload, _, processor = job
+        processor.process_shard_validation = AsyncMock(side_effect=[False, True])
+        redis = MagicMock(enqueue_job=AsyncMock())
+        args = (str(upload.id), str(upload.organization_id))
+
+        await worker.validate_upload_shard_job({"redis": redis}, *args, 0)
+        worker.UploadScheduler.return_value.enqueue.assert_not_awaited()
+        await worker.validate_upload_shard_job({"redis": redis}, *args, 1)
+
+        call = worker.UploadScheduler.return_value.enqueue.await_args
+        assert call.args == ("merge_upload_shards_job", *args)
+        assert call.kwargs["job_id"].endswith(":validating")
+
+    @pytest.mark.asyncio
+    async def test_shard_of_a_failed_upload_is_skipped(self, job):
+        worker, upload, _, processor = job
+        upload.status = UploadStatus.FAILED
+        processor.process_shard_validation = AsyncMock()
+
+        result = await worker.validate_upload_shard_job(
+            {"redis": MagicMock()}, str(upload.id), str(upload.organization_id), 0
+        )
+
+        assert result["status"] == "skipped"
+        processor.process_shard_validation.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_sharded_upload_fans_out_insertion(self, job):
+        worker, upload, service, processor = job
+        upload.status = UploadStatus.PROCESSING
+        service.get_shards.return_value = [_shard(0, valid_rows=10), _shard(1, valid_rows=5)]
+        processor.process_insertion = AsyncMock()
+        redis = MagicMock(enqueue_job=AsyncMock())
+
+        result = await worker.process_upload_job({"redis": redis}, str(upload.id), str(upload.organization_id))
+
+        assert result == {"status": "sharded", "shards": 2}
+        processor.process_insertion.assert_not_awaited()
+        calls = worker.UploadScheduler.return_value.enqueue.await_args_list
+        assert [c.args[0] for c in calls] == ["process_upload_shard_job"] * 2
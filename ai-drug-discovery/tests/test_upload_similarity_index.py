@@ -0,0 +1,306 @@
+"""Tests for batched duplicate detection against the per-org fingerprint index."""
+
+import uuid
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from apps.api.uploads.similarity_index import (
+    OrgFingerprintIndex,
+    find_similar_within_batch,
+    get_org_fingerprint_index,
+    get_org_index_manager,
+    invalidate_org_fingerprint_index,
+    record_inserted_molecule,
+)
+from db.models.upload import DuplicateAction
+from packages.chemistry.change_feed import (
+    SOURCE_FINGERPRINTS,
+    ChangeSet,
+    FingerprintDelta,
+)
+from packages.chemistry.features import calculate_morgan_fingerprint
+from packages.chemistry.index_manager import FingerprintIndexManager
+
+
+def _fp(smiles: str) -> bytes:
+    return calculate_morgan_fingerprint(smiles).bytes_data
+
+
+@pytest.fixture
+def index():
+    index = OrgFingerprintIndex(uuid.uuid4())
+    for key, smiles in [("ETHANOL", "CCO"), ("BENZENE", "c1ccccc1"), ("ASPIRIN", "CC(=O)Oc1ccccc1C(=O)O")]:
+        index._add_to(index._base, uuid.uuid4(), key, _fp(smiles))
+    return index
+
+
+class TestOrgFingerprintIndex:
+    """Tests for OrgFingerprintIndex batch search."""
+
+    def test_search_batch_returns_best_match_per_query(self, index):
+        matches = index.search_batch([_fp("CCO"), _fp("c1ccccc1"), _fp("CCCCCCCCCC")], 0.9)
+        assert matches[0].inchi_key == "ETHANOL"
+        assert matches[0].similarity == pytest.approx(1.0)
+        assert matches[1].inchi_key == "BENZENE"
+        assert matches[2] is None
+
+    def test_missing_and_mismatched_fingerprints_are_skipped(self, index):
+        assert index.search_batch([None, b"\xff" * 8], 0.1) == [None, None]
+
+    def test_added_molecules_are_searchable(self, index):
+        mol_id = uuid.uuid4()
+        index.add(mol_id, "TOLUENE", _fp("Cc1ccccc1"))
+        assert len(index) == 4
+        match = index.search_batch([_fp("Cc1ccccc1")], 0.99)[0]
+        assert match.molecule_id == mol_id
+
+    def test_base_match_wins_ties(self, index):
+        index.add(uuid.uuid4(), "ETHANOL-COPY", _fp("CCO"))
+        assert index.search_batch([_fp("CCO")], 0.99)[0].inchi_key == "ETHANOL"
+
+    def test_removed_molecules_are_not_matched(self, index):
+        ethanol_id = index._base[len(_fp("CCO"))].molecule_ids[0]
+
+        assert index.remove(ethanol_id) is True
+        assert index.remove(ethanol_id) is False
+        assert len(index) == 2
+        assert index.search_batch([_fp("CCO")], 0.99) == [None]
+
+    def test_apply_changes_upserts_and_removes(self, index):
+        segment = index._base[len(_fp("CCO"))]
+        ethanol_id, benzene_id = segment.molecule_ids[0], segment.molecule_ids[1]
+        new_id = uuid.uuid4()
+
+        index.apply_changes(ChangeSet(epoch=99, deltas=[
+            FingerprintDelta(ethanol_id, None),
+            FingerprintDelta(benzene_id, _fp("Cc1ccccc1"), "TOLUENE"),
+            FingerprintDelta(new_id, _fp("CCN"), "ETHYLAMINE"),
+        ]))
+
+        assert index.epoch == 99
+        assert len(index) == 3
+        assert index.search_batch([_fp("CCO")], 0.99) == [None]
+        assert index.search_batch([_fp("c1ccccc1")], 0.99) == [None]
+        assert index.search_batch([_fp("Cc1ccccc1")], 0.99)[0].molecule_id == benzene_id
+        assert index.search_batch([_fp("CCN")], 0.99)[0].inchi_key == "ETHYLAMINE"
+
+
+class TestOrgIndexCache:
+    """Tests for the process-wide index cache."""
+
+    @pytest.mark.asyncio
+    async def test_index_is_cached_until_stale(self, index):
+        org_id = index.organization_id
+        load = AsyncMock(return_value=index)
+        try:
+            with patch.object(OrgFingerprintIndex, "load", load):
+                assert await get_org_fingerprint_index(None, org_id) is index
+                assert await get_org_fingerprint_index(None, org_id) is index
+                assert load.await_count == 1
+
+                await get_org_fingerprint_index(None, org_id, max_age=-1)
+                assert load.await_count == 2
+        finally:
+            invalidate_org_fingerprint_index(org_id)
+
+    def test_nbytes_tracks_rows(self, index):
+        before = index.nbytes
+        index.add(uuid.uuid4(), "TOLUENE", _fp("Cc1ccccc1"))
+
+        assert index.nbytes > before
+        assert index.nbytes > 4 * len(_fp("CCO"))
+
+    @pytest.mark.asyncio
+    async def test_cold_indexes_are_evicted_under_budget(self, index):
+        small = OrgFingerprintIndex(uuid.uuid4())
+        small.add(uuid.uuid4(), "ETHANOL", _fp("CCO"))
+        manager = FingerprintIndexManager(memory_budget=index.nbytes + small.nbytes // 2)
+        load = AsyncMock(side_effect=[index, small, index])
+
+        with patch("apps.api.uploads.similarity_index._org_index_manager", manager), patch.object(
+            OrgFingerprintIndex, "load", load
+        ):
+            await get_org_fingerprint_index(None, index.organization_id)
+            await get_org_fingerprint_index(None, small.organization_id)
+            assert get_org_index_manager() is manager
+            assert (index.organization_id, "morgan") not in manager
+
+            assert await get_org_fingerprint_index(None, index.organization_id) is index
+            assert load.await_count == 3
+            stats = manager.get_stats()
+            assert stats.metadata["evictions"] == 2
+            assert stats.metadata["resident_bytes"] <= manager.memory_budget
+
+    @pytest.mark.asyncio
+    async def test_index_per_fingerprint_type(self, index):
+        org_id = index.organization_id
+        maccs = OrgFingerprintIndex(org_id, "maccs")
+        load = AsyncMock(side_effect=[index, maccs])
+        try:
+            with patch.object(OrgFingerprintIndex, "load", load):
+                assert await get_org_fingerprint_index(None, org_id) is index
+                assert await get_org_fingerprint_index(None, org_id, fingerprint_type="maccs") is maccs
+            assert load.await_args.args[2] == "maccs"
+        finally:
+            invalidate_org_fingerprint_index(org_id)
+
+    @pytest.mark.asyncio
+    async def test_other_types_sync_from_fingerprint_rows(self):
+        index = OrgFingerprintIndex(uuid.uuid4(), "maccs")
+        fetch = AsyncMock(return_value=ChangeSet(epoch=3, deltas=[]))
+
+        with patch("apps.api.uploads.similarity_index.fetch_fingerprint_changes", fetch):
+            await index.sync(None)
+
+        assert fetch.await_args.args[2:] == (SOURCE_FINGERPRINTS, "maccs")
+        assert fetch.await_args.kwargs == {"organization_id": index.organization_id}
+
+    @pytest.mark.asyncio
+    async def test_cached_index_follows_change_feed(self, index):
+        org_id = index.organization_id
+        new_id = uuid.uuid4()
+        changes = ChangeSet(epoch=7, deltas=[FingerprintDelta(new_id, _fp("CCN"), "ETHYLAMINE")])
+        fetch = AsyncMock(return_value=changes)
+        try:
+            with patch.object(OrgFingerprintIndex, "load", AsyncMock(return_value=index)), patch(
+                "apps.api.uploads.similarity_index.fetch_fingerprint_changes", fetch
+            ):
+                await get_org_fingerprint_index(None, org_id)
+                # Synced moments ago: no poll
+                await get_org_fingerprint_index(None, org_id)
+                assert fetch.await_count == 0
+
+                index.synced_at -= 60
+                assert await get_org_fingerprint_index(None, org_id) is index
+                assert fetch.await_count == 1
+                assert index.epoch == 7
+                assert index.search_batch([_fp("CCN")], 0.99)[0].molecule_id == new_id
+        finally:
+            invalidate_org_fingerprint_index(org_id)
+
+    @pytest.mark.asyncio
+    async def test_inserted_molecules_reach_cached_index(self, index):
+        org_id = index.organization_id
+        try:
+            with patch.object(OrgFingerprintIndex, "load", AsyncMock(return_value=index)):
+                await get_org_fingerprint_index(None, org_id)
+            record_inserted_molecule(org_id, uuid.uuid4(), "TOLUENE", _fp("Cc1ccccc1"))
+            assert len(index) == 4
+        finally:
+            invalidate_org_fingerprint_index(org_id)
+
+        # Without a cached index the insert is simply not recorded
+        record_inserted_molecule(org_id, uuid.uuid4(), "XYLENE", _fp("Cc1ccccc1C"))
+        assert len(index) == 4
+
+
+class TestFindSimilarWithinBatch:
+    def test_only_earlier_rows_are_reported(self):
+        fps = [_fp("CCO"), _fp("c1ccccc1"), _fp("CCO"), None]
+        earlier = find_similar_within_batch(fps, 0.99)
+        assert earlier[0] == []
+        assert earlier[1] == []
+        assert [j for j, _ in earlier[2]] == [0]
+        assert earlier[3] == []
+
+
+class TestCheckDuplicatesBatch:
+    """Tests for UploadProcessor._check_duplicates_batch."""
+
+    @pytest.fixture
+    def processor(self):
+        from apps.api.uploads.tasks import UploadProcessor
+
+        service = MagicMock()
+        service.resolve_molecule_ids = AsyncMock(return_value={})
+        service.add_row_error = AsyncMock()
+        return UploadProcessor(db=MagicMock(), service=service)
+
+    @pytest.fixture
+    def upload(self):
+        return MagicMock(
+            id=uuid.uuid4(),
+            organization_id=uuid.uuid4(),
+            similarity_threshold=Decimal("0.9"),
+            duplicate_action=DuplicateAction.ERROR,
+        )
+
+    def _results(self, smiles_list):
+        from apps.api.uploads.compute import ParsedRow, validate_row
+
+        return [validate_row(ParsedRow(i + 1, smiles, None, None, {})) for i, smiles in enumerate(smiles_list)]
+
+    @pytest.mark.asyncio
+    async def test_classifies_whole_batch_with_single_lookups(self, processor, upload, index):
+        results = self._results(["CCO", "CCCCCCCCCC", "CCCCCCCCCC", "c1ccccc1", "CCN"])
+        assert all(r.fingerprint_morgan for r in results)
+        processor.service.resolve_molecule_ids.return_value = {
+            results[3].inchi_key: uuid.uuid4()
+        }
+
+        with patch(
+            "apps.api.uploads.tasks.get_org_fingerprint_index",
+            AsyncMock(return_value=index),
+        ) as get_index:
+            dup_types = await processor._check_duplicates_batch(upload, results, set())
+
+        # CCO matches the indexed ethanol; the repeated decane is a batch duplicate
+        assert dup_types == ["similar", None, "batch", "exact", None]
+        processor.service.resolve_molecule_ids.assert_awaited_once()
+        get_index.assert_awaited_once()
+        assert processor.service.add_row_error.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_inchi_keys_resolved_once_per_job(self, processor, upload):
+        upload.similarity_threshold = None
+        first = self._results(["CCO", "CCN"])
+        processor.service.resolve_molecule_ids.return_value = {first[0].inchi_key: uuid.uuid4()}
+        assert await processor._check_duplicates_batch(upload, first, set()) == ["exact", None]
+
+        # Both keys are answered from memory in a later batch
+        second = self._results(["CCO", "CCN", "CCC"])
+        processor.service.resolve_molecule_ids.return_value = {}
+        assert await processor._check_duplicates_batch(upload, second, set()) == ["exact", None, None]
+
+        calls = processor.service.resolve_molecule_ids.await_args_list
+        assert len(calls) == 2
+        assert calls[1].args[1] == [second[2].inchi_key]
+
+    @pytest.mark.asyncio
+    async def test_seen_keys_from_earlier_batches(self, processor, upload, index):
+        results = self._results(["CCCCCCCCCC"])
+        with patch(
+            "apps.api.uploads.tasks.get_org_fingerprint_index",
+            AsyncMock(return_value=index),
+        ):
+            dup_types = await processor._check_duplicates_batch(
+                upload, results, {results[0].inchi_key}
+            )
+        assert dup_types == ["batch"]
+
+    @pytest.mark.asyncio
+    async def test_within_batch_similarity_during_insertion(self, processor, upload, index):
+        # Different InChIKeys, near-identical fingerprints
+        upload.similarity_threshold = Decimal("0.5")
+        results = self._results(["CCCCCCCCCCO", "CCCCCCCCCCCO"])
+        with patch(
+            "apps.api.uploads.tasks.get_org_fingerprint_index",
+            AsyncMock(return_value=index),
+        ):
+            validation = await processor._check_duplicates_batch(upload, results, set())
+            insertion = await processor._check_duplicates_batch(
+                upload, results, set(), record_errors=False, match_within_batch=True
+            )
+        assert validation == [None, None]
+        assert insertion == [None, "similar"]
+
+    @pytest.mark.asyncio
+    async def test_no_threshold_skips_similarity(self, processor, upload):
+        upload.similarity_threshold = None
+        results = self._results(["CCO"])
+        with patch("apps.api.uploads.tasks.get_org_fingerprint_index") as get_index:
+            dup_types = await processor._check_duplicates_batch(upload, results, set())
+        assert dup_types == [None]
+        get_index.assert_not_called()
@@ -0,0 +1,171 @@
+"""Tests for streamed upload file reading and incremental parsing."""
+
+import csv
+import io
+from unittest.mock import MagicMock
+
+import pytest
+
+from apps.api.uploads.streaming import (
+    iter_csv_blocks,
+    iter_line_blocks,
+    iter_sdf_blocks,
+)
+from apps.api.uploads.tasks import UploadProcessor
+from db.models.upload import FileType
+
+
+async def _chunks(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+async def _collect(blocks):
+    return [block async for block in blocks]
+
+
+CSV_CONTENT = (
+    b'smiles,name,notes\r\n'
+    b'CCO,ethanol,"multi\r\nline, with comma"\r\n'
+    b'c1ccccc1,benzene,"say ""hi"""\r\n'
+    b'\r\n'
+    b'CC(=O)O,acetic acid\r\n'
+    b'CCN,ethylamine,x,extra\r\n'
+)
+
+SDF_RECORD = """{name}
+     RDKit          2D
+
+  2  1  0  0  0  0  0  0  0  0999 V2000
+    0.0000    0.0000    0.0000 C   0  0  0  0  0  0  0  0  0  0  0  0
+    1.2990    0.7500    0.0000 O   0  0  0  0  0  0  0  0  0  0  0  0
+  1  2  1  0
+M  END
+>  <CAS>
+{cas}
+
+$$$$
+"""
+
+SDF_CONTENT = (
+    SDF_RECORD.format(name="mol-1", cas="64-17-5")
+    + SDF_RECORD.format(name="bad-valence", cas="x-2").replace("  1  2  1  0", "  1  2  3  0")
+    + SDF_RECORD.format(name="mol-3", cas="x-3").replace("$$$$\n", "")
+).encode()
+
+
+class TestLineBlocks:
+    """Tests for incremental line decoding."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("size", [1, 2, 3, 7, 1024])
+    async def test_lines_survive_any_chunking(self, size):
+        data = "CCO\tethanol\nµ-ü\r\n\nlast".encode()
+        blocks = await _collect(iter_line_blocks(_chunks(data, size)))
+        assert all(blocks)
+        assert [line for block in blocks for line in block] == ["CCO\tethanol\n", "µ-ü\r\n", "\n", "last"]
+
+    @pytest.mark.asyncio
+    async def test_invalid_utf8_raises(self):
+        with pytest.raises(UnicodeDecodeError):
+            await _collect(iter_line_blocks(_chunks(b"CCO\n\xff\n", 2)))
+
+
+class TestCsvBlocks:
+    """Tests for splitting CSV streams on record boundaries."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("size", [1, 5, 16, 4096])
+    async def test_blocks_parse_like_whole_file(self, size):
+        expected = list(csv.reader(io.StringIO(CSV_CONTENT.decode(), newline="")))
+        blocks = await _collect(iter_csv_blocks(_chunks(CSV_CONTENT, size)))
+        assert [row for block in blocks for row in csv.reader(block)] == expected
+
+
+class TestSdfBlocks:
+    """Tests for splitting SDF streams into complete records."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("size", [1, 13, 4096])
+    async def test_blocks_hold_complete_records(self, size):
+        blocks = await _collect(iter_sdf_blocks(_chunks(SDF_CONTENT, size)))
+        assert "".join(blocks) == SDF_CONTENT.decode()
+        assert all(block.rstrip().endswith("$$$$") for block in blocks[:-1])
+
+    @pytest.mark.asyncio
+    async def test_blank_tail_is_dropped(self):
+        data = SDF_RECORD.format(name="a", cas="1").encode() + b"\n\n"
+        blocks = await _collect(iter_sdf_blocks(_chunks(data, 8)))
+        assert "".join(blocks) == SDF_RECORD.format(name="a", cas="1")
+
+
+class TestStreamingParsers:
+    """Tests for UploadProcessor parsing from a chunk stream."""
+
+    async def _parse(self, file_type, data, chunk_size, column_mapping=None):
+        service = MagicMock()
+        service.iter_upload_file_chunks = MagicMock(side_effect=lambda upload: _chunks(data, chunk_size))
+        processor = UploadProcessor(db=MagicMock(), service=service)
+        processor.PARSE_BATCH_SIZE = 2
+        upload = MagicMock(file_type=file_type, column_mapping=column_mapping)
+        return [row async for batch in processor._parse_file(upload) for row in batch]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("size", [3, 4096])
+    async def test_csv(self, size):
+        rows = await self._parse(FileType.CSV, CSV_CONTENT, size, {"smiles": "smiles", "name": "name"})
+
+        assert [r.row_number for r in rows] == [2, 3, 4, 5]
+        assert [r.smiles for r in rows] == ["CCO", "c1ccccc1", "CC(=O)O", "CCN"]
+        assert rows[0].raw_data["notes"] == "multi\r\nline, with comma"
+        assert rows[1].raw_data["notes"] == 'say "hi"'
+        assert rows[2].raw_data["notes"] is None
+        assert rows[3].raw_data[None] == ["extra"]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("size", [3, 4096])
+    async def test_smiles_list(self, size):
+        data = b"# header\nCCO\tethanol\r\n\nc1ccccc1 benzene ring\nCCN"
+        rows = await self._parse(FileType.SMILES_LIST, data, size)
+
+        assert [(r.row_number, r.smiles, r.name) for r in rows] == [
+            (2, "CCO", "ethanol"),
+            (4, "c1ccccc1", "benzene ring"),
+            (5, "CCN", None),
+        ]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("size", [13, 4096])
+    async def test_sdf(self, size):
+        pytest.importorskip("rdkit")
+        rows = await self._parse(FileType.SDF, SDF_CONTENT, size)
+
+        assert [r.row_number for r in rows] == [1, 2, 3]
+        assert [r.smiles for r in rows] == ["CO", "", "CO"]
+        assert [r.name for r in rows] == ["mol-1", None, "mol-3"]
+        assert rows[0].external_id == "64-17-5"
+
+
+class TestLocalStorageStreaming:
+    """Tests for LocalFileStorage.iter_chunks."""
+
+    @pytest.mark.asyncio
+    async def test_iter_chunks(self, tmp_path):
+        from packages.shared.storage import LocalFileStorage
+
+        storage = LocalFileStorage(base_path=str(tmp_path))
+        content = bytes(range(256)) * 40
+        stored = await storage.save(io.BytesIO(content), "data.bin", "application/octet-stream")
+
+        chunks = [chunk async for chunk in storage.iter_chunks(stored.storage_path, chunk_size=1000)]
+
+        assert b"".join(chunks) == content
+        assert max(len(chunk) for chunk in chunks) == 1000
+
+    @pytest.mark.asyncio
+    async def test_missing_file_raises(self, tmp_path):
+        from packages.shared.storage import LocalFileStorage
+
+        storage = LocalFileStorage(base_path=str(tmp_path))
+        with pytest.raises(FileNotFoundError):
+            await _collect(storage.iter_chunks("nonexistent/path.txt"))